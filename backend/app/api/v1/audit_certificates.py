@@ -316,40 +316,49 @@ async def multi_upload_audit_certificates(
             raise HTTPException(status_code=500, detail="AI configuration not found")
         
         # Process each file
+        from app.utils.upload_ingest import ingest_upload, IMAGE_OR_PDF_TYPES
+        first_rejection = None
+        rejected_count = 0
         for file in files:
             try:
-                # Read file
-                file_content = await file.read()
-                
-                # Validate size (50MB max)
-                if len(file_content) > 50 * 1024 * 1024:
+                # Validate file type (PDF, JPG, PNG)
+                supported_extensions = ['pdf', 'jpg', 'jpeg', 'png']
+                file_ext = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
+                if file_ext not in supported_extensions:
                     summary["errors"] += 1
                     summary["error_files"].append({
                         "filename": file.filename,
-                        "error": "File size exceeds 50MB limit"
+                        "error": "Unsupported file type"
                     })
                     results.append({
                         "filename": file.filename,
                         "status": "error",
-                        "message": "File size exceeds 50MB limit"
+                        "message": "Unsupported file type. Supported: PDF, JPG, PNG"
                     })
                     continue
                 
-                # Validate file type (PDF, JPG, PNG)
-                supported_extensions = ['pdf', 'jpg', 'jpeg', 'png']
-                file_ext = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
-                if file_ext not in supported_extensions:
+                # Stream the file once (50MB limit enforced before / while reading)
+                try:
+                    upload = await ingest_upload(file, max_bytes=50 * 1024 * 1024, allowed_types=IMAGE_OR_PDF_TYPES)
+                except HTTPException as e:
+                    # Reject this file only (413 too large / 415 not an image or PDF)
+                    first_rejection = first_rejection or e
+                    rejected_count += 1
+                    message = "File size exceeds 50MB limit" if e.status_code == 413 else e.detail
+                    logger.warning(f"⚠️ {file.filename}: rejected - {message}")
                     summary["errors"] += 1
                     summary["error_files"].append({
                         "filename": file.filename,
-                        "error": "Unsupported file type"
+                        "error": message
                     })
                     results.append({
                         "filename": file.filename,
                         "status": "error",
-                        "message": "Unsupported file type. Supported: PDF, JPG, PNG"
+                        "message": message
                     })
                     continue
+                with upload:
+                    file_content = upload.read_bytes()
                 
                 # Convert to base64
                 file_base64 = base64.b64encode(file_content).decode('utf-8')
@@ -515,6 +524,10 @@ async def multi_upload_audit_certificates(
                 }
                 
                 # Create in database
+                from app.utils.survey_window import AUDIT_CERTIFICATE, survey_window_fields
+                cert_data.update(survey_window_fields(
+                    cert_data.get("next_survey_display"), cert_data.get("next_survey"), AUDIT_CERTIFICATE
+                ))
                 await mongo_db.create("audit_certificates", cert_data)
                 
                 # Log audit
@@ -566,6 +579,10 @@ async def multi_upload_audit_certificates(
                     "message": str(file_error)
                 })
         
+        if rejected_count == len(files) and first_rejection is not None:
+            # Every file rejected by size / type: fail the request with that status
+            raise first_rejection
+        
         logger.info(f"🎉 Multi-upload complete: {summary['successfully_created']} success, {summary['errors']} errors")
         
         return {
@@ -713,6 +730,10 @@ async def create_audit_certificate_with_file_override(
         
         logger.info(f"💾 Creating DB record with file_id={file_id}")
         
+        from app.utils.survey_window import AUDIT_CERTIFICATE, survey_window_fields
+        cert_record.update(survey_window_fields(
+            cert_record.get("next_survey_display"), cert_record.get("next_survey"), AUDIT_CERTIFICATE
+        ))
         await mongo_db.create("audit_certificates", cert_record)
         
         # Log audit
@@ -1,6 +1,7 @@
 import logging
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, BackgroundTasks, Response
+from fastapi.responses import StreamingResponse
 
 from app.models.certificate import (
     CertificateCreate, 
@@ -25,13 +26,33 @@ def check_editor_permission(current_user: UserResponse = Depends(get_current_use
 
 @router.get("", response_model=List[CertificateResponse])
 async def get_certificates(
+    response: Response,
     ship_id: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size (enables cursor pagination)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value of the previous page"),
+    stream: bool = Query(False, description="Stream the full list as a JSON array"),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Get certificates, optionally filtered by ship_id
+    
+    - Without limit: full list (as before)
+    - With limit: one page; the cursor of the next page is returned in the X-Next-Cursor header
+    - stream=true: full list streamed from a Mongo cursor
     """
     try:
+        if stream:
+            body = await CertificateService.stream_certificates(ship_id, current_user)
+            return StreamingResponse(body, media_type="application/json")
+        
+        if limit:
+            certificates, next_cursor = await CertificateService.get_certificates_page(
+                ship_id, current_user, limit, cursor
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return certificates
+        
         return await CertificateService.get_certificates(ship_id, current_user)
     except HTTPException:
         raise
@@ -39,6 +60,13 @@ async def get_certificates(
         logger.error(f"❌ Error fetching certificates: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch certificates")
 
+UPCOMING_SURVEY_PROJECTION = {
+    "_id": 0, "id": 1, "ship_id": 1, "cert_name": 1, "cert_abbreviation": 1, "abbreviation": 1,
+    "cert_type": 1, "cert_no": 1, "next_survey": 1, "next_survey_display": 1, "next_survey_type": 1,
+    "last_endorse": 1, "status": 1,
+    "survey_due_date": 1, "survey_window_open": 1, "survey_window_close": 1
+}
+
 @router.get("/upcoming-surveys")
 async def get_upcoming_surveys(
     current_user: UserResponse = Depends(get_current_user)
@@ -49,8 +77,7 @@ async def get_upcoming_surveys(
     """
     from datetime import datetime, timedelta
     from app.db.mongodb import mongo_db
-    from dateutil.relativedelta import relativedelta
-    import re
+    from app.utils.survey_window import SHIP_CERTIFICATE, backfill_survey_windows
     
     try:
         user_company = current_user.company
@@ -96,120 +123,86 @@ async def get_upcoming_surveys(
                 "check_date": datetime.now().date().isoformat()
             }
         
-        # Get all certificates from these ships
-        all_certificates = await mongo_db.database.certificates.find(
-            {"ship_id": {"$in": ship_ids}}
-        ).to_list(length=10000)
-        
-        logger.info(f"📄 Found {len(all_certificates)} total certificates to check")
+        # Certificates whose survey window contains today (materialized window fields, see
+        # app.utils.survey_window); certificates written before the fields existed are backfilled first
+        await backfill_survey_windows("certificates", {"ship_id": {"$in": ship_ids}}, SHIP_CERTIFICATE)
         
         current_date = datetime.now().date()
+        today = datetime.combine(current_date, datetime.min.time())
+        certificates_in_window = await mongo_db.database.certificates.find(
+            {
+                "ship_id": {"$in": ship_ids},
+                "survey_window_close": {"$gte": today},
+                "survey_window_open": {"$lte": today}
+            },
+            UPCOMING_SURVEY_PROJECTION
+        ).sort("survey_due_date", 1).to_list(length=None)
+        
+        logger.info(f"📄 Found {len(certificates_in_window)} certificates within their survey window")
+        
+        ships_by_id = {ship.get('id'): ship for ship in ships}
         upcoming_surveys = []
         
-        for cert in all_certificates:
-            try:
-                # Get Next Survey Display field
-                next_survey_display = cert.get('next_survey_display') or cert.get('next_survey')
-                
-                if not next_survey_display:
-                    continue
-                
-                # Parse date (dd/mm/yyyy format or ISO)
-                next_survey_str = str(next_survey_display)
-                date_match = re.search(r'(\d{2}/\d{2}/\d{4})', next_survey_str)
-                
-                if not date_match:
-                    # Try ISO format
-                    date_match_alt = re.search(r'(\d{4}-\d{2}-\d{2})', next_survey_str)
-                    if date_match_alt:
-                        date_str = date_match_alt.group(1)
-                        next_survey_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    else:
-                        continue
-                else:
-                    date_str = date_match.group(1)
-                    next_survey_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                
-                # Determine window based on annotation
-                if '(±3M)' in next_survey_str or '(+3M)' in next_survey_str or '(+-3M)' in next_survey_str:
-                    # Window: Next Survey ± 3M
-                    window_open = next_survey_date - relativedelta(months=3)
-                    window_close = next_survey_date + relativedelta(months=3)
-                elif '(-3M)' in next_survey_str:
-                    # Window: Next Survey - 3M → Next Survey (only before)
-                    window_open = next_survey_date - relativedelta(months=3)
-                    window_close = next_survey_date
-                else:
-                    # No annotation found - DEFAULT to (-3M) for safety (backend-v1 logic)
-                    window_open = next_survey_date - relativedelta(months=3)
-                    window_close = next_survey_date
-                    logger.debug(f"Certificate {cert.get('id')} has no annotation - using default (-3M) window")
-                
-                # Check if current date is WITHIN window (backend-v1 logic)
-                if not (window_open <= current_date <= window_close):
-                    continue  # Not within window yet
-                
-                # Calculate status
-                days_until_window_close = (window_close - current_date).days
-                days_until_survey = (next_survey_date - current_date).days
-                
-                # Status logic (unified with backend-v1)
-                is_overdue = current_date > window_close
-                is_critical = 0 <= days_until_window_close <= 30
-                
-                # Due Soon: within window but > 30 days to close
-                window_close_minus_30_date = window_close - timedelta(days=30)
-                is_due_soon = window_open < current_date < window_close_minus_30_date
-                
-                # Determine primary status
-                if is_overdue:
-                    status = "overdue"
-                elif is_critical:
-                    status = "critical"
-                elif is_due_soon:
-                    status = "due_soon"
-                else:
-                    status = "within_window"
-                
-                # Get ship info
-                ship = next((s for s in ships if s.get('id') == cert.get('ship_id')), None)
-                
-                # Get cert abbreviation
-                cert_abbreviation = cert.get('cert_abbreviation') or cert.get('abbreviation', '')
-                cert_name_display = f"{cert.get('cert_name', '')} ({cert_abbreviation})" if cert_abbreviation else cert.get('cert_name', '')
-                
-                upcoming_surveys.append({
-                    "certificate_id": cert.get("id"),
-                    "ship_id": cert.get("ship_id"),
-                    "ship_name": ship.get("name") if ship else "Unknown",
-                    "cert_name": cert.get("cert_name"),
-                    "cert_abbreviation": cert_abbreviation,
-                    "cert_name_display": cert_name_display,
-                    "cert_type": cert.get("cert_type"),
-                    "cert_no": cert.get("cert_no"),
-                    "next_survey": next_survey_str,
-                    "next_survey_date": next_survey_date.isoformat(),
-                    "next_survey_type": cert.get("next_survey_type"),
-                    "last_endorse": cert.get("last_endorse"),
-                    "status": cert.get("status"),
-                    "survey_status": status,
-                    "days_until_survey": days_until_survey,
-                    "days_until_window_close": days_until_window_close,
-                    "is_overdue": is_overdue,
-                    "is_due_soon": is_due_soon,
-                    "is_critical": is_critical,
-                    "is_within_window": True,
-                    "window_open": window_open.isoformat(),
-                    "window_close": window_close.isoformat(),
-                    "window_type": "±3M" if '(±3M)' in next_survey_str else "-3M"
-                })
-                
-            except Exception as e:
-                logger.warning(f"Error processing certificate {cert.get('id')}: {e}")
-                continue
-        
-        # Sort by next_survey_date (soonest first) - backend-v1 logic
-        upcoming_surveys.sort(key=lambda x: x.get("next_survey_date") or "9999-12-31")
+        for cert in certificates_in_window:
+            next_survey_str = str(cert.get('next_survey_display') or cert.get('next_survey'))
+            next_survey_date = cert['survey_due_date'].date()
+            window_open = cert['survey_window_open'].date()
+            window_close = cert['survey_window_close'].date()
+            
+            # Calculate status
+            days_until_window_close = (window_close - current_date).days
+            days_until_survey = (next_survey_date - current_date).days
+            
+            # Status logic (unified with backend-v1)
+            is_overdue = current_date > window_close
+            is_critical = 0 <= days_until_window_close <= 30
+            
+            # Due Soon: within window but > 30 days to close
+            window_close_minus_30_date = window_close - timedelta(days=30)
+            is_due_soon = window_open < current_date < window_close_minus_30_date
+            
+            # Determine primary status
+            if is_overdue:
+                status = "overdue"
+            elif is_critical:
+                status = "critical"
+            elif is_due_soon:
+                status = "due_soon"
+            else:
+                status = "within_window"
+            
+            # Get ship info
+            ship = ships_by_id.get(cert.get('ship_id'))
+            
+            # Get cert abbreviation
+            cert_abbreviation = cert.get('cert_abbreviation') or cert.get('abbreviation', '')
+            cert_name_display = f"{cert.get('cert_name', '')} ({cert_abbreviation})" if cert_abbreviation else cert.get('cert_name', '')
+            
+            upcoming_surveys.append({
+                "certificate_id": cert.get("id"),
+                "ship_id": cert.get("ship_id"),
+                "ship_name": ship.get("name") if ship else "Unknown",
+                "cert_name": cert.get("cert_name"),
+                "cert_abbreviation": cert_abbreviation,
+                "cert_name_display": cert_name_display,
+                "cert_type": cert.get("cert_type"),
+                "cert_no": cert.get("cert_no"),
+                "next_survey": next_survey_str,
+                "next_survey_date": next_survey_date.isoformat(),
+                "next_survey_type": cert.get("next_survey_type"),
+                "last_endorse": cert.get("last_endorse"),
+                "status": cert.get("status"),
+                "survey_status": status,
+                "days_until_survey": days_until_survey,
+                "days_until_window_close": days_until_window_close,
+                "is_overdue": is_overdue,
+                "is_due_soon": is_due_soon,
+                "is_critical": is_critical,
+                "is_within_window": True,
+                "window_open": window_open.isoformat(),
+                "window_close": window_close.isoformat(),
+                "window_type": "±3M" if '(±3M)' in next_survey_str else "-3M"
+            })
         
         logger.info(f"✅ Found {len(upcoming_surveys)} certificates with upcoming surveys")
         
@@ -6,6 +6,8 @@ from app.models.company import CompanyCreate, CompanyUpdate, CompanyResponse
 from app.models.user import UserResponse, UserRole
 from app.services.company_service import CompanyService
 from app.core.security import get_current_user
+from app.utils.http_client import http_session
+from app.utils.drive_folder_cache import DriveFolderCache
 
 logger = logging.getLogger(__name__)
 from app.core import messages
@@ -175,8 +177,11 @@ async def delete_ship_folder_from_gdrive(
         
         logger.info(f"🗑️ Deleting ship folder '{ship_name}' from Google Drive for company {company_id}")
         
+        # Cached folder IDs under the ship folder become invalid
+        await DriveFolderCache.invalidate_path(company_id, main_folder_id, [ship_name])
+        
         # Make request to Apps Script
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(
                 apps_script_url,
                 json=payload,
@@ -282,7 +287,8 @@ async def configure_company_gdrive(
     """
     try:
         from app.db.mongodb import mongo_db
-        import requests
+        import asyncio
+        import aiohttp
         from datetime import datetime, timezone
         
         # Check if company exists
@@ -303,11 +309,16 @@ async def configure_company_gdrive(
         }
         
         try:
-            response = requests.post(web_app_url, json=test_payload, timeout=30)
+            async with http_session() as session:
+                async with session.post(
+                    web_app_url,
+                    json=test_payload,
+                    timeout=aiohttp.ClientTimeout(total=30)
+                ) as response:
+                    status_code = response.status
+                    result = await response.json(content_type=None) if status_code == 200 else None
             
-            if response.status_code == 200:
-                result = response.json()
-                
+            if status_code == 200:
                 if result.get("success"):
                     # Save configuration to database
                     config_update = {
@@ -343,9 +354,9 @@ async def configure_company_gdrive(
             else:
                 raise HTTPException(status_code=400, detail="Failed to connect to Apps Script")
                 
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             raise HTTPException(status_code=504, detail="Apps Script request timeout")
-        except requests.RequestException as e:
+        except aiohttp.ClientError as e:
             raise HTTPException(status_code=400, detail=f"Connection error: {str(e)}")
             
     except HTTPException:
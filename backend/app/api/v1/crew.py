@@ -537,22 +537,19 @@ async def analyze_passport_file(
         ship_name: Ship name for the crew (optional, used for logging)
         current_user: Authenticated user
     """
+    upload = None
     try:
         # Validate file type
         if not passport_file.content_type or not passport_file.content_type.startswith("image/"):
             if passport_file.content_type != "application/pdf":
                 raise HTTPException(status_code=400, detail="Only image or PDF files are allowed")
         
-        # Validate file size (10MB limit)
-        if passport_file.size and passport_file.size > 10 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="File too large. Maximum size is 10MB")
+        # Stream the upload once (10MB limit enforced before / while reading); analyzed in place
+        from app.utils.upload_ingest import ingest_upload, IMAGE_OR_PDF_TYPES
+        upload = await ingest_upload(passport_file, max_bytes=10 * 1024 * 1024, allowed_types=IMAGE_OR_PDF_TYPES)
+        file_content = upload.view()
         
-        # Read file content
-        file_content = await passport_file.read()
-        if not file_content:
-            raise HTTPException(status_code=400, detail="Empty file received")
-        
-        logger.info(f"📄 Analyzing passport file: {passport_file.filename} ({len(file_content)} bytes)")
+        logger.info(f"📄 Analyzing passport file: {passport_file.filename} ({upload.size} bytes)")
         
         # ✅ USE GOOGLE DOCUMENT AI via Apps Script (same as V1)
         logger.info("🤖 Using Google Document AI for passport analysis...")
@@ -841,6 +838,9 @@ Return ONLY the JSON output with extracted fields. Do not include any explanatio
     except Exception as e:
         logger.error(f"❌ Passport analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to analyze passport: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.close()
 
 
 # ============================================================================
@@ -1134,6 +1134,37 @@ async def auto_rename_crew_passport(
         )
 
 
+@router.get("/file-move-tasks/{task_id}")
+async def get_crew_file_move_task(
+    task_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Get progress of the background Drive file move started by sign on / sign off / transfer
+    
+    Poll with the file_move_task_id returned by those endpoints. Each file has a
+    status: pending, moved or failed (with error).
+    """
+    from app.services.crew_file_movement_service import CrewFileMoveTaskService
+    
+    try:
+        task = await CrewFileMoveTaskService.get_task(task_id)
+        
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        
+        if current_user.role != UserRole.SYSTEM_ADMIN and task.get('company_id') != current_user.company:
+            raise HTTPException(status_code=403, detail=messages.ACCESS_DENIED)
+        
+        return task
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error getting file move task: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get task status: {str(e)}")
+
+
 @router.get("/{crew_id}/assignment-history")
 async def get_crew_assignment_history(
     crew_id: str,
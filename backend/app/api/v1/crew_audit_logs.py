@@ -32,9 +32,10 @@ async def get_audit_logs(
     performed_by: Optional[str] = Query(None, description="Filter by username"),
     ship_name: Optional[str] = Query(None, description="Filter by ship name"),
     entity_id: Optional[str] = Query(None, description="Filter by entity ID"),
-    search: Optional[str] = Query(None, description="Search entity name"),
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    search: Optional[str] = Query(None, description="Search entity name (word prefixes, accent insensitive)"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored when cursor is given)"),
     limit: int = Query(20, ge=1, le=100, description="Max records to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     current_user: dict = Depends(get_current_user),
     repository: CrewAuditLogRepository = Depends(get_audit_log_repository)
 ):
@@ -42,6 +43,7 @@ async def get_audit_logs(
     Get filtered system audit logs with pagination
     
     Supports all entity types: crew, certificate, ship, company, user, document
+    Page with ``cursor`` (the previous response's next_cursor) rather than skip.
     - Admin: can only view logs of their own company
     - Super Admin/System Admin: can view all logs
     """
@@ -60,26 +62,31 @@ async def get_audit_logs(
     end_date_parsed = datetime.fromisoformat(end_date.replace('Z', '+00:00')) if end_date else None
     
     # Get logs
-    logs, total = await repository.get_logs(
-        company_id=company_id,
-        entity_type=entity_type,
-        start_date=start_date_parsed,
-        end_date=end_date_parsed,
-        action=action,
-        performed_by=performed_by,
-        ship_name=ship_name,
-        entity_id=entity_id,
-        search=search,
-        skip=skip,
-        limit=limit
-    )
+    try:
+        logs, total, next_cursor = await repository.get_logs(
+            company_id=company_id,
+            entity_type=entity_type,
+            start_date=start_date_parsed,
+            end_date=end_date_parsed,
+            action=action,
+            performed_by=performed_by,
+            ship_name=ship_name,
+            entity_id=entity_id,
+            search=search,
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         'logs': logs,
         'total': total,
         'skip': skip,
         'limit': limit,
-        'has_more': (skip + len(logs)) < total
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor
     }
 
 
@@ -503,58 +503,26 @@ async def recalculate_all_crew_certificate_status(
                         If not provided, recalculates all certificates for company.
     """
     try:
-        from app.repositories.crew_certificate_repository import CrewCertificateRepository
-        from datetime import datetime, timezone
+        from app.services.certificate_recalculation_service import CertificateRecalculationService
         
-        # Get certificates to process
+        # Certificates to process: the specified ones or all of the company's
+        query = {"company_id": current_user.company}
         if certificate_ids and len(certificate_ids) > 0:
-            # Only process specified certificates
-            all_certs = []
-            for cert_id in certificate_ids:
-                cert = await CrewCertificateRepository.find_by_id(cert_id)
-                if cert and cert.get('company_id') == current_user.company:
-                    all_certs.append(cert)
-            logger.info(f"📋 Recalculating {len(all_certs)} specified certificates")
-        else:
-            # Process all certificates for company
-            all_certs = await CrewCertificateRepository.find_all({"company_id": current_user.company})
-            logger.info(f"📋 Recalculating all {len(all_certs)} certificates for company")
-        
-        updated_count = 0
-        no_expiry_count = 0
-        
-        for cert in all_certs:
-            cert_expiry = cert.get('cert_expiry')
-            
-            if cert_expiry:
-                # Calculate new status
-                new_status = CrewCertificateService._calculate_certificate_status(cert_expiry)
-                old_status = cert.get('status', 'Unknown')
-                
-                # Update if different
-                if new_status != old_status:
-                    await CrewCertificateRepository.update(
-                        cert['id'],
-                        {'status': new_status}
-                    )
-                    updated_count += 1
-                    logger.info(f"✅ Updated cert {cert['id']}: {old_status} → {new_status}")
-            else:
-                # No expiry date - set to Unknown
-                old_status = cert.get('status')
-                if old_status != 'Unknown':
-                    await CrewCertificateRepository.update(
-                        cert['id'],
-                        {'status': 'Unknown'}
-                    )
-                    no_expiry_count += 1
-                    logger.info(f"⚠️ No expiry date for cert {cert['id']}: {old_status} → Unknown")
+            query["id"] = {"$in": certificate_ids}
+        
+        # Streamed, changed certificates written in bulk (grouped by new status)
+        result = await CertificateRecalculationService.recalculate_crew_certificate_status(query)
+        updated_count = result["updated_count"]
+        logger.info(
+            f"📋 Recalculated {result['total_certificates']} certificates: "
+            f"{updated_count} status changes, {result['no_expiry_count']} without expiry reset to Unknown"
+        )
         
         return {
             "success": True,
-            "total_certificates": len(all_certs),
+            "total_certificates": result["total_certificates"],
             "updated_count": updated_count,
-            "no_expiry_count": no_expiry_count,
+            "no_expiry_count": result["no_expiry_count"],
             "message": f"Recalculated status for {updated_count} certificates"
         }
         
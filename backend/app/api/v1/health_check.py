@@ -10,7 +10,8 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.models.user import UserResponse
+from app.models.user import UserResponse, UserRole
+from app.core import messages
 from app.core.security import get_current_user
 from app.repositories.gdrive_config_repository import GDriveConfigRepository
 from app.repositories.ai_config_repository import AIConfigRepository
@@ -98,6 +99,21 @@ async def check_connectivity(
     return results
 
 
+@router.get("/http-pool")
+async def http_pool_metrics(
+    current_user: UserResponse = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Usage of the shared outbound HTTP connection pool (System Admin only)
+    (requests, in-flight, new vs reused connections, DNS cache hits).
+    """
+    if current_user.role != UserRole.SYSTEM_ADMIN:
+        raise HTTPException(status_code=403, detail=messages.SYSTEM_ADMIN_ONLY)
+    
+    from app.utils.http_client import get_http_metrics
+    return get_http_metrics()
+
+
 @router.get("/ping-apps-script")
 async def ping_apps_script(
     current_user: UserResponse = Depends(get_current_user)
@@ -361,7 +361,7 @@ async def add_file_to_task(
     Frontend sends all files first, then calls /start-processing.
     """
     from app.services.background_upload_service import BackgroundUploadTaskService
-    import base64
+    from app.services.upload_spool_service import UploadSpoolService
     
     try:
         # Get task and verify
@@ -379,7 +379,7 @@ async def add_file_to_task(
         if task.get("status") == "pending":
             await BackgroundUploadTaskService.update_task(task_id, {"status": "receiving"})
         
-        # Read file content and store as base64 (for MongoDB storage)
+        # Read file content (spooled to GridFS below; the task only keeps a reference)
         file_content = await file.read()
         filename = file.filename.split('/')[-1] if '/' in file.filename else file.filename
         
@@ -394,9 +394,10 @@ async def add_file_to_task(
             content_type = file.content_type or 'application/octet-stream'
         
         # Store file data
+        spool_ref = await UploadSpoolService.put(file_content, filename, content_type)
         file_data = {
             "filename": filename,
-            "content_base64": base64.b64encode(file_content).decode('utf-8'),
+            "spool_ref": spool_ref,
             "content_type": content_type,
             "size": len(file_content)
         }
@@ -433,9 +434,9 @@ async def start_task_processing(
 ):
     """
     V3: Start background processing after all files are received.
-    Backend will upload files to GDrive using asyncio.create_task().
+    Backend will upload files to GDrive in a durable background job.
     """
-    from app.services.background_upload_service import BackgroundUploadTaskService, BackgroundUploadService
+    from app.services.background_upload_service import BackgroundUploadTaskService
     
     try:
         # Get task and verify
@@ -463,13 +464,12 @@ async def start_task_processing(
             "total_files": received  # Update to actual received count
         })
         
-        # Start background processing (like Auto Rename)
-        import asyncio
-        asyncio.create_task(
-            BackgroundUploadService.process_pending_files_background(
-                task_id=task_id,
-                current_user=current_user
-            )
+        # Start background processing as a durable job (survives instance restarts)
+        from app.services.job_queue_service import JobQueueService, JOB_BACKGROUND_UPLOAD_PROCESS
+        await JobQueueService.enqueue(
+            JOB_BACKGROUND_UPLOAD_PROCESS,
+            {"task_id": task_id, "user_id": current_user.id, "company_id": current_user.company},
+            idempotency_key=f"{JOB_BACKGROUND_UPLOAD_PROCESS}:{task_id}"
         )
         
         return {
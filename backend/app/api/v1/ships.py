@@ -10,6 +10,8 @@ from app.core.security import get_current_user
 from app.utils.gdrive_folder_helper import create_google_drive_folder_background
 from app.utils.ship_calculations import calculate_audit_certificate_next_survey, parse_date, calculate_next_docking_enhanced
 from app.db.mongodb import mongo_db
+from app.utils.http_client import http_session
+from app.utils.drive_folder_cache import DriveFolderCache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -173,6 +175,9 @@ async def delete_ship(
                             "message": "Incomplete Google Drive configuration"
                         }
                     else:
+                        # Cached folder IDs under the ship folder become invalid
+                        await DriveFolderCache.invalidate_path(company_id, folder_id, [ship_name])
+                        
                         # Call Apps Script to delete folder
                         payload = {
                             "action": "delete_complete_ship_structure",
@@ -181,7 +186,7 @@ async def delete_ship(
                             "permanent_delete": False  # Move to trash by default for safety
                         }
                         
-                        async with aiohttp.ClientSession() as session:
+                        async with http_session() as session:
                             async with session.post(
                                 web_app_url,
                                 json=payload,
@@ -222,6 +227,35 @@ async def delete_ship(
         raise HTTPException(status_code=500, detail="Failed to delete ship")
 
 
+@router.post("/recalculate-certificates")
+async def start_certificate_recalculation(
+    current_user: UserResponse = Depends(check_editor_permission)
+):
+    """
+    Recalculate Next Survey of all ship certificates and the status of all crew
+    certificates of the user's company (whole fleet for System Admin) in the
+    background (Admin+ role required). Poll the returned task_id for progress.
+    """
+    from app.services.certificate_recalculation_service import CertificateRecalculationService
+    
+    if current_user.role not in [UserRole.ADMIN, UserRole.SUPER_ADMIN, UserRole.SYSTEM_ADMIN]:
+        raise HTTPException(status_code=403, detail="Admin permission required")
+    
+    company_id = None if current_user.role == UserRole.SYSTEM_ADMIN else current_user.company
+    return await CertificateRecalculationService.start_recalculation(company_id, current_user.username)
+
+
+@router.get("/recalculate-certificates/{task_id}")
+async def get_certificate_recalculation_status(
+    task_id: str,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Progress of a certificate recalculation run"""
+    from app.services.certificate_recalculation_service import CertificateRecalculationService
+    
+    return await CertificateRecalculationService.get_task_status(task_id, current_user)
+
+
 @router.post("/{ship_id}/update-next-survey")
 async def update_ship_next_survey(
     ship_id: str,
@@ -232,18 +266,18 @@ async def update_ship_next_survey(
     based on IMO regulations and 5-year survey cycle
     Migrated from backend-v1
     """
-    from app.utils.ship_calculations import calculate_next_survey_info
+    from app.services.certificate_recalculation_service import CertificateRecalculationService, SHIP_PROJECTION
     from app.db.mongodb import mongo_db
     
     try:
         # Get ship data
-        ship_data = await mongo_db.database.ships.find_one({"id": ship_id})
+        ship_data = await mongo_db.database.ships.find_one({"id": ship_id}, SHIP_PROJECTION)
         if not ship_data:
             raise HTTPException(status_code=404, detail="Ship not found")
         
-        # Get all certificates for the ship
-        certificates = await mongo_db.database.certificates.find({"ship_id": ship_id}).to_list(length=1000)
-        if not certificates:
+        # Stream the ship's certificates, write only the changed ones in bulk
+        result = await CertificateRecalculationService.recalculate_ship_next_surveys(ship_data)
+        if not result["total_certificates"]:
             return {
                 "success": True,
                 "message": "No certificates found for this ship",
@@ -251,78 +285,7 @@ async def update_ship_next_survey(
                 "results": []
             }
         
-        updated_count = 0
-        results = []
-        
-        for cert in certificates:
-            # Skip certificates that are excluded from auto-update
-            if cert.get('exclude_from_auto_update', False):
-                logger.info(f"⏭️ Skipping certificate {cert.get('id')} - excluded from auto-update")
-                continue
-            
-            # Calculate next survey info (handles all certificate types including renewal-only)
-            # Note: Interim certificates ARE processed - they have Next Survey Type = "FT Issue"
-            survey_info = calculate_next_survey_info(cert, ship_data)
-            
-            # Prepare update data
-            update_data = {}
-            
-            # ⭐ RULE: When next_survey is "-" or None, next_survey_type must also be "-" or None
-            next_survey_value = survey_info['next_survey']
-            next_survey_type_value = survey_info['next_survey_type']
-            
-            # If next_survey is "-" or empty, force next_survey_type to also be "-"
-            if not next_survey_value or next_survey_value == '-':
-                update_data['next_survey'] = None
-                update_data['next_survey_display'] = '-' if next_survey_value == '-' else None
-                update_data['next_survey_type'] = '-' if next_survey_value == '-' else None
-            else:
-                # Store next_survey as ISO datetime for compatibility
-                if survey_info.get('raw_date'):
-                    try:
-                        # Parse dd/MM/yyyy format and convert to ISO datetime
-                        from datetime import datetime
-                        parsed_date = datetime.strptime(survey_info['raw_date'], '%d/%m/%Y')
-                        update_data['next_survey'] = parsed_date.isoformat() + 'Z'  # Add Z for UTC (backend-v1 format)
-                    except Exception:
-                        update_data['next_survey'] = None
-                else:
-                    update_data['next_survey'] = None
-                    
-                update_data['next_survey_display'] = next_survey_value  # Store display format with window
-                update_data['next_survey_type'] = next_survey_type_value if next_survey_type_value else None
-            
-            # Update certificate if there are changes
-            current_next_survey = cert.get('next_survey')
-            current_next_survey_type = cert.get('next_survey_type')
-            current_next_survey_display = cert.get('next_survey_display')
-            
-            # Check if any field has changed
-            has_changes = (
-                update_data.get('next_survey') != current_next_survey or 
-                update_data.get('next_survey_type') != current_next_survey_type or
-                update_data.get('next_survey_display') != current_next_survey_display
-            )
-            
-            if has_changes:
-                
-                await mongo_db.database.certificates.update_one(
-                    {"id": cert['id']},
-                    {"$set": update_data}
-                )
-                updated_count += 1
-                
-                results.append({
-                    'cert_id': cert['id'],
-                    'cert_name': cert.get('cert_name', 'Unknown'),
-                    'cert_type': cert.get('cert_type', 'Unknown'),
-                    'old_next_survey': current_next_survey,
-                    'new_next_survey': update_data.get('next_survey_display'),
-                    'old_next_survey_type': current_next_survey_type,
-                    'new_next_survey_type': update_data.get('next_survey_type'),
-                    'reasoning': survey_info['reasoning']
-                })
-        
+        updated_count = result["updated_count"]
         logger.info(f"✅ Updated next survey info for {updated_count} certificates in ship {ship_id}")
         
         return {
@@ -331,8 +294,8 @@ async def update_ship_next_survey(
             "ship_id": ship_id,
             "ship_name": ship_data.get('name', 'Unknown'),
             "updated_count": updated_count,
-            "total_certificates": len(certificates),
-            "results": results[:10]  # Show first 10 results
+            "total_certificates": result["total_certificates"],
+            "results": result["results"]  # First 10 results
         }
         
     except HTTPException:
@@ -351,6 +314,7 @@ async def update_ship_audit_certificates_next_survey(
     Migrated from backend-v1
     """
     from app.utils.ship_calculations import calculate_next_survey_info
+    from app.utils.survey_window import AUDIT_CERTIFICATE, survey_window_fields
     from app.db.mongodb import mongo_db
     from datetime import datetime, timezone
     
@@ -405,6 +369,9 @@ async def update_ship_audit_certificates_next_survey(
             
             # Update certificate if there are changes
             if update_data:
+                update_data.update(survey_window_fields(
+                    update_data.get('next_survey_display'), update_data.get('next_survey'), AUDIT_CERTIFICATE
+                ))
                 update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
                 await mongo_db.database.audit_certificates.update_one(
                     {"id": cert["id"]},
@@ -602,9 +569,10 @@ async def upload_ship_logo(
         if not file.content_type or not file.content_type.startswith("image/"):
             raise HTTPException(status_code=400, detail="Only image files are allowed")
         
-        # Validate file size (5MB limit)
-        if file.size and file.size > 5 * 1024 * 1024:
-            raise HTTPException(status_code=413, detail="File too large. Maximum size is 5MB")
+        # Validate file size (5MB limit, enforced before / while reading) and content
+        # (any image/* type stays accepted, as before - the size is the only new check)
+        from app.utils.upload_ingest import ingest_upload
+        upload = await ingest_upload(file, max_bytes=5 * 1024 * 1024)
         
         # Verify ship exists
         ship = await ShipService.get_ship_by_id(ship_id, current_user)
@@ -622,10 +590,8 @@ async def upload_ship_logo(
         ext = file.filename.split('.')[-1] if '.' in file.filename else 'jpg'
         file_path = upload_dir / f"logo.{ext}"
         
-        # Save file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Save file (chunked copy from the upload spool)
+        await upload.save_to(file_path)
         
         # Update ship with logo path
         logo_url = f"/uploads/ships/{ship_id}/logo.{ext}"
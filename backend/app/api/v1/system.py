@@ -5,10 +5,13 @@ import logging
 import uuid
 import hashlib
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from app.db.mongodb import mongo_db
+from app.core import messages
+from app.core.security import get_current_user
+from app.models.user import UserResponse, UserRole
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -88,3 +91,47 @@ async def get_current_datetime():
         "timezone_offset": now.astimezone().strftime('%z'),
         "formatted": now.strftime('%d/%m/%Y %H:%M:%S')
     }
+
+
+@router.get("/db-stats")
+async def get_db_stats(
+    reset: bool = False,
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Mongo command statistics of this instance (System Admin only)
+    
+    - commands: latency histogram per collection and command (slowest total first)
+    - slow_ops: recent operations over MONGO_SLOW_OP_MS with redacted filter shape and caller
+    - collscans: sampled query shapes whose plan scans the whole collection
+    - caches / audit_log_sink / jobs: hit rates and queue sizes
+    
+    Statistics are per process and start at boot; ``reset=true`` clears them after reading.
+    """
+    if current_user.role != UserRole.SYSTEM_ADMIN:
+        raise HTTPException(status_code=403, detail=messages.SYSTEM_ADMIN_ONLY)
+    
+    from app.db.command_monitor import command_monitor, get_command_stats
+    from app.core.auth_cache import AuthCache
+    from app.services.audit_log_sink import AuditLogSink
+    from app.services.job_queue_service import JobQueueService
+    from app.utils.ai_extraction_cache import AIExtractionCache
+    from app.utils.page_text_cache import PageTextCache
+    
+    stats = get_command_stats()
+    stats["caches"] = {
+        "auth": AuthCache.get_stats(),
+        "ai_extraction": AIExtractionCache.get_stats(),
+        "page_text": PageTextCache.get_stats(),
+    }
+    stats["audit_log_sink"] = AuditLogSink.get_stats()
+    try:
+        stats["jobs"] = await JobQueueService.get_stats()
+    except Exception as e:
+        logger.warning(f"⚠️ Job stats unavailable: {e}")
+        stats["jobs"] = None
+    
+    if reset:
+        command_monitor.reset()
+    
+    return stats
@@ -0,0 +1,145 @@
+"""
+Authentication caches
+Short-lived, process-local caches for the lookups every authenticated request makes:
+
+- the current user, keyed by (user id, token iat), so ``get_current_user`` does not
+  read and re-validate the user document on every request;
+- ship names by ship ID and ship IDs by name, used by the Editor/Viewer
+  ship-scope checks.
+
+Entries expire after AUTH_USER_CACHE_TTL_SECONDS / AUTH_SHIP_CACHE_TTL_SECONDS and
+are dropped immediately when the user or ship is changed through UserRepository /
+ShipRepository. Other instances catch up when their entry expires, so keep the
+user TTL short (role, ship or company changes apply after at most one TTL).
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv('AUTH_USER_CACHE_TTL_SECONDS', '30'))
+AUTH_SHIP_CACHE_TTL_SECONDS = float(os.getenv('AUTH_SHIP_CACHE_TTL_SECONDS', '300'))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '10000'))
+
+_MISSING = object()
+
+
+class _TTLCache:
+    """Small LRU with per-entry expiry"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self._entries.pop(key, None)
+        self.misses += 1
+        return _MISSING
+
+    def set(self, key: Hashable, value: Any):
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def discard_where(self, predicate):
+        for key in [k for k in self._entries if predicate(k)]:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "ttl_seconds": self.ttl}
+
+
+_users = _TTLCache(AUTH_USER_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
+_ship_names = _TTLCache(AUTH_SHIP_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
+_ship_ids_by_name = _TTLCache(AUTH_SHIP_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES)
+
+
+class AuthCache:
+    """Current-user and ship-name caches (see module docstring)"""
+
+    @staticmethod
+    def get_user(user_id: str, issued_at: Any):
+        """Cached UserResponse for a token, or None"""
+        user = _users.get((user_id, issued_at))
+        if user is _MISSING:
+            return None
+        # Copy so a handler mutating current_user cannot leak into other requests
+        return user.model_copy()
+
+    @staticmethod
+    def set_user(user_id: str, issued_at: Any, user):
+        _users.set((user_id, issued_at), user)
+
+    @staticmethod
+    def invalidate_user(user_id: str):
+        """Forget a user (all tokens) after it was updated or deleted"""
+        _users.discard_where(lambda key: key[0] == user_id)
+
+    @staticmethod
+    async def get_ship_name(ship_id: str) -> str:
+        """Name of a ship ('' if it does not exist); only existing ships are cached"""
+        name = _ship_names.get(ship_id)
+        if name is _MISSING:
+            ship = await mongo_db.database["ships"].find_one({"id": ship_id}, {"_id": 0, "name": 1})
+            if not ship:
+                return ""
+            name = ship.get("name") or ""
+            _ship_names.set(ship_id, name)
+        return name
+
+    @staticmethod
+    async def get_ship_id_by_name(ship_name: str) -> str:
+        """ID of the ship with this name ('' if none); only existing ships are cached"""
+        ship_id = _ship_ids_by_name.get(ship_name)
+        if ship_id is _MISSING:
+            ship = await mongo_db.database["ships"].find_one({"name": ship_name}, {"_id": 0, "id": 1})
+            if not ship:
+                return ""
+            ship_id = ship.get("id") or ""
+            _ship_ids_by_name.set(ship_name, ship_id)
+        return ship_id
+
+    @staticmethod
+    def invalidate_ship(ship_id: str):
+        """Forget a ship after it was created, renamed or deleted"""
+        _ship_names.pop(ship_id)
+        # A rename can change which ship a name resolves to
+        _ship_ids_by_name.clear()
+
+    @staticmethod
+    def clear():
+        _users.clear()
+        _ship_names.clear()
+        _ship_ids_by_name.clear()
+
+    @staticmethod
+    def get_stats() -> dict:
+        return {
+            "users": _users.stats(),
+            "ship_names": _ship_names.stats(),
+            "ship_ids_by_name": _ship_ids_by_name.stats(),
+        }
@@ -79,7 +79,7 @@ async def check_editor_viewer_ship_scope_async(
     Raises:
         HTTPException(403): If Editor/Viewer doesn't have access to this ship
     """
-    from app.db.mongodb import mongo_db
+    from app.core.auth_cache import AuthCache
     
     # Only apply to Editor and Viewer roles
     if current_user.role not in [UserRole.EDITOR, UserRole.VIEWER]:
@@ -92,9 +92,8 @@ async def check_editor_viewer_ship_scope_async(
         # Editor/Viewer without assigned ship cannot access anything
         raise HTTPException(status_code=403, detail=messages.SHIP_ACCESS_DENIED)
     
-    # Get target ship to compare by name
-    ship = await mongo_db.find_one("ships", {"id": target_ship_id})
-    target_ship_name = ship.get('name', '') if ship else ''
+    # Get target ship name to compare (cached ship lookup)
+    target_ship_name = await AuthCache.get_ship_name(target_ship_id)
     
     # Check if target ship matches assigned ship (case-insensitive)
     if user_assigned_ship_name.lower() != target_ship_name.lower():
@@ -311,7 +310,7 @@ async def filter_documents_by_ship_scope_async(
     Returns:
         Filtered list of documents
     """
-    from app.db.mongodb import mongo_db
+    from app.core.auth_cache import AuthCache
     
     # Only apply to Editor and Viewer roles
     if current_user.role not in [UserRole.EDITOR, UserRole.VIEWER]:
@@ -324,9 +323,8 @@ async def filter_documents_by_ship_scope_async(
         # Editor/Viewer without assigned ship sees nothing
         return []
     
-    # Get ship ID from ship name
-    ship = await mongo_db.find_one("ships", {"name": user_assigned_ship_name})
-    user_ship_id = ship.get('id', '') if ship else ''
+    # Get ship ID from ship name (cached ship lookup)
+    user_ship_id = await AuthCache.get_ship_id_by_name(user_assigned_ship_name)
     
     if not user_ship_id:
         return []
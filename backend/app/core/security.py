@@ -20,7 +20,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.now(timezone.utc) + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.now(timezone.utc)})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
@@ -39,10 +39,18 @@ def verify_token(token: str) -> Dict[str, Any]:
         raise HTTPException(status_code=401, detail=f"Token validation failed: {str(e)}")
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Get current user from JWT token"""
+    """Get current user from JWT token (cached briefly per user and token, see app.core.auth_cache)"""
+    from app.core.auth_cache import AuthCache
+    
     token = credentials.credentials
     token_data = verify_token(token)
     
+    # Tokens issued before "iat" was added are keyed by their expiry instead
+    issued_at = token_data.get("iat", token_data.get("exp"))
+    cached_user = AuthCache.get_user(token_data["sub"], issued_at)
+    if cached_user is not None:
+        return cached_user
+    
     try:
         user = await mongo_db.find_one("users", {"id": token_data["sub"]})
         if not user:
@@ -50,7 +58,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         
         # Import here to avoid circular dependency
         from app.models.user import UserResponse
-        return UserResponse(**user)
+        current_user = UserResponse(**user)
+        AuthCache.set_user(token_data["sub"], issued_at, current_user)
+        return current_user
     except Exception as e:
         logger.error(f"Error getting current user: {e}")
         raise HTTPException(status_code=401, detail="Could not validate credentials")
@@ -0,0 +1,375 @@
+"""
+Mongo command monitoring
+A pymongo CommandListener attached to the Motor client (MONGO_COMMAND_MONITORING,
+on by default) that records, per process:
+
+- latency histograms per (collection, command), with failure counts;
+- the last MONGO_SLOW_OP_KEEP operations slower than MONGO_SLOW_OP_MS, with the
+  filter / sort shape (values redacted to "?") and the calling function;
+- query plans of sampled operations: every slow operation shape, plus a
+  MONGO_EXPLAIN_SAMPLE_RATE share of the others, is explained (queryPlanner,
+  at most once per shape per MONGO_EXPLAIN_INTERVAL_SECONDS) and plans that
+  use a COLLSCAN are listed.
+
+Read it with ``get_command_stats()`` (GET /api/system/db-stats, System Admin).
+
+Motor runs pymongo on executor threads, so the listener cannot see the calling
+coroutine on its own stack. ``install_task_tracking()`` (startup) records each
+asyncio task in a context variable that Motor copies to the executor; for slow
+operations the listener walks that task's suspended stack to name the caller.
+"""
+import asyncio
+import bisect
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+MONGO_COMMAND_MONITORING = os.getenv('MONGO_COMMAND_MONITORING', 'true').lower() == 'true'
+MONGO_SLOW_OP_MS = float(os.getenv('MONGO_SLOW_OP_MS', '100'))
+MONGO_SLOW_OP_KEEP = int(os.getenv('MONGO_SLOW_OP_KEEP', '200'))
+MONGO_EXPLAIN_SAMPLE_RATE = float(os.getenv('MONGO_EXPLAIN_SAMPLE_RATE', '0.01'))
+MONGO_EXPLAIN_INTERVAL_SECONDS = float(os.getenv('MONGO_EXPLAIN_INTERVAL_SECONDS', '3600'))
+
+# Histogram bucket upper bounds (ms); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Commands whose first argument is the collection name
+_COLLECTION_COMMANDS = {
+    "find", "insert", "update", "delete", "aggregate", "count", "distinct",
+    "findAndModify", "createIndexes", "listIndexes", "collMod", "drop",
+}
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+# Session / transport fields that must not be sent again with explain
+_COMMAND_META_FIELDS = {"lsid", "$db", "$clusterTime", "txnNumber", "$readPreference", "readConcern", "writeConcern"}
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DB_PACKAGE = os.path.join(_APP_ROOT, "db")
+_SERVICES_PACKAGE = os.path.join(_APP_ROOT, "services")
+_MAX_IN_FLIGHT = 10000
+
+_current_task: contextvars.ContextVar[Optional[asyncio.Task]] = contextvars.ContextVar(
+    "mongo_monitor_task", default=None
+)
+
+
+def redact_shape(value: Any, depth: int = 0) -> Any:
+    """Query shape: field names and operators kept, values replaced by "?" """
+    if depth > 8:
+        return "?"
+    if isinstance(value, dict):
+        return {key: redact_shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            # $and / $or clauses and pipelines: keep each clause's shape
+            return [redact_shape(item, depth + 1) for item in value]
+        return ["?"] if value else []
+    return "?"
+
+
+def _collection_of(command_name: str, command: Dict[str, Any]) -> str:
+    if command_name in _COLLECTION_COMMANDS:
+        return str(command.get(command_name))
+    if command_name == "getMore":
+        return str(command.get("collection"))
+    return "-"
+
+
+def _filter_of(command_name: str, command: Dict[str, Any]) -> Tuple[Any, Any]:
+    """(filter, sort) of a command, unredacted"""
+    if command_name == "find":
+        return command.get("filter"), command.get("sort")
+    if command_name in ("count", "distinct", "findAndModify"):
+        return command.get("query"), command.get("sort")
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        return (statements[0].get("q") if statements else None), None
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        match = next((stage["$match"] for stage in pipeline if "$match" in stage), None)
+        sort = next((stage["$sort"] for stage in pipeline if "$sort" in stage), None)
+        return match, sort
+    return None, None
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for key in ("inputStage", "queryPlan", "winningPlan"):
+            stages.extend(_plan_stages(plan.get(key)))
+        for child in plan.get("inputStages", []) or []:
+            stages.extend(_plan_stages(child))
+        for stage in plan.get("stages", []) or []:
+            # aggregate explain: [{"$cursor": {"queryPlanner": ...}}, ...]
+            if isinstance(stage, dict) and "$cursor" in stage:
+                stages.extend(_plan_stages(stage["$cursor"].get("queryPlanner")))
+        if "queryPlanner" in plan:
+            stages.extend(_plan_stages(plan["queryPlanner"]))
+    return stages
+
+
+def _caller_of(task: Optional[asyncio.Task]) -> Optional[str]:
+    """Innermost service function (else app function) on the task's suspended stack"""
+    if task is None:
+        return None
+    try:
+        frames = task.get_stack(limit=50)
+    except Exception:
+        return None
+    fallback = None
+    for frame in reversed(frames):  # innermost first
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_APP_ROOT) or filename.startswith(_DB_PACKAGE):
+            continue
+        label = f"{os.path.relpath(filename, os.path.dirname(_APP_ROOT))}:{frame.f_code.co_name}:{frame.f_lineno}"
+        if filename.startswith(_SERVICES_PACKAGE):
+            return label
+        fallback = fallback or label
+    return fallback
+
+
+class _Histogram:
+    __slots__ = ("count", "failures", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self, duration_ms: float, failed: bool):
+        self.count += 1
+        self.failures += failed
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the percentile; None if in the open bucket"""
+        target = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS_MS + (None,), self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+
+class MongoCommandMonitor(monitoring.CommandListener):
+    """Process-wide command statistics (see module docstring); callbacks run on pymongo threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._in_flight: Dict[int, Tuple[str, str, Optional[dict], Optional[asyncio.Task]]] = {}
+        self._slow_ops: Deque[Dict[str, Any]] = deque(maxlen=MONGO_SLOW_OP_KEEP)
+        self._explain_queue: Deque[Tuple[str, str, Dict[str, Any]]] = deque(maxlen=100)
+        self._explained_at: Dict[str, float] = {}
+        self._plans: Dict[str, Dict[str, Any]] = {}
+        self._since = time.time()
+
+    # CommandListener callbacks
+
+    def started(self, event):
+        command_name = event.command_name
+        if command_name == "explain":
+            return
+        command = event.command
+        collection = _collection_of(command_name, command)
+        explain_source = None
+        if command_name in _EXPLAINABLE:
+            explain_source = {key: value for key, value in command.items() if key not in _COMMAND_META_FIELDS}
+        with self._lock:
+            if len(self._in_flight) < _MAX_IN_FLIGHT:
+                self._in_flight[event.request_id] = (command_name, collection, explain_source, _current_task.get())
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            started = self._in_flight.pop(event.request_id, None)
+        if started is None:
+            return
+        command_name, collection, explain_source, task = started
+        duration_ms = event.duration_micros / 1000
+        slow = duration_ms >= MONGO_SLOW_OP_MS
+
+        shape_key = None
+        slow_op = None
+        if explain_source is not None or slow:
+            query, sort = _filter_of(command_name, explain_source or {})
+            shape = {"filter": redact_shape(query), "sort": sort}
+            shape_key = f"{collection}.{command_name}:{shape}"
+            if slow:
+                # Walked here, while the awaiting task is still suspended on this operation
+                slow_op = {
+                    "at": time.time(),
+                    "collection": collection,
+                    "command": command_name,
+                    "duration_ms": round(duration_ms, 1),
+                    "failed": failed,
+                    "shape": shape,
+                    "caller": _caller_of(task),
+                }
+
+        with self._lock:
+            histogram = self._histograms.get((collection, command_name))
+            if histogram is None:
+                histogram = self._histograms[(collection, command_name)] = _Histogram()
+            histogram.add(duration_ms, failed)
+            if slow_op is not None:
+                self._slow_ops.append(slow_op)
+            if explain_source is not None and not failed and (slow or random.random() < MONGO_EXPLAIN_SAMPLE_RATE):
+                last = self._explained_at.get(shape_key, 0)
+                if time.monotonic() - last > MONGO_EXPLAIN_INTERVAL_SECONDS:
+                    self._explained_at[shape_key] = time.monotonic()
+                    self._explain_queue.append((shape_key, command_name, explain_source))
+        if slow_op is not None:
+            logger.warning(
+                f"🐢 Slow Mongo {command_name} on {collection}: {slow_op['duration_ms']}ms "
+                f"{slow_op['shape']} from {slow_op['caller'] or 'unknown'}"
+            )
+
+    # Explain sampling (runs on the event loop)
+
+    async def explain_pending(self, database) -> int:
+        """Explain queued operation shapes; returns the number explained"""
+        explained = 0
+        while True:
+            with self._lock:
+                if not self._explain_queue:
+                    return explained
+                shape_key, command_name, command = self._explain_queue.popleft()
+            try:
+                result = await database.command({"explain": command, "verbosity": "queryPlanner"})
+            except Exception as e:
+                logger.debug(f"Explain of {shape_key} failed: {e}")
+                continue
+            stages = _plan_stages(result)
+            with self._lock:
+                self._plans[shape_key] = {
+                    "at": time.time(),
+                    "stages": stages,
+                    "collscan": "COLLSCAN" in stages,
+                }
+            if "COLLSCAN" in stages:
+                logger.warning(f"🔍 COLLSCAN plan: {shape_key}")
+            explained += 1
+
+    # Reporting
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            histograms = sorted(self._histograms.items(), key=lambda item: -item[1].total_ms)
+            commands = [
+                {"collection": collection, "command": command_name, **histogram.to_dict()}
+                for (collection, command_name), histogram in histograms
+            ]
+            slow_ops = list(self._slow_ops)[::-1]
+            plans = [{"shape": key, **plan} for key, plan in self._plans.items()]
+        return {
+            "since": self._since,
+            "slow_op_ms": MONGO_SLOW_OP_MS,
+            "commands": commands,
+            "slow_ops": slow_ops,
+            "collscans": [plan for plan in plans if plan["collscan"]],
+            "explained_shapes": len(plans),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._slow_ops.clear()
+            self._plans.clear()
+            self._explained_at.clear()
+            self._since = time.time()
+
+
+command_monitor = MongoCommandMonitor()
+_explain_task: Optional[asyncio.Task] = None
+
+
+def get_event_listeners() -> List[monitoring.CommandListener]:
+    """Listeners for the Motor client (empty when MONGO_COMMAND_MONITORING=false)"""
+    return [command_monitor] if MONGO_COMMAND_MONITORING else []
+
+
+def get_command_stats() -> Dict[str, Any]:
+    stats = command_monitor.get_stats()
+    stats["enabled"] = MONGO_COMMAND_MONITORING
+    return stats
+
+
+def _task_factory(loop, coro, **kwargs):
+    context = kwargs.pop("context", None) or contextvars.copy_context()
+    task = asyncio.Task(coro, loop=loop, context=context, **kwargs)
+    try:
+        context.run(_current_task.set, task)
+    except RuntimeError:
+        pass  # Context already entered (task created with the running context): caller unknown
+    return task
+
+
+async def _explain_loop(database):
+    while True:
+        await asyncio.sleep(5)
+        try:
+            await command_monitor.explain_pending(database)
+        except Exception as e:
+            logger.debug(f"Explain sampling failed: {e}")
+
+
+def install_task_tracking(database=None):
+    """
+    Startup hook: track tasks for caller attribution (unless another task factory
+    is installed) and start the explain sampler for ``database``.
+    """
+    global _explain_task
+    if not MONGO_COMMAND_MONITORING:
+        return
+    loop = asyncio.get_running_loop()
+    if loop.get_task_factory() is None:
+        loop.set_task_factory(_task_factory)
+    current = asyncio.current_task()
+    if current is not None and _current_task.get() is None:
+        _current_task.set(current)
+    if database is not None and (_explain_task is None or _explain_task.done()):
+        _explain_task = loop.create_task(_explain_loop(database))
+
+
+async def stop_command_monitoring():
+    global _explain_task
+    if _explain_task is not None and not _explain_task.done():
+        _explain_task.cancel()
+        try:
+            await _explain_task
+        except (asyncio.CancelledError, Exception):
+            pass
+    _explain_task = None
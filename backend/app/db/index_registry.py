@@ -0,0 +1,385 @@
+"""
+Index Registry
+Every collection's indexes in one place, and the runner that keeps the live
+database in line with them.
+
+- ``get_index_registry()``: collection -> index specs
+  (``keys``, optional ``name``, index ``options``, ``description``).
+- ``plan_index_migrations(db)``: diff against the live indexes - missing
+  indexes, TTL values to update, conflicting definitions (same keys, different
+  unique/partial options: reported, never dropped) and unregistered indexes.
+- ``apply_index_migrations(db)``: builds the missing indexes (online builds on
+  MongoDB 4.2+, reads and writes continue) and updates TTL values with collMod.
+- ``start_index_migrations()``: runs apply in a background task at startup -
+  on every instance, Cloud Run included - so a deploy never serves unindexed.
+- ``index_usage_report(db)``: $indexStats per collection, to find indexes
+  that are never used.
+
+Indexes are matched by key pattern, not by name, so indexes created earlier
+under other names are recognised instead of being built twice. The runner
+never drops an index; remove unregistered ones by hand after checking the
+usage report (``python scripts/migrate_indexes.py --report``).
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Finished upload / rename / recalculation / file move tasks are kept this long
+TASK_RETENTION_SECONDS = int(os.getenv('TASK_RETENTION_SECONDS', str(30 * 24 * 3600)))
+
+# Options that change what an index enforces or contains (a TTL change is applied with collMod)
+_DEFINING_OPTIONS = ("unique", "sparse", "partialFilterExpression")
+
+_migration_task: Optional[asyncio.Task] = None
+
+
+def _index(keys, name: Optional[str] = None, description: str = "", **options) -> Dict[str, Any]:
+    if isinstance(keys, str):
+        keys = [(keys, 1)]
+    return {"keys": list(keys), "name": name, "options": options, "description": description}
+
+
+def _task_indexes(id_field: str = "id") -> List[Dict[str, Any]]:
+    return [
+        _index(id_field, description="Task lookup (progress polling)"),
+        _index("created_at", expireAfterSeconds=TASK_RETENTION_SECONDS,
+               description="TTL: drop old tasks after TASK_RETENTION_SECONDS"),
+    ]
+
+
+def _document_indexes() -> List[Dict[str, Any]]:
+    return [
+        _index("id", description="Lookup by document ID"),
+        _index("ship_id", description="Documents of a ship"),
+    ]
+
+
+def get_index_registry() -> Dict[str, List[Dict[str, Any]]]:
+    """collection -> index specs (TTL values read from the owning modules)"""
+    from app.services.job_queue_service import (
+        JOBS_COLLECTION, DEAD_LETTER_COLLECTION, COMPLETED_JOB_RETENTION_SECONDS
+    )
+    from app.services.upload_spool_service import SPOOL_BUCKET
+    from app.utils.ai_extraction_cache import EXTRACTION_CACHE_COLLECTION, AI_EXTRACTION_CACHE_TTL_SECONDS
+    from app.utils.page_text_cache import PAGE_TEXT_CACHE_COLLECTION, PAGE_TEXT_CACHE_TTL_SECONDS
+    from app.utils.drive_folder_cache import FOLDER_CACHE_COLLECTION, FOLDER_CACHE_TTL_SECONDS
+
+    return {
+        "users": [
+            _index("username", unique=True),
+            # Only indexes non-null emails, so users without an email don't collide
+            _index("email", unique=True, partialFilterExpression={"email": {"$type": "string"}}),
+            _index([("role", 1), ("is_active", 1)]),
+            _index("company"),
+            _index("id", description="Lookup by user ID (every authenticated request)"),
+        ],
+        "companies": [
+            _index("tax_id", unique=True),
+            _index([("name_en", 1), ("name_vn", 1)]),
+            _index("id", description="Lookup by company ID"),
+        ],
+        "ships": [
+            # Same IMO may exist in different companies
+            _index([("imo", 1), ("company", 1)], unique=True, sparse=True),
+            _index("name"),
+            _index("company", name="company_1_standalone", description="Filter ships by company"),
+            _index("id", description="Lookup by ship ID"),
+        ],
+        "certificates": [
+            _index([("ship_id", 1), ("type", 1)]),
+            _index("expiry_date"),
+            _index([("ship_id", 1), ("survey_window_close", 1)],
+                   description="Upcoming-survey dashboards: survey window contains today"),
+            _index([("ship_id", 1), ("valid_date", 1)], name="ship_id_1_valid_date_1",
+                   description="Ship certificates sorted by expiry"),
+            _index("id", description="Lookup by certificate ID"),
+        ],
+        "audit_certificates": [
+            _index("ship_id", name="ship_id_1", description="Audit certificates of a ship"),
+            _index([("ship_id", 1), ("valid_date", 1)], name="ship_id_1_valid_date_1",
+                   description="Audit certificates sorted by expiry"),
+            _index([("ship_id", 1), ("survey_window_close", 1)]),
+            _index("id", description="Lookup by certificate ID"),
+        ],
+        "certificate_abbreviation_mappings": [
+            _index("cert_name", unique=True),
+            _index("created_by"),
+            _index([("usage_count", -1)]),
+        ],
+        "usage_tracking": [
+            _index([("timestamp", -1)]),
+            _index("user_id"),
+        ],
+        "crew": [
+            _index("company_id", name="company_id_1", description="Filter crews by company"),
+            _index([("company_id", 1), ("status", 1)], name="company_id_1_status_1",
+                   description="Crew list with status filter (Sign on/Standby/Leave)"),
+            _index([("company_id", 1), ("ship_sign_on", 1)], name="company_id_1_ship_sign_on_1",
+                   description="Crew on a specific ship"),
+            _index([("company_id", 1), ("passport", 1)], name="company_id_1_passport_1",
+                   description="Search crew by passport number"),
+            _index([("company_id", 1), ("created_at", -1)], name="company_id_1_created_at_-1",
+                   description="Crew list, newest first"),
+            _index("id", description="Lookup by crew ID (batched $in lookups)"),
+        ],
+        "crew_certificates": [
+            _index([("company_id", 1), ("crew_id", 1)], name="company_id_1_crew_id_1",
+                   description="Certificates of a crew member"),
+            _index([("company_id", 1), ("cert_expiry", 1)], name="company_id_1_cert_expiry_1",
+                   description="Expiring certificates"),
+            _index([("company_id", 1), ("status", 1)], name="company_id_1_status_1",
+                   description="Filter certificates by status (Valid/Expired)"),
+            _index("crew_id", description="Certificates of a crew member (no company filter)"),
+            _index("id", description="Lookup by certificate ID"),
+        ],
+        "crew_assignment_history": [
+            _index([("company_id", 1), ("crew_id", 1)], name="company_id_1_crew_id_1",
+                   description="Assignment history of a crew member"),
+            _index([("company_id", 1), ("crew_id", 1), ("action_date", -1)],
+                   name="company_id_1_crew_id_1_action_date_-1", description="Assignment timeline, newest first"),
+            _index([("crew_id", 1), ("action_date", -1)], description="Open sign-on record at sign off"),
+            _index("id", description="Lookup by assignment ID (file move results)"),
+        ],
+        "crew_audit_logs": [
+            _index([("company_id", 1), ("performed_at", -1), ("_id", -1)],
+                   description="Log viewer: keyset pages (performed_at + _id cursor)"),
+            _index([("performed_at", -1), ("_id", -1)], description="Log viewer across companies"),
+            _index([("company_id", 1), ("search_tokens", 1), ("performed_at", -1)],
+                   description="Entity name search (word prefixes)"),
+            _index([("entity_id", 1), ("performed_at", -1)], name="entity_id_1_performed_at_-1",
+                   description="Logs of one entity, newest first"),
+            _index([("company_id", 1), ("performed_by", 1), ("performed_at", -1)],
+                   name="company_id_1_performed_by_1_performed_at_-1", description="User activity filter"),
+            _index([("company_id", 1), ("action", 1), ("performed_at", -1)],
+                   name="company_id_1_action_1_performed_at_-1", description="Action type filter"),
+            _index([("company_id", 1), ("ship_name", 1), ("performed_at", -1)],
+                   name="company_id_1_ship_name_1_performed_at_-1", description="Ship filter"),
+            _index("id", description="Lookup by log ID"),
+            _index("expires_at", name="expires_at_1_ttl", expireAfterSeconds=0,
+                   description="TTL: 1-year retention (expires_at is set by create_log)"),
+        ],
+        "audit_trail": [
+            _index([("company_id", 1), ("timestamp", -1)]),
+            _index([("resource_type", 1), ("resource_id", 1)]),
+        ],
+        "company_gdrive_config": [
+            _index("company_id"),
+        ],
+        "system_announcements": [
+            _index("id"),
+        ],
+        "approval_documents": _document_indexes(),
+        "drawings_manuals": _document_indexes(),
+        "test_reports": _document_indexes(),
+        "audit_reports": _document_indexes(),
+        "company_certificates": [
+            _index("id", description="Lookup by certificate ID"),
+            _index("company", description="Certificates of a company"),
+        ],
+        "other_documents": _document_indexes(),
+        "other_audit_documents": _document_indexes(),
+        "survey_reports": _document_indexes(),
+        # Background tasks (progress polling; removed after TASK_RETENTION_SECONDS)
+        "upload_tasks": _task_indexes("task_id"),
+        "bulk_rename_tasks": _task_indexes(),
+        "background_upload_tasks": _task_indexes(),
+        "recalculation_tasks": _task_indexes(),
+        "crew_file_move_tasks": _task_indexes() + [
+            _index([("crew_id", 1), ("created_at", 1)], description="Earlier moves of the same crew member"),
+        ],
+        # Durable job queue
+        JOBS_COLLECTION: [
+            _index("id", unique=True),
+            _index([("status", 1), ("run_at", 1)], description="Claim query"),
+            _index([("status", 1), ("lease_expires_at", 1)], description="Expired lease recovery"),
+            _index("idempotency_key", unique=True,
+                   partialFilterExpression={"idempotency_key": {"$type": "string"}}),
+            _index("completed_at", expireAfterSeconds=COMPLETED_JOB_RETENTION_SECONDS,
+                   description="TTL: drop finished jobs"),
+        ],
+        DEAD_LETTER_COLLECTION: [
+            _index("failed_at"),
+        ],
+        f"{SPOOL_BUCKET}.files": [
+            _index("metadata.sha256", description="Content-hash dedupe"),
+            _index("metadata.last_ref_at", description="Stale spool sweep"),
+        ],
+        # Shared caches
+        FOLDER_CACHE_COLLECTION: [
+            _index([("company_id", 1), ("root_folder_id", 1), ("path", 1)], unique=True),
+            _index("folder_id"),
+            _index("updated_at", expireAfterSeconds=FOLDER_CACHE_TTL_SECONDS),
+        ],
+        EXTRACTION_CACHE_COLLECTION: [
+            _index("key", unique=True),
+            _index("created_at", expireAfterSeconds=AI_EXTRACTION_CACHE_TTL_SECONDS),
+        ],
+        PAGE_TEXT_CACHE_COLLECTION: [
+            _index("key", unique=True),
+            _index("created_at", expireAfterSeconds=PAGE_TEXT_CACHE_TTL_SECONDS),
+        ],
+    }
+
+
+def _key_signature(keys) -> tuple:
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                 for field, direction in keys)
+
+
+def _defining_options(options: Dict[str, Any]) -> Dict[str, Any]:
+    return {option: options[option] for option in _DEFINING_OPTIONS if options.get(option)}
+
+
+async def _live_indexes(collection) -> List[Dict[str, Any]]:
+    try:
+        return await collection.list_indexes().to_list(None)
+    except Exception as e:
+        # NamespaceNotFound: collection not created yet - nothing is indexed
+        if getattr(e, "code", None) == 26:
+            return []
+        raise
+
+
+async def plan_index_migrations(db, collections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Diff the registry against the live database.
+
+    Returns:
+        {"missing": [...], "ttl_changes": [...], "conflicts": [...], "unregistered": [...]}
+        (entries carry "collection" plus the index spec / live definition)
+    """
+    registry = get_index_registry()
+    plan = {"missing": [], "ttl_changes": [], "conflicts": [], "unregistered": []}
+    for collection_name, specs in registry.items():
+        if collections and collection_name not in collections:
+            continue
+        live = await _live_indexes(db[collection_name])
+        live_by_keys = {_key_signature(index["key"].items()): index for index in live}
+        registered = set()
+        for spec in specs:
+            signature = _key_signature(spec["keys"])
+            registered.add(signature)
+            existing = live_by_keys.get(signature)
+            if existing is None:
+                plan["missing"].append({"collection": collection_name, **spec})
+                continue
+            wanted = _defining_options(spec["options"])
+            if _defining_options(existing) != wanted:
+                plan["conflicts"].append({
+                    "collection": collection_name, "name": existing["name"],
+                    "live": _defining_options(existing), "registry": wanted,
+                })
+            wanted_ttl = spec["options"].get("expireAfterSeconds")
+            if wanted_ttl is not None and existing.get("expireAfterSeconds") != wanted_ttl:
+                plan["ttl_changes"].append({
+                    "collection": collection_name, "name": existing["name"],
+                    "from": existing.get("expireAfterSeconds"), "to": wanted_ttl,
+                })
+        for signature, index in live_by_keys.items():
+            if index["name"] != "_id_" and signature not in registered:
+                plan["unregistered"].append({
+                    "collection": collection_name, "name": index["name"], "keys": list(index["key"].items())
+                })
+    return plan
+
+
+async def ensure_collection_indexes(db, collection_name: str):
+    """Build the registered indexes of one collection (idempotent; for lazily used collections)"""
+    for spec in get_index_registry().get(collection_name, []):
+        kwargs = dict(spec["options"])
+        if spec["name"]:
+            kwargs["name"] = spec["name"]
+        await db[collection_name].create_index(spec["keys"], **kwargs)
+
+
+async def apply_index_migrations(db, collections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Build missing indexes and apply TTL changes. Failures are logged per index
+    and returned; they never stop the remaining builds.
+    """
+    plan = await plan_index_migrations(db, collections)
+    created, failed = [], []
+    for spec in plan["missing"]:
+        kwargs = dict(spec["options"])
+        if spec["name"]:
+            kwargs["name"] = spec["name"]
+        label = f"{spec['collection']}.{spec['name'] or _key_signature(spec['keys'])}"
+        try:
+            name = await db[spec["collection"]].create_index(spec["keys"], **kwargs)
+            created.append(f"{spec['collection']}.{name}")
+            logger.info(f"🗂️ Built index {spec['collection']}.{name}")
+        except Exception as e:
+            failed.append({"index": label, "error": str(e)})
+            logger.error(f"❌ Index build failed for {label}: {e}")
+    for change in plan["ttl_changes"]:
+        label = f"{change['collection']}.{change['name']}"
+        try:
+            await db.command({
+                "collMod": change["collection"],
+                "index": {"name": change["name"], "expireAfterSeconds": change["to"]},
+            })
+            logger.info(f"🗂️ TTL of {label}: {change['from']} → {change['to']}s")
+        except Exception as e:
+            failed.append({"index": label, "error": str(e)})
+            logger.error(f"❌ TTL update failed for {label}: {e}")
+    for conflict in plan["conflicts"]:
+        logger.warning(
+            f"⚠️ Index {conflict['collection']}.{conflict['name']} differs from the registry: "
+            f"live {conflict['live']}, registry {conflict['registry']} (not changed)"
+        )
+    if plan["unregistered"]:
+        logger.info(
+            f"ℹ️ {len(plan['unregistered'])} unregistered indexes: "
+            + ", ".join(f"{index['collection']}.{index['name']}" for index in plan["unregistered"])
+        )
+    return {
+        "created": created,
+        "ttl_updated": [f"{change['collection']}.{change['name']}" for change in plan["ttl_changes"]],
+        "failed": failed,
+        "conflicts": plan["conflicts"],
+        "unregistered": plan["unregistered"],
+    }
+
+
+async def index_usage_report(db) -> List[Dict[str, Any]]:
+    """Accesses of every live index since the last server restart ($indexStats)"""
+    report = []
+    for collection_name in get_index_registry():
+        try:
+            stats = await db[collection_name].aggregate([{"$indexStats": {}}]).to_list(None)
+        except Exception as e:
+            if getattr(e, "code", None) == 26:
+                continue
+            raise
+        for stat in stats:
+            report.append({
+                "collection": collection_name,
+                "name": stat["name"],
+                "ops": stat.get("accesses", {}).get("ops", 0),
+                "since": stat.get("accesses", {}).get("since"),
+            })
+    return sorted(report, key=lambda entry: (entry["ops"], entry["collection"], entry["name"]))
+
+
+async def _run_startup_migrations():
+    from app.db.mongodb import mongo_db
+
+    try:
+        result = await apply_index_migrations(mongo_db.database)
+        logger.info(
+            f"✅ Index migrations done: {len(result['created'])} built, "
+            f"{len(result['ttl_updated'])} TTL updated, {len(result['failed'])} failed"
+        )
+    except Exception as e:
+        logger.error(f"❌ Index migrations failed: {e}")
+
+
+def start_index_migrations():
+    """Run apply_index_migrations in the background (startup must not wait for builds)"""
+    global _migration_task
+    if _migration_task is None or _migration_task.done():
+        _migration_task = asyncio.create_task(_run_startup_migrations())
+    return _migration_task
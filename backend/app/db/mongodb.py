@@ -4,6 +4,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timezone
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import DuplicateKeyError
+from app.db.command_monitor import get_event_listeners
 from urllib.parse import urlparse
 import json
 
@@ -56,7 +57,9 @@ class MongoDatabase:
                 mongo_url,
                 serverSelectionTimeoutMS=5000 if is_cloud_run else 10000,
                 connectTimeoutMS=5000 if is_cloud_run else 10000,
-                socketTimeoutMS=10000
+                socketTimeoutMS=10000,
+                # Latency histograms / slow ops / sampled explains (app.db.command_monitor)
+                event_listeners=get_event_listeners()
             )
             
             # Test connection with timeout
@@ -89,9 +92,7 @@ class MongoDatabase:
             
             self.database = self.client[db_name]
             
-            # Skip indexes on Cloud Run for faster startup
-            if not is_cloud_run:
-                await self.create_indexes()
+            # Indexes are built in the background by the startup event (start_index_migrations)
             
             self.connected = True
             logger.info(f"✅ Successfully connected to MongoDB: {db_name}")
@@ -108,44 +109,12 @@ class MongoDatabase:
             logger.info("Disconnected from MongoDB")
     
     async def create_indexes(self):
-        """Create database indexes for better performance"""
+        """Build missing indexes of every collection (see app.db.index_registry)"""
+        from app.db.index_registry import apply_index_migrations
+        
         try:
-            # Users collection indexes
-            await self.database.users.create_index("username", unique=True)
-            # Partial index on email: only indexes non-null emails, allows multiple null values
-            # This enforces uniqueness only for users who have an email address
-            await self.database.users.create_index(
-                "email", 
-                unique=True, 
-                partialFilterExpression={"email": {"$type": "string"}}
-            )
-            await self.database.users.create_index([("role", 1), ("is_active", 1)])
-            await self.database.users.create_index("company")
-            
-            # Companies collection indexes  
-            await self.database.companies.create_index("tax_id", unique=True)
-            await self.database.companies.create_index([("name_en", 1), ("name_vn", 1)])
-            
-            # Ships collection indexes
-            # Create compound unique index on (imo, company) to allow same IMO for different companies
-            await self.database.ships.create_index([("imo", 1), ("company", 1)], unique=True, sparse=True)
-            await self.database.ships.create_index("name")
-            
-            # Certificates collection indexes
-            await self.database.certificates.create_index([("ship_id", 1), ("type", 1)])
-            await self.database.certificates.create_index("expiry_date")
-            
-            # Certificate abbreviation mappings collection indexes
-            await self.database.certificate_abbreviation_mappings.create_index("cert_name", unique=True)
-            await self.database.certificate_abbreviation_mappings.create_index("created_by")
-            await self.database.certificate_abbreviation_mappings.create_index([("usage_count", -1)])
-            
-            # Usage tracking indexes
-            await self.database.usage_tracking.create_index([("timestamp", -1)])
-            await self.database.usage_tracking.create_index("user_id")
-            
+            await apply_index_migrations(self.database)
             logger.info("Database indexes created successfully")
-            
         except Exception as e:
             logger.error(f"Error creating indexes: {e}")
 
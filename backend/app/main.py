@@ -11,6 +11,7 @@ from app.core.config import settings
 from app.db.mongodb import mongo_db
 from app.api.v1 import api_router
 from app.services.cleanup_service import CleanupService
+from app.utils.batch_loader import RequestLoaderMiddleware
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -45,6 +46,9 @@ app.add_middleware(
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
+# Request-scoped batched lookups (app.utils.batch_loader)
+app.add_middleware(RequestLoaderMiddleware)
+
 # Cleanup job function
 async def scheduled_cleanup_job():
     """Scheduled job to generate cleanup reports"""
@@ -100,6 +104,16 @@ async def startup_event():
                     import asyncio
                     await asyncio.sleep(1)  # Shorter wait
         
+        # Mongo command monitoring: caller attribution and sampled explains
+        if mongo_db.connected:
+            from app.db.command_monitor import install_task_tracking
+            install_task_tracking(mongo_db.database)
+        
+        # Build missing indexes in the background (every instance, Cloud Run included)
+        if mongo_db.connected:
+            from app.db.index_registry import start_index_migrations
+            start_index_migrations()
+        
         # Initialize admin if needed
         # On Cloud Run: only run if INIT_ADMIN_PASSWORD is set (explicit opt-in)
         # On local: always run
@@ -114,6 +128,23 @@ async def startup_event():
             else:
                 logger.info("ℹ️ Admin init skipped on Cloud Run (set INIT_ADMIN_PASSWORD to enable)")
         
+        # Dev/test: flag blocking network calls made on the event loop (SYNC_IO_GUARD=warn|raise)
+        if not is_cloud_run:
+            from app.utils.sync_io_guard import install_sync_io_guard
+            install_sync_io_guard()
+        
+        # Open the shared HTTP connection pool (Apps Script / Document AI calls)
+        from app.utils.http_client import get_http_session
+        get_http_session()
+        
+        # Start durable background job worker (Drive uploads/deletions, bulk rename)
+        if mongo_db.connected:
+            try:
+                from app.services.job_queue_service import start_app_job_worker
+                await start_app_job_worker()
+            except Exception as worker_error:
+                logger.warning(f"⚠️ Job worker not started: {worker_error}")
+        
         # Setup scheduled jobs (skip on cloud for faster startup)
         if not is_cloud_run:
             scheduler.add_job(
@@ -123,6 +154,15 @@ async def startup_event():
                 name="Daily Cleanup Report",
                 replace_existing=True
             )
+            # Nightly fleet-wide certificate recalculation (durable job, once per day across instances)
+            from app.services.certificate_recalculation_service import scheduled_recalculation_job
+            scheduler.add_job(
+                scheduled_recalculation_job,
+                CronTrigger(hour=int(os.environ.get('CERT_RECALCULATION_HOUR', '1')), minute=0),
+                id="certificate_recalculation_job",
+                name="Nightly Certificate Recalculation",
+                replace_existing=True
+            )
             scheduler.start()
             logger.info("✅ Scheduler started - Cleanup job scheduled for 2:00 AM daily")
         
@@ -136,9 +176,34 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     try:
-        # Shutdown scheduler
-        scheduler.shutdown()
-        logger.info("✅ Scheduler shut down")
+        # Shutdown scheduler (not started on Cloud Run)
+        if scheduler.running:
+            scheduler.shutdown()
+            logger.info("✅ Scheduler shut down")
+        
+        # Stop job worker (in-flight jobs are handed back to the queue)
+        from app.services.job_queue_service import stop_app_job_worker
+        await stop_app_job_worker()
+        
+        # Stop the explain sampler of the Mongo command monitor
+        from app.db.command_monitor import stop_command_monitoring
+        await stop_command_monitoring()
+        
+        # Write queued audit log entries
+        from app.services.audit_log_sink import AuditLogSink
+        await AuditLogSink.shutdown()
+        
+        # Write batched abbreviation usage counts
+        from app.utils.certificate_abbreviation import AbbreviationMappingCache
+        await AbbreviationMappingCache.shutdown()
+        
+        # Stop CPU worker processes (PDF parsing / OCR)
+        from app.utils.cpu_worker_pool import shutdown_executor
+        shutdown_executor()
+        
+        # Close shared HTTP connection pool
+        from app.utils.http_client import close_http_sessions
+        await close_http_sessions()
         
         # Disconnect database
         await mongo_db.disconnect()
@@ -1,6 +1,10 @@
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, AsyncIterator, Tuple
+from bson import ObjectId
 from app.db.mongodb import mongo_db
+from app.utils.survey_window import (
+    SHIP_CERTIFICATE, refresh_survey_window, survey_window_fields, touches_survey_window
+)
 
 logger = logging.getLogger(__name__)
 
@@ -8,11 +12,80 @@ class CertificateRepository:
     """Data access layer for certificates"""
     
     @staticmethod
-    async def find_all(ship_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all certificates, optionally filtered by ship"""
-        if ship_id:
-            return await mongo_db.find_all("certificates", {"ship_id": ship_id})
-        return await mongo_db.find_all("certificates")
+    def _scope_query(ship_id: Optional[str] = None, ship_ids: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Mongo filter for a ship and/or a set of allowed ships (tenant scope).
+        Returns None when the scope cannot match anything.
+        """
+        query: Dict[str, Any] = {}
+        if ship_ids is not None:
+            allowed = list(ship_ids)
+            if ship_id:
+                if ship_id not in allowed:
+                    return None
+                query["ship_id"] = ship_id
+            elif not allowed:
+                return None
+            else:
+                query["ship_id"] = {"$in": allowed}
+        elif ship_id:
+            query["ship_id"] = ship_id
+        return query
+    
+    @staticmethod
+    async def find_all(
+        ship_id: Optional[str] = None,
+        ship_ids: Optional[Iterable[str]] = None,
+        projection: Optional[Dict[str, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all certificates, optionally filtered by ship.
+        ``ship_ids`` restricts the result to those ships (filtered in Mongo, not in Python).
+        """
+        query = CertificateRepository._scope_query(ship_id, ship_ids)
+        if query is None:
+            return []
+        if projection is None:
+            return await mongo_db.find_all("certificates", query)
+        return await mongo_db.database["certificates"].find(query, projection).to_list(length=None)
+    
+    @staticmethod
+    async def find_page(
+        ship_id: Optional[str] = None,
+        ship_ids: Optional[Iterable[str]] = None,
+        projection: Optional[Dict[str, int]] = None,
+        limit: int = 200,
+        after: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Keyset-paginated certificates in insertion (_id) order.
+        
+        Returns:
+            (certificates, cursor for the next page or None on the last page)
+        """
+        query = CertificateRepository._scope_query(ship_id, ship_ids)
+        if query is None:
+            return [], None
+        if after:
+            query["_id"] = {"$gt": ObjectId(after)}
+        
+        docs = await mongo_db.database["certificates"].find(query, projection).sort("_id", 1).limit(limit).to_list(length=limit)
+        next_cursor = str(docs[-1]["_id"]) if len(docs) == limit else None
+        return docs, next_cursor
+    
+    @staticmethod
+    async def iter_all(
+        ship_id: Optional[str] = None,
+        ship_ids: Optional[Iterable[str]] = None,
+        projection: Optional[Dict[str, int]] = None,
+        batch_size: int = 200
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream certificates from a cursor instead of loading them all at once"""
+        query = CertificateRepository._scope_query(ship_id, ship_ids)
+        if query is None:
+            return
+        async for doc in mongo_db.database["certificates"].find(query, projection).batch_size(batch_size):
+            yield doc
     
     @staticmethod
     async def find_by_id(cert_id: str) -> Optional[Dict[str, Any]]:
@@ -22,12 +95,16 @@ class CertificateRepository:
     @staticmethod
     async def create(cert_data: Dict[str, Any]) -> str:
         """Create new certificate"""
+        cert_data.update(survey_window_fields(cert_data.get("next_survey_display"), cert_data.get("next_survey")))
         return await mongo_db.create("certificates", cert_data)
     
     @staticmethod
     async def update(cert_id: str, update_data: Dict[str, Any]) -> bool:
-        """Update certificate"""
-        return await mongo_db.update("certificates", {"id": cert_id}, update_data)
+        """Update certificate (survey window fields follow next survey changes)"""
+        updated = await mongo_db.update("certificates", {"id": cert_id}, update_data)
+        if touches_survey_window(update_data):
+            await refresh_survey_window("certificates", cert_id, SHIP_CERTIFICATE)
+        return updated
     
     @staticmethod
     async def delete(cert_id: str) -> bool:
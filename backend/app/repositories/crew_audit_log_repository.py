@@ -1,11 +1,76 @@
 """
 Crew Audit Log Repository
 Database operations for audit logs
+
+The log viewer pages with a keyset cursor (performed_at + _id of the last row;
+_id is the tie-breaker because logs written before ``id`` existed lack it)
+instead of skip, searches entity names through the indexed ``search_tokens``
+field (accent-free, lowercase word prefixes written by create_log) and reads
+totals from a short-lived count cache, so pages stay cheap as the log grows.
 """
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import List, Optional, Tuple
+import base64
+import json
+import os
 import re
+import time
+
+from app.services.audit_log_sink import AuditLogSink
+from app.utils.name_matcher import remove_vietnamese_accents
+
+AUDIT_LOG_COUNT_CACHE_SECONDS = float(os.getenv('AUDIT_LOG_COUNT_CACHE_SECONDS', '60'))
+AUDIT_LOG_COUNT_CACHE_MAX_ENTRIES = 1000
+# Longest indexed word prefix; longer search words are matched on this prefix
+SEARCH_TOKEN_MAX_LENGTH = 20
+
+# Cached totals: query key -> (total, expires_at)
+_count_cache: dict = {}
+
+
+def build_search_tokens(text: Optional[str]) -> List[str]:
+    """
+    Index tokens of a name: every prefix of every accent-free, lowercase word.
+    "Nguyễn Văn An" -> ["n", "ng", ..., "nguyen", "v", "va", "van", "a", "an"]
+    """
+    tokens = set()
+    for word in _search_words(text):
+        for length in range(1, min(len(word), SEARCH_TOKEN_MAX_LENGTH) + 1):
+            tokens.add(word[:length])
+    return sorted(tokens)
+
+
+def _search_words(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return re.findall(r'[a-z0-9]+', remove_vietnamese_accents(text).lower())
+
+
+def encode_cursor(log: dict) -> str:
+    """Opaque page token pointing after ``log``"""
+    performed_at = log['performed_at']
+    if isinstance(performed_at, datetime):
+        performed_at = performed_at.isoformat()
+    payload = json.dumps({'t': performed_at, 'oid': str(log['_id'])}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        performed_at = datetime.fromisoformat(payload['t'])
+        after_oid = ObjectId(payload['oid'])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if performed_at.tzinfo is None:
+        performed_at = performed_at.replace(tzinfo=timezone.utc)
+    return performed_at, after_oid
 
 
 class CrewAuditLogRepository:
@@ -38,7 +103,7 @@ class CrewAuditLogRepository:
     
     async def create_log(self, log_data: dict) -> dict:
         """
-        Create new audit log entry
+        Create new audit log entry (written by the buffered AuditLogSink)
         
         Args:
             log_data: Log data dictionary
@@ -53,15 +118,13 @@ class CrewAuditLogRepository:
         # Set expiration date (1 year from now)
         log_data['expires_at'] = now + timedelta(days=365)
         
-        # Insert into database
-        result = await self.collection.insert_one(log_data)
+        # Indexed name search (see get_logs)
+        log_data['search_tokens'] = build_search_tokens(log_data.get('entity_name'))
         
-        # Fetch and return created log
-        created_log = await self.collection.find_one(
-            {'_id': result.inserted_id},
-            {'_id': 0}
-        )
+        # Queue for the next batched insert; the entry is returned as written
+        await AuditLogSink.write(self.collection.name, log_data)
         
+        created_log = {key: value for key, value in log_data.items() if key not in ('_id', 'search_tokens')}
         return self._add_timezone_to_log(created_log)
     
     async def get_logs(
@@ -76,16 +139,25 @@ class CrewAuditLogRepository:
         entity_id: Optional[str] = None,
         search: Optional[str] = None,
         skip: int = 0,
-        limit: int = 20
-    ) -> tuple[List[dict], int]:
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> tuple[List[dict], int, Optional[str]]:
         """
         Get filtered audit logs with pagination
         
         Supports filtering by entity type (crew, certificate, ship, company, user, document)
         If company_id is None, returns logs from all companies (for super admins)
         
+        Pass the returned next cursor as ``cursor`` to get the following page
+        (``skip`` is still honoured when no cursor is given, but deep skips are
+        slow). ``search`` matches the start of words in the entity name, ignoring
+        case and accents. The total may be up to AUDIT_LOG_COUNT_CACHE_SECONDS old.
+        
         Returns:
-            Tuple of (logs list, total count)
+            Tuple of (logs list, total count, next cursor or None on the last page)
+        
+        Raises:
+            ValueError: if ``cursor`` is malformed
         """
         # Build query
         query = {}
@@ -140,21 +212,67 @@ class CrewAuditLogRepository:
         if entity_id:
             query['entity_id'] = entity_id
         
-        # Search filter (crew name - case insensitive)
+        # Search filter (crew name - word prefixes, case and accent insensitive)
+        conditions = []
         if search:
-            query['entity_name'] = {'$regex': re.escape(search), '$options': 'i'}
+            words = [word[:SEARCH_TOKEN_MAX_LENGTH] for word in _search_words(search)]
+            if words:
+                conditions.append({'$or': [
+                    {'search_tokens': {'$all': words}},
+                    # Logs written before search_tokens existed
+                    {'search_tokens': {'$exists': False}, 'entity_name': {'$regex': re.escape(search), '$options': 'i'}}
+                ]})
+            else:
+                query['entity_name'] = {'$regex': re.escape(search), '$options': 'i'}
+        if conditions:
+            query['$and'] = conditions
+        
+        # Get total count (cached)
+        total = await self._count(query)
+        
+        # Keyset pagination: rows strictly after the cursor in (performed_at, _id) order
+        page_query = query
+        if cursor:
+            after_performed_at, after_oid = decode_cursor(cursor)
+            page_query = {**query, '$and': conditions + [{'$or': [
+                {'performed_at': {'$lt': after_performed_at}},
+                {'performed_at': after_performed_at, '_id': {'$lt': after_oid}}
+            ]}]}
+            skip = 0
+        
+        # Get paginated logs (sorted by performed_at descending, _id breaks ties)
+        find_cursor = self.collection.find(page_query, {'search_tokens': 0}).sort(
+            [('performed_at', -1), ('_id', -1)]
+        ).skip(skip).limit(limit + 1)
+        logs = await find_cursor.to_list(length=limit + 1)
+        
+        next_cursor = encode_cursor(logs[limit - 1]) if len(logs) > limit else None
+        
+        # Add timezone to all logs (_id was only needed for the cursor)
+        logs = [self._add_timezone_to_log(log) for log in logs[:limit]]
+        for log in logs:
+            log.pop('_id', None)
+        
+        return logs, total, next_cursor
+    
+    async def _count(self, query: dict) -> int:
+        """Total for ``query``, cached for AUDIT_LOG_COUNT_CACHE_SECONDS"""
+        if not query:
+            # Unfiltered (system admin landing page): collection metadata, no scan
+            return await self.collection.estimated_document_count()
+        
+        key = repr(query)
+        cached = _count_cache.get(key)
+        now = time.monotonic()
+        if cached is not None and cached[1] > now:
+            return cached[0]
         
-        # Get total count
         total = await self.collection.count_documents(query)
-        
-        # Get paginated logs (sorted by performed_at descending)
-        cursor = self.collection.find(query, {'_id': 0}).sort('performed_at', -1).skip(skip).limit(limit)
-        logs = await cursor.to_list(length=limit)
-        
-        # Add timezone to all logs
-        logs = [self._add_timezone_to_log(log) for log in logs]
-        
-        return logs, total
+        if AUDIT_LOG_COUNT_CACHE_SECONDS > 0:
+            if len(_count_cache) >= AUDIT_LOG_COUNT_CACHE_MAX_ENTRIES:
+                _count_cache.clear()
+            _count_cache[key] = (total, now + AUDIT_LOG_COUNT_CACHE_SECONDS)
+        return total
     
     async def get_log_by_id(self, log_id: str, company_id: Optional[str]) -> Optional[dict]:
         """
@@ -171,7 +289,7 @@ class CrewAuditLogRepository:
         if company_id is not None:
             query['company_id'] = company_id
             
-        log = await self.collection.find_one(query, {'_id': 0})
+        log = await self.collection.find_one(query, {'_id': 0, 'search_tokens': 0})
         return self._add_timezone_to_log(log)
     
     async def get_logs_by_crew(
@@ -195,7 +313,7 @@ class CrewAuditLogRepository:
         if company_id is not None:
             query['company_id'] = company_id
             
-        cursor = self.collection.find(query, {'_id': 0}).sort('performed_at', -1).limit(limit)
+        cursor = self.collection.find(query, {'_id': 0, 'search_tokens': 0}).sort('performed_at', -1).limit(limit)
         
         logs = await cursor.to_list(length=limit)
         return [self._add_timezone_to_log(log) for log in logs]
@@ -219,7 +337,7 @@ class CrewAuditLogRepository:
         """
         cursor = self.collection.find(
             {'performed_by': username, 'company_id': company_id},
-            {'_id': 0}
+            {'_id': 0, 'search_tokens': 0}
         ).sort('performed_at', -1).limit(limit)
         
         logs = await cursor.to_list(length=limit)
@@ -1,6 +1,7 @@
 import logging
 from typing import Optional, List, Dict, Any
 from app.db.mongodb import mongo_db
+from app.core.auth_cache import AuthCache
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +28,20 @@ class ShipRepository:
     @staticmethod
     async def create(ship_data: Dict[str, Any]) -> str:
         """Create new ship"""
-        return await mongo_db.create("ships", ship_data)
+        created = await mongo_db.create("ships", ship_data)
+        AuthCache.invalidate_ship(ship_data.get("id"))
+        return created
     
     @staticmethod
     async def update(ship_id: str, update_data: Dict[str, Any]) -> bool:
         """Update ship"""
-        return await mongo_db.update("ships", {"id": ship_id}, update_data)
+        updated = await mongo_db.update("ships", {"id": ship_id}, update_data)
+        AuthCache.invalidate_ship(ship_id)
+        return updated
     
     @staticmethod
     async def delete(ship_id: str) -> bool:
         """Delete ship"""
-        return await mongo_db.delete("ships", {"id": ship_id})
+        deleted = await mongo_db.delete("ships", {"id": ship_id})
+        AuthCache.invalidate_ship(ship_id)
+        return deleted
@@ -1,6 +1,7 @@
 import logging
 from typing import Optional, List, Dict, Any
 from app.db.mongodb import mongo_db
+from app.core.auth_cache import AuthCache
 
 logger = logging.getLogger(__name__)
 
@@ -40,9 +41,13 @@ class UserRepository:
     @staticmethod
     async def update(user_id: str, update_data: Dict[str, Any]) -> bool:
         """Update user"""
-        return await mongo_db.update("users", {"id": user_id}, update_data)
+        updated = await mongo_db.update("users", {"id": user_id}, update_data)
+        AuthCache.invalidate_user(user_id)
+        return updated
     
     @staticmethod
     async def delete(user_id: str) -> bool:
         """Delete user"""
-        return await mongo_db.delete("users", {"id": user_id})
+        deleted = await mongo_db.delete("users", {"id": user_id})
+        AuthCache.invalidate_user(user_id)
+        return deleted
@@ -13,7 +13,9 @@ from fastapi import HTTPException, UploadFile
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
 from app.utils.pdf_splitter import PDFSplitter, create_enhanced_merged_summary
-from app.utils.approval_document_ai import extract_approval_document_fields_from_summary
+from app.utils.cpu_worker_pool import get_pdf_page_info_async, split_pdf_async
+from app.utils.approval_document_ai import extract_approval_document_fields_from_summary, APPROVAL_DOCUMENT_PROMPT_VERSION
+from app.utils.ai_extraction_cache import AIExtractionCache
 from app.utils.issued_by_abbreviation import normalize_issued_by
 
 logger = logging.getLogger(__name__)
@@ -94,8 +96,9 @@ class ApprovalDocumentAnalyzeService:
             splitter = PDFSplitter(max_pages_per_chunk=12)
             
             try:
-                total_pages = splitter.get_page_count(file_content)
-                needs_split = splitter.needs_splitting(file_content)
+                page_info = await get_pdf_page_info_async(file_content, splitter.max_pages_per_chunk)
+                total_pages = page_info['total_pages']
+                needs_split = page_info['needs_split']
                 logger.info(f"📊 PDF Analysis: {total_pages} pages, Split needed: {needs_split}")
             except ValueError as e:
                 logger.error(f"❌ Invalid PDF file: {e}")
@@ -175,23 +178,23 @@ class ApprovalDocumentAnalyzeService:
             analysis_result['_ship_name'] = ship_name
             analysis_result['_summary_text'] = ''
             
-            # Process based on file size
-            if needs_split and total_pages > 15:
-                # Large PDF processing with splitting
-                analysis_result = await ApprovalDocumentAnalyzeService._process_large_pdf(
-                    file_content=file_content,
-                    filename=filename,
-                    ship_name=ship_name,
-                    total_pages=total_pages,
-                    splitter=splitter,
-                    document_ai_config=document_ai_config,
-                    ai_config=ai_config,
-                    analysis_result=analysis_result,
-                    company_id=company_id
-                )
-            else:
+            async def run_ai_analysis(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+                # Process based on file size
+                if needs_split and total_pages > 15:
+                    # Large PDF processing with splitting
+                    return await ApprovalDocumentAnalyzeService._process_large_pdf(
+                        file_content=file_content,
+                        filename=filename,
+                        ship_name=ship_name,
+                        total_pages=total_pages,
+                        splitter=splitter,
+                        document_ai_config=document_ai_config,
+                        ai_config=ai_config,
+                        analysis_result=analysis_result,
+                        company_id=company_id
+                    )
                 # Small PDF: Normal single-file processing
-                analysis_result = await ApprovalDocumentAnalyzeService._process_small_pdf(
+                return await ApprovalDocumentAnalyzeService._process_small_pdf(
                     file_content=file_content,
                     filename=filename,
                     document_ai_config=document_ai_config,
@@ -200,6 +203,16 @@ class ApprovalDocumentAnalyzeService:
                     company_id=company_id
                 )
             
+            # ♻️ Same file + name + model + prompt analyzed before → reuse the AI output
+            # (the fallback document name is derived from the filename)
+            cache_key = AIExtractionCache.make_key(
+                file_content, "approval_document", ai_config, APPROVAL_DOCUMENT_PROMPT_VERSION, context=filename
+            )
+            analysis_result = await AIExtractionCache.get_or_analyze(
+                cache_key, analysis_result, run_ai_analysis, "approval_document",
+                ApprovalDocumentAnalyzeService._is_complete_analysis
+            )
+            
             # Normalize approved_by to standard abbreviation
             if analysis_result.get('approved_by'):
                 try:
@@ -226,6 +239,15 @@ class ApprovalDocumentAnalyzeService:
             raise HTTPException(status_code=500, detail=str(e))
     
     
+    @staticmethod
+    def _is_complete_analysis(analysis_result: Dict[str, Any]) -> bool:
+        """Whether the AI run extracted fields from every part (only those are cached)"""
+        split_info = analysis_result.get('_split_info') or {}
+        if split_info.get('was_split'):
+            # Set only when the chunk results were merged
+            return not split_info.get('has_failures')
+        return analysis_result.get('processing_method') == "analysis_only_no_upload"
+    
     @staticmethod
     async def _process_small_pdf(
         file_content: bytes,
@@ -358,7 +380,7 @@ class ApprovalDocumentAnalyzeService:
         
         try:
             # Split PDF into chunks
-            chunks = splitter.split_pdf(file_content, filename)
+            chunks = await split_pdf_async(file_content, filename, max_pages_per_chunk=splitter.max_pages_per_chunk)
             total_chunks = len(chunks)
             
             # Limit to first 5 chunks
@@ -13,11 +13,14 @@ from fastapi import HTTPException
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
 from app.utils.pdf_splitter import PDFSplitter, create_enhanced_merged_summary
+from app.utils.cpu_worker_pool import get_pdf_page_info_async, split_pdf_async
 from app.utils.audit_certificate_ai import (
     extract_audit_certificate_fields_from_summary,
-    AUDIT_CERTIFICATE_CATEGORIES
+    AUDIT_CERTIFICATE_CATEGORIES,
+    AUDIT_CERTIFICATE_PROMPT_VERSION
 )
 from app.utils.issued_by_abbreviation import normalize_issued_by
+from app.utils.ai_extraction_cache import AIExtractionCache
 
 logger = logging.getLogger(__name__)
 
@@ -167,56 +170,49 @@ class AuditCertificateAnalyzeService:
             
             logger.info("🤖 Analyzing certificate with Google Document AI...")
             
-            # Check if PDF needs splitting (>15 pages)
-            if file_ext == 'pdf':
-                splitter = PDFSplitter(max_pages_per_chunk=12)
-                try:
-                    total_pages = splitter.get_page_count(file_bytes)
-                    needs_split = splitter.needs_splitting(file_bytes)
-                    logger.info(f"📊 PDF: {total_pages} pages, Split needed: {needs_split}")
+            async def run_ai_extraction() -> Dict[str, Any]:
+                # Check if PDF needs splitting (>15 pages)
+                if file_ext == 'pdf':
+                    splitter = PDFSplitter(max_pages_per_chunk=12)
+                    try:
+                        page_info = await get_pdf_page_info_async(file_bytes, splitter.max_pages_per_chunk)
+                        total_pages = page_info['total_pages']
+                        needs_split = page_info['needs_split']
+                        logger.info(f"📊 PDF: {total_pages} pages, Split needed: {needs_split}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not detect page count: {e}, processing as single file")
+                        needs_split = False
                     
                     if needs_split:
-                        # Large file - split and process
-                        return await AuditCertificateAnalyzeService._process_large_file(
-                            file_bytes,
-                            filename,
-                            total_pages,
-                            ship,
-                            document_ai_config,
-                            ai_config_doc,
-                            current_user
-                        )
-                    else:
-                        # Small file - process directly
-                        return await AuditCertificateAnalyzeService._process_small_file(
-                            file_bytes,
-                            filename,
-                            ship,
-                            document_ai_config,
-                            ai_config_doc,
-                            current_user
-                        )
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not detect page count: {e}, processing as single file")
-                    return await AuditCertificateAnalyzeService._process_small_file(
-                        file_bytes,
-                        filename,
-                        ship,
-                        document_ai_config,
-                        ai_config_doc,
-                        current_user
-                    )
-            else:
-                # Image file - process directly
-                return await AuditCertificateAnalyzeService._process_small_file(
+                        # Large file - split and process (any failure retried as a single file, as before)
+                        try:
+                            return await AuditCertificateAnalyzeService._extract_large_file(
+                                file_bytes,
+                                filename,
+                                total_pages,
+                                document_ai_config,
+                                ai_config_doc
+                            )
+                        except Exception as e:
+                            logger.warning(f"⚠️ Large file processing failed: {e}, processing as single file")
+                
+                # Small file or image - process directly
+                return await AuditCertificateAnalyzeService._extract_small_file(
                     file_bytes,
                     filename,
-                    ship,
                     document_ai_config,
-                    ai_config_doc,
-                    current_user
+                    ai_config_doc
                 )
+            
+            # ♻️ Same file + name + model + prompt analyzed before → reuse the AI output
+            # (the prompt and the category fallback read the filename)
+            cache_key = AIExtractionCache.make_key(
+                file_bytes, "audit_certificate", ai_config_doc, AUDIT_CERTIFICATE_PROMPT_VERSION, context=filename
+            )
+            extraction = await AIExtractionCache.get_or_extract(cache_key, run_ai_extraction, "audit_certificate")
+            
+            # Per-ship post-processing runs on every call (also on cache hits)
+            return await AuditCertificateAnalyzeService._finalize_analysis(extraction, ship, current_user)
                 
         except HTTPException:
             raise
@@ -226,15 +222,13 @@ class AuditCertificateAnalyzeService:
             raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
     
     @staticmethod
-    async def _process_small_file(
+    async def _extract_small_file(
         file_bytes: bytes,
         filename: str,
-        ship: dict,
         document_ai_config: dict,
-        ai_config_doc: dict,
-        current_user: UserResponse
+        ai_config_doc: dict
     ) -> Dict[str, Any]:
-        """Process file ≤15 pages (or images) - single Document AI call"""
+        """AI extraction for a file ≤15 pages (or image) - single Document AI call"""
         try:
             logger.info("📄 Processing small file/image (single Document AI call)")
             
@@ -327,37 +321,9 @@ class AuditCertificateAnalyzeService:
                     detail="Could not extract certificate information from document"
                 )
             
-            # Normalize issued_by
-            if extracted_info.get('issued_by'):
-                extracted_info['issued_by'] = normalize_issued_by(extracted_info['issued_by'])
-            
-            # Validate ship info
-            validation_warning = await AuditCertificateAnalyzeService.validate_ship_info(
-                extracted_imo=extracted_info.get('imo_number'),
-                extracted_ship_name=extracted_info.get('ship_name'),
-                current_ship=ship
-            )
-            
-            # Check for duplicates
-            duplicate_warning = await AuditCertificateAnalyzeService.check_duplicate(
-                ship_id=ship["id"],
-                cert_name=extracted_info.get('cert_name'),
-                cert_no=extracted_info.get('cert_no'),
-                current_user=current_user
-            )
-            
-            # Check category (ISM/ISPS/MLC/CICA)
-            category_warning = await AuditCertificateAnalyzeService.check_category_ism_isps_mlc_cica(
-                cert_name=extracted_info.get('cert_name', '')
-            )
-            
             return {
-                "success": True,
                 "extracted_info": extracted_info,
-                "summary_text": summary_text,  # ⭐ NEW: Return summary text for storage
-                "validation_warning": validation_warning,
-                "duplicate_warning": duplicate_warning,
-                "category_warning": category_warning
+                "summary_text": summary_text  # ⭐ NEW: Return summary text for storage
             }
             
         except HTTPException:
@@ -367,22 +333,20 @@ class AuditCertificateAnalyzeService:
             raise HTTPException(status_code=500, detail=str(e))
     
     @staticmethod
-    async def _process_large_file(
+    async def _extract_large_file(
         file_bytes: bytes,
         filename: str,
         total_pages: int,
-        ship: dict,
         document_ai_config: dict,
-        ai_config_doc: dict,
-        current_user: UserResponse
+        ai_config_doc: dict
     ) -> Dict[str, Any]:
-        """Process file >15 pages with splitting - parallel Document AI calls"""
+        """AI extraction for a file >15 pages with splitting - parallel Document AI calls"""
         try:
             logger.info(f"📚 Processing large file ({total_pages} pages) with splitting")
             
             # Split PDF
             splitter = PDFSplitter(max_pages_per_chunk=12)
-            chunks = splitter.split_pdf(file_bytes)
+            chunks = await split_pdf_async(file_bytes, filename, max_pages_per_chunk=splitter.max_pages_per_chunk)
             logger.info(f"✂️ Split into {len(chunks)} chunks")
             
             # Process chunks in parallel
@@ -426,37 +390,9 @@ class AuditCertificateAnalyzeService:
                     detail="Could not extract certificate information from document"
                 )
             
-            # Normalize issued_by
-            if extracted_info.get('issued_by'):
-                extracted_info['issued_by'] = normalize_issued_by(extracted_info['issued_by'])
-            
-            # Validate ship info
-            validation_warning = await AuditCertificateAnalyzeService.validate_ship_info(
-                extracted_imo=extracted_info.get('imo_number'),
-                extracted_ship_name=extracted_info.get('ship_name'),
-                current_ship=ship
-            )
-            
-            # Check for duplicates
-            duplicate_warning = await AuditCertificateAnalyzeService.check_duplicate(
-                ship_id=ship["id"],
-                cert_name=extracted_info.get('cert_name'),
-                cert_no=extracted_info.get('cert_no'),
-                current_user=current_user
-            )
-            
-            # Check category (ISM/ISPS/MLC/CICA)
-            category_warning = await AuditCertificateAnalyzeService.check_category_ism_isps_mlc_cica(
-                cert_name=extracted_info.get('cert_name', '')
-            )
-            
             return {
-                "success": True,
                 "extracted_info": extracted_info,
-                "summary_text": merged_summary,  # ⭐ NEW: Return summary text for storage
-                "validation_warning": validation_warning,
-                "duplicate_warning": duplicate_warning,
-                "category_warning": category_warning
+                "summary_text": merged_summary  # ⭐ NEW: Return summary text for storage
             }
             
         except HTTPException:
@@ -465,6 +401,52 @@ class AuditCertificateAnalyzeService:
             logger.error(f"❌ Error processing large file: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    @staticmethod
+    async def _finalize_analysis(
+        extraction: Dict[str, Any],
+        ship: dict,
+        current_user: UserResponse
+    ) -> Dict[str, Any]:
+        """
+        Per-ship post-processing of an AI extraction (fresh or cached):
+        normalize issued_by, validate ship name/IMO, check duplicates and category
+        """
+        extracted_info = extraction["extracted_info"]
+        
+        # Normalize issued_by
+        if extracted_info.get('issued_by'):
+            extracted_info['issued_by'] = normalize_issued_by(extracted_info['issued_by'])
+        
+        # Validate ship info
+        validation_warning = await AuditCertificateAnalyzeService.validate_ship_info(
+            extracted_imo=extracted_info.get('imo_number'),
+            extracted_ship_name=extracted_info.get('ship_name'),
+            current_ship=ship
+        )
+        
+        # Check for duplicates
+        duplicate_warning = await AuditCertificateAnalyzeService.check_duplicate(
+            ship_id=ship["id"],
+            cert_name=extracted_info.get('cert_name'),
+            cert_no=extracted_info.get('cert_no'),
+            current_user=current_user
+        )
+        
+        # Check category (ISM/ISPS/MLC/CICA)
+        category_warning = await AuditCertificateAnalyzeService.check_category_ism_isps_mlc_cica(
+            cert_name=extracted_info.get('cert_name', '')
+        )
+        
+        return {
+            "success": True,
+            "extracted_info": extracted_info,
+            "summary_text": extraction.get("summary_text") or "",  # ⭐ NEW: Return summary text for storage
+            "validation_warning": validation_warning,
+            "duplicate_warning": duplicate_warning,
+            "category_warning": category_warning,
+            "ai_cache_hit": extraction.get("cache_hit", False)
+        }
+    
     @staticmethod
     async def validate_ship_info(
         extracted_imo: Optional[str],
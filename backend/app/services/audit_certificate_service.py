@@ -7,8 +7,11 @@ from fastapi import HTTPException, BackgroundTasks
 from app.models.audit_certificate import AuditCertificateCreate, AuditCertificateUpdate, AuditCertificateResponse, BulkDeleteAuditCertificateRequest
 from app.models.user import UserResponse, UserRole
 from app.db.mongodb import mongo_db
-from app.utils.certificate_abbreviation import generate_certificate_abbreviation
+from app.utils.certificate_abbreviation import AbbreviationMappingCache, generate_certificate_abbreviation
 from app.utils.issued_by_abbreviation import generate_organization_abbreviation
+from app.utils.survey_window import (
+    AUDIT_CERTIFICATE, backfill_survey_windows, refresh_survey_window, survey_window_fields, touches_survey_window
+)
 from app.utils.background_tasks import delete_file_background
 
 logger = logging.getLogger(__name__)
@@ -170,6 +173,9 @@ class AuditCertificateService:
             cert_dict["issued_by_abbreviation"] = generate_organization_abbreviation(cert_dict.get("issued_by"))
             logger.info(f"✅ Generated issued_by abbreviation: '{cert_dict['issued_by']}' → '{cert_dict['issued_by_abbreviation']}'")
         
+        cert_dict.update(survey_window_fields(
+            cert_dict.get("next_survey_display"), cert_dict.get("next_survey"), AUDIT_CERTIFICATE
+        ))
         await mongo_db.create(AuditCertificateService.collection_name, cert_dict)
         
         # Log audit
@@ -241,6 +247,8 @@ class AuditCertificateService:
         
         if update_data:
             await mongo_db.update(AuditCertificateService.collection_name, {"id": cert_id}, update_data)
+            if touches_survey_window(update_data):
+                await refresh_survey_window(AuditCertificateService.collection_name, cert_id, AUDIT_CERTIFICATE)
         
         updated_cert = await mongo_db.find_one(AuditCertificateService.collection_name, {"id": cert_id})
         
@@ -634,6 +642,9 @@ class AuditCertificateService:
                 
                 # Update certificate if there are changes
                 if update_data:
+                    update_data.update(survey_window_fields(
+                        update_data['next_survey_display'], update_data['next_survey'], AUDIT_CERTIFICATE
+                    ))
                     update_data['updated_at'] = datetime.now(timezone.utc)
                     await mongo_db.update(AuditCertificateService.collection_name, {"id": cert["id"]}, update_data)
                     updated_count += 1
@@ -687,7 +698,6 @@ class AuditCertificateService:
             dict with upcoming_surveys list and metadata
         """
         try:
-            import re
             from datetime import timedelta
             from dateutil.relativedelta import relativedelta
             
@@ -747,14 +757,29 @@ class AuditCertificateService:
             
             logger.info(f"Found {len(ships)} ships to check for upcoming surveys")
             
-            # Get all audit certificates for these ships (only if ships exist)
-            all_audit_certificates = []
+            # Audit certificates whose survey window contains today (materialized window
+            # fields, see app.utils.survey_window); older certificates are backfilled first
+            audit_certificates_in_window = []
             if ship_ids:
-                for ship_id in ship_ids:
-                    certs = await mongo_db.find_all(AuditCertificateService.collection_name, {"ship_id": ship_id})
-                    all_audit_certificates.extend(certs)
+                collection = AuditCertificateService.collection_name
+                await backfill_survey_windows(collection, {"ship_id": {"$in": ship_ids}}, AUDIT_CERTIFICATE)
+                today = datetime.combine(current_date, datetime.min.time())
+                audit_certificates_in_window = await mongo_db.database[collection].find(
+                    {
+                        "ship_id": {"$in": ship_ids},
+                        "survey_window_close": {"$gte": today},
+                        "survey_window_open": {"$lte": today}
+                    },
+                    {
+                        "_id": 0, "id": 1, "ship_id": 1, "cert_name": 1, "cert_abbreviation": 1,
+                        "next_survey": 1, "next_survey_display": 1, "next_survey_type": 1,
+                        "valid_date": 1, "last_endorse": 1, "status": 1,
+                        "survey_due_date": 1, "survey_window_open": 1, "survey_window_close": 1,
+                        "survey_window_annotation": 1
+                    }
+                ).to_list(length=None)
             
-            logger.info(f"📋 Found {len(all_audit_certificates)} audit certificates to check")
+            logger.info(f"📋 Found {len(audit_certificates_in_window)} audit certificates within their survey window")
             
             # ⭐ For Editor: Don't check company certificates (they don't have access)
             if is_editor:
@@ -769,111 +794,63 @@ class AuditCertificateService:
             
             # ==================== PROCESS AUDIT CERTIFICATES ====================
             
-            for cert in all_audit_certificates:
-                try:
-                    # Get Next Survey Display field (contains date with annotation like "30/10/2025 (±3M)")
-                    next_survey_display = cert.get('next_survey_display') or cert.get('next_survey')
-                    
-                    if not next_survey_display:
-                        continue
-                    
-                    # Parse Next Survey to extract date and window annotation
-                    next_survey_str = str(next_survey_display)
-                    
-                    # Extract date part (before annotation)
-                    # Format examples: "30/10/2025 (±6M)", "30/11/2025 (-3M)", "31/10/2027 (±3M)"
-                    date_match = re.search(r'(\d{2}/\d{2}/\d{4})', next_survey_str)
-                    if not date_match:
-                        continue
-                    
-                    date_str = date_match.group(1)
-                    next_survey_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                    
-                    # Determine window based on annotation
-                    window_open = None
-                    window_close = None
-                    window_type = ''
-                    has_explicit_annotation = False
-                    
-                    if '(±6M)' in next_survey_str:
-                        # Window: Next Survey ± 6M (Intermediate without Last Endorse)
-                        window_open = next_survey_date - relativedelta(months=6)
-                        window_close = next_survey_date + relativedelta(months=6)
-                        window_type = '±6M'
-                        has_explicit_annotation = True
-                    elif '(±3M)' in next_survey_str or '(+3M)' in next_survey_str or '(+-3M)' in next_survey_str:
-                        # Window: Next Survey ± 3M
-                        window_open = next_survey_date - relativedelta(months=3)
-                        window_close = next_survey_date + relativedelta(months=3)
-                        window_type = '±3M'
-                        has_explicit_annotation = True
-                    elif '(-3M)' in next_survey_str:
-                        # Window: Next Survey - 3M → Next Survey (only before)
-                        window_open = next_survey_date - relativedelta(months=3)
-                        window_close = next_survey_date
-                        window_type = '-3M'
-                        has_explicit_annotation = True
-                    else:
-                        # No annotation found - DEFAULT to (-3M) for safety
-                        window_open = next_survey_date - relativedelta(months=3)
-                        window_close = next_survey_date
-                        window_type = '-3M (default)'
-                        logger.info(f"📌 Certificate {cert.get('id', 'unknown')} has no annotation - using default (-3M) window")
-                    
-                    # Check if current_date is within window
-                    if window_open <= current_date <= window_close:
-                        # Find ship information
-                        ship_info = next((ship for ship in ships if ship.get('id') == cert.get('ship_id')), {})
-                        
-                        # Calculate status
-                        days_until_window_close = (window_close - current_date).days
-                        days_until_survey = (next_survey_date - current_date).days
-                        
-                        # Status logic
-                        # Overdue: Past window_close
-                        is_overdue = current_date > window_close
-                        
-                        # Critical: ≤ 30 days to window_close
-                        is_critical = 0 <= days_until_window_close <= 30
-                        
-                        # Due Soon: window_open < current_date < (window_close - 30 days)
-                        window_close_minus_30 = window_close - timedelta(days=30)
-                        is_due_soon = window_open < current_date < window_close_minus_30
-                        
-                        # Get cert abbreviation
-                        cert_abbreviation = cert.get('cert_abbreviation', '')
-                        cert_name_display = f"{cert.get('cert_name', '')} ({cert_abbreviation})" if cert_abbreviation else cert.get('cert_name', '')
-                        
-                        upcoming_survey = {
-                            'certificate_type': 'audit',  # Type indicator
-                            'certificate_id': cert.get('id'),
-                            'ship_id': cert.get('ship_id'),
-                            'ship_name': ship_info.get('name', ''),
-                            'cert_name': cert.get('cert_name', ''),
-                            'cert_abbreviation': cert_abbreviation,
-                            'cert_name_display': cert_name_display,
-                            'next_survey': next_survey_display,
-                            'next_survey_date': next_survey_date.isoformat(),
-                            'next_survey_type': cert.get('next_survey_type', ''),
-                            'valid_date': cert.get('valid_date'),
-                            'last_endorse': cert.get('last_endorse', ''),
-                            'status': cert.get('status', ''),
-                            'days_until_survey': days_until_survey,
-                            'days_until_window_close': days_until_window_close,
-                            'is_overdue': is_overdue,
-                            'is_due_soon': is_due_soon,
-                            'is_critical': is_critical,
-                            'is_within_window': True,
-                            'window_open': window_open.isoformat(),
-                            'window_close': window_close.isoformat(),
-                            'window_type': window_type
-                        }
-                        
-                        upcoming_surveys.append(upcoming_survey)
-                        
-                except Exception as cert_error:
-                    logger.warning(f"Error processing audit certificate {cert.get('id', 'unknown')}: {cert_error}")
-                    continue
+            ships_by_id = {ship.get('id'): ship for ship in ships}
+            
+            for cert in audit_certificates_in_window:
+                next_survey_display = cert.get('next_survey_display') or cert.get('next_survey')
+                next_survey_date = cert['survey_due_date'].date()
+                window_open = cert['survey_window_open'].date()
+                window_close = cert['survey_window_close'].date()
+                window_type = cert.get('survey_window_annotation') or '-3M (default)'
+                
+                # Find ship information
+                ship_info = ships_by_id.get(cert.get('ship_id')) or {}
+                
+                # Calculate status
+                days_until_window_close = (window_close - current_date).days
+                days_until_survey = (next_survey_date - current_date).days
+                
+                # Status logic
+                # Overdue: Past window_close
+                is_overdue = current_date > window_close
+                
+                # Critical: ≤ 30 days to window_close
+                is_critical = 0 <= days_until_window_close <= 30
+                
+                # Due Soon: window_open < current_date < (window_close - 30 days)
+                window_close_minus_30 = window_close - timedelta(days=30)
+                is_due_soon = window_open < current_date < window_close_minus_30
+                
+                # Get cert abbreviation
+                cert_abbreviation = cert.get('cert_abbreviation', '')
+                cert_name_display = f"{cert.get('cert_name', '')} ({cert_abbreviation})" if cert_abbreviation else cert.get('cert_name', '')
+                
+                upcoming_survey = {
+                    'certificate_type': 'audit',  # Type indicator
+                    'certificate_id': cert.get('id'),
+                    'ship_id': cert.get('ship_id'),
+                    'ship_name': ship_info.get('name', ''),
+                    'cert_name': cert.get('cert_name', ''),
+                    'cert_abbreviation': cert_abbreviation,
+                    'cert_name_display': cert_name_display,
+                    'next_survey': next_survey_display,
+                    'next_survey_date': next_survey_date.isoformat(),
+                    'next_survey_type': cert.get('next_survey_type', ''),
+                    'valid_date': cert.get('valid_date'),
+                    'last_endorse': cert.get('last_endorse', ''),
+                    'status': cert.get('status', ''),
+                    'days_until_survey': days_until_survey,
+                    'days_until_window_close': days_until_window_close,
+                    'is_overdue': is_overdue,
+                    'is_due_soon': is_due_soon,
+                    'is_critical': is_critical,
+                    'is_within_window': True,
+                    'window_open': window_open.isoformat(),
+                    'window_close': window_close.isoformat(),
+                    'window_type': window_type
+                }
+                
+                upcoming_surveys.append(upcoming_survey)
             
             # ==================== PROCESS COMPANY CERTIFICATES ====================
             
@@ -1116,10 +1093,7 @@ class AuditCertificateService:
             
             # ========== PRIORITY LOGIC FOR ABBREVIATION (like Class & Flag Certificate) ==========
             # Priority 1: Check user-defined abbreviation mappings FIRST
-            user_defined_abbr = await mongo_db.find_one(
-                "certificate_abbreviation_mappings",
-                {"cert_name": cert_name}
-            )
+            user_defined_abbr = await AbbreviationMappingCache.get(cert_name)
             
             if user_defined_abbr and user_defined_abbr.get("abbreviation"):
                 final_abbreviation = user_defined_abbr.get("abbreviation")
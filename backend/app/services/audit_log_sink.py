@@ -0,0 +1,156 @@
+"""
+Audit Log Sink
+Buffered writer for audit entries (crew_audit_logs, audit_trail) so audited
+mutations don't pay a database round trip per entry in the request path.
+
+- ``write(collection, entry)`` queues the entry and returns at once.
+- Entries are written with one ``insert_many`` per collection when
+  AUDIT_LOG_BATCH_SIZE entries are queued, or every AUDIT_LOG_FLUSH_SECONDS.
+- The queue holds at most AUDIT_LOG_MAX_QUEUE entries; a writer that finds it
+  full waits for a flush (back-pressure), and gets an error rather than growing
+  the queue if the database still refuses the writes.
+- ``shutdown()`` (app shutdown) stops the flush loop and drains the queue.
+- AUDIT_LOG_SYNC=true - or ``set_sync(True)`` in tests and scripts - writes
+  every entry immediately, as before.
+
+Entries become visible to readers up to AUDIT_LOG_FLUSH_SECONDS after they
+were logged. A failed flush keeps its entries for the next attempt.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_BATCH_SIZE = int(os.getenv('AUDIT_LOG_BATCH_SIZE', '200'))
+AUDIT_LOG_FLUSH_SECONDS = float(os.getenv('AUDIT_LOG_FLUSH_SECONDS', '1'))
+AUDIT_LOG_MAX_QUEUE = int(os.getenv('AUDIT_LOG_MAX_QUEUE', '10000'))
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class AuditLogSink:
+    """Process-wide buffered audit writer (see module docstring)"""
+
+    _sync = os.getenv('AUDIT_LOG_SYNC', 'false').lower() == 'true'
+    _pending: Dict[str, List[Dict[str, Any]]] = {}
+    _queued = 0
+    _flush_lock: Optional[asyncio.Lock] = None
+    _flush_task: Optional[asyncio.Task] = None
+    _size_flush: Optional[asyncio.Task] = None
+    written = 0
+    failed_flushes = 0
+
+    @staticmethod
+    def set_sync(sync: bool):
+        """Write entries immediately (tests / scripts) or buffer them (default)"""
+        AuditLogSink._sync = sync
+
+    @staticmethod
+    async def write(collection: str, entry: Dict[str, Any]):
+        """Queue ``entry`` for insertion into ``collection``"""
+        sink = AuditLogSink
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if sink._sync or loop is None:
+            await mongo_db.database[collection].insert_one(entry)
+            sink.written += 1
+            return
+
+        if sink._queued >= AUDIT_LOG_MAX_QUEUE:
+            # Back-pressure: the database is slower than the audit rate
+            logger.warning(f"⚠️ Audit log queue full ({sink._queued} entries), flushing inline")
+            await sink.flush()
+            if sink._queued >= AUDIT_LOG_MAX_QUEUE:
+                raise RuntimeError(f"Audit log queue full ({sink._queued} entries) and the database is not accepting writes")
+
+        sink._pending.setdefault(collection, []).append(entry)
+        sink._queued += 1
+        sink._ensure_flush_loop(loop)
+        if sink._queued >= AUDIT_LOG_BATCH_SIZE and (sink._size_flush is None or sink._size_flush.done()):
+            # Not cancelled on shutdown - it owns the entries it is writing
+            sink._size_flush = loop.create_task(sink.flush())
+
+    @staticmethod
+    async def flush() -> int:
+        """Write everything queued (one insert_many per collection); returns entries written"""
+        sink = AuditLogSink
+        if sink._flush_lock is None:
+            sink._flush_lock = asyncio.Lock()
+        async with sink._flush_lock:
+            pending, sink._pending = sink._pending, {}
+            sink._queued = 0
+            written = 0
+            for collection, entries in pending.items():
+                retry: List[Dict[str, Any]] = []
+                try:
+                    await mongo_db.database[collection].insert_many(entries, ordered=False)
+                except BulkWriteError as e:
+                    # Retry what failed; duplicates were written by an earlier attempt
+                    failed = {
+                        error['index'] for error in e.details.get('writeErrors', [])
+                        if error.get('code') != DUPLICATE_KEY_ERROR
+                    }
+                    retry = [entries[index] for index in sorted(failed)]
+                    logger.error(f"❌ Audit log flush to {collection}: {len(retry)} entries failed, kept for retry")
+                except Exception as e:
+                    # Unknown outcome: retry all (the _id assigned on the first attempt
+                    # turns entries that did reach the database into ignored duplicates)
+                    retry = entries
+                    logger.error(f"❌ Audit log flush to {collection} failed ({len(retry)} entries kept): {e}")
+                if retry:
+                    sink._pending.setdefault(collection, [])[:0] = retry
+                    sink._queued += len(retry)
+                    sink.failed_flushes += 1
+                written += len(entries) - len(retry)
+            sink.written += written
+            return written
+
+    @staticmethod
+    async def _flush_loop():
+        while True:
+            await asyncio.sleep(AUDIT_LOG_FLUSH_SECONDS)
+            if AuditLogSink._queued:
+                # Shielded: cancelling the loop must not abandon a batch mid-write
+                await asyncio.shield(AuditLogSink.flush())
+
+    @staticmethod
+    def _ensure_flush_loop(loop: asyncio.AbstractEventLoop):
+        sink = AuditLogSink
+        if sink._flush_task is None or sink._flush_task.done() or sink._flush_task.get_loop() is not loop:
+            if sink._flush_task is not None and sink._flush_task.get_loop() is not loop:
+                sink._flush_lock = None  # Bound to the previous event loop
+            sink._flush_task = loop.create_task(sink._flush_loop())
+
+    @staticmethod
+    async def shutdown():
+        """Stop the flush loop and write every queued entry"""
+        sink = AuditLogSink
+        if sink._flush_task is not None and not sink._flush_task.done():
+            sink._flush_task.cancel()
+            try:
+                await sink._flush_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        sink._flush_task = None
+        # In-flight flushes finish first (flush() waits for the lock)
+        written = await sink.flush()
+        if written:
+            logger.info(f"📝 Audit log sink drained ({written} entries)")
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        sink = AuditLogSink
+        return {
+            "mode": "sync" if sink._sync else "buffered",
+            "queued": sink._queued,
+            "written": sink.written,
+            "failed_flushes": sink.failed_flushes,
+        }
@@ -13,7 +13,9 @@ from fastapi import HTTPException, UploadFile
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
 from app.utils.pdf_splitter import PDFSplitter, create_enhanced_merged_summary
-from app.utils.audit_report_ai import extract_audit_report_fields_from_summary
+from app.utils.cpu_worker_pool import get_pdf_page_info_async, split_pdf_async
+from app.utils.audit_report_ai import extract_audit_report_fields_from_summary, AUDIT_REPORT_PROMPT_VERSION
+from app.utils.ai_extraction_cache import AIExtractionCache
 from app.utils.issued_by_abbreviation import normalize_issued_by
 
 logger = logging.getLogger(__name__)
@@ -95,8 +97,9 @@ class AuditReportAnalyzeService:
             splitter = PDFSplitter(max_pages_per_chunk=12)
             
             try:
-                total_pages = splitter.get_page_count(file_content)
-                needs_split = splitter.needs_splitting(file_content)
+                page_info = await get_pdf_page_info_async(file_content, splitter.max_pages_per_chunk)
+                total_pages = page_info['total_pages']
+                needs_split = page_info['needs_split']
                 logger.info(f"📊 PDF Analysis: {total_pages} pages, Split needed: {needs_split}")
             except ValueError as e:
                 logger.error(f"❌ Invalid PDF file: {e}")
@@ -178,26 +181,28 @@ class AuditReportAnalyzeService:
                 "custom_api_key": ai_config_doc.get("custom_api_key")
             }
             
-            # Process PDF based on size
-            if not needs_split:
-                # Process small PDF (≤15 pages)
-                analysis_result = await AuditReportAnalyzeService._process_small_pdf(
-                    file_content=file_content,
-                    filename=filename,
-                    document_ai_config=document_ai_config,
-                    ai_config=ai_config,
-                    analysis_result=analysis_result,
-                    company_id=company_uuid
-                )
+            async def run_ai_analysis(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+                # Process PDF based on size
+                if not needs_split:
+                    # Process small PDF (≤15 pages)
+                    analysis_result = await AuditReportAnalyzeService._process_small_pdf(
+                        file_content=file_content,
+                        filename=filename,
+                        document_ai_config=document_ai_config,
+                        ai_config=ai_config,
+                        analysis_result=analysis_result,
+                        company_id=company_uuid
+                    )
+                    
+                    analysis_result['_split_info'] = {
+                        'was_split': False,
+                        'total_pages': total_pages,
+                        'chunks_count': 1
+                    }
+                    return analysis_result
                 
-                analysis_result['_split_info'] = {
-                    'was_split': False,
-                    'total_pages': total_pages,
-                    'chunks_count': 1
-                }
-            else:
                 # Process large PDF (>15 pages) with splitting
-                analysis_result = await AuditReportAnalyzeService._process_large_pdf(
+                return await AuditReportAnalyzeService._process_large_pdf(
                     file_content=file_content,
                     filename=filename,
                     ship_name=ship_name,
@@ -209,6 +214,16 @@ class AuditReportAnalyzeService:
                     company_id=company_uuid
                 )
             
+            # ♻️ Same file + name + model + prompt analyzed before → reuse the AI output
+            # (the filename is part of the key: audit_type and report_form are read from it)
+            cache_key = AIExtractionCache.make_key(
+                file_content, "audit_report", ai_config_doc, AUDIT_REPORT_PROMPT_VERSION, context=filename
+            )
+            analysis_result = await AIExtractionCache.get_or_analyze(
+                cache_key, analysis_result, run_ai_analysis, "audit_report",
+                AuditReportAnalyzeService._is_complete_analysis
+            )
+            
             # Normalize issued_by to standard abbreviation
             if analysis_result.get('issued_by'):
                 try:
@@ -266,6 +281,11 @@ class AuditReportAnalyzeService:
             raise HTTPException(status_code=500, detail=str(e))
     
     
+    @staticmethod
+    def _is_complete_analysis(analysis_result: Dict[str, Any]) -> bool:
+        """Whether every chunk was analyzed (only those runs are cached; failed runs raise)"""
+        return not (analysis_result.get('_split_info') or {}).get('failed_chunks')
+    
     @staticmethod
     async def _process_small_pdf(
         file_content: bytes,
@@ -402,7 +422,7 @@ class AuditReportAnalyzeService:
         
         try:
             # Split PDF into chunks
-            chunks = splitter.split_pdf(file_content, filename)
+            chunks = await split_pdf_async(file_content, filename, max_pages_per_chunk=splitter.max_pages_per_chunk)
             logger.info(f"✂️ Split into {len(chunks)} chunks")
             
             # Limit to first 5 chunks
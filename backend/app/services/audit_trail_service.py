@@ -7,6 +7,7 @@ import logging
 from datetime import datetime, timezone
 from typing import Dict, Optional
 from app.db.mongodb import mongo_db
+from app.services.audit_log_sink import AuditLogSink
 
 logger = logging.getLogger(__name__)
 
@@ -48,10 +49,11 @@ class AuditTrailService:
                 "company_id": company_id,
                 "timestamp": datetime.now(timezone.utc),
                 "ip_address": ip_address,
-                "user_agent": user_agent
+                "user_agent": user_agent,
+                "created_at": datetime.now(timezone.utc)
             }
             
-            await mongo_db.create("audit_trail", audit_entry)
+            await AuditLogSink.write("audit_trail", audit_entry)
             
             logger.info(f"📝 Audit: {action} on {resource_type}/{resource_id} by user {user_id}")
             
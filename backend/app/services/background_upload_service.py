@@ -8,6 +8,8 @@ NEW STRATEGY (v2):
 - Backend tracks progress per file
 - Works for any number of files without hitting request size limits
 """
+import os
+import time
 import uuid
 import logging
 import asyncio
@@ -19,9 +21,21 @@ from fastapi import HTTPException, UploadFile
 
 from app.models.user import UserResponse
 from app.db.mongodb import mongo_db
+from app.utils.adaptive_pacer import AdaptivePacer, is_throttle_response
+from app.utils.http_client import http_session
 
 logger = logging.getLogger(__name__)
 
+# V3 processing: max concurrent Apps Script uploads per task (adapted down on throttling)
+BACKGROUND_UPLOAD_CONCURRENCY = int(os.getenv('BACKGROUND_UPLOAD_CONCURRENCY', '4'))
+BACKGROUND_UPLOAD_THROTTLE_RETRIES = 3
+# Progress is written every N results or every N seconds, whichever comes first
+BACKGROUND_UPLOAD_PROGRESS_BATCH = 5
+BACKGROUND_UPLOAD_PROGRESS_INTERVAL = 2.0
+
+# Cancellation signals of tasks being processed in this process
+_cancel_events: Dict[str, asyncio.Event] = {}
+
 
 class BackgroundUploadTaskService:
     """Service for managing background upload tasks"""
@@ -95,7 +109,7 @@ class BackgroundUploadTaskService:
             "completed_files": 0,
             "failed_files": 0,
             "current_file": "",
-            "results": [],  # List of {filename, success, file_id, error}
+            "results": [],  # List of {index, filename, success, file_id, error} (index into pending_files)
             "folder_id": None,
             "folder_link": None,
             "document_id": None,
@@ -139,11 +153,41 @@ class BackgroundUploadTaskService:
     
     @staticmethod
     async def clear_pending_files(task_id: str):
-        """Clear pending files after processing"""
+        """Clear pending files after processing and release their spooled bytes"""
+        from app.services.upload_spool_service import UploadSpoolService
+        
+        pending_files = await BackgroundUploadTaskService.get_pending_files(task_id)
         await mongo_db.database[BackgroundUploadTaskService.COLLECTION].update_one(
             {"id": task_id},
             {"$set": {"pending_files": [], "updated_at": datetime.utcnow()}}
         )
+        for file_data in pending_files:
+            await UploadSpoolService.release(file_data.get("spool_ref"))
+    
+    @staticmethod
+    async def record_progress(task_id: str, results: List[Dict[str, Any]], updates: Dict[str, Any]) -> Optional[str]:
+        """
+        Append a batch of upload results and progress counters in one write.
+        Returns the task status (so callers notice a cancellation).
+        """
+        update: Dict[str, Any] = {"$set": {**updates, "updated_at": datetime.utcnow()}}
+        if results:
+            update["$push"] = {"results": {"$each": results}}
+        task = await mongo_db.database[BackgroundUploadTaskService.COLLECTION].find_one_and_update(
+            {"id": task_id},
+            update,
+            projection={"status": 1}
+        )
+        return task.get("status") if task else None
+    
+    @staticmethod
+    def register_cancel_event(task_id: str) -> asyncio.Event:
+        """In-process cancellation signal for a task being processed here"""
+        return _cancel_events.setdefault(task_id, asyncio.Event())
+    
+    @staticmethod
+    def unregister_cancel_event(task_id: str):
+        _cancel_events.pop(task_id, None)
     
     @staticmethod
     async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
@@ -205,6 +249,15 @@ class BackgroundUploadTaskService:
             "completed_at": datetime.utcnow()
         })
         
+        # Stop an upload running in this process right away (other instances
+        # notice the status on their next progress write)
+        if task_id in _cancel_events:
+            _cancel_events[task_id].set()
+        
+        # Nothing will process files that were never started
+        if task.get("status") in ["pending", "receiving"]:
+            await BackgroundUploadTaskService.clear_pending_files(task_id)
+        
         logger.info(f"🚫 Task {task_id} cancelled by user {user_id}")
         
         return {
@@ -228,8 +281,12 @@ class BackgroundUploadService:
     ):
         """
         Background task to process pending files.
-        Called via asyncio.create_task() - runs on server side.
-        Similar to Auto Rename background processing.
+        Runs as a durable job (JOB_BACKGROUND_UPLOAD_PROCESS) on the server side.
+        Files are uploaded concurrently under an adaptive pacer; progress is written in batches.
+        Until one upload has succeeded (and so created the Drive folder) files go one at
+        a time, so concurrent uploads never create the same folder twice.
+        An unexpected error is re-raised so the job queue retries the job; files already
+        uploaded are skipped on the retry.
         """
         from app.repositories.gdrive_config_repository import GDriveConfigRepository
         
@@ -242,6 +299,13 @@ class BackgroundUploadService:
                 logger.error(f"Task {task_id} not found")
                 return
             
+            if task.get("status") in ["completed", "completed_with_errors", "failed", "cancelled"]:
+                # Retried job whose previous attempt already finalized the task
+                # (it may have stopped before releasing the pending files)
+                logger.info(f"ℹ️ [V3] Task {task_id} already {task.get('status')}, nothing to do")
+                await BackgroundUploadTaskService.clear_pending_files(task_id)
+                return
+            
             ship_id = task.get("ship_id")
             folder_name = task.get("folder_name")
             
@@ -249,10 +313,7 @@ class BackgroundUploadService:
             ship = await mongo_db.database.ships.find_one({"id": ship_id})
             if not ship:
                 logger.error(f"Ship not found: {ship_id}")
-                await BackgroundUploadTaskService.update_task(task_id, {
-                    "status": "failed",
-                    "current_file": "Ship not found"
-                })
+                await BackgroundUploadService.fail_task(task_id, "Ship not found")
                 return
             
             ship_name = ship.get("name", "Unknown")
@@ -262,10 +323,7 @@ class BackgroundUploadService:
             gdrive_config = await GDriveConfigRepository.get_by_company(str(company_id))
             if not gdrive_config:
                 logger.error(f"GDrive not configured for company {company_id}")
-                await BackgroundUploadTaskService.update_task(task_id, {
-                    "status": "failed",
-                    "current_file": "Google Drive not configured"
-                })
+                await BackgroundUploadService.fail_task(task_id, "Google Drive not configured")
                 return
             
             script_url = gdrive_config.get("web_app_url") or gdrive_config.get("apps_script_url")
@@ -273,10 +331,7 @@ class BackgroundUploadService:
             
             if not script_url or not parent_folder_id:
                 logger.error("GDrive configuration incomplete")
-                await BackgroundUploadTaskService.update_task(task_id, {
-                    "status": "failed",
-                    "current_file": "Google Drive configuration incomplete"
-                })
+                await BackgroundUploadService.fail_task(task_id, "Google Drive configuration incomplete")
                 return
             
             # Get pending files
@@ -285,97 +340,132 @@ class BackgroundUploadService:
             
             logger.info(f"📤 [V3] Processing {total_files} files for task {task_id}")
             
-            completed = 0
+            # Resume support: keep results of a previous (interrupted) attempt. Results are
+            # keyed by pending-file index (file names may repeat within a folder upload)
+            previous_results = task.get("results") or []
+            uploaded_indexes = {r["index"] for r in previous_results if r.get("success") and "index" in r}
+            completed = len(uploaded_indexes)
             failed = 0
-            file_ids = []
-            folder_id = None
+            file_ids = list(task.get("file_ids") or [])
+            folder_id = task.get("folder_id")
+            folder_ready = bool(folder_id or uploaded_indexes)
+            recorded = set()
+            
+            # Uploads run concurrently; the pacer adapts concurrency to Apps Script
+            # latency and quota errors (no fixed delay between files)
+            pacer = AdaptivePacer(max_concurrency=BACKGROUND_UPLOAD_CONCURRENCY)
+            cancel_event = BackgroundUploadTaskService.register_cancel_event(task_id)
+            unflushed_results: List[Dict[str, Any]] = []
+            flush_lock = asyncio.Lock()
+            last_flush = time.monotonic()
+            current_file = ""
+            
+            async def flush_progress():
+                # One write per batch of results; also picks up a cancellation
+                # made on another instance
+                nonlocal last_flush
+                async with flush_lock:
+                    results = unflushed_results[:]
+                    unflushed_results.clear()
+                    last_flush = time.monotonic()
+                    status = await BackgroundUploadTaskService.record_progress(task_id, results, {
+                        "completed_files": completed,
+                        "failed_files": failed,
+                        "file_ids": list(file_ids),
+                        "current_file": current_file
+                    })
+                if status == "cancelled":
+                    cancel_event.set()
             
-            # Process files sequentially with 2s delay (like Auto Rename)
-            for i, file_data in enumerate(pending_files):
-                # Check if cancelled
-                task = await BackgroundUploadTaskService.get_task(task_id)
-                if task.get("status") == "cancelled":
-                    logger.info(f"🚫 Task {task_id} cancelled. Stopping.")
-                    break
-                
+            async def upload_one(i: int, file_data: Dict[str, Any], session: aiohttp.ClientSession):
+                nonlocal completed, failed, folder_id, folder_ready, current_file
                 filename = file_data.get("filename", f"file_{i}")
+                payload = {
+                    "action": "upload_file_with_folder_creation",
+                    "parent_folder_id": parent_folder_id,
+                    "ship_name": ship_name,
+                    "parent_category": "Class & Flag Cert/Other Documents",
+                    "category": folder_name,
+                    "filename": filename,
+                    "content_type": file_data.get("content_type", "application/octet-stream")
+                }
                 
-                # Update current file
-                await BackgroundUploadTaskService.update_task(task_id, {
-                    "current_file": f"Uploading {i + 1}/{total_files}: {filename}"
-                })
-                
-                try:
-                    # Prepare payload
-                    payload = {
-                        "action": "upload_file_with_folder_creation",
-                        "parent_folder_id": parent_folder_id,
-                        "ship_name": ship_name,
-                        "parent_category": "Class & Flag Cert/Other Documents",
-                        "category": folder_name,
-                        "filename": filename,
-                        "file_content": file_data.get("content_base64"),
-                        "content_type": file_data.get("content_type", "application/octet-stream")
-                    }
-                    
-                    # Upload to GDrive via Apps Script
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(
-                            script_url,
-                            json=payload,
-                            timeout=aiohttp.ClientTimeout(total=300)
-                        ) as response:
-                            result = await response.json()
-                    
-                    if result.get('success'):
-                        file_id = result.get('file_id')
-                        folder_id = result.get('folder_id') or folder_id
-                        
-                        completed += 1
-                        file_ids.append(file_id)
-                        
-                        logger.info(f"✅ [{task_id}] Uploaded {i + 1}/{total_files}: {filename}")
-                        
-                        # Add success result
-                        await BackgroundUploadTaskService.add_result(task_id, {
-                            'success': True,
-                            'filename': filename,
-                            'file_id': file_id
-                        })
-                    else:
-                        failed += 1
-                        error_msg = result.get('message', 'Unknown error')
-                        logger.warning(f"⚠️ [{task_id}] Failed {i + 1}/{total_files}: {filename} - {error_msg}")
-                        
-                        await BackgroundUploadTaskService.add_result(task_id, {
-                            'success': False,
-                            'filename': filename,
-                            'error': error_msg
-                        })
+                result, error_msg = None, None
+                for attempt in range(BACKGROUND_UPLOAD_THROTTLE_RETRIES + 1):
+                    async with pacer.slot():
+                        if cancel_event.is_set():
+                            return
+                        current_file = f"Uploading {i + 1}/{total_files}: {filename}"
+                        started = time.monotonic()
+                        try:
+                            status_code, result, retry_after = await BackgroundUploadService._post_pending_file(
+                                session, script_url, payload, file_data
+                            )
+                            error_msg = None if result.get('success') else result.get('message', 'Unknown error')
+                        except Exception as e:
+                            status_code, result, retry_after, error_msg = None, None, None, str(e)
                         
-                except Exception as e:
-                    failed += 1
-                    logger.error(f"❌ [{task_id}] Error uploading {filename}: {e}")
-                    
-                    await BackgroundUploadTaskService.add_result(task_id, {
-                        'success': False,
-                        'filename': filename,
-                        'error': str(e)
-                    })
+                        if error_msg and is_throttle_response(status_code, error_msg) and attempt < BACKGROUND_UPLOAD_THROTTLE_RETRIES:
+                            pacer.record_throttle(retry_after)
+                            logger.warning(f"⏳ [{task_id}] Throttled on {filename}, retrying: {error_msg}")
+                            continue
+                        if not error_msg:
+                            pacer.record_success(time.monotonic() - started)
+                        break
                 
-                # Update progress
-                await BackgroundUploadTaskService.update_task(task_id, {
-                    "completed_files": completed,
-                    "failed_files": failed,
-                    "file_ids": file_ids
-                })
+                recorded.add(i)
+                if not error_msg:
+                    completed += 1
+                    file_ids.append(result.get('file_id'))
+                    folder_id = result.get('folder_id') or folder_id
+                    folder_ready = True
+                    logger.info(f"✅ [{task_id}] Uploaded {i + 1}/{total_files}: {filename}")
+                    unflushed_results.append({'success': True, 'index': i, 'filename': filename, 'file_id': result.get('file_id')})
+                else:
+                    failed += 1
+                    logger.warning(f"⚠️ [{task_id}] Failed {i + 1}/{total_files}: {filename} - {error_msg}")
+                    unflushed_results.append({'success': False, 'index': i, 'filename': filename, 'error': error_msg})
                 
-                # Delay between files (like Auto Rename uses 500ms, we use 2s)
-                if i < total_files - 1:
-                    await asyncio.sleep(2)
+                if (len(unflushed_results) >= BACKGROUND_UPLOAD_PROGRESS_BATCH
+                        or time.monotonic() - last_flush >= BACKGROUND_UPLOAD_PROGRESS_INTERVAL):
+                    await flush_progress()
+            
+            async def upload_guarded(i: int, file_data: Dict[str, Any], session: aiohttp.ClientSession):
+                # One failing file must not abort the others
+                nonlocal failed
+                try:
+                    await upload_one(i, file_data, session)
+                except Exception as e:
+                    logger.error(f"❌ [{task_id}] Error on {file_data.get('filename')}: {e}")
+                    if i not in recorded:
+                        recorded.add(i)
+                        failed += 1
+                        unflushed_results.append({'success': False, 'index': i, 'filename': file_data.get('filename'), 'error': str(e)})
+            
+            remaining = [
+                (i, file_data) for i, file_data in enumerate(pending_files)
+                if i not in uploaded_indexes
+            ]
+            try:
+                async with http_session() as session:
+                    # The first upload creates the target folder: run alone until one succeeds
+                    while remaining and not folder_ready and not cancel_event.is_set():
+                        i, file_data = remaining.pop(0)
+                        await upload_guarded(i, file_data, session)
+                    await asyncio.gather(*[
+                        upload_guarded(i, file_data, session) for i, file_data in remaining
+                    ], return_exceptions=True)
+                current_file = ""
+                await flush_progress()
+            finally:
+                BackgroundUploadTaskService.unregister_cancel_event(task_id)
             
             # Finalize task
-            final_status = "completed" if failed == 0 else ("failed" if completed == 0 else "completed_with_errors")
+            if cancel_event.is_set():
+                logger.info(f"🚫 Task {task_id} cancelled. Stopped after {completed} uploads.")
+                final_status = "cancelled"
+            else:
+                final_status = "completed" if failed == 0 else ("failed" if completed == 0 else "completed_with_errors")
             
             updates = {
                 "status": final_status,
@@ -408,11 +498,67 @@ class BackgroundUploadService:
             import traceback
             logger.error(f"Traceback: {traceback.format_exc()}")
             
+            # Record the error but keep the task open: the job is retried (files already
+            # uploaded are skipped) and only a dead-lettered job fails it (see fail_task)
             await BackgroundUploadTaskService.update_task(task_id, {
-                "status": "failed",
-                "current_file": f"Error: {str(e)}",
-                "completed_at": datetime.utcnow()
+                "current_file": f"Error: {str(e)} - retrying",
+                "last_error": str(e)
             })
+            raise
+    
+    @staticmethod
+    async def fail_task(task_id: str, error: str):
+        """Mark a task failed for good and release its pending files (spooled bytes)"""
+        await BackgroundUploadTaskService.update_task(task_id, {
+            "status": "failed",
+            "current_file": error,
+            "completed_at": datetime.utcnow()
+        })
+        await BackgroundUploadTaskService.clear_pending_files(task_id)
+    
+    @staticmethod
+    async def _post_pending_file(
+        session: aiohttp.ClientSession,
+        script_url: str,
+        payload: Dict[str, Any],
+        file_data: Dict[str, Any]
+    ):
+        """
+        Send one pending file to Apps Script.
+        
+        Returns:
+            (HTTP status, result dict, Retry-After seconds or None)
+        """
+        from app.services.upload_spool_service import UploadSpoolService
+        
+        if file_data.get("spool_ref"):
+            # Stream base64 straight from the spool into the request body
+            body, content_length = UploadSpoolService.json_body_with_base64(
+                payload, "file_content", file_data["spool_ref"]
+            )
+            request_kwargs = {
+                "data": body,
+                "headers": {"Content-Type": "application/json", "Content-Length": str(content_length)}
+            }
+        else:
+            # Task created before spooling was introduced
+            request_kwargs = {"json": {**payload, "file_content": file_data.get("content_base64")}}
+        
+        async with session.post(
+            script_url,
+            timeout=aiohttp.ClientTimeout(total=300),
+            **request_kwargs
+        ) as response:
+            retry_after = response.headers.get("Retry-After")
+            try:
+                result = await response.json(content_type=None)
+            except Exception:
+                result = {"success": False, "message": f"HTTP {response.status}"}
+            return (
+                response.status,
+                result if isinstance(result, dict) else {"success": False, "message": str(result)},
+                float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
     
     @staticmethod
     async def _create_document_for_task_v3(task_id: str, task: Dict, updates: Dict, current_user: UserResponse) -> Optional[str]:
@@ -578,7 +724,7 @@ class BackgroundUploadService:
             }
             
             # Upload to Apps Script
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.post(
                     script_url,
                     json=payload,
@@ -960,7 +1106,7 @@ class BackgroundUploadService:
                     }
                     
                     # Upload to Apps Script
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         async with session.post(
                             script_url,
                             json=payload,
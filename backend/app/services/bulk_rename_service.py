@@ -114,14 +114,18 @@ class BulkRenameService:
             task_type=task_type
         )
         
-        # Start background processing
-        asyncio.create_task(
-            BulkRenameService._process_bulk_rename(
-                task_id=task_id,
-                certificate_ids=certificate_ids,
-                current_user=current_user,
-                task_type=task_type
-            )
+        # Start background processing as a durable job (survives instance restarts)
+        from app.services.job_queue_service import JobQueueService, JOB_BULK_RENAME
+        await JobQueueService.enqueue(
+            JOB_BULK_RENAME,
+            {
+                "task_id": task_id,
+                "certificate_ids": certificate_ids,
+                "user_id": current_user.id,
+                "company_id": current_user.company,
+                "task_type": task_type
+            },
+            idempotency_key=f"{JOB_BULK_RENAME}:{task_id}"
         )
         
         return {
@@ -17,9 +17,17 @@ from app.db.mongodb import mongo_db
 from app.services.ai_config_service import AIConfigService
 from app.repositories.ship_repository import ShipRepository
 from app.repositories.certificate_repository import CertificateRepository
+from app.utils.http_client import http_session
+from app.utils.upload_ingest import ingest_upload
 
 logger = logging.getLogger(__name__)
 
+# Per-stage concurrency for the background multi-upload pipeline
+# (AI analysis is additionally bounded by the LLM client's per-provider limit)
+CERT_UPLOAD_READ_CONCURRENCY = int(os.getenv('CERT_UPLOAD_READ_CONCURRENCY', '2'))
+CERT_UPLOAD_ANALYZE_CONCURRENCY = int(os.getenv('CERT_UPLOAD_ANALYZE_CONCURRENCY', '4'))
+CERT_UPLOAD_DB_CONCURRENCY = int(os.getenv('CERT_UPLOAD_DB_CONCURRENCY', '4'))
+
 # ⭐ ISM/ISPS/MLC/CICA Certificate Categories (from audit_certificate_ai.py)
 AUDIT_CERTIFICATE_CATEGORIES = {
     "ISM": [
@@ -148,7 +156,7 @@ class CertificateMultiUploadService:
                 warmup_start = time.time()
                 logger.info("🔥 Warming up Apps Script before processing certificates...")
                 try:
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         async with session.post(
                             apps_script_url,
                             json={"action": "ping"},
@@ -240,6 +248,7 @@ class CertificateMultiUploadService:
         from app.services.upload_task_service import UploadTaskService
         from app.models.upload_task import TaskStatus, ProcessingType
         import tempfile
+        import shutil
         import os as os_module
         
         try:
@@ -284,24 +293,43 @@ class CertificateMultiUploadService:
             logger.info(f"📊 Queueing {len(files)} files for BACKGROUND processing")
             
             temp_files = []
-            for file in files:
-                file_content = await file.read()
-                
-                # Save to temp file
-                temp_dir = tempfile.mkdtemp(prefix="cert_upload_")
-                temp_path = os_module.path.join(temp_dir, file.filename)
-                
-                with open(temp_path, "wb") as f:
-                    f.write(file_content)
-                
-                temp_files.append({
-                    "temp_path": temp_path,
-                    "filename": file.filename,
-                    "content_type": file.content_type,
-                    "path_info": {"path": "BACKGROUND", "reason": "All files processed in background for reliability"}
-                })
-                
-                logger.info(f"📁 {file.filename}: Saved to temp, queued for background processing")
+            rejected_results = []
+            first_rejection = None
+            try:
+                for file in files:
+                    # Size limit checked while streaming; the spool is copied in chunks, never held in memory
+                    try:
+                        upload = await ingest_upload(file, allow_empty=True)
+                    except HTTPException as e:
+                        # Reject this file only (same result shape as the single-file path)
+                        first_rejection = first_rejection or e
+                        message = "File size exceeds the upload limit" if e.status_code == 413 else e.detail
+                        logger.warning(f"⚠️ {file.filename}: rejected - {message}")
+                        rejected_results.append({"filename": file.filename, "status": "error", "message": message})
+                        continue
+                    
+                    # Save to temp file
+                    temp_dir = tempfile.mkdtemp(prefix="cert_upload_")
+                    temp_path = os_module.path.join(temp_dir, file.filename)
+                    temp_files.append({
+                        "temp_path": temp_path,
+                        "filename": file.filename,
+                        "content_type": file.content_type,
+                        "path_info": {"path": "BACKGROUND", "reason": "All files processed in background for reliability"}
+                    })
+                    
+                    await upload.save_to(temp_path)
+                    
+                    logger.info(f"📁 {file.filename}: Saved to temp, queued for background processing")
+            except Exception:
+                # Nothing will process the files saved so far
+                for temp_file in temp_files:
+                    shutil.rmtree(os_module.path.dirname(temp_file["temp_path"]), ignore_errors=True)
+                raise
+            
+            if not temp_files and first_rejection is not None:
+                # Every file rejected: fail the request as before (the frontend sends one file per request)
+                raise first_rejection
             
             # Step 4: Create task in database (fast - ~100ms)
             task_id = await UploadTaskService.create_task(
@@ -324,19 +352,19 @@ class CertificateMultiUploadService:
                 company_id=current_user.company
             )
             
-            logger.info(f"📋 Created background task {task_id} for {len(files)} files - returning immediately")
+            logger.info(f"📋 Created background task {task_id} for {len(temp_files)} files - returning immediately")
             
             # Step 6: Return IMMEDIATELY with task_id
             # Total time: ~1 second (no blocking operations)
             response = {
-                "fast_path_results": [],  # All files go to background
+                "fast_path_results": rejected_results,  # All accepted files go to background
                 "slow_path_task_id": task_id,
                 "summary": {
                     "total_files": len(files),
-                    "fast_path_count": 0,
-                    "slow_path_count": len(files),
+                    "fast_path_count": len(rejected_results),
+                    "slow_path_count": len(temp_files),
                     "fast_path_completed": 0,
-                    "fast_path_errors": 0,
+                    "fast_path_errors": len(rejected_results),
                     "slow_path_processing": True
                 },
                 "ship": {
@@ -374,7 +402,9 @@ class CertificateMultiUploadService:
         from app.services.upload_task_service import UploadTaskService
         from app.models.upload_task import TaskStatus
         from app.models.user import UserResponse
-        import os as os_module
+        from app.utils.async_pipeline import PipelineStage, run_pipeline
+        from app.services.job_queue_service import JobQueueService, JOB_CERTIFICATE_GDRIVE_UPLOAD
+        from app.services.upload_spool_service import UploadSpoolService
         import asyncio
         
         logger.info(f"🔄 Starting background processing for task {task_id} ({len(temp_files)} files)")
@@ -419,133 +449,160 @@ class CertificateMultiUploadService:
             current_user = UserResponse(**user_doc)
             logger.info(f"🔄 Task {task_id}: Using user {current_user.username} (company={current_user.company})")
             
-            # Process each file
-            for i, temp_file in enumerate(temp_files):
-                try:
-                    filename = temp_file["filename"]
-                    logger.info(f"📄 [{i+1}/{len(temp_files)}] Processing: {filename}")
-                    
-                    # Update file status
-                    await UploadTaskService.update_file_status_by_name(
-                        task_id, filename, "processing", progress=10
-                    )
-                    
-                    # Read file content
-                    with open(temp_file["temp_path"], "rb") as f:
-                        file_content = f.read()
-                    
-                    # Step 1: Analyze with AI
-                    await UploadTaskService.update_file_status_by_name(
-                        task_id, filename, "processing", progress=20,
-                        message="Analyzing document with AI..."
-                    )
-                    
-                    analysis_result = await CertificateMultiUploadService._analyze_document_with_ai(
-                        file_content, filename, temp_file["content_type"],
-                        ai_config, ship_id, current_user  # Pass real user for background processing
-                    )
-                    
-                    if not analysis_result.get("success"):
-                        raise Exception(analysis_result.get("message", "Analysis failed"))
-                    
-                    extracted_info = analysis_result.get("extracted_info", {})
-                    summary_text = analysis_result.get("summary_text", "")
-                    extracted_info["filename"] = filename
-                    
-                    # ⭐ POST-PROCESSING: Override cert_type based on cert_name keywords
-                    cert_name_for_check = (extracted_info.get("cert_name") or "").upper()
-                    if "INTERIM" in cert_name_for_check:
-                        extracted_info["cert_type"] = "Interim"
-                        logger.info(f"✅ POST-PROCESS (bg): Detected 'INTERIM' in cert_name → cert_type = 'Interim'")
-                    elif "STATEMENT" in cert_name_for_check:
-                        extracted_info["cert_type"] = "Statement"
-                        logger.info(f"✅ POST-PROCESS (bg): Detected 'STATEMENT' in cert_name → cert_type = 'Statement'")
-                    
-                    # ⭐ POST-PROCESSING: Generate proper abbreviation for SOC certificates
-                    if "STATEMENT OF COMPLIANCE" in cert_name_for_check:
-                        from app.utils.certificate_abbreviation import generate_abbreviation_sync
-                        cert_name_value = extracted_info.get("cert_name", "")
-                        new_abbr = generate_abbreviation_sync(cert_name_value)
-                        extracted_info["cert_abbreviation"] = new_abbr
-                        logger.info(f"✅ POST-PROCESS (bg): SOC cert abbreviation: '{cert_name_value}' → '{new_abbr}'")
-                    
-                    # ⚡ OPTIMIZED: Create DB record FIRST (without file_id)
-                    # This allows faster response - GDrive upload happens after
-                    await UploadTaskService.update_file_status_by_name(
-                        task_id, filename, "processing", progress=60,
-                        message="Creating certificate record..."
-                    )
-                    
-                    ship_name = ship.get("name", "Unknown_Ship")
-                    
-                    # Step 2: Create certificate record IMMEDIATELY (no file_id yet)
-                    upload_data = {
-                        "success": True,
-                        "file_id": None,  # Will be updated after GDrive upload
-                        "file_url": None,
-                        "folder_path": f"{ship_name}/Class & Flag Cert/Certificates"
+            # Process files through a bounded pipeline:
+            # read → AI analysis → DB record → schedule GDrive upload job
+            # Each stage has its own concurrency; bounded queues between stages keep
+            # memory flat (at most a few files' bytes are held at any time)
+            total = len(temp_files)
+            ship_name = ship.get("name", "Unknown_Ship")
+            
+            async def read_stage(item: Dict[str, Any]) -> Dict[str, Any]:
+                i, temp_file = item["index"], item["temp_file"]
+                filename = temp_file["filename"]
+                logger.info(f"📄 [{i+1}/{total}] Processing: {filename}")
+                
+                await UploadTaskService.update_file_status_by_name(
+                    task_id, filename, "processing", progress=10
+                )
+                
+                item["file_content"] = await asyncio.to_thread(
+                    CertificateMultiUploadService._read_and_remove_temp_file, temp_file["temp_path"]
+                )
+                return item
+            
+            async def analyze_stage(item: Dict[str, Any]) -> Dict[str, Any]:
+                temp_file = item["temp_file"]
+                filename = temp_file["filename"]
+                
+                await UploadTaskService.update_file_status_by_name(
+                    task_id, filename, "processing", progress=20,
+                    message="Analyzing document with AI..."
+                )
+                
+                analysis_result = await CertificateMultiUploadService._analyze_document_with_ai(
+                    item["file_content"], filename, temp_file["content_type"],
+                    ai_config, ship_id, current_user  # Pass real user for background processing
+                )
+                
+                if not analysis_result.get("success"):
+                    raise Exception(analysis_result.get("message", "Analysis failed"))
+                
+                extracted_info = analysis_result.get("extracted_info", {})
+                extracted_info["filename"] = filename
+                
+                # ⭐ POST-PROCESSING: Override cert_type based on cert_name keywords
+                cert_name_for_check = (extracted_info.get("cert_name") or "").upper()
+                if "INTERIM" in cert_name_for_check:
+                    extracted_info["cert_type"] = "Interim"
+                    logger.info(f"✅ POST-PROCESS (bg): Detected 'INTERIM' in cert_name → cert_type = 'Interim'")
+                elif "STATEMENT" in cert_name_for_check:
+                    extracted_info["cert_type"] = "Statement"
+                    logger.info(f"✅ POST-PROCESS (bg): Detected 'STATEMENT' in cert_name → cert_type = 'Statement'")
+                
+                # ⭐ POST-PROCESSING: Generate proper abbreviation for SOC certificates
+                if "STATEMENT OF COMPLIANCE" in cert_name_for_check:
+                    from app.utils.certificate_abbreviation import generate_abbreviation_sync
+                    cert_name_value = extracted_info.get("cert_name", "")
+                    new_abbr = generate_abbreviation_sync(cert_name_value)
+                    extracted_info["cert_abbreviation"] = new_abbr
+                    logger.info(f"✅ POST-PROCESS (bg): SOC cert abbreviation: '{cert_name_value}' → '{new_abbr}'")
+                
+                item["extracted_info"] = extracted_info
+                item["summary_text"] = analysis_result.get("summary_text", "")
+                return item
+            
+            async def create_record_stage(item: Dict[str, Any]) -> Dict[str, Any]:
+                i = item["index"]
+                filename = item["temp_file"]["filename"]
+                extracted_info = item["extracted_info"]
+                
+                # ⚡ OPTIMIZED: Create DB record FIRST (without file_id)
+                # This allows faster response - GDrive upload happens after
+                await UploadTaskService.update_file_status_by_name(
+                    task_id, filename, "processing", progress=60,
+                    message="Creating certificate record..."
+                )
+                
+                upload_data = {
+                    "success": True,
+                    "file_id": None,  # Will be updated after GDrive upload
+                    "file_url": None,
+                    "folder_path": f"{ship_name}/Class & Flag Cert/Certificates"
+                }
+                
+                cert_result = await CertificateMultiUploadService._create_certificate_from_analysis(
+                    extracted_info, upload_data, current_user, ship_id,
+                    None, db, summary_file_id=None,
+                    extracted_ship_name=extracted_info.get("ship_name"),
+                    file_pending_upload=True  # Mark as pending upload
+                )
+                
+                cert_id = cert_result.get("id")
+                logger.info(f"✅ [{i+1}/{total}] Record created: {cert_id} (GDrive upload pending)")
+                
+                # Mark file as completed IMMEDIATELY (user sees success faster)
+                await UploadTaskService.update_file_status_by_name(
+                    task_id, filename, "completed", progress=100,
+                    result={
+                        "certificate_id": cert_id,
+                        "extracted_info": extracted_info,
+                        "file_id": None,  # Will be updated later
+                        "gdrive_pending": True
                     }
-                    
-                    cert_result = await CertificateMultiUploadService._create_certificate_from_analysis(
-                        extracted_info, upload_data, current_user, ship_id,
-                        None, db, summary_file_id=None,
-                        extracted_ship_name=extracted_info.get("ship_name"),
-                        file_pending_upload=True  # Mark as pending upload
-                    )
-                    
-                    cert_id = cert_result.get("id")
-                    logger.info(f"✅ [{i+1}/{len(temp_files)}] Record created: {cert_id} (GDrive upload pending)")
-                    
-                    # Mark file as completed IMMEDIATELY (user sees success faster)
-                    await UploadTaskService.update_file_status_by_name(
-                        task_id, filename, "completed", progress=100,
-                        result={
-                            "certificate_id": cert_id,
-                            "extracted_info": extracted_info,
-                            "file_id": None,  # Will be updated later
-                            "gdrive_pending": True
-                        }
-                    )
-                    
-                    # Increment completed count
-                    await UploadTaskService.increment_completed(task_id, success=True)
-                    
-                    logger.info(f"✅ [{i+1}/{len(temp_files)}] Completed (record created): {filename}")
-                    
-                    # Step 3: Upload to GDrive in DEFERRED background (non-blocking)
-                    # This happens AFTER user sees success - much faster perceived response
-                    asyncio.create_task(
-                        CertificateMultiUploadService._deferred_gdrive_upload(
-                            cert_id=cert_id,
-                            file_content=file_content,
-                            filename=filename,
-                            summary_text=summary_text,
-                            ship_name=ship_name,
-                            gdrive_config_doc=gdrive_config_doc
-                        )
-                    )
-                    
-                except Exception as file_error:
-                    logger.error(f"❌ [{i+1}/{len(temp_files)}] Error processing {temp_file['filename']}: {file_error}")
-                    import traceback
-                    logger.error(traceback.format_exc())
-                    
-                    await UploadTaskService.update_file_status_by_name(
-                        task_id, temp_file["filename"], "failed",
-                        error=str(file_error)
-                    )
-                    
-                    # Increment failed count
-                    await UploadTaskService.increment_completed(task_id, success=False)
+                )
+                await UploadTaskService.increment_completed(task_id, success=True)
                 
-                finally:
-                    # Clean up temp file
-                    try:
-                        if os_module.path.exists(temp_file["temp_path"]):
-                            os_module.remove(temp_file["temp_path"])
-                            os_module.rmdir(os_module.path.dirname(temp_file["temp_path"]))
-                    except:
-                        pass
+                logger.info(f"✅ [{i+1}/{total}] Completed (record created): {filename}")
+                item["cert_id"] = cert_id
+                return item
+            
+            async def schedule_gdrive_upload_stage(item: Dict[str, Any]) -> None:
+                # Upload happens AFTER user sees success, as a durable job so it
+                # survives an instance recycle (record stays file_pending_upload until done)
+                spool_ref = await UploadSpoolService.put(
+                    item.pop("file_content"), item["temp_file"]["filename"], item["temp_file"]["content_type"]
+                )
+                await JobQueueService.enqueue(
+                    JOB_CERTIFICATE_GDRIVE_UPLOAD,
+                    {
+                        "cert_id": item["cert_id"],
+                        "spool_ref": spool_ref,
+                        "filename": item["temp_file"]["filename"],
+                        "summary_text": item.pop("summary_text"),
+                        "ship_name": ship_name,
+                        "gdrive_config_doc": {k: v for k, v in gdrive_config_doc.items() if k != "_id"}
+                    },
+                    idempotency_key=f"{JOB_CERTIFICATE_GDRIVE_UPLOAD}:{item['cert_id']}"
+                )
+                return None
+            
+            async def on_file_error(item: Dict[str, Any], stage: str, file_error: Exception):
+                i, temp_file = item["index"], item["temp_file"]
+                if stage == "schedule_gdrive_upload":
+                    # Record already created and counted - it stays file_pending_upload
+                    logger.error(f"❌ [{i+1}/{total}] Could not schedule GDrive upload for {temp_file['filename']}: {file_error}")
+                    return
+                logger.error(f"❌ [{i+1}/{total}] Error processing {temp_file['filename']} ({stage}): {file_error}")
+                
+                await UploadTaskService.update_file_status_by_name(
+                    task_id, temp_file["filename"], "failed",
+                    error=str(file_error)
+                )
+                await UploadTaskService.increment_completed(task_id, success=False)
+                await asyncio.to_thread(
+                    CertificateMultiUploadService._read_and_remove_temp_file, temp_file["temp_path"], False
+                )
+            
+            await run_pipeline(
+                ({"index": i, "temp_file": temp_file} for i, temp_file in enumerate(temp_files)),
+                [
+                    PipelineStage("read", read_stage, CERT_UPLOAD_READ_CONCURRENCY),
+                    PipelineStage("analyze", analyze_stage, CERT_UPLOAD_ANALYZE_CONCURRENCY),
+                    PipelineStage("create_record", create_record_stage, CERT_UPLOAD_DB_CONCURRENCY),
+                    PipelineStage("schedule_gdrive_upload", schedule_gdrive_upload_stage),
+                ],
+                on_error=on_file_error
+            )
             
             # Task status is automatically updated by increment_completed
             logger.info(f"✅ Background task {task_id} processing finished")
@@ -556,6 +613,23 @@ class CertificateMultiUploadService:
             logger.error(traceback.format_exc())
             await UploadTaskService.update_task_status(task_id, TaskStatus.FAILED)
     
+    @staticmethod
+    def _read_and_remove_temp_file(temp_path: str, read: bool = True) -> Optional[bytes]:
+        """Read a queued temp file (optionally) and delete it with its temp directory"""
+        content = None
+        try:
+            if read:
+                with open(temp_path, "rb") as f:
+                    content = f.read()
+        finally:
+            try:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                    os.rmdir(os.path.dirname(temp_path))
+            except OSError:
+                pass
+        return content
+    
     @staticmethod
     async def _process_slow_path_background(
         task_id: str,
@@ -735,18 +809,21 @@ class CertificateMultiUploadService:
         timing = {}
         total_start = time.time()
         
-        # Read file content
+        # Read file content (50MB limit checked before / while streaming, not after buffering)
         step_start = time.time()
-        file_content = await file.read()
-        timing['1_read_file'] = round(time.time() - step_start, 2)
-        
-        # Check file size (50MB limit)
-        if len(file_content) > 50 * 1024 * 1024:
+        try:
+            upload = await ingest_upload(file, max_bytes=50 * 1024 * 1024, allow_empty=True)
+        except HTTPException as e:
+            message = "File size exceeds 50MB limit" if e.status_code == 413 else e.detail
             return {
                 "filename": file.filename,
                 "status": "error",
-                "message": "File size exceeds 50MB limit"
+                "message": message
             }
+        # Real bytes: the content outlives the request in the background Drive upload
+        file_content = upload.read_bytes()
+        upload.close()
+        timing['1_read_file'] = round(time.time() - step_start, 2)
         
         # Check file type - support PDF, JPG, PNG
         supported_types = ["application/pdf", "image/jpeg", "image/jpg", "image/png"]
@@ -995,10 +1072,12 @@ class CertificateMultiUploadService:
     ):
         """
         Deferred GDrive upload - runs AFTER record is created and user sees success
-        This is called via asyncio.create_task() so it doesn't block the main flow
+        Runs as a durable job (JOB_CERTIFICATE_GDRIVE_UPLOAD) so it never delays record creation
+        
+        Raises when the PDF upload failed so the job queue retries it
         """
         # Delegate to existing background upload function
-        await CertificateMultiUploadService._upload_files_to_gdrive_background(
+        uploaded = await CertificateMultiUploadService._upload_files_to_gdrive_background(
             cert_id=cert_id,
             file_content=file_content,
             filename=filename,
@@ -1006,6 +1085,8 @@ class CertificateMultiUploadService:
             ship_name=ship_name,
             gdrive_config_doc=gdrive_config_doc
         )
+        if not uploaded:
+            raise Exception(f"GDrive upload failed for certificate {cert_id}: {filename}")
     
     @staticmethod
     async def _upload_files_to_gdrive_background(
@@ -1015,11 +1096,14 @@ class CertificateMultiUploadService:
         summary_text: str,
         ship_name: str,
         gdrive_config_doc: Dict[str, Any]
-    ):
+    ) -> bool:
         """
         Background task to upload PDF and Summary to GDrive SEQUENTIALLY
         Updates certificate record with file URLs when complete
         Note: Sequential upload prevents duplicate folder creation (race condition)
+        
+        Returns:
+            bool: True if the PDF was uploaded (a failed summary upload is only logged)
         """
         
         try:
@@ -1061,21 +1145,25 @@ class CertificateMultiUploadService:
                 update_data["google_drive_file_id"] = pdf_result.get("file_id")
                 update_data["google_drive_file_url"] = pdf_result.get("file_url")
                 update_data["file_uploaded"] = True
+                pdf_uploaded = True
                 logger.info(f"✅ Background: PDF uploaded for cert {cert_id}")
             else:
                 logger.error(f"❌ Background: PDF upload failed for cert {cert_id}")
                 update_data["file_upload_error"] = str(pdf_result) if isinstance(pdf_result, Exception) else "Upload failed"
+                pdf_uploaded = False
             
             if summary_result and not isinstance(summary_result, Exception) and summary_result.get("success"):
                 update_data["summary_file_id"] = summary_result.get("file_id")
                 logger.info(f"✅ Background: Summary uploaded for cert {cert_id}")
             
-            await db.certificates.update_one(
-                {"id": cert_id},
-                {"$set": update_data}
-            )
+            update = {"$set": update_data}
+            if pdf_uploaded:
+                # Clear the error left by an earlier failed attempt
+                update["$unset"] = {"file_upload_error": ""}
+            await db.certificates.update_one({"id": cert_id}, update)
             
             logger.info(f"✅ Background upload completed for cert {cert_id}")
+            return pdf_uploaded
             
         except Exception as e:
             logger.error(f"❌ Background upload error for cert {cert_id}: {e}")
@@ -1094,6 +1182,7 @@ class CertificateMultiUploadService:
                 )
             except:
                 pass
+            return False
     
     @staticmethod
     async def _resolve_company_id(current_user: UserResponse) -> Optional[str]:
@@ -1706,6 +1795,9 @@ IMPORTANT DATE EXAMPLES:
             preserved_fields = ['extracted_ship_name', 'text_content', 'notes', 'file_pending_upload']
             cert_doc = {k: v for k, v in cert_doc.items() if v is not None or k in preserved_fields}
             
+            from app.utils.survey_window import survey_window_fields
+            cert_doc.update(survey_window_fields(cert_doc.get("next_survey_display"), cert_doc.get("next_survey")))
+            
             # Insert into database
             await db.certificates.insert_one(cert_doc)
             
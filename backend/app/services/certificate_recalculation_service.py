@@ -0,0 +1,364 @@
+"""
+Certificate Recalculation Service
+Bulk recalculation of derived certificate fields:
+
+- Ship certificates: Next Survey / Next Survey Type (IMO 5-year cycle, see
+  app.utils.ship_calculations) and the materialized survey window fields.
+- Crew certificates: status from cert_expiry (Valid / Expiring Soon / Expired).
+
+Certificates are streamed with a projection of the fields the calculation
+reads, results are computed in memory and only documents whose values changed
+are written, with unordered bulk_write batches of RECALC_BATCH_SIZE operations.
+
+The same engine serves the per-ship / per-company endpoints and the
+fleet-wide (or company-wide) run, which executes as a durable job
+(JOB_CERTIFICATE_RECALCULATION) with progress stored in ``recalculation_tasks``
+and is also scheduled nightly from app.main.
+"""
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import UpdateMany, UpdateOne
+
+from app.db.mongodb import mongo_db
+from app.models.user import UserResponse
+
+logger = logging.getLogger(__name__)
+
+RECALC_BATCH_SIZE = int(os.getenv('RECALC_BATCH_SIZE', '500'))
+
+# Fields calculate_next_survey_info reads, plus those compared / reported
+SHIP_CERTIFICATE_PROJECTION = {
+    "_id": 1, "id": 1, "cert_name": 1, "cert_type": 1, "cert_abbreviation": 1,
+    "has_annual_survey": 1, "last_endorse": 1, "valid_date": 1,
+    "exclude_from_auto_update": 1,
+    "next_survey": 1, "next_survey_type": 1, "next_survey_display": 1,
+}
+SHIP_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "company": 1,
+    "anniversary_date": 1, "last_intermediate_survey": 1, "special_survey_cycle": 1,
+}
+CREW_CERTIFICATE_PROJECTION = {"_id": 1, "id": 1, "cert_expiry": 1, "status": 1}
+
+
+class RecalculationTaskService:
+    """Progress documents of fleet / company recalculation runs"""
+
+    COLLECTION = "recalculation_tasks"
+
+    @staticmethod
+    async def create_task(company_id: Optional[str], triggered_by: str, task_id: Optional[str] = None) -> str:
+        """Create a task (no-op if ``task_id`` already exists)"""
+        task_id = task_id or str(uuid.uuid4())
+        await mongo_db.database[RecalculationTaskService.COLLECTION].update_one({"id": task_id}, {"$setOnInsert": {
+            "id": task_id,
+            "company_id": company_id,  # None = whole fleet
+            "triggered_by": triggered_by,
+            "status": "pending",  # pending, processing, completed, failed
+            "total_ships": 0,
+            "processed_ships": 0,
+            "current_ship": "",
+            "certificates_scanned": 0,
+            "certificates_updated": 0,
+            "crew_certificates_scanned": 0,
+            "crew_certificates_updated": 0,
+            "errors": [],
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
+            "completed_at": None
+        }}, upsert=True)
+        return task_id
+
+    @staticmethod
+    async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
+        return await mongo_db.database[RecalculationTaskService.COLLECTION].find_one({"id": task_id}, {"_id": 0})
+
+    @staticmethod
+    async def update_task(task_id: str, updates: Dict[str, Any], push_error: Optional[str] = None):
+        update = {"$set": {**updates, "updated_at": datetime.now(timezone.utc)}}
+        if push_error:
+            update["$push"] = {"errors": push_error}
+        await mongo_db.database[RecalculationTaskService.COLLECTION].update_one({"id": task_id}, update)
+
+
+class CertificateRecalculationService:
+    """Streamed, change-only bulk recalculation (see module docstring)"""
+
+    @staticmethod
+    async def _flush(collection: str, operations: List[Any]) -> int:
+        if not operations:
+            return 0
+        await mongo_db.database[collection].bulk_write(operations, ordered=False)
+        written = len(operations)
+        operations.clear()
+        return written
+
+    @staticmethod
+    def next_survey_update(cert: Dict[str, Any], ship_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Next survey fields of a ship certificate.
+
+        Returns:
+            (fields to $set, or None if nothing changed / excluded, survey_info)
+        """
+        from app.utils.ship_calculations import calculate_next_survey_info
+        from app.utils.survey_window import SHIP_CERTIFICATE, survey_window_fields
+
+        # Skip certificates that are excluded from auto-update
+        if cert.get('exclude_from_auto_update', False):
+            return None, {}
+
+        # Handles all certificate types including renewal-only
+        # Note: Interim certificates ARE processed - they have Next Survey Type = "FT Issue"
+        survey_info = calculate_next_survey_info(cert, ship_data)
+        update_data = {}
+
+        # ⭐ RULE: When next_survey is "-" or None, next_survey_type must also be "-" or None
+        next_survey_value = survey_info['next_survey']
+        next_survey_type_value = survey_info['next_survey_type']
+
+        if not next_survey_value or next_survey_value == '-':
+            update_data['next_survey'] = None
+            update_data['next_survey_display'] = '-' if next_survey_value == '-' else None
+            update_data['next_survey_type'] = '-' if next_survey_value == '-' else None
+        else:
+            # Store next_survey as ISO datetime (dd/MM/yyyy → ISO + Z, backend-v1 format)
+            update_data['next_survey'] = None
+            if survey_info.get('raw_date'):
+                try:
+                    parsed_date = datetime.strptime(survey_info['raw_date'], '%d/%m/%Y')
+                    update_data['next_survey'] = parsed_date.isoformat() + 'Z'
+                except Exception:
+                    pass
+            update_data['next_survey_display'] = next_survey_value  # Display format with window
+            update_data['next_survey_type'] = next_survey_type_value if next_survey_type_value else None
+
+        has_changes = any(
+            update_data[field] != cert.get(field)
+            for field in ('next_survey', 'next_survey_type', 'next_survey_display')
+        )
+        if not has_changes:
+            return None, survey_info
+
+        update_data.update(survey_window_fields(
+            update_data['next_survey_display'], update_data['next_survey'], SHIP_CERTIFICATE
+        ))
+        return update_data, survey_info
+
+    @staticmethod
+    async def recalculate_ship_next_surveys(ship_data: Dict[str, Any], max_results: int = 10) -> Dict[str, Any]:
+        """
+        Recalculate Next Survey for every certificate of a ship.
+
+        Returns:
+            dict with total_certificates, updated_count and the first ``max_results``
+            changes (old/new values + reasoning)
+        """
+        operations: List[UpdateOne] = []
+        results = []
+        total = 0
+        updated_count = 0
+
+        cursor = mongo_db.database.certificates.find(
+            {"ship_id": ship_data["id"]}, SHIP_CERTIFICATE_PROJECTION, batch_size=RECALC_BATCH_SIZE
+        )
+        async for cert in cursor:
+            total += 1
+            update_data, survey_info = CertificateRecalculationService.next_survey_update(cert, ship_data)
+            if update_data is None:
+                continue
+
+            operations.append(UpdateOne({"_id": cert["_id"]}, {"$set": update_data}))
+            updated_count += 1
+            if len(results) < max_results:
+                results.append({
+                    'cert_id': cert.get('id'),
+                    'cert_name': cert.get('cert_name', 'Unknown'),
+                    'cert_type': cert.get('cert_type', 'Unknown'),
+                    'old_next_survey': cert.get('next_survey'),
+                    'new_next_survey': update_data.get('next_survey_display'),
+                    'old_next_survey_type': cert.get('next_survey_type'),
+                    'new_next_survey_type': update_data.get('next_survey_type'),
+                    'reasoning': survey_info.get('reasoning')
+                })
+            if len(operations) >= RECALC_BATCH_SIZE:
+                await CertificateRecalculationService._flush("certificates", operations)
+        await CertificateRecalculationService._flush("certificates", operations)
+
+        return {
+            "total_certificates": total,
+            "updated_count": updated_count,
+            "results": results
+        }
+
+    @staticmethod
+    async def recalculate_crew_certificate_status(query: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Recalculate status of the crew certificates matching ``query``.
+        Changed certificates are grouped by their new status: one UpdateMany per
+        status and batch instead of one update per certificate.
+
+        Returns:
+            dict with total_certificates, updated_count (status changed from the
+            expiry date) and no_expiry_count (reset to Unknown, no expiry date)
+        """
+        from app.services.crew_certificate_service import CrewCertificateService
+
+        changed: Dict[str, List[Any]] = {}
+        total = 0
+        updated_count = 0
+        no_expiry_count = 0
+
+        async def flush():
+            now = datetime.now(timezone.utc)
+            operations = [
+                UpdateMany({"_id": {"$in": ids}}, {"$set": {"status": status, "updated_at": now}})
+                for status, ids in changed.items() if ids
+            ]
+            changed.clear()
+            await CertificateRecalculationService._flush("crew_certificates", operations)
+
+        pending = 0
+        cursor = mongo_db.database.crew_certificates.find(query, CREW_CERTIFICATE_PROJECTION, batch_size=RECALC_BATCH_SIZE)
+        async for cert in cursor:
+            total += 1
+            cert_expiry = cert.get('cert_expiry')
+            new_status = CrewCertificateService._calculate_certificate_status(cert_expiry) if cert_expiry else 'Unknown'
+            if new_status == cert.get('status'):
+                continue
+            if cert_expiry:
+                updated_count += 1
+            else:
+                no_expiry_count += 1
+            changed.setdefault(new_status, []).append(cert["_id"])
+            pending += 1
+            if pending >= RECALC_BATCH_SIZE:
+                await flush()
+                pending = 0
+        await flush()
+
+        return {
+            "total_certificates": total,
+            "updated_count": updated_count,
+            "no_expiry_count": no_expiry_count
+        }
+
+    @staticmethod
+    async def run_recalculation(company_id: Optional[str] = None, task_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Recalculate ship certificate next surveys and crew certificate status for
+        one company, or the whole fleet when ``company_id`` is None. Progress is
+        recorded per ship on ``task_id``; a failing ship is reported and skipped.
+        Any other error marks the task "failed" and is re-raised (the job is retried).
+        """
+        try:
+            return await CertificateRecalculationService._recalculate(company_id, task_id)
+        except Exception as e:
+            logger.error(f"❌ Certificate recalculation {task_id or ''} failed: {e}")
+            if task_id:
+                await RecalculationTaskService.update_task(task_id, {
+                    "status": "failed",
+                    "error": str(e),
+                    "current_ship": "",
+                    "completed_at": datetime.now(timezone.utc)
+                })
+            raise
+
+    @staticmethod
+    async def _recalculate(company_id: Optional[str], task_id: Optional[str]) -> Dict[str, Any]:
+        ship_query = {"company": company_id} if company_id else {}
+        totals = {
+            "total_ships": await mongo_db.database.ships.count_documents(ship_query),
+            "processed_ships": 0,
+            "certificates_scanned": 0,
+            "certificates_updated": 0,
+        }
+        scope = f"company {company_id}" if company_id else "fleet"
+        logger.info(f"🔄 Recalculating certificates for {scope}: {totals['total_ships']} ships")
+        if task_id:
+            await RecalculationTaskService.update_task(task_id, {"status": "processing", "error": None, **totals})
+
+        async for ship_data in mongo_db.database.ships.find(ship_query, SHIP_PROJECTION):
+            ship_name = ship_data.get("name", "Unknown")
+            error = None
+            try:
+                result = await CertificateRecalculationService.recalculate_ship_next_surveys(ship_data, max_results=0)
+                totals["certificates_scanned"] += result["total_certificates"]
+                totals["certificates_updated"] += result["updated_count"]
+            except Exception as e:
+                error = f"{ship_name}: {e}"
+                logger.error(f"❌ Next survey recalculation failed for ship {ship_name}: {e}")
+            totals["processed_ships"] += 1
+            logger.info(
+                f"📊 [{totals['processed_ships']}/{totals['total_ships']}] {ship_name}: "
+                f"{totals['certificates_updated']} of {totals['certificates_scanned']} certificates updated so far"
+            )
+            if task_id:
+                await RecalculationTaskService.update_task(task_id, {**totals, "current_ship": ship_name}, push_error=error)
+
+        crew_query = {"company_id": company_id} if company_id else {}
+        crew_result = await CertificateRecalculationService.recalculate_crew_certificate_status(crew_query)
+        totals["crew_certificates_scanned"] = crew_result["total_certificates"]
+        totals["crew_certificates_updated"] = crew_result["updated_count"] + crew_result["no_expiry_count"]
+
+        logger.info(
+            f"✅ Recalculation for {scope} done: {totals['certificates_updated']} ship certificates, "
+            f"{totals['crew_certificates_updated']} crew certificates updated"
+        )
+        if task_id:
+            await RecalculationTaskService.update_task(task_id, {
+                **totals,
+                "status": "completed",
+                "current_ship": "",
+                "completed_at": datetime.now(timezone.utc)
+            })
+        return totals
+
+    @staticmethod
+    async def start_recalculation(
+        company_id: Optional[str],
+        triggered_by: str,
+        task_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue a fleet / company recalculation as a durable job; returns its task id.
+        Starting an existing ``task_id`` again does nothing.
+        """
+        from app.services.job_queue_service import JobQueueService, JOB_CERTIFICATE_RECALCULATION
+
+        task_id = await RecalculationTaskService.create_task(company_id, triggered_by, task_id)
+        await JobQueueService.enqueue(
+            JOB_CERTIFICATE_RECALCULATION,
+            {"task_id": task_id, "company_id": company_id},
+            idempotency_key=f"{JOB_CERTIFICATE_RECALCULATION}:{task_id}",
+            max_attempts=2
+        )
+        return {
+            "success": True,
+            "task_id": task_id,
+            "message": "Certificate recalculation started"
+        }
+
+    @staticmethod
+    async def get_task_status(task_id: str, current_user: UserResponse) -> Dict[str, Any]:
+        from app.models.user import UserRole
+
+        task = await RecalculationTaskService.get_task(task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if current_user.role != UserRole.SYSTEM_ADMIN and task.get("company_id") != current_user.company:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return task
+
+
+async def scheduled_recalculation_job():
+    """Nightly fleet-wide run (one job per day, whichever instance enqueues first)"""
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    try:
+        await CertificateRecalculationService.start_recalculation(None, "scheduler", task_id=f"nightly-{today}")
+    except Exception as e:
+        logger.error(f"❌ Could not schedule certificate recalculation: {e}")
@@ -1,7 +1,7 @@
 import uuid
 import logging
 import os
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime, timezone, date
 from fastapi import HTTPException, UploadFile, BackgroundTasks
 
@@ -16,9 +16,10 @@ from app.repositories.certificate_repository import CertificateRepository
 from app.repositories.ship_repository import ShipRepository
 from app.utils.pdf_processor import PDFProcessor
 from app.utils.ai_helper import AIHelper
-from app.utils.certificate_abbreviation import generate_certificate_abbreviation
+from app.utils.certificate_abbreviation import AbbreviationMappingCache, generate_certificate_abbreviation
 from app.utils.issued_by_abbreviation import generate_organization_abbreviation
 from app.utils.background_tasks import delete_file_background
+from app.utils.http_client import http_session
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +35,11 @@ class CertificateService:
         return CrewAuditLogService(CrewAuditLogRepository(mongo_db.database))
     
     @staticmethod
-    async def get_certificates(ship_id: Optional[str], current_user: UserResponse) -> List[CertificateResponse]:
-        """Get certificates, optionally filtered by ship"""
+    async def _get_certificate_scope(ship_id: Optional[str], current_user: UserResponse) -> Optional[List[str]]:
+        """
+        Ship IDs whose certificates the user may list (None = unrestricted).
+        Raises 403 for viewers and for a ship outside the user's company.
+        """
         from app.models.user import UserRole
         from app.core import messages
         
@@ -43,42 +47,106 @@ class CertificateService:
         if current_user.role == UserRole.VIEWER:
             raise HTTPException(status_code=403, detail=messages.VIEWER_CANNOT_VIEW_SHIP_CERTS)
         
-        # Add company-based filtering for non-super admins
-        if current_user.role not in [UserRole.SYSTEM_ADMIN, UserRole.SUPER_ADMIN]:
-            # Get ships for user's company
-            company_ships = await ShipRepository.find_all(company=current_user.company)
-            company_ship_ids = [ship['id'] for ship in company_ships]
-            
-            if ship_id:
-                # Verify ship belongs to user's company
-                if ship_id not in company_ship_ids:
-                    raise HTTPException(status_code=403, detail=messages.ACCESS_DENIED_SHIP)
-            
-            # Get all certificates first
-            all_certificates = await CertificateRepository.find_all(ship_id=ship_id)
-            # Filter by company's ships
-            certificates = [cert for cert in all_certificates if cert.get('ship_id') in company_ship_ids]
-            
-            # ⭐ NEW: For Editor/Viewer, filter by assigned ship
-            from app.core.permission_checks import filter_documents_by_ship_scope_async
-            certificates = await filter_documents_by_ship_scope_async(certificates, current_user)
-        else:
-            certificates = await CertificateRepository.find_all(ship_id=ship_id)
-        
-        # Enhance certificates with abbreviations
-        enhanced_certs = []
-        for cert in certificates:
-            # Generate certificate abbreviation if not present
-            if not cert.get("cert_abbreviation") and cert.get("cert_name"):
-                cert["cert_abbreviation"] = await generate_certificate_abbreviation(cert.get("cert_name"))
-            
-            # Generate organization abbreviation for issued_by if not present
-            if not cert.get("issued_by_abbreviation") and cert.get("issued_by"):
-                cert["issued_by_abbreviation"] = generate_organization_abbreviation(cert.get("issued_by"))
-            
-            enhanced_certs.append(CertificateResponse(**cert))
+        if current_user.role in [UserRole.SYSTEM_ADMIN, UserRole.SUPER_ADMIN]:
+            return None
+        
+        # Company-based filtering for non-super admins
+        company_ships = await ShipRepository.find_all(company=current_user.company)
+        company_ship_ids = [ship['id'] for ship in company_ships]
+        
+        if ship_id and ship_id not in company_ship_ids:
+            raise HTTPException(status_code=403, detail=messages.ACCESS_DENIED_SHIP)
+        
+        # Editor/Viewer: only their assigned ship (same rule as filter_documents_by_ship_scope_async)
+        if current_user.role in [UserRole.EDITOR, UserRole.VIEWER]:
+            assigned_ship_name = (getattr(current_user, 'ship', None) or '').strip()
+            if not assigned_ship_name:
+                return []
+            return [ship['id'] for ship in company_ships if ship.get('name') == assigned_ship_name]
+        
+        return company_ship_ids
+    
+    @staticmethod
+    def _certificate_projection() -> dict:
+        """Only the fields CertificateResponse exposes"""
+        return {field: 1 for field in CertificateResponse.model_fields}
+    
+    @staticmethod
+    async def _to_certificate_response(cert: dict) -> CertificateResponse:
+        """Fill derived abbreviations and build the response model"""
+        # Generate certificate abbreviation if not present
+        if not cert.get("cert_abbreviation") and cert.get("cert_name"):
+            cert["cert_abbreviation"] = await generate_certificate_abbreviation(cert.get("cert_name"))
         
-        return enhanced_certs
+        # Generate organization abbreviation for issued_by if not present
+        if not cert.get("issued_by_abbreviation") and cert.get("issued_by"):
+            cert["issued_by_abbreviation"] = generate_organization_abbreviation(cert.get("issued_by"))
+        
+        return CertificateResponse(**cert)
+    
+    @staticmethod
+    async def get_certificates(ship_id: Optional[str], current_user: UserResponse) -> List[CertificateResponse]:
+        """Get certificates, optionally filtered by ship (tenant scope applied in Mongo)"""
+        ship_ids = await CertificateService._get_certificate_scope(ship_id, current_user)
+        certificates = await CertificateRepository.find_all(
+            ship_id=ship_id,
+            ship_ids=ship_ids,
+            projection=CertificateService._certificate_projection()
+        )
+        
+        return [await CertificateService._to_certificate_response(cert) for cert in certificates]
+    
+    @staticmethod
+    async def get_certificates_page(
+        ship_id: Optional[str],
+        current_user: UserResponse,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[CertificateResponse], Optional[str]]:
+        """
+        One page of certificates.
+        
+        Returns:
+            (certificates, cursor of the next page or None)
+        """
+        from bson.errors import InvalidId
+        
+        ship_ids = await CertificateService._get_certificate_scope(ship_id, current_user)
+        try:
+            certificates, next_cursor = await CertificateRepository.find_page(
+                ship_id=ship_id,
+                ship_ids=ship_ids,
+                projection=CertificateService._certificate_projection(),
+                limit=limit,
+                after=cursor
+            )
+        except InvalidId:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        
+        return [await CertificateService._to_certificate_response(cert) for cert in certificates], next_cursor
+    
+    @staticmethod
+    async def stream_certificates(ship_id: Optional[str], current_user: UserResponse) -> AsyncIterator[bytes]:
+        """
+        Certificates as a streamed JSON array (same items as get_certificates).
+        Permission checks run before the first byte is produced.
+        """
+        ship_ids = await CertificateService._get_certificate_scope(ship_id, current_user)
+        
+        async def body() -> AsyncIterator[bytes]:
+            yield b"["
+            first = True
+            async for cert in CertificateRepository.iter_all(
+                ship_id=ship_id,
+                ship_ids=ship_ids,
+                projection=CertificateService._certificate_projection()
+            ):
+                response = await CertificateService._to_certificate_response(cert)
+                yield (b"" if first else b",") + response.model_dump_json().encode("utf-8")
+                first = False
+            yield b"]"
+        
+        return body()
     
     @staticmethod
     async def get_certificate_by_id(cert_id: str, current_user: UserResponse) -> CertificateResponse:
@@ -516,19 +584,29 @@ class CertificateService:
         from app.services.gdrive_service import GDriveService
         from app.core.permission_checks import check_delete_permission, check_editor_viewer_ship_scope
         
+        from app.utils.batch_loader import get_loader
+        
         deleted_count = 0
         files_scheduled = 0
         errors = []
         
+        # One batched query for all certificates and one for their ships
+        cert_loader = get_loader("certificates")
+        certs = await cert_loader.load_many(request.certificate_ids)
+        ships = await get_loader("ships").load_many(cert.get("ship_id") for cert in certs.values() if cert)
+        
+        deletable = []
+        seen = set()
         for cert_id in request.certificate_ids:
             try:
-                cert = await CertificateRepository.find_by_id(cert_id)
+                cert = certs.get(cert_id) if cert_id not in seen else None
+                seen.add(cert_id)
                 if not cert:
                     errors.append(f"Certificate {cert_id} not found")
                     continue
                 
                 # ⭐ NEW: Permission checks for each certificate
-                ship = await ShipRepository.find_by_id(cert.get('ship_id'))
+                ship = ships.get(cert.get('ship_id'))
                 if not ship:
                     errors.append(f"Ship not found for certificate {cert_id}")
                     continue
@@ -536,49 +614,7 @@ class CertificateService:
                 ship_company_id = ship.get("company")
                 check_delete_permission(current_user, "ship_cert", ship_company_id)
                 check_editor_viewer_ship_scope(current_user, cert.get('ship_id'), "delete")
-                
-                # Extract file info before deletion
-                google_drive_file_id = cert.get("google_drive_file_id")
-                summary_file_id = cert.get("summary_file_id")  # ⭐ NEW: Get summary file ID
-                cert_name = cert.get("cert_name", "Unknown")
-                
-                # Delete from database immediately
-                await CertificateRepository.delete(cert_id)
-                deleted_count += 1
-                logger.info(f"✅ Certificate deleted from DB: {cert_id} ({cert_name})")
-                
-                # Schedule Google Drive file deletion in background
-                if google_drive_file_id and background_tasks:
-                    ship_id = cert.get("ship_id")
-                    if ship_id:
-                        ship = await ShipRepository.find_by_id(ship_id)
-                        if ship:
-                            company_id = ship.get("company")
-                            if company_id:
-                                # Schedule main certificate file deletion
-                                background_tasks.add_task(
-                                    delete_file_background,
-                                    google_drive_file_id,
-                                    company_id,
-                                    "certificate",
-                                    cert_name,
-                                    GDriveService
-                                )
-                                files_scheduled += 1
-                                logger.info(f"📋 Scheduled background deletion for certificate file: {google_drive_file_id}")
-                                
-                                # ⭐ NEW: Schedule summary file deletion
-                                if summary_file_id:
-                                    background_tasks.add_task(
-                                        delete_file_background,
-                                        summary_file_id,
-                                        company_id,
-                                        "certificate_summary",
-                                        f"{cert_name} (Summary)",
-                                        GDriveService
-                                    )
-                                    files_scheduled += 1
-                                    logger.info(f"📋 Scheduled background deletion for summary file: {summary_file_id}")
+                deletable.append((cert, ship))
                 
             except HTTPException as http_ex:
                 # ⭐ NEW: Extract specific error message for permission errors
@@ -589,6 +625,53 @@ class CertificateService:
                 errors.append(f"Error deleting certificate {cert_id}: {str(e)}")
                 logger.error(f"❌ Error deleting certificate {cert_id}: {e}")
         
+        # Delete all permitted certificates from database in one operation
+        if deletable:
+            deletable_ids = [cert["id"] for cert, _ in deletable]
+            try:
+                deleted_count = await CertificateRepository.bulk_delete(deletable_ids)
+            except Exception as e:
+                errors.append(f"Error deleting certificates: {str(e)}")
+                logger.error(f"❌ Error deleting certificates {deletable_ids}: {e}")
+                deletable = []
+            for cert_id in deletable_ids:
+                cert_loader.clear(cert_id)
+        
+        for cert, ship in deletable:
+            # Extract file info
+            google_drive_file_id = cert.get("google_drive_file_id")
+            summary_file_id = cert.get("summary_file_id")  # ⭐ NEW: Get summary file ID
+            cert_name = cert.get("cert_name", "Unknown")
+            logger.info(f"✅ Certificate deleted from DB: {cert['id']} ({cert_name})")
+            
+            # Schedule Google Drive file deletion in background
+            company_id = ship.get("company")
+            if google_drive_file_id and background_tasks and company_id:
+                # Schedule main certificate file deletion
+                background_tasks.add_task(
+                    delete_file_background,
+                    google_drive_file_id,
+                    company_id,
+                    "certificate",
+                    cert_name,
+                    GDriveService
+                )
+                files_scheduled += 1
+                logger.info(f"📋 Scheduled background deletion for certificate file: {google_drive_file_id}")
+                
+                # ⭐ NEW: Schedule summary file deletion
+                if summary_file_id:
+                    background_tasks.add_task(
+                        delete_file_background,
+                        summary_file_id,
+                        company_id,
+                        "certificate_summary",
+                        f"{cert_name} (Summary)",
+                        GDriveService
+                    )
+                    files_scheduled += 1
+                    logger.info(f"📋 Scheduled background deletion for summary file: {summary_file_id}")
+        
         message = f"Deleted {deleted_count} certificate(s)"
         if files_scheduled > 0:
             message += f". {files_scheduled} file(s) deletion in progress..."
@@ -840,9 +923,7 @@ class CertificateService:
         
         # ========== PRIORITY LOGIC FOR ABBREVIATION ==========
         # Priority 1: Check user-defined abbreviation mappings FIRST
-        user_defined_abbr = await mongo_db.database.certificate_abbreviation_mappings.find_one(
-            {"cert_name": cert_name}
-        )
+        user_defined_abbr = await AbbreviationMappingCache.get(cert_name)
         
         if user_defined_abbr and user_defined_abbr.get("abbreviation"):
             final_abbreviation = user_defined_abbr.get("abbreviation")
@@ -904,7 +985,7 @@ class CertificateService:
         logger.info("🔍 Checking Apps Script capabilities for auto-rename functionality...")
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 # Test payload to get available actions
                 async with session.post(
                     apps_script_url,
@@ -943,7 +1024,7 @@ class CertificateService:
         logger.info(f"🔄 Auto-renaming certificate file {file_id} to '{new_filename}' for certificate {certificate_id}")
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.post(
                     apps_script_url,
                     json=payload,
@@ -520,6 +520,7 @@ class CompanyCertService:
         """
         try:
             from app.services.gdrive_service import GDriveService
+            from app.utils.certificate_abbreviation import AbbreviationMappingCache
             from app.utils.company_helper import resolve_company_id
             from app.utils.filename_helper import generate_company_certificate_filename
             
@@ -551,10 +552,7 @@ class CompanyCertService:
             
             # ========== PRIORITY LOGIC FOR ABBREVIATION ==========
             # Priority 1: Check user-defined abbreviation mappings FIRST
-            user_defined_abbr = await mongo_db.find_one(
-                "certificate_abbreviation_mappings",
-                {"cert_name": cert_name}
-            )
+            user_defined_abbr = await AbbreviationMappingCache.get(cert_name)
             
             if user_defined_abbr and user_defined_abbr.get("abbreviation"):
                 final_abbreviation = user_defined_abbr.get("abbreviation")
@@ -3,7 +3,7 @@ Crew Assignment Service
 Handles crew sign on, sign off, and ship transfers with file movement and audit trail
 """
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from datetime import datetime, timezone
 from uuid import uuid4
 from fastapi import HTTPException
@@ -12,7 +12,7 @@ import asyncio
 from app.repositories.crew_repository import CrewRepository
 from app.repositories.crew_assignment_repository import CrewAssignmentRepository
 from app.repositories.crew_audit_log_repository import CrewAuditLogRepository
-from app.services.crew_file_movement_service import CrewFileMovementService
+from app.services.crew_file_movement_service import CrewFileMovementService, empty_files_moved, total_files
 from app.services.crew_audit_log_service import CrewAuditLogService
 from app.models.user import UserResponse, UserRole
 from app.utils.date_helpers import parse_date_flexible
@@ -43,6 +43,8 @@ async def sync_user_ship_with_crew(crew_id: str, new_ship: str):
                 {"id": user_id},
                 {"$set": {"ship": new_ship}}
             )
+            from app.core.auth_cache import AuthCache
+            AuthCache.invalidate_user(user_id)
             
             logger.info(f"🔄 Synced user ship: {user.get('username')} from '{old_ship}' to '{new_ship}'")
         else:
@@ -52,6 +54,33 @@ async def sync_user_ship_with_crew(crew_id: str, new_ship: str):
         logger.error(f"❌ Error syncing user ship for crew {crew_id}: {e}")
 
 
+async def start_crew_file_move(
+    company_id: str,
+    crew_id: str,
+    crew_name: str,
+    from_ship: Optional[str],
+    to_ship: Optional[str],
+    assignment_id: str,
+    assignment_field: str = 'files_moved'
+) -> Tuple[Optional[str], Dict]:
+    """
+    Queue the Drive move of a crew member's files after the assignment is saved.
+    A failure to queue is logged, not raised - the assignment change stands.
+    
+    Returns:
+        (file move task id or None, counts of the files being moved)
+    """
+    try:
+        logger.info(f"📦 Queueing file move {from_ship or 'Standby'} → {to_ship or 'Standby'}...")
+        return await CrewFileMovementService.start_crew_file_move(
+            company_id, crew_id, crew_name, from_ship, to_ship,
+            assignment_id=assignment_id, assignment_field=assignment_field
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Could not queue file movement for crew {crew_id}: {e}")
+        return None, empty_files_moved()
+
+
 def run_async_file_movement(coro):
     """
     Run async file movement in background without blocking the response
@@ -91,11 +120,9 @@ class CrewAssignmentService:
         
         Steps:
         1. Validate crew is "Sign on" with a ship
-        2. Move files from ship folder to Standby folder
-        3. Update crew status to "Standby"
-        4. Update ship_sign_on to "-"
-        5. Update date_sign_off
-        6. Create audit trail
+        2. Update crew status to "Standby", ship_sign_on to "-" and date_sign_off
+        3. Create audit trail
+        4. Queue the move of files from ship folder to Standby folder (background)
         
         Args:
             crew_id: Crew member UUID
@@ -108,7 +135,8 @@ class CrewAssignmentService:
                 "success": boolean,
                 "message": string,
                 "crew_id": string,
-                "files_moved": {...},
+                "files_moved": {...},  # files being moved
+                "file_move_task_id": string,  # progress: GET /crew/file-move-tasks/{id}
                 "assignment_id": string
             }
         """
@@ -158,27 +186,7 @@ class CrewAssignmentService:
                     detail="Cannot sign off crew without ship assignment"
                 )
             
-            # Step 2: Move files to Standby (use ship_to_search for file movement)
-            logger.info(f"📦 Moving files from {ship_to_search} to Standby...")
-            
-            move_result = await CrewFileMovementService.move_crew_files_to_standby(
-                company_id=current_user.company,
-                crew_id=crew_id,
-                crew_name=crew_name,
-                from_ship_name=ship_to_search
-            )
-            
-            if not move_result.get('success'):
-                logger.warning(f"⚠️ File movement failed: {move_result.get('message')}")
-                # Continue anyway - don't fail the whole operation
-            
-            files_moved = move_result.get('files_moved', {
-                "passport_moved": False,
-                "certificates_moved": 0,
-                "summaries_moved": 0
-            })
-            
-            # Step 3: Update crew in database
+            # Step 2: Update crew in database (files are moved in the background, step 4)
             logger.info(f"💾 Updating crew database...")
             
             # Parse date
@@ -199,7 +207,7 @@ class CrewAssignmentService:
             # ⭐ Sync linked user's ship to "Standby"
             await sync_user_ship_with_crew(crew_id, "Standby")
             
-            # Step 4: Update existing assignment record (not create new)
+            # Step 3: Update existing assignment record (not create new)
             logger.info(f"📝 Updating assignment history with sign off info...")
             
             # Find the most recent SIGN_ON or SHIP_TRANSFER record for this crew on the specified ship
@@ -250,7 +258,7 @@ class CrewAssignmentService:
                             'sign_off_place': place_sign_off,
                             'sign_off_by': current_user.username,
                             'sign_off_notes': notes or f"Sign off from {ship_to_search}",
-                            'files_moved_on_sign_off': files_moved,
+                            'files_moved_on_sign_off': empty_files_moved(),
                             'updated_at': datetime.now(timezone.utc)
                         }
                     }
@@ -280,7 +288,7 @@ class CrewAssignmentService:
                     'sign_off_notes': notes or f"Sign off from {ship_to_search}",
                     'performed_by': current_user.username,
                     'notes': notes or f"Sign off from {current_ship}",
-                    'files_moved': files_moved,
+                    'files_moved': empty_files_moved(),
                     'created_at': datetime.now(timezone.utc)
                 }
                 
@@ -288,6 +296,12 @@ class CrewAssignmentService:
                 assignment_id = assignment_data['id']
                 logger.info(f"✅ New SIGN_OFF record created: {assignment_id}")
             
+            # Step 4: Move files to Standby in the background (use ship_to_search for file movement)
+            file_move_task_id, files_moved = await start_crew_file_move(
+                current_user.company, crew_id, crew_name, ship_to_search, None,
+                assignment_id, 'files_moved_on_sign_off' if existing_record else 'files_moved'
+            )
+            
             # Step 5: Log crew audit
             try:
                 audit_service = CrewAssignmentService.get_audit_log_service()
@@ -310,20 +324,15 @@ class CrewAssignmentService:
                 logger.error(f"Failed to create sign-off audit log: {e}")
             
             # Step 6: Return result
-            total_files = (
-                (1 if files_moved.get('passport_moved') else 0) +
-                files_moved.get('certificates_moved', 0) +
-                files_moved.get('summaries_moved', 0)
-            )
-            
             return {
                 "success": True,
-                "message": f"Crew {crew_name} signed off successfully. {total_files} files moved to Standby.",
+                "message": f"Crew {crew_name} signed off successfully. {total_files(files_moved)} files are being moved to Standby.",
                 "crew_id": crew_id,
                 "crew_name": crew_name,
                 "from_ship": ship_to_search,
                 "sign_off_date": sign_off_date,
                 "files_moved": files_moved,
+                "file_move_task_id": file_move_task_id,
                 "assignment_id": assignment_id
             }
             
@@ -355,11 +364,9 @@ class CrewAssignmentService:
         
         Steps:
         1. Validate crew is "Standby"
-        2. Move files from Standby folder to ship folder
-        3. Update crew status to "Sign on"
-        4. Update ship_sign_on
-        5. Update date_sign_on and place_sign_on
-        6. Create audit trail
+        2. Update crew status to "Sign on", ship_sign_on, date_sign_on and place_sign_on
+        3. Create audit trail
+        4. Queue the move of files from Standby folder to ship folder (background)
         
         Args:
             crew_id: Crew member UUID
@@ -412,27 +419,7 @@ class CrewAssignmentService:
                     detail="Ship name is required for sign on"
                 )
             
-            # Step 2: Move files from Standby to Ship
-            logger.info(f"📦 Moving files from Standby to {ship_name}...")
-            
-            move_result = await CrewFileMovementService.move_crew_files_from_standby_to_ship(
-                company_id=current_user.company,
-                crew_id=crew_id,
-                crew_name=crew_name,
-                to_ship_name=ship_name
-            )
-            
-            if not move_result.get('success'):
-                logger.warning(f"⚠️ File movement failed: {move_result.get('message')}")
-                # Continue anyway
-            
-            files_moved = move_result.get('files_moved', {
-                "passport_moved": False,
-                "certificates_moved": 0,
-                "summaries_moved": 0
-            })
-            
-            # Step 3: Update crew in database
+            # Step 2: Update crew in database (files are moved in the background, step 4)
             logger.info(f"💾 Updating crew database...")
             
             # Parse date
@@ -457,7 +444,7 @@ class CrewAssignmentService:
             # ⭐ Sync linked user's ship to new ship
             await sync_user_ship_with_crew(crew_id, ship_name)
             
-            # Step 4: Create audit trail (sign on record)
+            # Step 3: Create audit trail (sign on record)
             logger.info(f"📝 Creating assignment history record...")
             
             assignment_data = {
@@ -480,7 +467,7 @@ class CrewAssignmentService:
                 'sign_off_notes': None,
                 'performed_by': current_user.username,
                 'notes': notes or f"Sign on to {ship_name}",
-                'files_moved': files_moved,
+                'files_moved': empty_files_moved(),
                 'files_moved_on_sign_off': None,
                 'created_at': datetime.now(timezone.utc),
                 'updated_at': datetime.now(timezone.utc)
@@ -489,6 +476,11 @@ class CrewAssignmentService:
             await CrewAssignmentRepository.create(assignment_data)
             logger.info(f"✅ Audit trail created: {assignment_data['id']}")
             
+            # Step 4: Move files from Standby to Ship in the background
+            file_move_task_id, files_moved = await start_crew_file_move(
+                current_user.company, crew_id, crew_name, None, ship_name, assignment_data['id']
+            )
+            
             # Step 5: Log crew audit
             try:
                 audit_service = CrewAssignmentService.get_audit_log_service()
@@ -518,21 +510,16 @@ class CrewAssignmentService:
                 logger.error(f"Failed to create sign-on audit log: {e}")
             
             # Step 6: Return result
-            total_files = (
-                (1 if files_moved.get('passport_moved') else 0) +
-                files_moved.get('certificates_moved', 0) +
-                files_moved.get('summaries_moved', 0)
-            )
-            
             return {
                 "success": True,
-                "message": f"Crew {crew_name} signed on to {ship_name} successfully. {total_files} files moved.",
+                "message": f"Crew {crew_name} signed on to {ship_name} successfully. {total_files(files_moved)} files are being moved.",
                 "crew_id": crew_id,
                 "crew_name": crew_name,
                 "to_ship": ship_name,
                 "sign_on_date": sign_on_date,
                 "place_sign_on": place_sign_on,
                 "files_moved": files_moved,
+                "file_move_task_id": file_move_task_id,
                 "assignment_id": assignment_data['id']
             }
             
@@ -562,10 +549,9 @@ class CrewAssignmentService:
         
         Steps:
         1. Validate crew is "Sign on" with a ship
-        2. Move files from current ship to new ship
-        3. Update ship_sign_on
-        4. Update date_sign_on (optional)
-        5. Create audit trail
+        2. Update ship_sign_on and date_sign_on
+        3. Create audit trail
+        4. Queue the move of files from current ship to new ship (background)
         
         Args:
             crew_id: Crew member UUID
@@ -628,28 +614,7 @@ class CrewAssignmentService:
                     detail=f"Crew is already on {from_ship}"
                 )
             
-            # Step 2: Move files between ships
-            logger.info(f"📦 Moving files from {from_ship} to {to_ship_name}...")
-            
-            move_result = await CrewFileMovementService.move_crew_files_between_ships(
-                company_id=current_user.company,
-                crew_id=crew_id,
-                crew_name=crew_name,
-                from_ship_name=from_ship,
-                to_ship_name=to_ship_name
-            )
-            
-            if not move_result.get('success'):
-                logger.warning(f"⚠️ File movement failed: {move_result.get('message')}")
-                # Continue anyway
-            
-            files_moved = move_result.get('files_moved', {
-                "passport_moved": False,
-                "certificates_moved": 0,
-                "summaries_moved": 0
-            })
-            
-            # Step 3: Update crew in database
+            # Step 2: Update crew in database (files are moved in the background, step 4)
             logger.info(f"💾 Updating crew database...")
             
             # Parse date
@@ -668,7 +633,7 @@ class CrewAssignmentService:
             # ⭐ Sync linked user's ship to new ship
             await sync_user_ship_with_crew(crew_id, to_ship_name)
             
-            # Step 4: Create audit trail
+            # Step 3: Create audit trail
             logger.info(f"📝 Creating audit trail...")
             
             assignment_data = {
@@ -683,13 +648,18 @@ class CrewAssignmentService:
                 'action_date': parsed_date,
                 'performed_by': current_user.username,
                 'notes': notes or f"Transfer from {from_ship} to {to_ship_name}",
-                'files_moved': files_moved,
+                'files_moved': empty_files_moved(),
                 'created_at': datetime.now(timezone.utc)
             }
             
             await CrewAssignmentRepository.create(assignment_data)
             logger.info(f"✅ Audit trail created: {assignment_data['id']}")
             
+            # Step 4: Move files between ships in the background
+            file_move_task_id, files_moved = await start_crew_file_move(
+                current_user.company, crew_id, crew_name, from_ship, to_ship_name, assignment_data['id']
+            )
+            
             # Step 5: Create crew audit log
             try:
                 audit_service = CrewAssignmentService.get_audit_log_service()
@@ -716,21 +686,16 @@ class CrewAssignmentService:
                 logger.error(f"Failed to create crew audit log: {e}")
             
             # Step 6: Return result
-            total_files = (
-                (1 if files_moved.get('passport_moved') else 0) +
-                files_moved.get('certificates_moved', 0) +
-                files_moved.get('summaries_moved', 0)
-            )
-            
             return {
                 "success": True,
-                "message": f"Crew {crew_name} transferred from {from_ship} to {to_ship_name} successfully. {total_files} files moved.",
+                "message": f"Crew {crew_name} transferred from {from_ship} to {to_ship_name} successfully. {total_files(files_moved)} files are being moved.",
                 "crew_id": crew_id,
                 "crew_name": crew_name,
                 "from_ship": from_ship,
                 "to_ship": to_ship_name,
                 "transfer_date": transfer_date,
                 "files_moved": files_moved,
+                "file_move_task_id": file_move_task_id,
                 "assignment_id": assignment_data['id']
             }
             
@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
+from app.utils.http_client import http_session
 
 logger = logging.getLogger(__name__)
 
@@ -291,7 +292,7 @@ class CrewCertificateRenameService:
             logger.info(f"   File ID: {file_id}")
             logger.info(f"   New Name: {new_name}")
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.post(
                     apps_script_url,
                     json=payload,
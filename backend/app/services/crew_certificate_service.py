@@ -289,7 +289,7 @@ class CrewCertificateService:
     ) -> List[CrewCertificateResponse]:
         """Get crew certificates with optional filters"""
         from app.core.permission_checks import filter_documents_by_ship_scope
-        from app.db.mongodb import mongo_db
+        from app.utils.batch_loader import get_loader
         
         # ⚠️ Standby users (Editor/Viewer with ship="Standby") cannot view crew certificates
         if current_user.role in [UserRole.EDITOR, UserRole.VIEWER]:
@@ -318,14 +318,21 @@ class CrewCertificateService:
             user_assigned_ship = getattr(current_user, 'assigned_ship_id', None)
             if user_assigned_ship:
                 # Only show certs for crew on their assigned ship
+                # (one batched query for the crew, one for their ships - not two per certificate)
+                crews = await get_loader("crew").load_many(cert.get("crew_id") for cert in certificates)
+                crew_ships = {
+                    crew.get("ship_sign_on", "-") for crew in crews.values() if crew
+                } - {None, "", "-"}
+                ships_by_name = await get_loader("ships", key_field="name").load_many(crew_ships)
+                
                 filtered_certs = []
                 for cert in certificates:
-                    crew = await mongo_db.find_one("crew", {"id": cert.get("crew_id")})
+                    crew = crews.get(cert.get("crew_id"))
                     if crew:
                         crew_ship = crew.get("ship_sign_on", "-")
                         # Find ship ID by name
                         if crew_ship and crew_ship != "-":
-                            ship = await mongo_db.find_one("ships", {"name": crew_ship})
+                            ship = ships_by_name.get(crew_ship)
                             if ship and ship.get("id") == user_assigned_ship:
                                 filtered_certs.append(cert)
                 certificates = filtered_certs
@@ -871,12 +878,12 @@ class CrewCertificateService:
         if not file.content_type or not (file.content_type == "application/pdf" or file.content_type.startswith("image/")):
             raise HTTPException(status_code=400, detail="Only PDF or image files are allowed")
         
-        # Read file content
-        file_content = await file.read()
-        if not file_content:
-            raise HTTPException(status_code=400, detail="Empty file received")
+        # Stream the upload once (size / hash / type); the analysis reads the spooled content in place
+        from app.utils.upload_ingest import ingest_upload, IMAGE_OR_PDF_TYPES
+        upload = await ingest_upload(file, allowed_types=IMAGE_OR_PDF_TYPES)
+        file_content = upload.view()
         
-        logger.info(f"📄 Analyzing crew certificate file: {file.filename} ({len(file_content)} bytes)")
+        logger.info(f"📄 Analyzing crew certificate file: {file.filename} ({upload.size} bytes)")
         
         try:
             # Get crew information
@@ -1394,3 +1401,5 @@ Return ONLY the JSON object with extracted fields. No additional text."""
         except Exception as e:
             logger.error(f"❌ Error analyzing crew certificate: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to analyze certificate: {str(e)}")
+        finally:
+            upload.close()
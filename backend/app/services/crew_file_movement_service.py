@@ -1,21 +1,315 @@
 """
 Crew File Movement Service
 Handles moving crew files between ships and standby in Google Drive
+
+A crew move (sign on, sign off, transfer) is planned from the database - the
+passport, passport summary, certificate and certificate summary files of the
+crew member - and the files are then moved with bounded concurrency
+(CREW_FILE_MOVE_CONCURRENCY Apps Script calls at a time, target folders
+resolved once through DriveFolderCache).
+
+Crew assignment changes don't wait for Drive: start_crew_file_move() records a
+task in ``crew_file_move_tasks`` with one status per file and runs the moves as
+a durable job (JOB_CREW_FILE_MOVE). Poll CrewFileMoveTaskService.get_task for
+progress. Moves of the same crew member run in the order they were started: a
+move whose crew member has an earlier unfinished move is re-queued with a delay
+(CREW_FILE_MOVE_DEFER_SECONDS) rather than waiting inside the job. An earlier
+move that has not progressed for CREW_FILE_MOVE_STALE_SECONDS no longer holds
+later ones back, and a move whose job could not be queued or was dead-lettered
+is marked "failed".
 """
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import os
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from fastapi import HTTPException
 
+from app.db.mongodb import mongo_db
 from app.utils.google_drive_helper import GoogleDriveHelper
+from app.utils.drive_folder_cache import DriveFolderCache
 from app.repositories.crew_repository import CrewRepository
 from app.repositories.crew_certificate_repository import CrewCertificateRepository
 
 logger = logging.getLogger(__name__)
 
+CREW_FILE_MOVE_CONCURRENCY = int(os.getenv('CREW_FILE_MOVE_CONCURRENCY', '4'))
+# Delay before a move blocked by an earlier move of the same crew member is retried
+CREW_FILE_MOVE_DEFER_SECONDS = float(os.getenv('CREW_FILE_MOVE_DEFER_SECONDS', '10'))
+# An earlier unfinished move not updated for this long (job lost) stops blocking later moves
+# (longer than the job queue's maximum retry backoff)
+CREW_FILE_MOVE_STALE_SECONDS = float(os.getenv('CREW_FILE_MOVE_STALE_SECONDS', '900'))
+
+STANDBY_CREW_FOLDER = "COMPANY DOCUMENT/Standby Crew"
+
+# File kinds of a crew move
+PASSPORT = "passport"
+PASSPORT_SUMMARY = "passport_summary"
+CERTIFICATE = "certificate"
+CERTIFICATE_SUMMARY = "certificate_summary"
+
+
+def _crew_folder(ship_name: Optional[str], subfolder: str) -> str:
+    """Drive folder of crew files on a ship, or in Standby when ``ship_name`` is None"""
+    if not ship_name:
+        return f"{STANDBY_CREW_FOLDER}/{subfolder}"
+    return f"{ship_name}/Crew Records/{subfolder}"
+
+
+def empty_files_moved() -> Dict[str, Any]:
+    return {"passport_moved": False, "certificates_moved": 0, "summaries_moved": 0}
+
+
+def count_files_moved(files: List[Dict[str, Any]], status: Optional[str] = "moved") -> Dict[str, Any]:
+    """files_moved summary of a move (``status`` None counts every planned file)"""
+    files_moved = empty_files_moved()
+    for file in files:
+        if status is not None and file.get("status") != status:
+            continue
+        if file["kind"] == PASSPORT:
+            files_moved["passport_moved"] = True
+        elif file["kind"] == CERTIFICATE:
+            files_moved["certificates_moved"] += 1
+        else:
+            files_moved["summaries_moved"] += 1
+    return files_moved
+
+
+def total_files(files_moved: Dict[str, Any]) -> int:
+    return (
+        (1 if files_moved.get("passport_moved") else 0) +
+        files_moved.get("certificates_moved", 0) +
+        files_moved.get("summaries_moved", 0)
+    )
+
+
+class CrewFileMoveTaskService:
+    """Per-file status of background crew file moves"""
+    
+    COLLECTION = "crew_file_move_tasks"
+    
+    @staticmethod
+    async def create_task(
+        company_id: str,
+        crew_id: str,
+        crew_name: str,
+        from_ship_name: Optional[str],
+        to_ship_name: Optional[str],
+        files: List[Dict[str, Any]],
+        assignment_id: Optional[str] = None,
+        assignment_field: Optional[str] = None
+    ) -> str:
+        task_id = str(uuid.uuid4())
+        now = datetime.now(timezone.utc)
+        await mongo_db.database[CrewFileMoveTaskService.COLLECTION].insert_one({
+            "id": task_id,
+            "company_id": company_id,
+            "crew_id": crew_id,
+            "crew_name": crew_name,
+            "from_ship": from_ship_name or "Standby",
+            "to_ship": to_ship_name or "Standby",
+            "status": "pending",  # pending, processing, completed, completed_with_errors, failed
+            "files": [{**file, "status": "pending", "error": None} for file in files],
+            "total_files": len(files),
+            "moved_files": 0,
+            "failed_files": 0,
+            # Assignment history record that receives the final files_moved counts
+            "assignment_id": assignment_id,
+            "assignment_field": assignment_field,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None
+        })
+        return task_id
+    
+    @staticmethod
+    async def get_task(task_id: str) -> Optional[Dict[str, Any]]:
+        return await mongo_db.database[CrewFileMoveTaskService.COLLECTION].find_one({"id": task_id}, {"_id": 0})
+    
+    @staticmethod
+    async def update_task(task_id: str, updates: Dict[str, Any]):
+        updates["updated_at"] = datetime.now(timezone.utc)
+        await mongo_db.database[CrewFileMoveTaskService.COLLECTION].update_one({"id": task_id}, {"$set": updates})
+    
+    @staticmethod
+    async def set_file_status(task_id: str, index: int, status: str, error: Optional[str] = None):
+        counter = "moved_files" if status == "moved" else "failed_files"
+        await mongo_db.database[CrewFileMoveTaskService.COLLECTION].update_one(
+            {"id": task_id},
+            {
+                "$set": {
+                    f"files.{index}.status": status,
+                    f"files.{index}.error": error,
+                    "updated_at": datetime.now(timezone.utc)
+                },
+                "$inc": {counter: 1}
+            }
+        )
+    
+    @staticmethod
+    async def mark_failed(task_id: str, error: str):
+        """Settle a task whose job will not run (enqueue failed / dead-lettered)"""
+        await CrewFileMoveTaskService.update_task(task_id, {
+            "status": "failed",
+            "error": error,
+            "completed_at": datetime.now(timezone.utc)
+        })
+    
+    @staticmethod
+    async def find_earlier_unfinished_move(task: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        An earlier move of the same crew member that is still pending or running;
+        moves not updated for CREW_FILE_MOVE_STALE_SECONDS are ignored (job lost)
+        """
+        fresh_after = datetime.now(timezone.utc) - timedelta(seconds=CREW_FILE_MOVE_STALE_SECONDS)
+        return await mongo_db.database[CrewFileMoveTaskService.COLLECTION].find_one({
+            "crew_id": task["crew_id"],
+            "created_at": {"$lt": task["created_at"]},
+            "status": {"$in": ["pending", "processing"]},
+            "updated_at": {"$gte": fresh_after}
+        }, {"id": 1})
+
 
 class CrewFileMovementService:
     """Service for moving crew files in Google Drive"""
     
+    @staticmethod
+    async def plan_crew_files(
+        crew_id: str,
+        crew_name: str,
+        from_ship_name: Optional[str],
+        to_ship_name: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Files of a crew member to move (passport + summary, certificates + summaries).
+        ``None`` as ship name means the Standby folder.
+        """
+        crew = await CrewRepository.find_by_id(crew_id)
+        if not crew:
+            raise HTTPException(status_code=404, detail="Crew member not found")
+        
+        files = []
+        passport_from = _crew_folder(from_ship_name, "Crew Passport")
+        passport_to = _crew_folder(to_ship_name, "Crew Passport")
+        passport_no = crew.get('passport', 'unknown')
+        if crew.get('passport_file_id'):
+            files.append({
+                "kind": PASSPORT, "file_id": crew['passport_file_id'],
+                "from_folder_path": passport_from, "to_folder_path": passport_to,
+                "filename": f"passport_{passport_no}.pdf", "label": "Passport file"
+            })
+        if crew.get('summary_file_id'):
+            files.append({
+                "kind": PASSPORT_SUMMARY, "file_id": crew['summary_file_id'],
+                "from_folder_path": passport_from, "to_folder_path": passport_to,
+                "filename": f"passport_{passport_no}_summary.txt", "label": "Passport summary"
+            })
+        
+        certificates = await CrewCertificateRepository.find_by_crew_id(crew_id)
+        logger.info(f"📋 Found {len(certificates)} certificates for crew")
+        cert_from = _crew_folder(from_ship_name, "Crew Cert")
+        cert_to = _crew_folder(to_ship_name, "Crew Cert")
+        for cert in certificates:
+            cert_name = cert.get('cert_name', 'unknown')
+            cert_no = cert.get('cert_no', 'unknown')
+            if cert.get('crew_cert_file_id'):
+                files.append({
+                    "kind": CERTIFICATE, "file_id": cert['crew_cert_file_id'],
+                    "from_folder_path": cert_from, "to_folder_path": cert_to,
+                    "filename": f"{crew_name}_{cert_name}_{cert_no}.pdf", "label": f"Certificate: {cert_name}"
+                })
+            else:
+                logger.warning(f"⚠️ Certificate '{cert_name}' (No: {cert_no}) has no file - skipped")
+            if cert.get('crew_cert_summary_file_id'):
+                files.append({
+                    "kind": CERTIFICATE_SUMMARY, "file_id": cert['crew_cert_summary_file_id'],
+                    "from_folder_path": cert_from, "to_folder_path": cert_to,
+                    "filename": f"{crew_name}_{cert_name}_{cert_no}_summary.txt",
+                    "label": f"Certificate summary: {cert_name}"
+                })
+        return files
+    
+    @staticmethod
+    async def move_files(
+        drive_helper: GoogleDriveHelper,
+        files: List[Dict[str, Any]],
+        on_result: Optional[Callable[[int, bool, Optional[str]], Awaitable[None]]] = None,
+        concurrency: int = CREW_FILE_MOVE_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Move ``files`` (see plan_crew_files) with at most ``concurrency`` Apps Script
+        calls in flight. Each distinct target folder is resolved once, up front.
+        Files whose status is already "moved" (a retried task) are skipped.
+        
+        Returns:
+            The files with "status" ("moved" / "failed") and "error" set
+        """
+        target_paths = sorted({file["to_folder_path"] for file in files})
+        target_ids = dict(zip(target_paths, await asyncio.gather(*(
+            CrewFileMovementService._ensure_folder_exists(drive_helper, path) for path in target_paths
+        ))))
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def move(index: int, file: Dict[str, Any]) -> Dict[str, Any]:
+            if file.get("status") == "moved":
+                return file
+            target_folder_id = target_ids.get(file["to_folder_path"])
+            if not target_folder_id:
+                error = f"Failed to create/find target folder: {file['to_folder_path']}"
+                logger.error(f"❌ {error}")
+                moved = False
+            else:
+                async with semaphore:
+                    moved, error = await CrewFileMovementService._move_to_folder(
+                        drive_helper, file["file_id"], target_folder_id, file["to_folder_path"], file["filename"]
+                    )
+            if on_result is not None:
+                await on_result(index, moved, error)
+            return {**file, "status": "moved" if moved else "failed", "error": error}
+        
+        return list(await asyncio.gather(*(move(index, file) for index, file in enumerate(files))))
+    
+    @staticmethod
+    async def _move_crew_files(
+        company_id: str,
+        crew_id: str,
+        crew_name: str,
+        from_ship_name: Optional[str],
+        to_ship_name: Optional[str],
+        success_message: str
+    ) -> Dict:
+        """Plan and move all files of a crew member, waiting for the result"""
+        try:
+            drive_helper = GoogleDriveHelper(company_id)
+            await drive_helper.load_config()
+            
+            files = await CrewFileMovementService.plan_crew_files(crew_id, crew_name, from_ship_name, to_ship_name)
+            results = await CrewFileMovementService.move_files(drive_helper, files)
+            files_moved = count_files_moved(results)
+            
+            logger.info(f"🎉 File movement complete: {total_files(files_moved)} files moved")
+            
+            return {
+                "success": True,
+                "files_moved": files_moved,
+                "message": success_message.format(count=total_files(files_moved)),
+                "details": [file["label"] for file in results if file["status"] == "moved" and file["kind"] != CERTIFICATE_SUMMARY]
+            }
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error moving crew files: {e}")
+            import traceback
+            traceback.print_exc()
+            return {
+                "success": False,
+                "files_moved": empty_files_moved(),
+                "message": f"Failed to move files: {str(e)}",
+                "details": []
+            }
+    
     @staticmethod
     async def move_crew_files_to_standby(
         company_id: str,
@@ -56,126 +350,10 @@ class CrewFileMovementService:
         logger.info(f"   Crew: {crew_name} ({crew_id})")
         logger.info(f"   From Ship: {from_ship_name}")
         
-        try:
-            # Initialize Google Drive helper
-            drive_helper = GoogleDriveHelper(company_id)
-            await drive_helper.load_config()
-            
-            moved_details = []
-            files_moved = {
-                "passport_moved": False,
-                "certificates_moved": 0,
-                "summaries_moved": 0
-            }
-            
-            # 1. Get crew info for passport file IDs
-            crew = await CrewRepository.find_by_id(crew_id)
-            if not crew:
-                raise HTTPException(status_code=404, detail="Crew member not found")
-            
-            # 2. Move passport files (if exist)
-            passport_file_id = crew.get('passport_file_id')
-            summary_file_id = crew.get('summary_file_id')
-            
-            if passport_file_id:
-                # Move passport from: {ship}/Crew Records/Crew Passport
-                # To: COMPANY DOCUMENT/Standby Crew/Crew Passport
-                success = await CrewFileMovementService._move_file(
-                    drive_helper=drive_helper,
-                    file_id=passport_file_id,
-                    from_folder_path=f"{from_ship_name}/Crew Records/Crew Passport",
-                    to_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Passport",
-                    filename=f"passport_{crew.get('passport', 'unknown')}.pdf"
-                )
-                
-                if success:
-                    files_moved["passport_moved"] = True
-                    moved_details.append(f"Passport file moved")
-                    logger.info(f"✅ Passport file moved")
-            
-            if summary_file_id:
-                success = await CrewFileMovementService._move_file(
-                    drive_helper=drive_helper,
-                    file_id=summary_file_id,
-                    from_folder_path=f"{from_ship_name}/Crew Records/Crew Passport",
-                    to_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Passport",
-                    filename=f"passport_{crew.get('passport', 'unknown')}_summary.txt"
-                )
-                
-                if success:
-                    files_moved["summaries_moved"] += 1
-                    moved_details.append(f"Passport summary moved")
-                    logger.info(f"✅ Passport summary moved")
-            
-            # 3. Get all certificates for this crew
-            certificates = await CrewCertificateRepository.find_by_crew_id(crew_id)
-            logger.info(f"📋 Found {len(certificates)} certificates for crew")
-            
-            # 4. Move each certificate and its summary
-            for cert in certificates:
-                cert_file_id = cert.get('crew_cert_file_id')  # ✅ Correct field name
-                cert_summary_file_id = cert.get('crew_cert_summary_file_id')  # ✅ Correct field name
-                cert_name = cert.get('cert_name', 'unknown')
-                cert_no = cert.get('cert_no', 'unknown')
-                
-                if cert_file_id:
-                    # Move certificate from: {ship}/Crew Records/Crew Cert
-                    # To: COMPANY DOCUMENT/Standby Crew/Crew Cert
-                    success = await CrewFileMovementService._move_file(
-                        drive_helper=drive_helper,
-                        file_id=cert_file_id,
-                        from_folder_path=f"{from_ship_name}/Crew Records/Crew Cert",
-                        to_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Cert",
-                        filename=f"{crew_name}_{cert_name}_{cert_no}.pdf"
-                    )
-                    
-                    if success:
-                        files_moved["certificates_moved"] += 1
-                        moved_details.append(f"Certificate: {cert_name}")
-                        logger.info(f"✅ Certificate moved: {cert_name}")
-                else:
-                    logger.warning(f"⚠️ Certificate '{cert_name}' (No: {cert_no}) has no file - skipped")
-                
-                if cert_summary_file_id:
-                    success = await CrewFileMovementService._move_file(
-                        drive_helper=drive_helper,
-                        file_id=cert_summary_file_id,
-                        from_folder_path=f"{from_ship_name}/Crew Records/Crew Cert",
-                        to_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Cert",
-                        filename=f"{crew_name}_{cert_name}_{cert_no}_summary.txt"
-                    )
-                    
-                    if success:
-                        files_moved["summaries_moved"] += 1
-                        logger.info(f"✅ Certificate summary moved: {cert_name}")
-            
-            total_files = (
-                (1 if files_moved["passport_moved"] else 0) +
-                files_moved["certificates_moved"] +
-                files_moved["summaries_moved"]
-            )
-            
-            logger.info(f"🎉 File movement complete: {total_files} files moved")
-            
-            return {
-                "success": True,
-                "files_moved": files_moved,
-                "message": f"Successfully moved {total_files} files to Standby folder",
-                "details": moved_details
-            }
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"❌ Error moving crew files to standby: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "success": False,
-                "files_moved": {"passport_moved": False, "certificates_moved": 0, "summaries_moved": 0},
-                "message": f"Failed to move files: {str(e)}",
-                "details": []
-            }
+        return await CrewFileMovementService._move_crew_files(
+            company_id, crew_id, crew_name, from_ship_name, None,
+            "Successfully moved {count} files to Standby folder"
+        )
     
     @staticmethod
     async def move_crew_files_from_standby_to_ship(
@@ -202,121 +380,10 @@ class CrewFileMovementService:
         logger.info(f"   Crew: {crew_name} ({crew_id})")
         logger.info(f"   To Ship: {to_ship_name}")
         
-        try:
-            drive_helper = GoogleDriveHelper(company_id)
-            await drive_helper.load_config()
-            
-            moved_details = []
-            files_moved = {
-                "passport_moved": False,
-                "certificates_moved": 0,
-                "summaries_moved": 0
-            }
-            
-            # 1. Get crew info
-            crew = await CrewRepository.find_by_id(crew_id)
-            if not crew:
-                raise HTTPException(status_code=404, detail="Crew member not found")
-            
-            # 2. Move passport files (if exist)
-            passport_file_id = crew.get('passport_file_id')
-            summary_file_id = crew.get('summary_file_id')
-            
-            if passport_file_id:
-                success = await CrewFileMovementService._move_file(
-                    drive_helper=drive_helper,
-                    file_id=passport_file_id,
-                    from_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Passport",
-                    to_folder_path=f"{to_ship_name}/Crew Records/Crew Passport",
-                    filename=f"passport_{crew.get('passport', 'unknown')}.pdf"
-                )
-                
-                if success:
-                    files_moved["passport_moved"] = True
-                    moved_details.append(f"Passport file moved")
-                    logger.info(f"✅ Passport file moved")
-            
-            if summary_file_id:
-                success = await CrewFileMovementService._move_file(
-                    drive_helper=drive_helper,
-                    file_id=summary_file_id,
-                    from_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Passport",
-                    to_folder_path=f"{to_ship_name}/Crew Records/Crew Passport",
-                    filename=f"passport_{crew.get('passport', 'unknown')}_summary.txt"
-                )
-                
-                if success:
-                    files_moved["summaries_moved"] += 1
-                    moved_details.append(f"Passport summary moved")
-                    logger.info(f"✅ Passport summary moved")
-            
-            # 3. Get all certificates
-            certificates = await CrewCertificateRepository.find_by_crew_id(crew_id)
-            logger.info(f"📋 Found {len(certificates)} certificates for crew")
-            
-            # 4. Move each certificate
-            for cert in certificates:
-                cert_file_id = cert.get('crew_cert_file_id')  # ✅ Correct field name
-                cert_summary_file_id = cert.get('crew_cert_summary_file_id')  # ✅ Correct field name
-                cert_name = cert.get('cert_name', 'unknown')
-                cert_no = cert.get('cert_no', 'unknown')
-                
-                if cert_file_id:
-                    success = await CrewFileMovementService._move_file(
-                        drive_helper=drive_helper,
-                        file_id=cert_file_id,
-                        from_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Cert",
-                        to_folder_path=f"{to_ship_name}/Crew Records/Crew Cert",
-                        filename=f"{crew_name}_{cert_name}_{cert_no}.pdf"
-                    )
-                    
-                    if success:
-                        files_moved["certificates_moved"] += 1
-                        moved_details.append(f"Certificate: {cert_name}")
-                        logger.info(f"✅ Certificate moved: {cert_name}")
-                else:
-                    logger.warning(f"⚠️ Certificate '{cert_name}' (No: {cert_no}) has no file - skipped")
-                
-                if cert_summary_file_id:
-                    success = await CrewFileMovementService._move_file(
-                        drive_helper=drive_helper,
-                        file_id=cert_summary_file_id,
-                        from_folder_path="COMPANY DOCUMENT/Standby Crew/Crew Cert",
-                        to_folder_path=f"{to_ship_name}/Crew Records/Crew Cert",
-                        filename=f"{crew_name}_{cert_name}_{cert_no}_summary.txt"
-                    )
-                    
-                    if success:
-                        files_moved["summaries_moved"] += 1
-                        logger.info(f"✅ Certificate summary moved: {cert_name}")
-            
-            total_files = (
-                (1 if files_moved["passport_moved"] else 0) +
-                files_moved["certificates_moved"] +
-                files_moved["summaries_moved"]
-            )
-            
-            logger.info(f"🎉 File movement complete: {total_files} files moved")
-            
-            return {
-                "success": True,
-                "files_moved": files_moved,
-                "message": f"Successfully moved {total_files} files to {to_ship_name}",
-                "details": moved_details
-            }
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"❌ Error moving crew files from standby: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "success": False,
-                "files_moved": {"passport_moved": False, "certificates_moved": 0, "summaries_moved": 0},
-                "message": f"Failed to move files: {str(e)}",
-                "details": []
-            }
+        return await CrewFileMovementService._move_crew_files(
+            company_id, crew_id, crew_name, None, to_ship_name,
+            "Successfully moved {count} files to " + to_ship_name
+        )
     
     @staticmethod
     async def move_crew_files_between_ships(
@@ -345,121 +412,123 @@ class CrewFileMovementService:
         logger.info(f"   Crew: {crew_name} ({crew_id})")
         logger.info(f"   From: {from_ship_name} → To: {to_ship_name}")
         
+        return await CrewFileMovementService._move_crew_files(
+            company_id, crew_id, crew_name, from_ship_name, to_ship_name,
+            "Successfully moved {count} files from " + from_ship_name + " to " + to_ship_name
+        )
+    
+    @staticmethod
+    async def start_crew_file_move(
+        company_id: str,
+        crew_id: str,
+        crew_name: str,
+        from_ship_name: Optional[str],
+        to_ship_name: Optional[str],
+        assignment_id: Optional[str] = None,
+        assignment_field: str = "files_moved"
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Plan a crew file move and queue it as a background job (returns immediately).
+        ``None`` as ship name means the Standby folder. When the job finishes, the
+        counts of moved files are written to ``assignment_field`` of the
+        crew_assignment_history record ``assignment_id``.
+        
+        Returns:
+            (task_id or None if there is nothing to move, files_moved counts of the planned files)
+        """
+        from app.services.job_queue_service import JobQueueService, JOB_CREW_FILE_MOVE
+        
+        files = await CrewFileMovementService.plan_crew_files(crew_id, crew_name, from_ship_name, to_ship_name)
+        planned = count_files_moved(files, status=None)
+        if not files:
+            return None, planned
+        
+        task_id = await CrewFileMoveTaskService.create_task(
+            company_id, crew_id, crew_name, from_ship_name, to_ship_name, files,
+            assignment_id=assignment_id, assignment_field=assignment_field
+        )
         try:
-            drive_helper = GoogleDriveHelper(company_id)
-            await drive_helper.load_config()
-            
-            moved_details = []
-            files_moved = {
-                "passport_moved": False,
-                "certificates_moved": 0,
-                "summaries_moved": 0
-            }
-            
-            # 1. Get crew info
-            crew = await CrewRepository.find_by_id(crew_id)
-            if not crew:
-                raise HTTPException(status_code=404, detail="Crew member not found")
-            
-            # 2. Move passport files (if exist)
-            passport_file_id = crew.get('passport_file_id')
-            summary_file_id = crew.get('summary_file_id')
-            
-            if passport_file_id:
-                success = await CrewFileMovementService._move_file(
-                    drive_helper=drive_helper,
-                    file_id=passport_file_id,
-                    from_folder_path=f"{from_ship_name}/Crew Records/Crew Passport",
-                    to_folder_path=f"{to_ship_name}/Crew Records/Crew Passport",
-                    filename=f"passport_{crew.get('passport', 'unknown')}.pdf"
-                )
-                
-                if success:
-                    files_moved["passport_moved"] = True
-                    moved_details.append(f"Passport file moved")
-                    logger.info(f"✅ Passport file moved")
-            
-            if summary_file_id:
-                success = await CrewFileMovementService._move_file(
-                    drive_helper=drive_helper,
-                    file_id=summary_file_id,
-                    from_folder_path=f"{from_ship_name}/Crew Records/Crew Passport",
-                    to_folder_path=f"{to_ship_name}/Crew Records/Crew Passport",
-                    filename=f"passport_{crew.get('passport', 'unknown')}_summary.txt"
-                )
-                
-                if success:
-                    files_moved["summaries_moved"] += 1
-                    moved_details.append(f"Passport summary moved")
-                    logger.info(f"✅ Passport summary moved")
-            
-            # 3. Get all certificates
-            certificates = await CrewCertificateRepository.find_by_crew_id(crew_id)
-            logger.info(f"📋 Found {len(certificates)} certificates for crew")
-            
-            # 4. Move each certificate
-            for cert in certificates:
-                cert_file_id = cert.get('crew_cert_file_id')  # ✅ Correct field name
-                cert_summary_file_id = cert.get('crew_cert_summary_file_id')  # ✅ Correct field name
-                cert_name = cert.get('cert_name', 'unknown')
-                cert_no = cert.get('cert_no', 'unknown')
-                
-                if cert_file_id:
-                    success = await CrewFileMovementService._move_file(
-                        drive_helper=drive_helper,
-                        file_id=cert_file_id,
-                        from_folder_path=f"{from_ship_name}/Crew Records/Crew Cert",
-                        to_folder_path=f"{to_ship_name}/Crew Records/Crew Cert",
-                        filename=f"{crew_name}_{cert_name}_{cert_no}.pdf"
-                    )
-                    
-                    if success:
-                        files_moved["certificates_moved"] += 1
-                        moved_details.append(f"Certificate: {cert_name}")
-                        logger.info(f"✅ Certificate moved: {cert_name}")
-                else:
-                    logger.warning(f"⚠️ Certificate '{cert_name}' (No: {cert_no}) has no file - skipped")
-                
-                if cert_summary_file_id:
-                    success = await CrewFileMovementService._move_file(
-                        drive_helper=drive_helper,
-                        file_id=cert_summary_file_id,
-                        from_folder_path=f"{from_ship_name}/Crew Records/Crew Cert",
-                        to_folder_path=f"{to_ship_name}/Crew Records/Crew Cert",
-                        filename=f"{crew_name}_{cert_name}_{cert_no}_summary.txt"
-                    )
-                    
-                    if success:
-                        files_moved["summaries_moved"] += 1
-                        logger.info(f"✅ Certificate summary moved: {cert_name}")
-            
-            total_files = (
-                (1 if files_moved["passport_moved"] else 0) +
-                files_moved["certificates_moved"] +
-                files_moved["summaries_moved"]
+            await JobQueueService.enqueue(
+                JOB_CREW_FILE_MOVE,
+                {"task_id": task_id},
+                idempotency_key=f"{JOB_CREW_FILE_MOVE}:{task_id}"
             )
-            
-            logger.info(f"🎉 File movement complete: {total_files} files moved")
-            
-            return {
-                "success": True,
-                "files_moved": files_moved,
-                "message": f"Successfully moved {total_files} files from {from_ship_name} to {to_ship_name}",
-                "details": moved_details
-            }
-            
-        except HTTPException:
-            raise
         except Exception as e:
-            logger.error(f"❌ Error moving crew files between ships: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "success": False,
-                "files_moved": {"passport_moved": False, "certificates_moved": 0, "summaries_moved": 0},
-                "message": f"Failed to move files: {str(e)}",
-                "details": []
-            }
+            # Nothing will run the task - don't leave it pending (it would hold later moves back)
+            await CrewFileMoveTaskService.mark_failed(task_id, f"Could not queue file move: {e}")
+            raise
+        logger.info(f"📋 Queued move of {len(files)} files for crew {crew_name} (task {task_id})")
+        return task_id, planned
+    
+    @staticmethod
+    async def run_file_move_task(task_id: str):
+        """Job body of a queued crew file move (per-file status on the task)"""
+        task = await CrewFileMoveTaskService.get_task(task_id)
+        if not task:
+            logger.warning(f"⚠️ Crew file move task {task_id} not found")
+            return
+        if task["status"] in ("completed", "completed_with_errors", "failed"):
+            return
+        
+        earlier = await CrewFileMoveTaskService.find_earlier_unfinished_move(task)
+        if earlier:
+            await CrewFileMovementService._defer_file_move_task(task, earlier["id"])
+            return
+        
+        # A retried task moves its failed and pending files again
+        await CrewFileMoveTaskService.update_task(task_id, {"status": "processing", "failed_files": 0})
+        
+        drive_helper = GoogleDriveHelper(task["company_id"])
+        await drive_helper.load_config()
+        
+        async def on_result(index: int, moved: bool, error: Optional[str]):
+            await CrewFileMoveTaskService.set_file_status(task_id, index, "moved" if moved else "failed", error)
+        
+        results = await CrewFileMovementService.move_files(drive_helper, task["files"], on_result=on_result)
+        files_moved = count_files_moved(results)
+        failed = sum(1 for file in results if file["status"] != "moved")
+        
+        await CrewFileMoveTaskService.update_task(task_id, {
+            "status": "completed_with_errors" if failed else "completed",
+            "completed_at": datetime.now(timezone.utc)
+        })
+        
+        # Final counts on the assignment history record
+        if task.get("assignment_id") and task.get("assignment_field"):
+            await mongo_db.database.crew_assignment_history.update_one(
+                {"id": task["assignment_id"]},
+                {"$set": {task["assignment_field"]: files_moved}}
+            )
+        
+        logger.info(
+            f"🎉 Crew file move {task_id} ({task['crew_name']}: {task['from_ship']} → {task['to_ship']}): "
+            f"{total_files(files_moved)} moved, {failed} failed"
+        )
+    
+    @staticmethod
+    async def _defer_file_move_task(task: Dict[str, Any], earlier_task_id: str):
+        """Re-queue a move behind an earlier unfinished move of the same crew member"""
+        from app.services.job_queue_service import JobQueueService, JOB_CREW_FILE_MOVE
+        
+        task_id = task["id"]
+        # Counts the deferrals (unique idempotency key per re-queue) and keeps the
+        # task fresh for moves queued behind it
+        deferred = await mongo_db.database[CrewFileMoveTaskService.COLLECTION].find_one_and_update(
+            {"id": task_id},
+            {"$inc": {"deferrals": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            projection={"deferrals": 1}
+        )
+        deferrals = (deferred or {}).get("deferrals", 0) + 1
+        logger.info(
+            f"⏳ File move {task_id} waits for earlier move {earlier_task_id} of crew {task['crew_id']} "
+            f"(re-queued in {CREW_FILE_MOVE_DEFER_SECONDS:g}s)"
+        )
+        await JobQueueService.enqueue(
+            JOB_CREW_FILE_MOVE,
+            {"task_id": task_id},
+            idempotency_key=f"{JOB_CREW_FILE_MOVE}:{task_id}:{deferrals}",
+            delay_seconds=CREW_FILE_MOVE_DEFER_SECONDS
+        )
     
     @staticmethod
     async def _find_folder_id_by_path(
@@ -469,6 +538,7 @@ class CrewFileMovementService:
     ) -> Optional[str]:
         """
         Find folder ID by traversing path, auto-create if not exists
+        (served from the Drive folder cache when the path was resolved before)
         
         Args:
             drive_helper: Initialized GoogleDriveHelper instance
@@ -478,6 +548,20 @@ class CrewFileMovementService:
         Returns:
             Folder ID if found/created, None otherwise
         """
+        return await DriveFolderCache.resolve(
+            drive_helper.company_id,
+            drive_helper.folder_id,
+            folder_path.split('/'),
+            lambda: CrewFileMovementService._walk_folder_path(drive_helper, folder_path, auto_create)
+        )
+    
+    @staticmethod
+    async def _walk_folder_path(
+        drive_helper: GoogleDriveHelper,
+        folder_path: str,
+        auto_create: bool = True
+    ) -> Optional[str]:
+        """Uncached _find_folder_id_by_path: one Apps Script listing per path level"""
         logger.info(f"🔍 Finding folder ID for path: {folder_path}")
         
         try:
@@ -559,7 +643,23 @@ class CrewFileMovementService:
         folder_path: str
     ) -> Optional[str]:
         """
-        Ensure folder exists, create only if needed
+        Ensure folder exists, create only if needed.
+        Cached per company/root/path; concurrent moves to a new folder create it once.
+        """
+        return await DriveFolderCache.resolve(
+            drive_helper.company_id,
+            drive_helper.folder_id,
+            folder_path.split('/'),
+            lambda: CrewFileMovementService._check_or_create_folder(drive_helper, folder_path)
+        )
+    
+    @staticmethod
+    async def _check_or_create_folder(
+        drive_helper: GoogleDriveHelper,
+        folder_path: str
+    ) -> Optional[str]:
+        """
+        Uncached _ensure_folder_exists
         
         Strategy:
         1. Check if folder already exists (traverse path)
@@ -702,22 +802,38 @@ class CrewFileMovementService:
         logger.info(f"📦 Moving file: {filename}")
         logger.info(f"   From: {from_folder_path}")
         logger.info(f"   To: {to_folder_path}")
-        logger.info(f"   File ID: {file_id}")
         
+        # Step 1: Ensure target folder exists (auto-create if needed)
+        target_folder_id = await CrewFileMovementService._ensure_folder_exists(
+            drive_helper,
+            to_folder_path
+        )
+        
+        if not target_folder_id:
+            logger.error(f"❌ Failed to create/find target folder: {to_folder_path}")
+            return False
+        
+        # Step 2: Move file to target folder
+        moved, _ = await CrewFileMovementService._move_to_folder(
+            drive_helper, file_id, target_folder_id, to_folder_path, filename
+        )
+        return moved
+    
+    @staticmethod
+    async def _move_to_folder(
+        drive_helper: GoogleDriveHelper,
+        file_id: str,
+        target_folder_id: str,
+        to_folder_path: str,
+        filename: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Move one file into an already resolved folder
+        
+        Returns:
+            (moved, error message)
+        """
         try:
-            # Step 1: Ensure target folder exists (auto-create if needed)
-            target_folder_id = await CrewFileMovementService._ensure_folder_exists(
-                drive_helper,
-                to_folder_path
-            )
-            
-            if not target_folder_id:
-                logger.error(f"❌ Failed to create/find target folder: {to_folder_path}")
-                return False
-            
-            logger.info(f"✅ Target folder ID: {target_folder_id}")
-            
-            # Step 2: Move file to target folder
             move_payload = {
                 "action": "move_file",
                 "file_id": file_id,
@@ -728,11 +844,14 @@ class CrewFileMovementService:
             
             if result.get('success'):
                 logger.info(f"✅ File moved successfully: {filename}")
-                return True
+                return True, None
             else:
-                logger.warning(f"⚠️ File move failed: {result.get('message')}")
-                return False
+                logger.warning(f"⚠️ File move to {to_folder_path} failed: {result.get('message')}")
+                # The cached target folder may have been deleted or moved in Drive: forget
+                # every path resolved to it so the next move re-resolves
+                await DriveFolderCache.invalidate_folder(target_folder_id)
+                return False, result.get('message') or "File move failed"
                 
         except Exception as e:
             logger.error(f"❌ Error moving file {filename}: {e}")
-            return False
+            return False, str(e)
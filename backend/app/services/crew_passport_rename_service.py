@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
+from app.utils.http_client import http_session
 
 logger = logging.getLogger(__name__)
 
@@ -85,7 +86,7 @@ class CrewPassportRenameService:
             # Check if Apps Script supports rename_file action
             logger.info("🔍 Checking Apps Script capabilities for passport rename...")
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.post(
                     apps_script_url,
                     json={},
@@ -246,7 +247,7 @@ class CrewPassportRenameService:
         try:
             logger.info(f"🔄 Renaming {file_type} file {file_id} to {new_name}")
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 payload = {
                     "action": "rename_file",
                     "file_id": file_id,
@@ -13,7 +13,9 @@ from fastapi import HTTPException, UploadFile
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
 from app.utils.pdf_splitter import PDFSplitter, create_enhanced_merged_summary
-from app.utils.drawing_manual_ai import extract_drawings_manuals_fields_from_summary
+from app.utils.cpu_worker_pool import get_pdf_page_info_async, split_pdf_async
+from app.utils.drawing_manual_ai import extract_drawings_manuals_fields_from_summary, DRAWING_MANUAL_PROMPT_VERSION
+from app.utils.ai_extraction_cache import AIExtractionCache
 
 logger = logging.getLogger(__name__)
 
@@ -85,8 +87,9 @@ class DrawingManualAnalyzeService:
             splitter = PDFSplitter(max_pages_per_chunk=12)
             
             try:
-                total_pages = splitter.get_page_count(file_content)
-                needs_split = splitter.needs_splitting(file_content)
+                page_info = await get_pdf_page_info_async(file_content, splitter.max_pages_per_chunk)
+                total_pages = page_info['total_pages']
+                needs_split = page_info['needs_split']
                 logger.info(f"📊 PDF Analysis: {total_pages} pages, Split needed: {needs_split}")
             except ValueError as e:
                 logger.error(f"❌ Invalid PDF file: {e}")
@@ -155,12 +158,12 @@ class DrawingManualAnalyzeService:
             analysis_result['_ship_name'] = ship_name
             analysis_result['_summary_text'] = ''
             
-            try:
+            async def run_ai_analysis(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
                 # Process PDF based on size
                 if not needs_split:
                     # Small PDF - process entire document
                     logger.info(f"🔄 Processing single PDF: {filename}")
-                    analysis_result = await DrawingManualAnalyzeService._process_single_pdf(
+                    return await DrawingManualAnalyzeService._process_single_pdf(
                         file_content,
                         filename,
                         file.content_type or 'application/octet-stream',
@@ -169,18 +172,27 @@ class DrawingManualAnalyzeService:
                         analysis_result,
                         total_pages
                     )
-                else:
-                    # Large PDF - split and process chunks
-                    logger.info(f"🔪 Splitting PDF ({total_pages} pages) into chunks...")
-                    analysis_result = await DrawingManualAnalyzeService._process_large_pdf(
-                        file_content,
-                        filename,
-                        splitter,
-                        document_ai_config,
-                        ai_config_doc,
-                        analysis_result,
-                        total_pages
-                    )
+                # Large PDF - split and process chunks
+                logger.info(f"🔪 Splitting PDF ({total_pages} pages) into chunks...")
+                return await DrawingManualAnalyzeService._process_large_pdf(
+                    file_content,
+                    filename,
+                    splitter,
+                    document_ai_config,
+                    ai_config_doc,
+                    analysis_result,
+                    total_pages
+                )
+            
+            try:
+                # ♻️ Same file + name + model + prompt analyzed before → reuse the AI output
+                cache_key = AIExtractionCache.make_key(
+                    file_content, "drawing_manual", ai_config_doc, DRAWING_MANUAL_PROMPT_VERSION, context=filename
+                )
+                analysis_result = await AIExtractionCache.get_or_analyze(
+                    cache_key, analysis_result, run_ai_analysis, "drawing_manual",
+                    DrawingManualAnalyzeService._is_complete_analysis
+                )
                 
                 # Success - return analysis
                 logger.info("✅ Drawing/manual analysis completed successfully")
@@ -216,6 +228,14 @@ class DrawingManualAnalyzeService:
                 detail=f"Failed to analyze drawing/manual: {str(e)}"
             )
     
+    @staticmethod
+    def _is_complete_analysis(analysis_result: Dict[str, Any]) -> bool:
+        """Whether the AI run extracted fields from every part (only those are cached)"""
+        if analysis_result.get('processing_method') not in ("full_analysis", "split_pdf_merged_analysis"):
+            return False
+        split_info = analysis_result.get('_split_info') or {}
+        return not (split_info.get('has_failures') or split_info.get('failed_chunks'))
+    
     @staticmethod
     async def _process_single_pdf(
         file_content: bytes,
@@ -336,7 +356,7 @@ class DrawingManualAnalyzeService:
         """
         from app.utils.document_ai_helper import analyze_document_with_document_ai
         
-        chunks = splitter.split_pdf(file_content, filename)
+        chunks = await split_pdf_async(file_content, filename, max_pages_per_chunk=splitter.max_pages_per_chunk)
         total_chunks = len(chunks)
         logger.info(f"📦 Created {total_chunks} chunks from {total_pages}-page PDF")
         
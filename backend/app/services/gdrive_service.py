@@ -11,7 +11,6 @@ from fastapi import HTTPException
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
-import requests
 
 from app.models.user import UserResponse
 from app.models.gdrive_config import (
@@ -21,6 +20,7 @@ from app.models.gdrive_config import (
     GDriveProxyConfigRequest
 )
 from app.repositories.gdrive_config_repository import GDriveConfigRepository
+from app.utils.http_client import http_session, post_json
 
 logger = logging.getLogger(__name__)
 
@@ -79,20 +79,14 @@ class GDriveService:
             }
             
             try:
-                response = requests.post(
-                    proxy_config.web_app_url,
-                    json=test_payload,
-                    timeout=30
-                )
-                response.raise_for_status()
-                result = response.json()
+                result = await post_json(proxy_config.web_app_url, test_payload, timeout=30)
                 
                 if not result.get("success"):
                     raise HTTPException(
                         status_code=400,
                         detail=f"Apps Script test failed: {result.get('message', 'Unknown error')}"
                     )
-            except requests.exceptions.RequestException as e:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Failed to connect to Apps Script: {str(e)}"
@@ -240,9 +234,7 @@ class GDriveService:
                     raise HTTPException(status_code=400, detail="Apps Script URL not configured")
                 
                 test_payload = {"action": "test_connection", "parent_folder_id": folder_id}
-                response = requests.post(web_app_url, json=test_payload, timeout=30)
-                response.raise_for_status()
-                result = response.json()
+                result = await post_json(web_app_url, test_payload, timeout=30)
                 
                 if result.get("success"):
                     return {
@@ -263,8 +255,12 @@ class GDriveService:
                     credentials_dict, scopes=scopes
                 )
                 
-                service = build('drive', 'v3', credentials=credentials)
-                files = service.files().list(q=f"parents in '{folder_id}'", pageSize=5).execute()
+                # googleapiclient is synchronous - keep it off the event loop
+                def list_folder():
+                    service = build('drive', 'v3', credentials=credentials)
+                    return service.files().list(q=f"parents in '{folder_id}'", pageSize=5).execute()
+                
+                files = await asyncio.to_thread(list_folder)
                 
                 return {
                     "success": True,
@@ -401,10 +397,7 @@ class GDriveService:
                     }
                     
                     logger.info(f"Requesting file view URL from Apps Script for file: {file_id}")
-                    response = requests.post(script_url, json=payload, timeout=30)
-                    response.raise_for_status()
-                    
-                    result = response.json()
+                    result = await post_json(script_url, payload, timeout=30)
                     
                     if result.get("success") and result.get("view_url"):
                         return {"success": True, "view_url": result.get("view_url")}
@@ -459,10 +452,7 @@ class GDriveService:
                     }
                     
                     logger.info(f"Requesting file download URL from Apps Script for file: {file_id}")
-                    response = requests.post(script_url, json=payload, timeout=30)
-                    response.raise_for_status()
-                    
-                    result = response.json()
+                    result = await post_json(script_url, payload, timeout=30)
                     
                     if result.get("success") and result.get("download_url"):
                         return {"success": True, "download_url": result.get("download_url")}
@@ -533,10 +523,16 @@ class GDriveService:
                         "permanent_delete": permanent_delete
                     }
                     
-                    response = requests.post(script_url, json=payload, timeout=30)
+                    async with http_session() as session:
+                        async with session.post(
+                            script_url,
+                            json=payload,
+                            timeout=aiohttp.ClientTimeout(total=30)
+                        ) as response:
+                            status_code = response.status
+                            result = await response.json(content_type=None) if status_code == 200 else None
                     
-                    if response.status_code == 200:
-                        result = response.json()
+                    if status_code == 200:
                         if result.get("success"):
                             logger.info(f"✅ File {file_id} deleted from Google Drive successfully")
                             return {"success": True, "message": "File deleted successfully"}
@@ -544,8 +540,8 @@ class GDriveService:
                             logger.warning(f"⚠️ Google Drive file deletion warning: {result.get('message')}")
                             return {"success": False, "message": result.get("message", "Unknown error")}
                     else:
-                        logger.warning(f"⚠️ Failed to delete file from Google Drive: HTTP {response.status_code}")
-                        return {"success": False, "message": f"HTTP {response.status_code}"}
+                        logger.warning(f"⚠️ Failed to delete file from Google Drive: HTTP {status_code}")
+                        return {"success": False, "message": f"HTTP {status_code}"}
                         
                 except Exception as e:
                     logger.warning(f"⚠️ Google Drive deletion failed: {str(e)}")
@@ -658,7 +654,7 @@ class GDriveService:
                     start_time = time.time()
                     logger.info(f"⏱️ [TIMING] Starting GDrive upload (attempt {retry_count + 1})...")
                     
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         async with session.post(
                             apps_script_url,
                             json=payload,
@@ -825,7 +821,7 @@ class GDriveService:
                 logger.info("🔍 Checking Apps Script capabilities for auto-rename functionality...")
                 
                 try:
-                    async with aiohttp.ClientSession() as session:
+                    async with http_session() as session:
                         # Test payload to get available actions
                         async with session.post(
                             apps_script_url,
@@ -864,7 +860,7 @@ class GDriveService:
             logger.info(f"📤 Calling Apps Script rename action...")
             
             # Call Apps Script with aiohttp (like Class & Flag Certificate)
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.post(
                     apps_script_url,
                     json=payload,
@@ -1010,7 +1006,7 @@ class GDriveService:
                 logger.warning("No Apps Script URL configured for find_subfolder")
                 return None
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 payload = {
                     "action": "find_subfolder",
                     "parent_folder_id": parent_folder_id,
@@ -1054,7 +1050,7 @@ class GDriveService:
                 logger.warning("No Apps Script URL configured for create_folder")
                 return None
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 payload = {
                     "action": "create_folder",
                     "parent_folder_id": parent_folder_id,
@@ -1106,7 +1102,7 @@ class GDriveService:
                 logger.warning("No Apps Script URL configured for delete_file")
                 return False
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 payload = {
                     "action": "delete_file",
                     "file_id": file_id,
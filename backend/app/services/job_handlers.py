@@ -0,0 +1,172 @@
+"""
+Job Handlers
+Executors for the durable job queue (see app.services.job_queue_service).
+Each handler receives the job payload; raising an exception schedules a retry.
+"""
+import base64
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from app.db.mongodb import mongo_db
+from app.models.user import UserResponse, UserRole
+from app.services.upload_spool_service import UploadSpoolService
+from app.utils.drive_folder_cache import DriveFolderCache
+from app.services.job_queue_service import (
+    register_job_handler,
+    register_dead_letter_handler,
+    JOB_CERTIFICATE_GDRIVE_UPLOAD,
+    JOB_SURVEY_REPORT_GDRIVE_UPLOAD,
+    JOB_GDRIVE_DELETE_FILE,
+    JOB_BACKGROUND_UPLOAD_PROCESS,
+    JOB_BULK_RENAME,
+    JOB_CERTIFICATE_RECALCULATION,
+    JOB_CREW_FILE_MOVE
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _load_user(user_id: str, company_id: str = None) -> UserResponse:
+    """Rebuild the acting user for a job (jobs may run long after the request)"""
+    user_doc = await mongo_db.database.users.find_one({"id": user_id})
+    if not user_doc:
+        raise ValueError(f"User not found: {user_id}")
+
+    department = user_doc.get("department") or []
+    if not isinstance(department, list):
+        department = [department]
+
+    return UserResponse(
+        id=user_doc["id"],
+        email=user_doc.get("email") or "",
+        username=user_doc["username"],
+        full_name=user_doc.get("full_name") or user_doc["username"],
+        role=UserRole(user_doc.get("role", "viewer")),
+        company=user_doc.get("company") or company_id,
+        department=department,
+        ship=user_doc.get("ship"),
+        zalo=user_doc.get("zalo"),
+        gmail=user_doc.get("gmail"),
+        is_active=user_doc.get("is_active", True),
+        signature_file_id=user_doc.get("signature_file_id"),
+        signature_url=user_doc.get("signature_url"),
+        crew_id=user_doc.get("crew_id"),
+        created_at=user_doc.get("created_at") or datetime.now(timezone.utc),
+        permissions=user_doc.get("permissions") or {}
+    )
+
+
+async def _payload_file_content(payload: Dict[str, Any]) -> bytes:
+    """File bytes of a job: spooled (spool_ref) or inline (jobs enqueued before spooling)"""
+    if payload.get("spool_ref"):
+        return await UploadSpoolService.read(payload["spool_ref"])
+    file_content = payload["file_content"]
+    return base64.b64decode(file_content) if isinstance(file_content, str) else file_content
+
+
+@register_job_handler(JOB_CERTIFICATE_GDRIVE_UPLOAD)
+async def handle_certificate_gdrive_upload(payload: Dict[str, Any]):
+    from app.services.certificate_multi_upload_service import CertificateMultiUploadService
+
+    await CertificateMultiUploadService._deferred_gdrive_upload(
+        cert_id=payload["cert_id"],
+        file_content=await _payload_file_content(payload),
+        filename=payload["filename"],
+        summary_text=payload.get("summary_text", ""),
+        ship_name=payload["ship_name"],
+        gdrive_config_doc=payload["gdrive_config_doc"]
+    )
+    # A failed upload raises (retry); the spooled bytes are kept until it succeeds
+    await UploadSpoolService.release(payload.get("spool_ref"))
+
+
+@register_job_handler(JOB_SURVEY_REPORT_GDRIVE_UPLOAD)
+async def handle_survey_report_gdrive_upload(payload: Dict[str, Any]):
+    from app.services.survey_report_multi_upload_service import SurveyReportMultiUploadService
+
+    file_content = await _payload_file_content(payload)
+    await SurveyReportMultiUploadService._deferred_gdrive_upload(
+        report_id=payload["report_id"],
+        file_content=base64.b64encode(file_content).decode('utf-8'),
+        filename=payload["filename"],
+        content_type=payload.get("content_type", "application/pdf"),
+        summary_text=payload.get("summary_text", ""),
+        user_id=payload["user_id"],
+        company_id=payload["company_id"]
+    )
+    # A failed upload is recorded on the report and raises (retry)
+    await UploadSpoolService.release(payload.get("spool_ref"))
+
+
+@register_job_handler(JOB_GDRIVE_DELETE_FILE)
+async def handle_gdrive_delete_file(payload: Dict[str, Any]):
+    from app.services.gdrive_service import GDriveService
+
+    result = await GDriveService().delete_file(
+        file_id=payload["file_id"],
+        company_id=payload["company_id"],
+        permanent_delete=False  # Move to trash by default
+    )
+    if not result:
+        raise Exception(f"Drive deletion failed for {payload.get('document_type')}: {payload['file_id']}")
+    # A deleted folder (e.g. an Other Documents folder) must not be served from the folder cache
+    await DriveFolderCache.invalidate_folder(payload["file_id"])
+    logger.info(f"✅ Deleted {payload.get('document_type')} file: {payload['file_id']} ({payload.get('document_name')})")
+
+
+@register_job_handler(JOB_BACKGROUND_UPLOAD_PROCESS)
+async def handle_background_upload_process(payload: Dict[str, Any]):
+    from app.services.background_upload_service import BackgroundUploadService
+
+    current_user = await _load_user(payload["user_id"], payload.get("company_id"))
+    await BackgroundUploadService.process_pending_files_background(
+        task_id=payload["task_id"],
+        current_user=current_user
+    )
+
+
+@register_dead_letter_handler(JOB_BACKGROUND_UPLOAD_PROCESS)
+async def handle_background_upload_process_dead(payload: Dict[str, Any], error: str):
+    from app.services.background_upload_service import BackgroundUploadService
+
+    # Out of retries: fail the task and purge its spooled files
+    await BackgroundUploadService.fail_task(payload["task_id"], f"Error: {error}")
+
+
+@register_job_handler(JOB_BULK_RENAME)
+async def handle_bulk_rename(payload: Dict[str, Any]):
+    from app.services.bulk_rename_service import BulkRenameService
+
+    current_user = await _load_user(payload["user_id"], payload.get("company_id"))
+    await BulkRenameService._process_bulk_rename(
+        task_id=payload["task_id"],
+        certificate_ids=payload["certificate_ids"],
+        current_user=current_user,
+        task_type=payload["task_type"]
+    )
+
+
+@register_job_handler(JOB_CERTIFICATE_RECALCULATION)
+async def handle_certificate_recalculation(payload: Dict[str, Any]):
+    from app.services.certificate_recalculation_service import CertificateRecalculationService
+
+    await CertificateRecalculationService.run_recalculation(
+        company_id=payload.get("company_id"),
+        task_id=payload.get("task_id")
+    )
+
+
+@register_job_handler(JOB_CREW_FILE_MOVE)
+async def handle_crew_file_move(payload: Dict[str, Any]):
+    from app.services.crew_file_movement_service import CrewFileMovementService
+
+    await CrewFileMovementService.run_file_move_task(payload["task_id"])
+
+
+@register_dead_letter_handler(JOB_CREW_FILE_MOVE)
+async def handle_crew_file_move_dead(payload: Dict[str, Any], error: str):
+    from app.services.crew_file_movement_service import CrewFileMoveTaskService
+
+    # A task left pending/processing would hold later moves of the crew member back
+    await CrewFileMoveTaskService.mark_failed(payload["task_id"], error)
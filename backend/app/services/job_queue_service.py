@@ -0,0 +1,420 @@
+"""
+Durable Job Queue Service
+Mongo-backed queue for background work that must survive an instance recycle
+(deferred Drive uploads, Drive deletions, V3 folder uploads, bulk rename,
+certificate recalculation runs).
+
+- Jobs are claimed with a lease; a running worker heartbeats to extend it, and a
+  job whose lease expired (instance killed mid-job) is picked up again.
+- Failures are retried with exponential backoff; after max_attempts the job is
+  moved to the dead-letter collection. That includes a job whose lease keeps
+  expiring (it kills its worker), which is not leased again once exhausted.
+- A worker that loses the lease of a running job (heartbeat refused) stops it.
+- An optional idempotency key makes enqueueing the same work twice a no-op.
+"""
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "background_jobs"
+DEAD_LETTER_COLLECTION = "background_jobs_dead"
+
+JOB_WORKER_CONCURRENCY = int(os.getenv('JOB_WORKER_CONCURRENCY', '2'))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv('JOB_POLL_INTERVAL_SECONDS', '2'))
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '120'))
+JOB_DEFAULT_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_SECONDS = 10
+JOB_RETRY_MAX_SECONDS = 600
+COMPLETED_JOB_RETENTION_SECONDS = 7 * 24 * 3600
+
+# Job types
+JOB_CERTIFICATE_GDRIVE_UPLOAD = "certificate_gdrive_upload"
+JOB_SURVEY_REPORT_GDRIVE_UPLOAD = "survey_report_gdrive_upload"
+JOB_GDRIVE_DELETE_FILE = "gdrive_delete_file"
+JOB_BACKGROUND_UPLOAD_PROCESS = "background_upload_process"
+JOB_BULK_RENAME = "bulk_rename"
+JOB_CERTIFICATE_RECALCULATION = "certificate_recalculation"
+JOB_CREW_FILE_MOVE = "crew_file_move"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+DeadLetterHandler = Callable[[Dict[str, Any], str], Awaitable[Any]]
+_job_handlers: Dict[str, JobHandler] = {}
+_dead_letter_handlers: Dict[str, DeadLetterHandler] = {}
+
+# Wakes local workers as soon as a job is enqueued in this process
+_wakeup_event: Optional[asyncio.Event] = None
+
+
+def register_job_handler(job_type: str):
+    """Decorator registering the coroutine that executes jobs of ``job_type``"""
+    def decorator(func: JobHandler) -> JobHandler:
+        _job_handlers[job_type] = func
+        return func
+    return decorator
+
+
+def register_dead_letter_handler(job_type: str):
+    """Decorator registering a coroutine ``(payload, error)`` run when a job of ``job_type`` is dead-lettered"""
+    def decorator(func: DeadLetterHandler) -> DeadLetterHandler:
+        _dead_letter_handlers[job_type] = func
+        return func
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobQueueService:
+    """Enqueue, claim and settle background jobs"""
+
+    @staticmethod
+    async def ensure_indexes():
+        """Indexes the claim query and idempotency keys rely on (see app.db.index_registry)"""
+        from app.db.index_registry import ensure_collection_indexes
+
+        await ensure_collection_indexes(mongo_db.database, JOBS_COLLECTION)
+        await ensure_collection_indexes(mongo_db.database, DEAD_LETTER_COLLECTION)
+
+    @staticmethod
+    async def enqueue(
+        job_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        max_attempts: int = JOB_DEFAULT_MAX_ATTEMPTS,
+        delay_seconds: float = 0
+    ) -> str:
+        """
+        Persist a job and return its id.
+
+        If ``idempotency_key`` matches an existing job (queued, running or completed
+        within the retention window), no new job is created and the existing id is returned.
+        """
+        now = _now()
+        job_id = str(uuid.uuid4())
+        job_doc = {
+            "id": job_id,
+            "job_type": job_type,
+            "payload": payload,
+            "status": "queued",
+            "idempotency_key": idempotency_key,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": now + timedelta(seconds=delay_seconds),
+            "lease_expires_at": None,
+            "worker_id": None,
+            "last_error": None,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None
+        }
+
+        try:
+            await mongo_db.database[JOBS_COLLECTION].insert_one(job_doc)
+        except DuplicateKeyError:
+            existing = await mongo_db.database[JOBS_COLLECTION].find_one(
+                {"idempotency_key": idempotency_key}, {"id": 1}
+            )
+            logger.info(f"📋 Job already enqueued for key {idempotency_key}")
+            return existing.get("id") if existing else job_id
+
+        logger.info(f"📋 Enqueued job {job_id} ({job_type})")
+        if _wakeup_event is not None:
+            _wakeup_event.set()
+        return job_id
+
+    @staticmethod
+    async def claim_next(worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """Atomically lease the next due job (or one whose previous lease expired)"""
+        now = _now()
+        return await mongo_db.database[JOBS_COLLECTION].find_one_and_update(
+            {
+                "job_type": {"$in": list(_job_handlers.keys())},
+                "$or": [
+                    {"status": "queued", "run_at": {"$lte": now}},
+                    # Expired lease: only while attempts remain (see dead_letter_expired_leases)
+                    {
+                        "status": "running",
+                        "lease_expires_at": {"$lt": now},
+                        "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+                    }
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    @staticmethod
+    async def heartbeat(job_id: str, worker_id: str, lease_seconds: int = JOB_LEASE_SECONDS) -> bool:
+        """Extend the lease of a job this worker still owns"""
+        result = await mongo_db.database[JOBS_COLLECTION].update_one(
+            {"id": job_id, "worker_id": worker_id, "status": "running"},
+            {"$set": {"lease_expires_at": _now() + timedelta(seconds=lease_seconds)}}
+        )
+        return result.modified_count > 0
+
+    @staticmethod
+    async def complete(job_id: str, worker_id: str):
+        now = _now()
+        await mongo_db.database[JOBS_COLLECTION].update_one(
+            {"id": job_id, "worker_id": worker_id},
+            {"$set": {
+                "status": "completed",
+                "lease_expires_at": None,
+                "completed_at": now,
+                "updated_at": now
+            }}
+        )
+
+    @staticmethod
+    async def fail(job: Dict[str, Any], worker_id: str, error: str):
+        """Schedule a retry with exponential backoff, or dead-letter the job"""
+        now = _now()
+        jobs = mongo_db.database[JOBS_COLLECTION]
+
+        if job.get("attempts", 1) >= job.get("max_attempts", JOB_DEFAULT_MAX_ATTEMPTS):
+            await JobQueueService._dead_letter(job, error, {"id": job["id"], "worker_id": worker_id})
+            return
+
+        backoff = min(JOB_RETRY_BASE_SECONDS * (2 ** (job.get("attempts", 1) - 1)), JOB_RETRY_MAX_SECONDS)
+        await jobs.update_one(
+            {"id": job["id"], "worker_id": worker_id},
+            {"$set": {
+                "status": "queued",
+                "run_at": now + timedelta(seconds=backoff),
+                "lease_expires_at": None,
+                "worker_id": None,
+                "last_error": error,
+                "updated_at": now
+            }}
+        )
+        logger.warning(f"🔁 Job {job['id']} ({job['job_type']}) failed, retry in {backoff}s: {error}")
+
+    @staticmethod
+    async def _dead_letter(job: Dict[str, Any], error: str, job_filter: Dict[str, Any]):
+        """Move ``job`` to the dead-letter collection and run its dead-letter handler"""
+        dead_doc = {**job, "status": "dead", "last_error": error, "failed_at": _now()}
+        await mongo_db.database[DEAD_LETTER_COLLECTION].insert_one(dead_doc)
+        await mongo_db.database[JOBS_COLLECTION].delete_one(job_filter)
+        logger.error(f"💀 Job {job['id']} ({job['job_type']}) dead-lettered after {job.get('attempts')} attempts: {error}")
+
+        on_dead = _dead_letter_handlers.get(job["job_type"])
+        if on_dead is not None:
+            try:
+                await on_dead(job.get("payload") or {}, error)
+            except Exception as e:
+                logger.error(f"❌ Dead-letter handler for job {job['id']} failed: {e}")
+
+    @staticmethod
+    async def dead_letter_expired_leases() -> int:
+        """
+        Dead-letter running jobs whose lease expired with no attempts left
+        (the job kept killing its worker); returns the number moved
+        """
+        now = _now()
+        jobs = mongo_db.database[JOBS_COLLECTION]
+        moved = 0
+        cursor = jobs.find({
+            "status": "running",
+            "lease_expires_at": {"$lt": now},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+        }, {"_id": 0})
+        async for job in cursor:
+            error = job.get("last_error") or "Lease expired on the last attempt (worker died)"
+            # The lease filter keeps a late heartbeat/complete from racing the move
+            await JobQueueService._dead_letter(job, error, {
+                "id": job["id"], "status": "running", "lease_expires_at": job["lease_expires_at"]
+            })
+            moved += 1
+        return moved
+
+    @staticmethod
+    async def release(job_id: str, worker_id: str):
+        """Hand an interrupted job back to the queue without counting the attempt"""
+        await mongo_db.database[JOBS_COLLECTION].update_one(
+            {"id": job_id, "worker_id": worker_id, "status": "running"},
+            {
+                "$set": {"status": "queued", "lease_expires_at": None, "worker_id": None, "updated_at": _now()},
+                "$inc": {"attempts": -1}
+            }
+        )
+
+    @staticmethod
+    async def get_stats() -> Dict[str, Any]:
+        """Job counts by status, plus dead-letter size"""
+        pipeline = [{"$group": {"_id": {"type": "$job_type", "status": "$status"}, "count": {"$sum": 1}}}]
+        counts: Dict[str, Dict[str, int]] = {}
+        async for row in mongo_db.database[JOBS_COLLECTION].aggregate(pipeline):
+            counts.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+        dead = await mongo_db.database[DEAD_LETTER_COLLECTION].count_documents({})
+        return {"jobs": counts, "dead_letter": dead}
+
+
+class JobWorker:
+    """
+    Polls the job queue and runs registered handlers.
+
+    Started from the FastAPI startup event (unless JOB_WORKER_ENABLED=false) and
+    from the standalone ``worker.py`` entry point, so background throughput can be
+    scaled separately from request serving.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY, poll_interval: float = JOB_POLL_INTERVAL_SECONDS):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._housekeeping_task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def start(self):
+        global _wakeup_event
+        # Handlers register themselves on import
+        import app.services.job_handlers  # noqa: F401
+
+        from app.services.upload_spool_service import UploadSpoolService
+
+        try:
+            await JobQueueService.ensure_indexes()
+            await UploadSpoolService.ensure_indexes()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not ensure job queue indexes: {e}")
+
+        # Spooled bytes of abandoned tasks / dead-lettered jobs are swept on start
+        self._housekeeping_task = asyncio.create_task(UploadSpoolService.purge_stale())
+
+        _wakeup_event = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._run_slot(slot)) for slot in range(self.concurrency)]
+        logger.info(f"✅ Job worker {self.worker_id} started ({self.concurrency} slots)")
+
+    async def stop(self, timeout: float = 20):
+        """Stop claiming new jobs and give in-flight jobs ``timeout`` seconds to finish"""
+        self._stopping = True
+        if _wakeup_event is not None:
+            _wakeup_event.set()
+        if not self._tasks:
+            return
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        logger.info(f"✅ Job worker {self.worker_id} stopped")
+
+    async def _run_slot(self, slot: int):
+        while not self._stopping:
+            try:
+                job = await JobQueueService.claim_next(self.worker_id)
+            except Exception as e:
+                logger.error(f"❌ Job worker slot {slot}: claim failed: {e}")
+                job = None
+
+            if job is None:
+                if slot == 0:
+                    try:
+                        await JobQueueService.dead_letter_expired_leases()
+                    except Exception as e:
+                        logger.error(f"❌ Job worker: dead-lettering expired leases failed: {e}")
+                await self._wait_for_work()
+                continue
+
+            await self._execute(job)
+
+    async def _wait_for_work(self):
+        if _wakeup_event is None:
+            await asyncio.sleep(self.poll_interval)
+            return
+        try:
+            await asyncio.wait_for(_wakeup_event.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup_event.clear()
+
+    async def _heartbeat(self, job_id: str, handler_task: asyncio.Task, lease: Dict[str, bool]):
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                owned = await JobQueueService.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Heartbeat failed for job {job_id}: {e}")
+                continue
+            if not owned:
+                # Lease expired and the job was re-claimed or dead-lettered - stop running it here
+                logger.warning(f"⚠️ Lost the lease of job {job_id}, stopping it")
+                lease["lost"] = True
+                handler_task.cancel()
+                return
+
+    async def _execute(self, job: Dict[str, Any]):
+        handler = _job_handlers.get(job["job_type"])
+        handler_task = asyncio.create_task(handler(job.get("payload") or {}))
+        lease = {"lost": False}
+        heartbeat_task = asyncio.create_task(self._heartbeat(job["id"], handler_task, lease))
+        try:
+            logger.info(f"▶️ Running job {job['id']} ({job['job_type']}, attempt {job.get('attempts')})")
+            try:
+                await handler_task
+            except asyncio.CancelledError:
+                if lease["lost"] and not asyncio.current_task().cancelling():
+                    return
+                raise
+            await JobQueueService.complete(job["id"], self.worker_id)
+            logger.info(f"✅ Job {job['id']} ({job['job_type']}) completed")
+        except asyncio.CancelledError:
+            # Shutdown interrupted the job - give it back for another worker
+            handler_task.cancel()
+            await asyncio.shield(JobQueueService.release(job["id"], self.worker_id))
+            raise
+        except Exception as e:
+            import traceback
+            logger.error(traceback.format_exc())
+            try:
+                await JobQueueService.fail(job, self.worker_id, str(e))
+            except Exception as settle_error:
+                logger.error(f"❌ Could not record failure for job {job['id']}: {settle_error}")
+        finally:
+            heartbeat_task.cancel()
+
+
+# Worker running inside the API process (started/stopped by app.main)
+_app_worker: Optional[JobWorker] = None
+
+
+async def start_app_job_worker():
+    """Start the in-process job worker unless disabled with JOB_WORKER_ENABLED=false"""
+    global _app_worker
+    if os.getenv('JOB_WORKER_ENABLED', 'true').lower() == 'false':
+        logger.info("ℹ️ In-process job worker disabled (JOB_WORKER_ENABLED=false)")
+        return
+    _app_worker = JobWorker()
+    await _app_worker.start()
+
+
+async def stop_app_job_worker():
+    global _app_worker
+    if _app_worker is not None:
+        await _app_worker.stop()
+        _app_worker = None
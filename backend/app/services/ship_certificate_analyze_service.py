@@ -13,11 +13,14 @@ from fastapi import HTTPException
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
 from app.utils.pdf_splitter import PDFSplitter, create_enhanced_merged_summary
+from app.utils.cpu_worker_pool import get_pdf_page_info_async, split_pdf_async
 from app.utils.ship_certificate_ai import (
     extract_ship_certificate_fields_from_summary,
-    SHIP_CERTIFICATE_CATEGORIES
+    SHIP_CERTIFICATE_CATEGORIES,
+    SHIP_CERTIFICATE_PROMPT_VERSION
 )
 from app.utils.issued_by_abbreviation import normalize_issued_by
+from app.utils.ai_extraction_cache import AIExtractionCache
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +32,10 @@ class ShipCertificateAnalyzeService:
     """Service for analyzing ship certificate files with AI"""
     
     @staticmethod
-    def quick_check_processing_path(file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    async def quick_check_processing_path(file_bytes: bytes, filename: str) -> Dict[str, Any]:
         """
         Quick check to determine if file needs FAST PATH or SLOW PATH (background)
-        This is a synchronous, fast operation (~100ms)
+        Runs the text layer check in the CPU worker pool (~100ms)
         
         Logic for Certificate:
         - PDF with text layer >= 400 chars → FAST PATH
@@ -47,7 +50,7 @@ class ShipCertificateAnalyzeService:
                 "reason": str
             }
         """
-        from app.utils.pdf_text_extractor import quick_check_text_layer
+        from app.utils.cpu_worker_pool import quick_check_text_layer_async
         
         file_ext = filename.lower().split('.')[-1] if '.' in filename else ''
         
@@ -63,7 +66,7 @@ class ShipCertificateAnalyzeService:
         
         # For PDFs, check text layer
         if file_ext == 'pdf':
-            text_check = quick_check_text_layer(file_bytes, filename)
+            text_check = await quick_check_text_layer_async(file_bytes, filename)
             
             if text_check.get("has_sufficient_text"):
                 return {
@@ -231,56 +234,49 @@ class ShipCertificateAnalyzeService:
             
             logger.info("🤖 Analyzing certificate with Google Document AI...")
             
-            # Check if PDF needs splitting (>15 pages)
-            if file_ext == 'pdf':
-                splitter = PDFSplitter(max_pages_per_chunk=12)
-                try:
-                    total_pages = splitter.get_page_count(file_bytes)
-                    needs_split = splitter.needs_splitting(file_bytes)
-                    logger.info(f"📊 PDF: {total_pages} pages, Split needed: {needs_split}")
+            async def run_ai_extraction() -> Dict[str, Any]:
+                # Check if PDF needs splitting (>15 pages)
+                if file_ext == 'pdf':
+                    splitter = PDFSplitter(max_pages_per_chunk=12)
+                    try:
+                        page_info = await get_pdf_page_info_async(file_bytes, splitter.max_pages_per_chunk)
+                        total_pages = page_info['total_pages']
+                        needs_split = page_info['needs_split']
+                        logger.info(f"📊 PDF: {total_pages} pages, Split needed: {needs_split}")
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not detect page count: {e}, processing as single file")
+                        needs_split = False
                     
                     if needs_split:
-                        # Large file - split and process
-                        return await ShipCertificateAnalyzeService._process_large_file(
-                            file_bytes,
-                            filename,
-                            total_pages,
-                            ship,
-                            document_ai_config,
-                            ai_config_doc,
-                            current_user
-                        )
-                    else:
-                        # Small file - process directly
-                        return await ShipCertificateAnalyzeService._process_small_file(
-                            file_bytes,
-                            filename,
-                            ship,
-                            document_ai_config,
-                            ai_config_doc,
-                            current_user
-                        )
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Could not detect page count: {e}, processing as single file")
-                    return await ShipCertificateAnalyzeService._process_small_file(
-                        file_bytes,
-                        filename,
-                        ship,
-                        document_ai_config,
-                        ai_config_doc,
-                        current_user
-                    )
-            else:
-                # Image file - process directly
-                return await ShipCertificateAnalyzeService._process_small_file(
+                        # Large file - split and process (any failure retried as a single file, as before)
+                        try:
+                            return await ShipCertificateAnalyzeService._extract_large_file(
+                                file_bytes,
+                                filename,
+                                total_pages,
+                                document_ai_config,
+                                ai_config_doc
+                            )
+                        except Exception as e:
+                            logger.warning(f"⚠️ Large file processing failed: {e}, processing as single file")
+                
+                # Small file or image - process directly
+                return await ShipCertificateAnalyzeService._extract_small_file(
                     file_bytes,
                     filename,
-                    ship,
                     document_ai_config,
-                    ai_config_doc,
-                    current_user
+                    ai_config_doc
                 )
+            
+            # ♻️ Same file + name + model + prompt analyzed before → reuse the AI output
+            # (the extraction prompt reads the filename)
+            cache_key = AIExtractionCache.make_key(
+                file_bytes, "ship_certificate", ai_config_doc, SHIP_CERTIFICATE_PROMPT_VERSION, context=filename
+            )
+            extraction = await AIExtractionCache.get_or_extract(cache_key, run_ai_extraction, "ship_certificate")
+            
+            # Per-ship post-processing runs on every call (also on cache hits)
+            return await ShipCertificateAnalyzeService._finalize_analysis(extraction, ship, current_user)
                 
         except HTTPException:
             raise
@@ -290,18 +286,19 @@ class ShipCertificateAnalyzeService:
             raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
     
     @staticmethod
-    async def _process_small_file(
+    async def _extract_small_file(
         file_bytes: bytes,
         filename: str,
-        ship: dict,
         document_ai_config: dict,
-        ai_config_doc: dict,
-        current_user: UserResponse
+        ai_config_doc: dict
     ) -> Dict[str, Any]:
         """
-        Process file ≤15 pages (or images) with SMART PATH selection:
+        AI extraction for a file ≤15 pages (or image) with SMART PATH selection:
         - FAST PATH: If text layer >= 400 chars, use text layer only (no Document AI)
         - SLOW PATH: If text layer < 400 chars, use Document AI (OCR)
+        
+        Returns:
+            dict: {"extracted_info", "summary_text", "processing_path", "timing"}
         """
         import time
         timing = {}
@@ -314,10 +311,10 @@ class ShipCertificateAnalyzeService:
             
             # Import utilities
             from app.utils.pdf_text_extractor import (
-                quick_check_text_layer, 
                 format_text_layer_summary,
                 TEXT_LAYER_THRESHOLD
             )
+            from app.utils.cpu_worker_pool import quick_check_text_layer_async
             
             summary_text = None
             processing_path = None
@@ -326,9 +323,9 @@ class ShipCertificateAnalyzeService:
             if is_pdf:
                 logger.info(f"⚡ SMART PATH: Checking text layer for {filename}...")
                 
-                # Quick check text layer (synchronous, fast)
+                # Quick check text layer (CPU worker pool, fast)
                 step_start = time.time()
-                text_check = quick_check_text_layer(file_bytes, filename)
+                text_check = await quick_check_text_layer_async(file_bytes, filename)
                 timing['a_quick_check_text'] = round(time.time() - step_start, 2)
                 
                 char_count = text_check.get("char_count", 0)
@@ -477,13 +474,12 @@ class ShipCertificateAnalyzeService:
                     
                     # ⭐ Add Targeted OCR for header/footer (especially for Cert No)
                     try:
-                        from app.utils.targeted_ocr import get_ocr_processor
-                        ocr_processor = get_ocr_processor()
+                        from app.utils.cpu_worker_pool import ocr_extract_from_image_async
                         
                         logger.info(f"🔍 Running targeted OCR for header/footer on image: {filename}")
                         
                         # For images, extract from the image directly
-                        ocr_result = ocr_processor.extract_from_image(
+                        ocr_result = await ocr_extract_from_image_async(
                             file_bytes,
                             report_no_field='cert_no'
                         )
@@ -542,45 +538,12 @@ class ShipCertificateAnalyzeService:
             # Add processing metadata
             extracted_info['_processing_path'] = processing_path
             
-            # Normalize issued_by
-            if extracted_info.get('issued_by'):
-                extracted_info['issued_by'] = normalize_issued_by(extracted_info['issued_by'])
-            
-            # Validate ship info
-            step_start = time.time()
-            validation_warning = await ShipCertificateAnalyzeService.validate_ship_info(
-                extracted_imo=extracted_info.get('imo_number'),
-                extracted_ship_name=extracted_info.get('ship_name'),
-                current_ship=ship
-            )
-            timing['e_validate_ship'] = round(time.time() - step_start, 2)
-            
-            # Check for duplicates
-            step_start = time.time()
-            duplicate_warning = await ShipCertificateAnalyzeService.check_duplicate(
-                ship_id=ship["id"],
-                cert_name=extracted_info.get('cert_name'),
-                cert_no=extracted_info.get('cert_no'),
-                current_user=current_user,
-                issue_date=extracted_info.get('issue_date'),
-                valid_date=extracted_info.get('valid_date'),
-                last_endorse=extracted_info.get('last_endorse')
-            )
-            timing['f_check_duplicate'] = round(time.time() - step_start, 2)
-            
-            # Calculate total and log timing
-            timing['TOTAL_ANALYSIS'] = round(time.time() - total_start, 2)
-            logger.info(f"⏱️ FAST PATH TIMING for {filename}:")
-            for step, duration in timing.items():
-                logger.info(f"   {step}: {duration}s")
+            timing['TOTAL_AI_EXTRACTION'] = round(time.time() - total_start, 2)
             
             return {
-                "success": True,
                 "extracted_info": extracted_info,
                 "summary_text": summary_text,
                 "processing_path": processing_path,  # ⭐ Return which path was used
-                "validation_warning": validation_warning,
-                "duplicate_warning": duplicate_warning,
                 "timing": timing  # ⭐ Return timing for debugging
             }
             
@@ -591,22 +554,20 @@ class ShipCertificateAnalyzeService:
             raise HTTPException(status_code=500, detail=str(e))
     
     @staticmethod
-    async def _process_large_file(
+    async def _extract_large_file(
         file_bytes: bytes,
         filename: str,
         total_pages: int,
-        ship: dict,
         document_ai_config: dict,
-        ai_config_doc: dict,
-        current_user: UserResponse
+        ai_config_doc: dict
     ) -> Dict[str, Any]:
-        """Process file >15 pages with splitting - parallel Document AI calls"""
+        """AI extraction for a file >15 pages with splitting - parallel Document AI calls"""
         try:
             logger.info(f"📚 Processing large file ({total_pages} pages) with splitting")
             
             # Split PDF
             splitter = PDFSplitter(max_pages_per_chunk=12)
-            chunks = splitter.split_pdf(file_bytes)
+            chunks = await split_pdf_async(file_bytes, filename, max_pages_per_chunk=splitter.max_pages_per_chunk)
             logger.info(f"✂️ Split into {len(chunks)} chunks")
             
             # Process chunks in parallel
@@ -650,34 +611,10 @@ class ShipCertificateAnalyzeService:
                     detail="Could not extract certificate information from document"
                 )
             
-            # Normalize issued_by
-            if extracted_info.get('issued_by'):
-                extracted_info['issued_by'] = normalize_issued_by(extracted_info['issued_by'])
-            
-            # Validate ship info
-            validation_warning = await ShipCertificateAnalyzeService.validate_ship_info(
-                extracted_imo=extracted_info.get('imo_number'),
-                extracted_ship_name=extracted_info.get('ship_name'),
-                current_ship=ship
-            )
-            
-            # Check for duplicates with all 5 fields
-            duplicate_warning = await ShipCertificateAnalyzeService.check_duplicate(
-                ship_id=ship["id"],
-                cert_name=extracted_info.get('cert_name'),
-                cert_no=extracted_info.get('cert_no'),
-                current_user=current_user,
-                issue_date=extracted_info.get('issue_date'),
-                valid_date=extracted_info.get('valid_date'),
-                last_endorse=extracted_info.get('last_endorse')
-            )
-            
             return {
-                "success": True,
                 "extracted_info": extracted_info,
                 "summary_text": merged_summary,  # ⭐ Return merged summary
-                "validation_warning": validation_warning,
-                "duplicate_warning": duplicate_warning
+                "processing_path": None
             }
             
         except HTTPException:
@@ -686,6 +623,66 @@ class ShipCertificateAnalyzeService:
             logger.error(f"❌ Error processing large file: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    @staticmethod
+    async def _finalize_analysis(
+        extraction: Dict[str, Any],
+        ship: dict,
+        current_user: UserResponse
+    ) -> Dict[str, Any]:
+        """
+        Per-ship post-processing of an AI extraction (fresh or cached):
+        normalize issued_by, validate ship name/IMO, check for duplicates
+        """
+        import time
+        timing = dict(extraction.get("timing") or {})
+        total_start = time.time()
+        
+        extracted_info = extraction["extracted_info"]
+        
+        # Normalize issued_by
+        if extracted_info.get('issued_by'):
+            extracted_info['issued_by'] = normalize_issued_by(extracted_info['issued_by'])
+        
+        # Validate ship info
+        step_start = time.time()
+        validation_warning = await ShipCertificateAnalyzeService.validate_ship_info(
+            extracted_imo=extracted_info.get('imo_number'),
+            extracted_ship_name=extracted_info.get('ship_name'),
+            current_ship=ship
+        )
+        timing['e_validate_ship'] = round(time.time() - step_start, 2)
+        
+        # Check for duplicates
+        step_start = time.time()
+        duplicate_warning = await ShipCertificateAnalyzeService.check_duplicate(
+            ship_id=ship["id"],
+            cert_name=extracted_info.get('cert_name'),
+            cert_no=extracted_info.get('cert_no'),
+            current_user=current_user,
+            issue_date=extracted_info.get('issue_date'),
+            valid_date=extracted_info.get('valid_date'),
+            last_endorse=extracted_info.get('last_endorse')
+        )
+        timing['f_check_duplicate'] = round(time.time() - step_start, 2)
+        
+        timing['TOTAL_POST_PROCESSING'] = round(time.time() - total_start, 2)
+        logger.info(f"⏱️ ANALYSIS TIMING for {extracted_info.get('cert_name') or 'certificate'}:")
+        for step, duration in timing.items():
+            logger.info(f"   {step}: {duration}")
+        
+        result = {
+            "success": True,
+            "extracted_info": extracted_info,
+            "summary_text": extraction.get("summary_text") or "",
+            "validation_warning": validation_warning,
+            "duplicate_warning": duplicate_warning,
+            "ai_cache_hit": extraction.get("cache_hit", False),
+            "timing": timing
+        }
+        if extraction.get("processing_path"):
+            result["processing_path"] = extraction["processing_path"]
+        return result
+    
     @staticmethod
     async def validate_ship_info(
         extracted_imo: Optional[str],
@@ -11,7 +11,13 @@ from fastapi import HTTPException, UploadFile
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
 from app.utils.pdf_splitter import PDFSplitter, merge_analysis_results, create_enhanced_merged_summary
-from app.utils.survey_report_ai import extract_survey_report_fields_from_summary, extract_report_form_from_filename
+from app.utils.cpu_worker_pool import get_pdf_page_info_async
+from app.utils.survey_report_ai import (
+    extract_survey_report_fields_from_summary,
+    extract_report_form_from_filename,
+    SURVEY_REPORT_PROMPT_VERSION
+)
+from app.utils.ai_extraction_cache import AIExtractionCache
 
 logger = logging.getLogger(__name__)
 
@@ -84,8 +90,9 @@ class SurveyReportAnalyzeService:
             splitter = PDFSplitter(max_pages_per_chunk=12)
             
             try:
-                total_pages = splitter.get_page_count(file_content)
-                needs_split = splitter.needs_splitting(file_content)
+                page_info = await get_pdf_page_info_async(file_content, splitter.max_pages_per_chunk)
+                total_pages = page_info['total_pages']
+                needs_split = page_info['needs_split']
                 logger.info(f"📊 PDF Analysis: {total_pages} pages, Split needed: {needs_split}")
             except ValueError as e:
                 logger.error(f"❌ Invalid PDF file: {e}")
@@ -159,12 +166,12 @@ class SurveyReportAnalyzeService:
             analysis_result['_ship_name'] = ship_name
             analysis_result['_summary_text'] = ''
             
-            try:
+            async def run_ai_analysis(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
                 # Process PDF based on size
                 if not needs_split:
                     # Small PDF - process entire document
                     logger.info(f"🔄 Processing single PDF: {filename}")
-                    analysis_result = await SurveyReportAnalyzeService._process_single_pdf(
+                    return await SurveyReportAnalyzeService._process_single_pdf(
                         file_content,
                         filename,
                         file.content_type or 'application/octet-stream',
@@ -173,18 +180,28 @@ class SurveyReportAnalyzeService:
                         analysis_result,
                         total_pages
                     )
-                else:
-                    # Large PDF - split and process chunks
-                    logger.info(f"🔪 Splitting PDF ({total_pages} pages) into chunks...")
-                    analysis_result = await SurveyReportAnalyzeService._process_large_pdf(
-                        file_content,
-                        filename,
-                        splitter,
-                        document_ai_config,
-                        ai_config_doc,
-                        analysis_result,
-                        total_pages
-                    )
+                # Large PDF - split and process chunks
+                logger.info(f"🔪 Splitting PDF ({total_pages} pages) into chunks...")
+                return await SurveyReportAnalyzeService._process_large_pdf(
+                    file_content,
+                    filename,
+                    splitter,
+                    document_ai_config,
+                    ai_config_doc,
+                    analysis_result,
+                    total_pages
+                )
+            
+            try:
+                # ♻️ Same file + name + model + prompt analyzed before → reuse the AI output
+                # (the filename is part of the key: it feeds the prompt and report_form)
+                cache_key = AIExtractionCache.make_key(
+                    file_content, "survey_report", ai_config_doc, SURVEY_REPORT_PROMPT_VERSION, context=filename
+                )
+                analysis_result = await AIExtractionCache.get_or_analyze(
+                    cache_key, analysis_result, run_ai_analysis, "survey_report",
+                    SurveyReportAnalyzeService._is_complete_analysis
+                )
                 
                 # Validate ship name/IMO if not bypassed
                 if not bypass_validation:
@@ -273,6 +290,15 @@ class SurveyReportAnalyzeService:
                 detail=f"Failed to analyze survey report: {str(e)}"
             )
     
+    @staticmethod
+    def _is_complete_analysis(analysis_result: Dict[str, Any]) -> bool:
+        """Whether the AI run extracted fields from every part (only those are cached)"""
+        processing_method = analysis_result.get('processing_method') or ''
+        if processing_method in ("document_ai_failed", "all_chunks_failed") or processing_method.endswith("_no_fields"):
+            return False
+        split_info = analysis_result.get('_split_info') or {}
+        return not (split_info.get('has_failures') or split_info.get('failed_chunks'))
+    
     @staticmethod
     async def _process_single_pdf(
         file_content: bytes,
@@ -291,10 +317,10 @@ class SurveyReportAnalyzeService:
         - File >15 trang + không có text layer → SLOW PATH (split 10+10)
         """
         from app.utils.pdf_text_extractor import (
-            quick_check_text_layer,
             format_text_layer_summary,
             TEXT_LAYER_THRESHOLD
         )
+        from app.utils.cpu_worker_pool import quick_check_text_layer_async
         
         PAGE_THRESHOLD = 15  # Ngưỡng số trang
         
@@ -318,7 +344,7 @@ class SurveyReportAnalyzeService:
         # Step 1: Check page count first
         if total_pages <= PAGE_THRESHOLD:
             # ≤15 trang → Check text layer để quyết định có gộp hay không
-            text_check = quick_check_text_layer(file_content, filename)
+            text_check = await quick_check_text_layer_async(file_content, filename)
             char_count = text_check.get("char_count", 0)
             
             if text_check.get("has_sufficient_text"):
@@ -333,7 +359,7 @@ class SurveyReportAnalyzeService:
             
         else:
             # >15 trang → Kiểm tra text layer
-            text_check = quick_check_text_layer(file_content, filename)
+            text_check = await quick_check_text_layer_async(file_content, filename)
             char_count = text_check.get("char_count", 0)
             
             if text_check.get("has_sufficient_text"):
@@ -431,7 +457,7 @@ class SurveyReportAnalyzeService:
             
         elif processing_path == "FAST_PATH":
             # FAST PATH - Use text layer with AI correction if needed
-            text_check = quick_check_text_layer(file_content, filename)
+            text_check = await quick_check_text_layer_async(file_content, filename)
             char_count = text_check.get("char_count", 0)
             
             # Check text quality and apply AI correction if needed
@@ -540,9 +566,8 @@ class SurveyReportAnalyzeService:
         
         if ocr_metadata.get('ocr_success') and ocr_metadata.get('ocr_text_merged'):
             try:
-                from app.utils.targeted_ocr import get_ocr_processor
-                ocr_processor = get_ocr_processor()
-                ocr_result = ocr_processor.extract_from_pdf(
+                from app.utils.cpu_worker_pool import ocr_extract_from_pdf_async
+                ocr_result = await ocr_extract_from_pdf_async(
                     file_content, 
                     page_num=0,
                     report_no_field='survey_report_no'
@@ -643,8 +668,8 @@ class SurveyReportAnalyzeService:
            - OCR header/footer for Report Form
         """
         from app.utils.document_ai_helper import analyze_survey_report_with_document_ai
-        from app.utils.pdf_text_extractor import quick_check_text_layer, TEXT_LAYER_THRESHOLD
-        from app.utils.pdf_splitter import split_first_and_last
+        from app.utils.pdf_text_extractor import TEXT_LAYER_THRESHOLD
+        from app.utils.cpu_worker_pool import quick_check_text_layer_async, split_first_and_last_async
         import time
         
         process_start_time = time.time()
@@ -652,7 +677,7 @@ class SurveyReportAnalyzeService:
         
         # ⭐ Step 1: Check text layer for ENTIRE PDF
         logger.info(f"⚡ SMART PATH: Checking text layer for large PDF ({total_pages} pages)...")
-        text_check = quick_check_text_layer(file_content, filename)
+        text_check = await quick_check_text_layer_async(file_content, filename)
         char_count = text_check.get("char_count", 0)
         
         processing_path = None
@@ -743,7 +768,7 @@ class SurveyReportAnalyzeService:
             logger.info("   📄 Large scanned PDF - splitting into first 10 + last 10 pages")
             
             # Split into 2 chunks: first 10 + last 10 pages
-            chunks = split_first_and_last(file_content, filename, first_pages=10, last_pages=10)
+            chunks = await split_first_and_last_async(file_content, filename, first_pages=10, last_pages=10)
             
             analysis_result['_split_info'] = {
                 'was_split': True,
@@ -865,9 +890,8 @@ class SurveyReportAnalyzeService:
         # Merge OCR text into summary
         if ocr_metadata.get('ocr_success') and ocr_metadata.get('ocr_text_merged'):
             try:
-                from app.utils.targeted_ocr import get_ocr_processor
-                ocr_processor = get_ocr_processor()
-                ocr_result = ocr_processor.extract_from_pdf(
+                from app.utils.cpu_worker_pool import ocr_extract_from_pdf_async
+                ocr_result = await ocr_extract_from_pdf_async(
                     file_content, 
                     page_num=0,
                     report_no_field='survey_report_no'
@@ -935,6 +959,7 @@ class SurveyReportAnalyzeService:
             analysis_result.update(extracted_fields)
         else:
             logger.warning("⚠️ Field extraction returned no results")
+            analysis_result['processing_method'] = f"{processing_path.lower()}_no_fields"
         
         # Try to extract report_form from filename if not found
         if not analysis_result.get('report_form'):
@@ -972,6 +997,7 @@ class SurveyReportAnalyzeService:
         
         try:
             from app.utils.targeted_ocr import get_ocr_processor
+            from app.utils.cpu_worker_pool import ocr_extract_from_pdf_async
             
             ocr_processor = get_ocr_processor()
             ocr_metadata['ocr_attempted'] = True
@@ -980,7 +1006,7 @@ class SurveyReportAnalyzeService:
                 logger.info(f"✅ OCR processor available - extracting from {source}...")
                 
                 # Extract from first page (page 0)
-                ocr_result = ocr_processor.extract_from_pdf(
+                ocr_result = await ocr_extract_from_pdf_async(
                     pdf_content, 
                     page_num=0,
                     report_no_field='survey_report_no'
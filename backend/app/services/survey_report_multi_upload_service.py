@@ -17,6 +17,7 @@ from app.models.user import UserResponse, UserRole
 from app.services.ai_config_service import AIConfigService
 from app.services.upload_task_service import UploadTaskService
 from app.models.upload_task import TaskStatus, ProcessingType
+from app.utils.upload_ingest import ingest_upload
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +50,7 @@ class SurveyReportMultiUploadService:
             return 0
     
     @staticmethod
-    def quick_check_processing_path(file_content: bytes, filename: str) -> Dict[str, Any]:
+    async def quick_check_processing_path(file_content: bytes, filename: str) -> Dict[str, Any]:
         """
         Determine whether file should use FAST or SLOW path.
         OPTIMIZED: Parse PDF only ONCE and cache results.
@@ -62,7 +63,7 @@ class SurveyReportMultiUploadService:
         Returns:
             Dict with path info AND cached text_content (to avoid re-parsing)
         """
-        from app.utils.pdf_text_extractor import parse_pdf_once
+        from app.utils.cpu_worker_pool import parse_pdf_once_async
         
         result = {
             "path": "SLOW_PATH",
@@ -87,7 +88,7 @@ class SurveyReportMultiUploadService:
             return result
         
         # ========== OPTIMIZED: Parse PDF only ONCE ==========
-        pdf_info = parse_pdf_once(file_content, filename)
+        pdf_info = await parse_pdf_once_async(file_content, filename)
         
         if not pdf_info["success"]:
             result["reason"] = f"PDF parse failed: {pdf_info.get('error', 'Unknown error')}"
@@ -189,11 +190,11 @@ class SurveyReportMultiUploadService:
             slow_path_files = []
             
             for file in files:
-                file_content = await file.read()
-                await file.seek(0)  # Reset for later use
+                # Streamed once (size limit checked while reading); content stays in the upload spool
+                upload = await ingest_upload(file, allow_empty=True)
                 
-                path_info = SurveyReportMultiUploadService.quick_check_processing_path(
-                    file_content, file.filename
+                path_info = await SurveyReportMultiUploadService.quick_check_processing_path(
+                    upload.view(), file.filename
                 )
                 
                 logger.info(f"📁 {file.filename}: {path_info['path']} - {path_info['reason']}")
@@ -201,13 +202,13 @@ class SurveyReportMultiUploadService:
                 if path_info["path"] == "FAST_PATH":
                     fast_path_files.append({
                         "file": file,
-                        "content": file_content,
+                        "upload": upload,
                         "path_info": path_info
                     })
                 else:
                     slow_path_files.append({
                         "file": file,
-                        "content": file_content,
+                        "upload": upload,
                         "path_info": path_info
                     })
             
@@ -221,7 +222,7 @@ class SurveyReportMultiUploadService:
                     cached_text = file_data["path_info"].get("cached_text_content")
                     
                     result = await SurveyReportMultiUploadService._process_single_file_fast(
-                        file_content=file_data["content"],
+                        file_content=file_data["upload"].view(),
                         filename=file_data["file"].filename,
                         content_type=file_data["file"].content_type or "application/pdf",
                         ship_id=ship_id,
@@ -246,6 +247,8 @@ class SurveyReportMultiUploadService:
                         "message": str(e),
                         "processing_path": "FAST_PATH"
                     })
+                finally:
+                    file_data["upload"].close()
             
             # Step 5: Create background task for SLOW PATH files
             task_id = None
@@ -256,8 +259,8 @@ class SurveyReportMultiUploadService:
                     temp_dir = tempfile.mkdtemp(prefix="survey_upload_")
                     temp_path = os.path.join(temp_dir, file_data["file"].filename)
                     
-                    with open(temp_path, "wb") as f:
-                        f.write(file_data["content"])
+                    await file_data["upload"].save_to(temp_path)
+                    file_data["upload"].close()
                     
                     temp_files.append({
                         "temp_path": temp_path,
@@ -657,17 +660,25 @@ Processing: Text Layer Extraction + AI Correction
                         
                         # ⚡ Upload files to Google Drive in DEFERRED background (non-blocking)
                         if analysis.get("_file_content"):
-                            import asyncio
-                            asyncio.create_task(
-                                SurveyReportMultiUploadService._deferred_gdrive_upload(
-                                    report_id=created_report.id,
-                                    file_content=analysis["_file_content"],
-                                    filename=analysis.get("_filename", temp_file["filename"]),
-                                    content_type=analysis.get("_content_type", "application/pdf"),
-                                    summary_text=analysis.get("_summary_text", ""),
-                                    user_id=user_id,
-                                    company_id=company_id
-                                )
+                            from app.services.job_queue_service import JobQueueService, JOB_SURVEY_REPORT_GDRIVE_UPLOAD
+                            from app.services.upload_spool_service import UploadSpoolService
+                            upload_filename = analysis.get("_filename", temp_file["filename"])
+                            upload_content_type = analysis.get("_content_type", "application/pdf")
+                            spool_ref = await UploadSpoolService.put(
+                                base64.b64decode(analysis["_file_content"]), upload_filename, upload_content_type
+                            )
+                            await JobQueueService.enqueue(
+                                JOB_SURVEY_REPORT_GDRIVE_UPLOAD,
+                                {
+                                    "report_id": created_report.id,
+                                    "spool_ref": spool_ref,
+                                    "filename": upload_filename,
+                                    "content_type": upload_content_type,
+                                    "summary_text": analysis.get("_summary_text", ""),
+                                    "user_id": user_id,
+                                    "company_id": company_id
+                                },
+                                idempotency_key=f"{JOB_SURVEY_REPORT_GDRIVE_UPLOAD}:{created_report.id}"
                             )
                     else:
                         # Analysis failed
@@ -723,7 +734,9 @@ Processing: Text Layer Extraction + AI Correction
     ):
         """
         Deferred GDrive upload - runs AFTER record is created and user sees success
-        This is called via asyncio.create_task() so it doesn't block the main flow
+        Runs as a durable job (JOB_SURVEY_REPORT_GDRIVE_UPLOAD) so it doesn't block the main flow
+        
+        A failed upload is recorded on the report and re-raised so the job queue retries it
         """
         from app.services.survey_report_service import SurveyReportService
         
@@ -768,10 +781,13 @@ Processing: Text Layer Extraction + AI Correction
                 current_user=real_user
             )
             
-            # Update record to mark upload complete
+            # Update record to mark upload complete (and clear an earlier attempt's error)
             await db.survey_reports.update_one(
                 {"id": report_id},
-                {"$set": {"file_pending_upload": False, "file_uploaded": True}}
+                {
+                    "$set": {"file_pending_upload": False, "file_uploaded": True},
+                    "$unset": {"file_upload_error": ""}
+                }
             )
             
             logger.info(f"✅ Deferred GDrive upload completed for report {report_id}")
@@ -793,3 +809,5 @@ Processing: Text Layer Extraction + AI Correction
                 )
             except:
                 pass
+            raise
+
@@ -12,7 +12,13 @@ from fastapi import HTTPException, UploadFile
 from app.db.mongodb import mongo_db
 from app.models.user import UserResponse
 from app.utils.pdf_splitter import PDFSplitter, create_enhanced_merged_summary
-from app.utils.test_report_ai import extract_test_report_fields_from_summary, extract_report_form_from_filename
+from app.utils.cpu_worker_pool import get_pdf_page_info_async, split_pdf_async
+from app.utils.test_report_ai import (
+    extract_test_report_fields_from_summary,
+    extract_report_form_from_filename,
+    TEST_REPORT_PROMPT_VERSION
+)
+from app.utils.ai_extraction_cache import AIExtractionCache
 from app.utils.test_report_valid_date_calculator import calculate_valid_date
 
 logger = logging.getLogger(__name__)
@@ -88,8 +94,9 @@ class TestReportAnalyzeService:
             splitter = PDFSplitter(max_pages_per_chunk=12)
             
             try:
-                total_pages = splitter.get_page_count(file_content)
-                needs_split = splitter.needs_splitting(file_content)
+                page_info = await get_pdf_page_info_async(file_content, splitter.max_pages_per_chunk)
+                total_pages = page_info['total_pages']
+                needs_split = page_info['needs_split']
                 logger.info(f"📊 PDF Analysis: {total_pages} pages, Split needed: {needs_split}")
             except ValueError as e:
                 logger.error(f"❌ Invalid PDF file: {e}")
@@ -163,12 +170,12 @@ class TestReportAnalyzeService:
             analysis_result['_ship_name'] = ship_name
             analysis_result['_summary_text'] = ''
             
-            try:
+            async def run_ai_analysis(analysis_result: Dict[str, Any]) -> Dict[str, Any]:
                 # Process PDF based on size
                 if not needs_split:
                     # Small PDF - process entire document
                     logger.info(f"🔄 Processing single PDF: {filename}")
-                    analysis_result = await TestReportAnalyzeService._process_single_pdf(
+                    return await TestReportAnalyzeService._process_single_pdf(
                         file_content,
                         filename,
                         file.content_type or 'application/octet-stream',
@@ -178,19 +185,30 @@ class TestReportAnalyzeService:
                         total_pages,
                         ship_id
                     )
-                else:
-                    # Large PDF - split and process chunks
-                    logger.info(f"🔪 Splitting PDF ({total_pages} pages) into chunks...")
-                    analysis_result = await TestReportAnalyzeService._process_large_pdf(
-                        file_content,
-                        filename,
-                        splitter,
-                        document_ai_config,
-                        ai_config_doc,
-                        analysis_result,
-                        total_pages,
-                        ship_id
-                    )
+                # Large PDF - split and process chunks
+                logger.info(f"🔪 Splitting PDF ({total_pages} pages) into chunks...")
+                return await TestReportAnalyzeService._process_large_pdf(
+                    file_content,
+                    filename,
+                    splitter,
+                    document_ai_config,
+                    ai_config_doc,
+                    analysis_result,
+                    total_pages,
+                    ship_id
+                )
+            
+            try:
+                # ♻️ Same file + name + ship + model + prompt analyzed before → reuse the AI output
+                # (report_form comes from the filename, valid_date from the ship's equipment intervals)
+                cache_key = AIExtractionCache.make_key(
+                    file_content, "test_report", ai_config_doc, TEST_REPORT_PROMPT_VERSION,
+                    context=f"{filename}|{ship_id}"
+                )
+                analysis_result = await AIExtractionCache.get_or_analyze(
+                    cache_key, analysis_result, run_ai_analysis, "test_report",
+                    TestReportAnalyzeService._is_complete_analysis
+                )
                 
                 # Validate ship name/IMO if not bypassed
                 if not bypass_validation:
@@ -279,6 +297,14 @@ class TestReportAnalyzeService:
                 detail=f"Failed to analyze test report: {str(e)}"
             )
     
+    @staticmethod
+    def _is_complete_analysis(analysis_result: Dict[str, Any]) -> bool:
+        """Whether the AI run extracted fields from every part (only those are cached)"""
+        if analysis_result.get('processing_method') not in ("full_analysis", "split_pdf_full_analysis"):
+            return False
+        split_info = analysis_result.get('_split_info') or {}
+        return not (split_info.get('has_failures') or split_info.get('failed_chunks'))
+    
     @staticmethod
     async def _process_single_pdf(
         file_content: bytes,
@@ -330,9 +356,8 @@ class TestReportAnalyzeService:
             if ocr_metadata.get('ocr_success') and ocr_metadata.get('ocr_text_merged'):
                 # Get OCR text from processor
                 try:
-                    from app.utils.targeted_ocr import get_ocr_processor
-                    ocr_processor = get_ocr_processor()
-                    ocr_result = ocr_processor.extract_from_pdf(
+                    from app.utils.cpu_worker_pool import ocr_extract_from_pdf_async
+                    ocr_result = await ocr_extract_from_pdf_async(
                         file_content, 
                         page_num=0,
                         report_no_field='test_report_no'
@@ -452,7 +477,7 @@ class TestReportAnalyzeService:
         """Process a large PDF (>15 pages) by splitting into chunks"""
         from app.utils.document_ai_helper import analyze_test_report_with_document_ai
         
-        chunks = splitter.split_pdf(file_content, filename)
+        chunks = await split_pdf_async(file_content, filename, max_pages_per_chunk=splitter.max_pages_per_chunk)
         total_chunks = len(chunks)
         logger.info(f"📦 Created {total_chunks} chunks from {total_pages}-page PDF")
         
@@ -605,9 +630,8 @@ class TestReportAnalyzeService:
             # Merge OCR if successful
             if ocr_metadata.get('ocr_success'):
                 try:
-                    from app.utils.targeted_ocr import get_ocr_processor
-                    ocr_processor = get_ocr_processor()
-                    ocr_result = ocr_processor.extract_from_pdf(
+                    from app.utils.cpu_worker_pool import ocr_extract_from_pdf_async
+                    ocr_result = await ocr_extract_from_pdf_async(
                         chunks[0]['content'], 
                         page_num=0,
                         report_no_field='test_report_no'
@@ -736,12 +760,11 @@ class TestReportAnalyzeService:
         }
         
         try:
-            from app.utils.targeted_ocr import get_ocr_processor
+            from app.utils.cpu_worker_pool import ocr_extract_from_pdf_async
             
-            ocr_processor = get_ocr_processor()
             ocr_metadata['ocr_attempted'] = True
             
-            ocr_result = ocr_processor.extract_from_pdf(
+            ocr_result = await ocr_extract_from_pdf_async(
                 pdf_content,
                 page_num=0,
                 report_no_field='test_report_no'
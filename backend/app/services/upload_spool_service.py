@@ -0,0 +1,192 @@
+"""
+Upload Spool Service
+Holds file bytes that are waiting for a background upload (V3 folder uploads,
+deferred certificate / survey report Drive uploads) outside the task and job documents.
+
+Bytes are stored once in GridFS (bucket ``upload_spool``), addressed by their
+SHA-256 and reference-counted, so task/job documents only carry a small ref:
+
+    {"spool_id": "<GridFS id>", "sha256": "<hex digest>", "size": <bytes>}
+
+GridFS (rather than a local disk spool) is used because a durable job may be
+executed by a different instance than the one that received the file.
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+SPOOL_BUCKET = "upload_spool"
+SPOOL_CHUNK_SIZE = 255 * 1024 * 3  # Multiple of 3 so chunks base64-encode independently
+SPOOL_RETENTION_HOURS = int(os.getenv('UPLOAD_SPOOL_RETENTION_HOURS', '72'))
+
+
+class UploadSpoolService:
+    """Store, stream and release spooled upload bytes"""
+
+    @staticmethod
+    def _bucket() -> AsyncIOMotorGridFSBucket:
+        return AsyncIOMotorGridFSBucket(
+            mongo_db.database, bucket_name=SPOOL_BUCKET, chunk_size_bytes=SPOOL_CHUNK_SIZE
+        )
+
+    @staticmethod
+    def _files():
+        return mongo_db.database[f"{SPOOL_BUCKET}.files"]
+
+    @staticmethod
+    async def ensure_indexes():
+        """Index the content-hash lookup and the stale-file sweep (see app.db.index_registry)"""
+        from app.db.index_registry import ensure_collection_indexes
+
+        await ensure_collection_indexes(mongo_db.database, f"{SPOOL_BUCKET}.files")
+
+    @staticmethod
+    async def put(content: bytes, filename: str = "", content_type: str = "application/octet-stream") -> Dict[str, Any]:
+        """
+        Spool ``content`` and return its ref.
+
+        Identical content that is already spooled is not stored again; its
+        reference count is incremented instead.
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        # One atomic increment: a copy whose refs already dropped to 0 is being
+        # deleted by release() and must not be handed out again
+        existing = await UploadSpoolService._files().find_one_and_update(
+            {"metadata.sha256": sha256, "metadata.refs": {"$gt": 0}},
+            {"$inc": {"metadata.refs": 1}, "$set": {"metadata.last_ref_at": datetime.utcnow()}},
+            projection={"_id": 1}
+        )
+        if existing:
+            return {"spool_id": str(existing["_id"]), "sha256": sha256, "size": len(content)}
+
+        spool_id = await UploadSpoolService._bucket().upload_from_stream(
+            sha256,
+            content,
+            metadata={
+                "sha256": sha256,
+                "refs": 1,
+                "filename": filename,
+                "content_type": content_type,
+                "last_ref_at": datetime.utcnow()
+            }
+        )
+        return {"spool_id": str(spool_id), "sha256": sha256, "size": len(content)}
+
+    @staticmethod
+    async def iter_chunks(ref: Dict[str, Any]) -> AsyncIterator[bytes]:
+        """Stream the spooled bytes chunk by chunk"""
+        stream = await UploadSpoolService._bucket().open_download_stream(ObjectId(ref["spool_id"]))
+        while True:
+            chunk = await stream.readchunk()
+            if not chunk:
+                break
+            yield chunk
+
+    @staticmethod
+    async def read(ref: Dict[str, Any]) -> bytes:
+        """Read the whole spooled file (for consumers that need the bytes in memory)"""
+        stream = await UploadSpoolService._bucket().open_download_stream(ObjectId(ref["spool_id"]))
+        return await stream.read()
+
+    @staticmethod
+    def json_body_with_base64(
+        payload: Dict[str, Any],
+        field: str,
+        ref: Dict[str, Any]
+    ) -> Tuple[AsyncIterator[bytes], int]:
+        """
+        Build a JSON request body where ``field`` is the base64 of a spooled file,
+        encoded while streaming from GridFS instead of materializing the base64
+        string (and a second copy inside json.dumps).
+
+        Returns:
+            (async body iterator, exact Content-Length)
+        """
+        prefix = json.dumps(payload)[:-1]
+        prefix += (", " if payload else "") + json.dumps(field) + ': "'
+        prefix_bytes = prefix.encode("ascii")
+        suffix_bytes = b'"}'
+        encoded_size = 4 * ((ref["size"] + 2) // 3)
+
+        async def body() -> AsyncIterator[bytes]:
+            yield prefix_bytes
+            remainder = b""
+            async for chunk in UploadSpoolService.iter_chunks(ref):
+                data = remainder + chunk
+                cut = len(data) - len(data) % 3
+                remainder = data[cut:]
+                if cut:
+                    yield base64.b64encode(data[:cut])
+            if remainder:
+                yield base64.b64encode(remainder)
+            yield suffix_bytes
+
+        return body(), len(prefix_bytes) + encoded_size + len(suffix_bytes)
+
+    @staticmethod
+    async def release(ref: Optional[Dict[str, Any]]):
+        """Drop one reference; the bytes are deleted when nothing references them"""
+        if not ref or not ref.get("spool_id"):
+            return
+        spool_id = ObjectId(ref["spool_id"])
+        try:
+            doc = await UploadSpoolService._files().find_one_and_update(
+                {"_id": spool_id},
+                {"$inc": {"metadata.refs": -1}},
+                projection={"metadata.refs": 1},
+                return_document=ReturnDocument.AFTER
+            )
+            if doc and doc.get("metadata", {}).get("refs", 0) <= 0:
+                await UploadSpoolService._bucket().delete(spool_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not release spooled file {ref.get('spool_id')}: {e}")
+
+    @staticmethod
+    async def _is_referenced(spool_id: ObjectId) -> bool:
+        """Whether a queued/running job or a pending background upload still holds the file"""
+        from app.services.background_upload_service import BackgroundUploadTaskService
+        from app.services.job_queue_service import JOBS_COLLECTION
+
+        ref_id = str(spool_id)
+        if await mongo_db.database[JOBS_COLLECTION].find_one({"payload.spool_ref.spool_id": ref_id}, {"_id": 1}):
+            return True
+        return bool(await mongo_db.database[BackgroundUploadTaskService.COLLECTION].find_one(
+            {"pending_files.spool_ref.spool_id": ref_id}, {"_id": 1}
+        ))
+
+    @staticmethod
+    async def purge_stale(hours: int = SPOOL_RETENTION_HOURS):
+        """
+        Delete spooled files older than ``hours`` that nothing uses any more: files
+        whose refs reached 0 (release interrupted before the delete) and files still
+        counting refs that no job or upload task references (abandoned work)
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        bucket = UploadSpoolService._bucket()
+        purged = 0
+        try:
+            cursor = UploadSpoolService._files().find(
+                {"metadata.last_ref_at": {"$lt": cutoff}}, {"_id": 1, "metadata.refs": 1}
+            )
+            async for doc in cursor:
+                if doc.get("metadata", {}).get("refs", 0) > 0 and await UploadSpoolService._is_referenced(doc["_id"]):
+                    continue
+                await bucket.delete(doc["_id"])
+                purged += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Spool purge stopped early: {e}")
+        if purged:
+            logger.info(f"🧹 Purged {purged} stale spooled upload files")
@@ -7,6 +7,7 @@ from fastapi import HTTPException
 from app.models.user import UserCreate, UserUpdate, UserResponse, UserRole
 from app.repositories.user_repository import UserRepository
 from app.core.security import hash_password, verify_password, create_access_token
+from app.utils.http_client import http_session
 
 logger = logging.getLogger(__name__)
 
@@ -334,7 +335,7 @@ class UserService:
             # Step 1: Check if COMPANY DOCUMENT folder exists, create if not
             logger.info(f"📁 Checking if COMPANY DOCUMENT folder exists...")
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 # Check folder existence
                 check_payload = {
                     "action": "check_ship_folder_exists",
@@ -398,7 +399,7 @@ class UserService:
                 "content_type": "image/png"
             }
             
-            async with aiohttp.ClientSession() as session:
+            async with http_session() as session:
                 async with session.post(
                     apps_script_url,
                     json=payload,
@@ -486,7 +487,7 @@ class UserService:
             "folder_name": folder_name
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             # Try to find
             async with session.post(
                 apps_script_url,
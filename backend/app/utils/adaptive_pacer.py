@@ -0,0 +1,124 @@
+"""
+Adaptive pacing for rate-limited backends (Apps Script / Google Drive)
+
+Replaces fixed sleeps between calls. Concurrency grows additively while calls
+succeed quickly and is halved (with a cool-down delay) on 429/quota responses or
+when latency degrades, so throughput tracks what the backend currently accepts.
+
+Usage:
+    pacer = AdaptivePacer(max_concurrency=4)
+    async with pacer.slot():
+        started = time.monotonic()
+        ...
+        pacer.record_success(time.monotonic() - started)   # or pacer.record_throttle()
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Markers of quota / rate-limit errors returned by Apps Script and the Drive API
+THROTTLE_MARKERS = (
+    "rate limit",
+    "ratelimit",
+    "quota",
+    "too many",
+    "service invoked too many times",
+    "user rate limit exceeded",
+)
+
+
+def is_throttle_response(status: Optional[int] = None, message: Optional[str] = None) -> bool:
+    """True if an HTTP status or an Apps Script error message means 'slow down'"""
+    if status in (429, 503):
+        return True
+    if message:
+        lowered = str(message).lower()
+        return any(marker in lowered for marker in THROTTLE_MARKERS)
+    return False
+
+
+class AdaptivePacer:
+    """
+    AIMD concurrency limiter.
+
+    Args:
+        max_concurrency: Upper bound of simultaneous calls
+        initial_concurrency: Starting limit (defaults to max_concurrency)
+        latency_target: Seconds; when the latency average exceeds it the limit stops
+            growing and is reduced by one
+        max_backoff: Upper bound of the cool-down delay after throttling (seconds)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        initial_concurrency: Optional[int] = None,
+        latency_target: float = 30.0,
+        max_backoff: float = 60.0
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = max(1, min(initial_concurrency or self.max_concurrency, self.max_concurrency))
+        self.latency_target = latency_target
+        self.max_backoff = max_backoff
+
+        self.active = 0
+        self.avg_latency: Optional[float] = None
+        self.throttle_count = 0
+        self._backoff = 0.0
+        self._paused_until = 0.0
+        self._successes_since_change = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot (and any cool-down) before running one call"""
+        async with self._condition:
+            while True:
+                delay = self._paused_until - time.monotonic()
+                if delay <= 0 and self.active < self.limit:
+                    break
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=delay if delay > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.active -= 1
+                self._condition.notify_all()
+
+    def record_success(self, latency: float):
+        """
+        A call succeeded after ``latency`` seconds (call inside ``slot()``; waiters
+        re-check the new limit when the slot is released)
+        """
+        self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+        self._backoff = 0.0
+
+        if self.avg_latency > self.latency_target:
+            # Backend is slowing down: shed one slot instead of adding load
+            if self.limit > 1:
+                self.limit -= 1
+                self._successes_since_change = 0
+            return
+
+        self._successes_since_change += 1
+        if self._successes_since_change >= self.limit and self.limit < self.max_concurrency:
+            self.limit += 1
+            self._successes_since_change = 0
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """The backend answered 429/quota: halve concurrency and cool down"""
+        self.throttle_count += 1
+        self.limit = max(1, self.limit // 2)
+        self._successes_since_change = 0
+        self._backoff = min(max(self._backoff * 2, 1.0), self.max_backoff)
+        delay = max(self._backoff, retry_after or 0)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.warning(f"⏳ Throttled by backend: concurrency -> {self.limit}, pausing {delay:.1f}s")
@@ -0,0 +1,236 @@
+"""
+AI extraction cache
+Content-addressed cache of AI analysis results (Document AI / text layer summary
++ System AI extracted fields), so the same file analyzed again - a retry after a
+timeout, a duplicate file in a folder, the same certificate uploaded for sister
+ships - skips the AI calls entirely.
+
+- Key: SHA-256 of the file bytes + document type + AI provider/model + Document AI
+  processor + extraction prompt version. Changing the model or bumping a prompt
+  version therefore never serves stale extractions.
+- Only the AI output is cached (extracted fields, summary text, processing path).
+  Per-ship post-processing (issued_by normalization, ship validation, duplicate
+  checks) still runs on every call.
+- Process-local LRU in front of the ``ai_extraction_cache`` collection (shared by
+  all instances; entries expire after AI_EXTRACTION_CACHE_TTL_SECONDS).
+- Single-flight: concurrent analyses of the same key share one AI run.
+
+Usage:
+    key = AIExtractionCache.make_key(file_bytes, "ship_certificate", ai_config_doc, PROMPT_VERSION)
+    extraction = await AIExtractionCache.get_or_extract(key, lambda: run_ai(...))
+
+    # Report analyzers that fill an analysis_result dict in place
+    analysis_result = await AIExtractionCache.get_or_analyze(key, analysis_result, process, "survey_report", is_complete)
+"""
+import asyncio
+import copy
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_CACHE_COLLECTION = "ai_extraction_cache"
+AI_EXTRACTION_CACHE_ENABLED = os.getenv('AI_EXTRACTION_CACHE_ENABLED', 'true').lower() == 'true'
+AI_EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv('AI_EXTRACTION_CACHE_MAX_ENTRIES', '500'))
+AI_EXTRACTION_CACHE_TTL_SECONDS = int(os.getenv('AI_EXTRACTION_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+
+# Fields of an extraction that are cached
+CACHED_FIELDS = ("extracted_info", "summary_text", "processing_path")
+# Per-request entries of a report analyzer's analysis_result (upload payload, ship)
+REQUEST_FIELDS = ("_file_content", "_filename", "_content_type", "_ship_name")
+
+
+class AIExtractionCache:
+    """File hash -> AI extraction cache (see module docstring)"""
+
+    _lru: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+    _in_flight: Dict[str, asyncio.Future] = {}
+    _indexes_ready = False
+    _stats = {"memory_hits": 0, "db_hits": 0, "shared": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def make_key(
+        file_bytes: bytes,
+        document_type: str,
+        ai_config_doc: Optional[Dict[str, Any]],
+        prompt_version: str,
+        context: str = ""
+    ) -> str:
+        """
+        Cache key for a file analyzed as ``document_type`` with the current AI configuration.
+        ``context``: other request inputs the extraction depends on (filename hints, ship).
+        """
+        ai_config_doc = ai_config_doc or {}
+        document_ai_config = ai_config_doc.get("document_ai") or {}
+        parts = (
+            hashlib.sha256(file_bytes).hexdigest(),
+            document_type,
+            str(ai_config_doc.get("provider") or ""),
+            str(ai_config_doc.get("model") or ""),
+            str(document_ai_config.get("processor_id") or ""),
+            str(prompt_version),
+        )
+        if context:
+            parts += (context,)
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    async def _ensure_indexes():
+        if AIExtractionCache._indexes_ready:
+            return
+        from app.db.index_registry import ensure_collection_indexes
+
+        await ensure_collection_indexes(mongo_db.database, EXTRACTION_CACHE_COLLECTION)
+        AIExtractionCache._indexes_ready = True
+
+    @staticmethod
+    def _remember(key: str, extraction: Dict[str, Any]):
+        lru = AIExtractionCache._lru
+        lru[key] = (extraction, time.monotonic() + AI_EXTRACTION_CACHE_TTL_SECONDS)
+        lru.move_to_end(key)
+        while len(lru) > AI_EXTRACTION_CACHE_MAX_ENTRIES:
+            lru.popitem(last=False)
+
+    @staticmethod
+    async def get(key: str) -> Optional[Dict[str, Any]]:
+        """Cached extraction (a private copy), or None"""
+        if not AI_EXTRACTION_CACHE_ENABLED:
+            return None
+        cached = AIExtractionCache._lru.get(key)
+        if cached:
+            extraction, expires_at = cached
+            if expires_at > time.monotonic():
+                AIExtractionCache._lru.move_to_end(key)
+                AIExtractionCache._stats["memory_hits"] += 1
+                return copy.deepcopy(extraction)
+            AIExtractionCache._lru.pop(key, None)
+
+        try:
+            doc = await mongo_db.database[EXTRACTION_CACHE_COLLECTION].find_one(
+                {"key": key}, {"_id": 0, **{field: 1 for field in CACHED_FIELDS}}
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ AI extraction cache lookup failed: {e}")
+            return None
+        if not doc or not doc.get("extracted_info"):
+            return None
+        AIExtractionCache._remember(key, doc)
+        AIExtractionCache._stats["db_hits"] += 1
+        return copy.deepcopy(doc)
+
+    @staticmethod
+    async def set(key: str, extraction: Dict[str, Any], document_type: str = ""):
+        """Remember a successful extraction (locally and in Mongo)"""
+        if not AI_EXTRACTION_CACHE_ENABLED or not extraction.get("extracted_info"):
+            return
+        entry = copy.deepcopy({field: extraction.get(field) for field in CACHED_FIELDS})
+        AIExtractionCache._remember(key, entry)
+        AIExtractionCache._stats["stores"] += 1
+        try:
+            await AIExtractionCache._ensure_indexes()
+            await mongo_db.database[EXTRACTION_CACHE_COLLECTION].update_one(
+                {"key": key},
+                {"$set": {**entry, "document_type": document_type, "created_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ AI extraction cache write failed: {e}")
+
+    @staticmethod
+    async def get_or_extract(
+        key: str,
+        extractor: Callable[[], Awaitable[Dict[str, Any]]],
+        document_type: str = ""
+    ) -> Dict[str, Any]:
+        """
+        Cached extraction for ``key``; on a miss run ``extractor`` (the AI calls) once
+        for all concurrent callers and cache its result. Errors are not cached.
+
+        Returns:
+            dict with extracted_info / summary_text / processing_path and
+            "cache_hit": bool. Every caller gets its own copy.
+        """
+        extraction = await AIExtractionCache.get(key)
+        if extraction is not None:
+            logger.info(f"♻️ AI extraction cache hit ({document_type}), skipping AI analysis")
+            return {**extraction, "cache_hit": True}
+
+        in_flight = AIExtractionCache._in_flight.get(key)
+        if in_flight is not None:
+            AIExtractionCache._stats["shared"] += 1
+            logger.info(f"♻️ Same file is already being analyzed ({document_type}), waiting for its result")
+            extraction = await asyncio.shield(in_flight)
+            return {**copy.deepcopy(extraction), "cache_hit": True}
+
+        AIExtractionCache._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        AIExtractionCache._in_flight[key] = future
+        try:
+            extraction = await extractor()
+            await AIExtractionCache.set(key, extraction, document_type)
+            future.set_result(copy.deepcopy(extraction))
+            return {**extraction, "cache_hit": False}
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not logged as lost
+            future.exception()
+            raise
+        finally:
+            AIExtractionCache._in_flight.pop(key, None)
+
+    @staticmethod
+    async def get_or_analyze(
+        key: str,
+        analysis_result: Dict[str, Any],
+        analyze: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        document_type: str = "",
+        is_complete: Callable[[Dict[str, Any]], bool] = lambda result: True
+    ) -> Dict[str, Any]:
+        """
+        ``get_or_extract`` for the report analyzers (survey, test, audit report,
+        drawing/manual, approval document) whose pipeline fills ``analysis_result``.
+
+        ``analyze(analysis_result)`` runs the AI calls and returns the filled dict.
+        Everything in it except REQUEST_FIELDS is cached when ``is_complete(result)``
+        (failed or partial runs are not); cached fields are applied to this
+        request's ``analysis_result``, which is returned.
+        """
+        async def extract() -> Dict[str, Any]:
+            result = await analyze(analysis_result)
+            fields = {name: value for name, value in result.items() if name not in REQUEST_FIELDS}
+            return {
+                "extracted_info": fields if is_complete(result) else {},
+                "summary_text": result.get("_summary_text", ""),
+                "processing_path": result.get("_processing_path") or result.get("processing_method"),
+                # Uncached: what the caller (and concurrent waiters) apply
+                "analysis": fields,
+            }
+
+        extraction = await AIExtractionCache.get_or_extract(key, extract, document_type)
+        analysis_result.update(extraction.get("analysis") or extraction["extracted_info"])
+        return analysis_result
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        stats = dict(AIExtractionCache._stats)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["shared"] + stats["misses"]
+        hits = lookups - stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        stats["entries"] = len(AIExtractionCache._lru)
+        stats["enabled"] = AI_EXTRACTION_CACHE_ENABLED
+        return stats
+
+    @staticmethod
+    def clear_local():
+        """Drop the process-local LRU (Mongo entries are kept)"""
+        AIExtractionCache._lru.clear()
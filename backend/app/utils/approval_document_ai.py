@@ -9,6 +9,10 @@ from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Bump when the approval document extraction prompt or its post-parsing changes:
+# cached AI extractions (app/utils/ai_extraction_cache.py) are keyed by it
+APPROVAL_DOCUMENT_PROMPT_VERSION = "1"
+
 
 async def extract_approval_document_fields_from_summary(
     summary_text: str,
@@ -0,0 +1,87 @@
+"""
+Bounded async pipeline
+Runs items through a sequence of stages, each with its own concurrency limit.
+Stages are connected by bounded queues, so a slow stage applies backpressure
+upstream instead of letting finished-but-unconsumed items pile up in memory.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # Queue sentinel
+
+
+class PipelineStage:
+    """
+    One pipeline stage
+
+    Args:
+        name: Stage name (used in logs and passed to the error handler)
+        handler: async callable(item) -> item for the next stage, or None to drop the item
+        concurrency: Number of items this stage may process at the same time
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Any]], concurrency: int = 1):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+
+
+async def run_pipeline(
+    items: Iterable[Any],
+    stages: List[PipelineStage],
+    on_error: Optional[Callable[[Any, str, Exception], Awaitable[None]]] = None
+) -> None:
+    """
+    Push every item through all stages and wait until the pipeline drains.
+
+    An exception raised by a stage handler drops that item (after ``on_error`` is
+    awaited with the item, stage name and exception); other items keep flowing.
+    The queue in front of each stage holds at most ``concurrency`` items of that
+    stage, which bounds the number of in-flight items to roughly twice the sum
+    of stage concurrencies.
+    """
+    queues = [asyncio.Queue(maxsize=stage.concurrency) for stage in stages]
+
+    async def worker(index: int, stage: PipelineStage):
+        in_queue = queues[index]
+        out_queue = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            item = await in_queue.get()
+            if item is _DONE:
+                return
+            try:
+                result = await stage.handler(item)
+            except Exception as e:
+                logger.error(f"❌ Pipeline stage '{stage.name}' failed: {e}")
+                if on_error:
+                    try:
+                        await on_error(item, stage.name, e)
+                    except Exception as handler_error:
+                        logger.error(f"❌ Pipeline error handler failed: {handler_error}")
+                continue
+            if result is not None and out_queue is not None:
+                await out_queue.put(result)
+
+    stage_workers = [
+        [asyncio.create_task(worker(index, stage)) for _ in range(stage.concurrency)]
+        for index, stage in enumerate(stages)
+    ]
+
+    try:
+        for item in items:
+            await queues[0].put(item)
+
+        # Shut stages down in order: once every worker of a stage has exited,
+        # nothing more can arrive at the next stage's queue
+        for index, workers in enumerate(stage_workers):
+            for _ in workers:
+                await queues[index].put(_DONE)
+            await asyncio.gather(*workers)
+    finally:
+        for workers in stage_workers:
+            for task in workers:
+                if not task.done():
+                    task.cancel()
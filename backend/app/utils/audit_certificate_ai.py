@@ -13,6 +13,10 @@ from dateutil import parser as date_parser
 
 logger = logging.getLogger(__name__)
 
+# Bump when the audit certificate extraction prompt or its post-parsing changes:
+# cached AI extractions (app/utils/ai_extraction_cache.py) are keyed by it
+AUDIT_CERTIFICATE_PROMPT_VERSION = "1"
+
 # ⭐ EXPANDED: Certificate categories (ISM/ISPS/MLC/CICA)
 AUDIT_CERTIFICATE_CATEGORIES = {
     "ism": [
@@ -12,6 +12,10 @@ from dateutil import parser as date_parser
 
 logger = logging.getLogger(__name__)
 
+# Bump when the audit report extraction prompt or its post-parsing changes:
+# cached AI extractions (app/utils/ai_extraction_cache.py) are keyed by it
+AUDIT_REPORT_PROMPT_VERSION = "1"
+
 
 async def extract_audit_report_fields_from_summary(
     summary_text: str,
@@ -47,40 +47,39 @@ async def delete_file_background(
     company_id: str,
     document_type: str,
     document_name: str,
-    gdrive_service_class
+    gdrive_service_class=None
 ):
     """
-    Background task to delete file from Google Drive with retry logic
+    Schedule deletion of a Google Drive file as a durable job
+    
+    The job survives instance restarts and is retried with backoff by the job
+    worker (see app.services.job_handlers.handle_gdrive_delete_file).
     
     Args:
         file_id: Google Drive file ID
         company_id: Company ID for Drive configuration
         document_type: Type of document (for logging)
         document_name: Name of document (for logging)
-        gdrive_service_class: GDriveService class reference
+        gdrive_service_class: Unused, kept for backward compatibility
     """
+    from app.services.job_queue_service import JobQueueService, JOB_GDRIVE_DELETE_FILE
+    
     try:
-        logger.info(f"🔄 Starting background deletion for {document_type}: {file_id} ({document_name})")
-        
-        @with_retry(max_attempts=3, min_wait=2, max_wait=10)
-        async def _delete_with_retry():
-            # Create instance of GDriveService since delete_file is an instance method
-            gdrive_service_instance = gdrive_service_class()
-            result = await gdrive_service_instance.delete_file(
-                file_id=file_id,
-                company_id=company_id,
-                permanent_delete=False  # Move to trash by default
-            )
-            if not result:
-                raise Exception(f"Drive deletion failed")
-            return {"success": True}
-        
-        result = await _delete_with_retry()
-        logger.info(f"✅ Successfully deleted {document_type} file in background: {file_id} ({document_name})")
-        return result
+        job_id = await JobQueueService.enqueue(
+            JOB_GDRIVE_DELETE_FILE,
+            {
+                "file_id": file_id,
+                "company_id": company_id,
+                "document_type": document_type,
+                "document_name": document_name
+            },
+            idempotency_key=f"{JOB_GDRIVE_DELETE_FILE}:{file_id}"
+        )
+        logger.info(f"📋 Queued deletion for {document_type}: {file_id} ({document_name})")
+        return {"success": True, "job_id": job_id}
         
     except Exception as e:
-        logger.error(f"❌ Failed to delete {document_type} file after retries: {file_id} ({document_name}) - Error: {e}")
+        logger.error(f"❌ Failed to queue deletion for {document_type} file: {file_id} ({document_name}) - Error: {e}")
         import traceback
         logger.error(traceback.format_exc())
         return {"success": False, "error": str(e)}
@@ -0,0 +1,137 @@
+"""
+Batch Loader
+Request-scoped batching of "find one document by key" lookups (the dataloader
+pattern), to replace per-row ``find_one`` calls in list and bulk endpoints:
+
+- ``load_many(keys)`` fetches every key not seen yet with one ``$in`` query.
+- ``load(key)`` calls issued in the same event-loop tick (e.g. from
+  ``asyncio.gather``) are coalesced into one ``$in`` query.
+- Results - including "not found" - are memoized for the rest of the request, so
+  a collection is queried at most once per key however many rows refer to it.
+
+Loaders live in a per-request registry (RequestLoaderMiddleware, installed in
+app.main); outside a request ``get_loader`` returns a fresh loader, which still
+batches for the caller holding it. Documents are shared between callers of the
+same request: treat them as read-only, and ``clear(key)`` after writing one.
+
+Usage:
+    crews = await get_loader("crew").load_many(cert["crew_id"] for cert in certificates)
+    ship = await get_loader("ships", key_field="name").load(crew["ship_sign_on"])
+"""
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+_request_loaders: ContextVar[Optional[Dict[Tuple[str, str], "BatchLoader"]]] = ContextVar(
+    "request_loaders", default=None
+)
+
+
+class BatchLoader:
+    """Batched, memoized lookups of ``collection`` documents by ``key_field``"""
+
+    def __init__(self, collection: str, key_field: str = "id"):
+        self.collection = collection
+        self.key_field = key_field
+        self._cache: Dict[Any, Optional[Dict[str, Any]]] = {}
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._dispatch_scheduled = False
+        self.queries = 0
+
+    async def _fetch(self, keys) -> Dict[Any, Optional[Dict[str, Any]]]:
+        """One ``$in`` query for ``keys``; the first match per key wins, like find_one"""
+        self.queries += 1
+        cursor = mongo_db.database[self.collection].find({self.key_field: {"$in": list(keys)}})
+        found: Dict[Any, Dict[str, Any]] = {}
+        async for document in cursor:
+            if '_id' in document:
+                document['_id'] = str(document['_id'])
+            found.setdefault(document.get(self.key_field), document)
+        return {key: found.get(key) for key in keys}
+
+    async def load_many(self, keys: Iterable[Any]) -> Dict[Any, Optional[Dict[str, Any]]]:
+        """Documents for ``keys`` (None for missing keys), fetching unseen keys in one query"""
+        keys = [key for key in dict.fromkeys(keys) if key is not None]
+        missing = [key for key in keys if key not in self._cache and key not in self._pending]
+        if missing:
+            self._cache.update(await self._fetch(missing))
+        waiting = [self._pending[key] for key in keys if key in self._pending]
+        if waiting:
+            await asyncio.gather(*waiting, return_exceptions=True)
+        return {key: self._cache.get(key) for key in keys}
+
+    async def load(self, key: Any) -> Optional[Dict[str, Any]]:
+        """Document for ``key``; concurrent loads of the same tick share one query"""
+        if key is None:
+            return None
+        if key in self._cache:
+            return self._cache[key]
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                asyncio.get_running_loop().call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        return await asyncio.shield(future)
+
+    async def _dispatch(self):
+        self._dispatch_scheduled = False
+        pending, self._pending = self._pending, {}
+        try:
+            documents = await self._fetch(pending.keys())
+        except Exception as e:
+            logger.error(f"❌ Batched lookup in {self.collection} failed: {e}")
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # retrieved by the awaiting callers
+            return
+        self._cache.update(documents)
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(documents.get(key))
+
+    def prime(self, key: Any, document: Optional[Dict[str, Any]]):
+        """Seed the memo with a document the caller already has"""
+        self._cache[key] = document
+
+    def clear(self, key: Any = None):
+        """Forget one key (after it was written), or everything"""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+
+def get_loader(collection: str, key_field: str = "id") -> BatchLoader:
+    """The current request's loader for ``collection`` by ``key_field``"""
+    loaders = _request_loaders.get()
+    if loaders is None:
+        return BatchLoader(collection, key_field)
+    loader = loaders.get((collection, key_field))
+    if loader is None:
+        loader = loaders[(collection, key_field)] = BatchLoader(collection, key_field)
+    return loader
+
+
+class RequestLoaderMiddleware:
+    """ASGI middleware giving every HTTP request its own loader registry"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_loaders.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_loaders.reset(token)
@@ -2,32 +2,184 @@
 Certificate Abbreviation Generation Utilities
 Generates abbreviations for certificate names with user-defined mapping support
 """
+import asyncio
+import os
 import re
 import logging
-from typing import Optional
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
 from app.db.mongodb import mongo_db
+from app.utils.keyword_matcher import MappingMatcher
 
 logger = logging.getLogger(__name__)
 
+ABBREVIATION_MAPPINGS_COLLECTION = "certificate_abbreviation_mappings"
+# Upper bound on how stale the cached mapping table may be when change streams
+# are unavailable (standalone MongoDB); with a replica set changes apply at once
+ABBREVIATION_CACHE_REFRESH_SECONDS = float(os.getenv('ABBREVIATION_CACHE_REFRESH_SECONDS', '300'))
+ABBREVIATION_USAGE_FLUSH_SECONDS = float(os.getenv('ABBREVIATION_USAGE_FLUSH_SECONDS', '30'))
+
+
+class AbbreviationMappingCache:
+    """
+    Process-local copy of ``certificate_abbreviation_mappings`` (a small table)
+    so generating abbreviations for a certificate list costs no database calls.
+
+    - The table is loaded in one query and reloaded when it is older than
+      ABBREVIATION_CACHE_REFRESH_SECONDS, when a change stream reports an edit,
+      or after ``invalidate()`` (call it after writing mappings). Mappings are
+      currently edited through backend-v1, a separate process, so this
+      backend relies on the change stream and the refresh interval.
+    - Usage counts are accumulated in memory and written by a background task
+      every ABBREVIATION_USAGE_FLUSH_SECONDS as one bulk_write of $inc updates.
+    """
+
+    _mappings: Dict[str, dict] = {}
+    _loaded_at: Optional[float] = None
+    _version = 0
+    _loaded_version = -1
+    _load_lock: Optional[asyncio.Lock] = None
+    _pending_usage: Counter = Counter()
+    _flush_task: Optional[asyncio.Task] = None
+    _watch_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _is_fresh() -> bool:
+        cache = AbbreviationMappingCache
+        return (
+            cache._loaded_at is not None
+            and cache._loaded_version == cache._version
+            and time.monotonic() - cache._loaded_at < ABBREVIATION_CACHE_REFRESH_SECONDS
+        )
+
+    @staticmethod
+    async def _load():
+        cache = AbbreviationMappingCache
+        if cache._load_lock is None:
+            cache._load_lock = asyncio.Lock()
+        async with cache._load_lock:
+            if cache._is_fresh():
+                return  # Reloaded by a concurrent caller
+            version = cache._version
+            mappings = {}
+            cursor = mongo_db.database[ABBREVIATION_MAPPINGS_COLLECTION].find(
+                {}, {"_id": 0, "id": 1, "cert_name": 1, "abbreviation": 1}
+            )
+            async for mapping in cursor:
+                if mapping.get("cert_name"):
+                    mappings[mapping["cert_name"].upper().strip()] = mapping
+            cache._mappings = mappings
+            cache._loaded_at = time.monotonic()
+            cache._loaded_version = version
+            logger.info(f"🔤 Loaded {len(mappings)} certificate abbreviation mappings")
+
+    @staticmethod
+    async def get(cert_name: str) -> Optional[dict]:
+        """Mapping for a certificate name (case-insensitive), or None"""
+        if not AbbreviationMappingCache._is_fresh():
+            await AbbreviationMappingCache._load()
+            AbbreviationMappingCache._ensure_background_tasks()
+        return AbbreviationMappingCache._mappings.get(cert_name.upper().strip())
+
+    @staticmethod
+    def invalidate():
+        """Reload the mapping table on next use (after mappings were created, edited or deleted)"""
+        AbbreviationMappingCache._version += 1
+
+    @staticmethod
+    def record_usage(mapping_id: str):
+        """Count one use of a mapping; persisted by the next flush"""
+        if mapping_id:
+            AbbreviationMappingCache._pending_usage[mapping_id] += 1
+            AbbreviationMappingCache._ensure_background_tasks()
+
+    @staticmethod
+    async def flush_usage() -> int:
+        """Write accumulated usage counts in one bulk_write; returns the number of mappings updated"""
+        pending = AbbreviationMappingCache._pending_usage
+        if not pending:
+            return 0
+        AbbreviationMappingCache._pending_usage = Counter()
+        operations = [
+            UpdateOne({"id": mapping_id}, {"$inc": {"usage_count": count}})
+            for mapping_id, count in pending.items()
+        ]
+        try:
+            await mongo_db.database[ABBREVIATION_MAPPINGS_COLLECTION].bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Keep the counts for the next attempt
+            AbbreviationMappingCache._pending_usage.update(pending)
+            logger.warning(f"⚠️ Abbreviation usage flush failed: {e}")
+            return 0
+        return len(operations)
+
+    @staticmethod
+    async def _flush_loop():
+        while True:
+            await asyncio.sleep(ABBREVIATION_USAGE_FLUSH_SECONDS)
+            await AbbreviationMappingCache.flush_usage()
+
+    @staticmethod
+    async def _watch_loop():
+        """Invalidate on mapping edits; usage-count updates are ignored"""
+        pipeline = [{"$match": {"$or": [
+            {"operationType": {"$ne": "update"}},
+            {"updateDescription.updatedFields.cert_name": {"$exists": True}},
+            {"updateDescription.updatedFields.abbreviation": {"$exists": True}},
+        ]}}]
+        try:
+            async with mongo_db.database[ABBREVIATION_MAPPINGS_COLLECTION].watch(pipeline) as stream:
+                async for _change in stream:
+                    AbbreviationMappingCache.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Standalone servers have no change streams: rely on the refresh interval
+            logger.info(f"ℹ️ Abbreviation mapping change stream unavailable ({e}); refreshing every {ABBREVIATION_CACHE_REFRESH_SECONDS:.0f}s")
+
+    @staticmethod
+    def _ensure_background_tasks():
+        cache = AbbreviationMappingCache
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if cache._flush_task is None or cache._flush_task.done() or cache._flush_task.get_loop() is not loop:
+            cache._flush_task = loop.create_task(cache._flush_loop())
+        if cache._watch_task is None or cache._watch_task.get_loop() is not loop:
+            cache._watch_task = loop.create_task(cache._watch_loop())
+
+    @staticmethod
+    async def shutdown():
+        """Stop the background tasks and write pending usage counts"""
+        cache = AbbreviationMappingCache
+        for task in (cache._flush_task, cache._watch_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        cache._flush_task = None
+        cache._watch_task = None
+        await cache.flush_usage()
+
 
 async def get_user_defined_abbreviation(cert_name: str) -> Optional[str]:
-    """Get user-defined certificate abbreviation from database mappings"""
+    """Get user-defined certificate abbreviation from the cached database mappings"""
     try:
         if not cert_name:
             return None
         
-        # Normalize certificate name for lookup (uppercase, stripped)
-        normalized_name = cert_name.upper().strip()
-        
-        # Look for existing mapping
-        mapping = await mongo_db.find_one("certificate_abbreviation_mappings", 
-                                        {"cert_name": normalized_name})
+        mapping = await AbbreviationMappingCache.get(cert_name)
         
         if mapping:
-            # Increment usage count
-            await mongo_db.update("certificate_abbreviation_mappings", 
-                                {"id": mapping["id"]}, 
-                                {"usage_count": mapping.get("usage_count", 0) + 1})
+            # Usage count is incremented in batches (see AbbreviationMappingCache)
+            AbbreviationMappingCache.record_usage(mapping.get("id"))
             return mapping.get("abbreviation")
         
         return None
@@ -137,6 +289,8 @@ STANDARD_CERTIFICATE_ABBREVIATIONS = {
     # Add more standard mappings here as needed
 }
 
+_standard_abbreviation_matcher = MappingMatcher(STANDARD_CERTIFICATE_ABBREVIATIONS)
+
 
 def get_standard_abbreviation(cert_name: str) -> Optional[str]:
     """
@@ -154,11 +308,12 @@ def get_standard_abbreviation(cert_name: str) -> Optional[str]:
     
     cert_name_upper = cert_name.upper().strip()
     
-    # Check each standard mapping
-    for keyword, abbreviation in STANDARD_CERTIFICATE_ABBREVIATIONS.items():
-        if keyword in cert_name_upper:
-            logger.info(f"✅ Standard abbreviation match: '{cert_name}' contains '{keyword}' → '{abbreviation}'")
-            return abbreviation
+    # First standard mapping (in table order) contained in the name
+    keyword = _standard_abbreviation_matcher.first_key_in(cert_name_upper)
+    if keyword is not None:
+        abbreviation = STANDARD_CERTIFICATE_ABBREVIATIONS[keyword]
+        logger.info(f"✅ Standard abbreviation match: '{cert_name}' contains '{keyword}' → '{abbreviation}'")
+        return abbreviation
     
     return None
 
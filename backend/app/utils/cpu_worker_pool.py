@@ -0,0 +1,374 @@
+"""
+CPU Worker Pool
+Runs CPU-bound PDF work (pdfplumber, PyPDF2, pdf2image + Tesseract) in a shared
+process pool so that large files never stall the event loop.
+
+Usage:
+    from app.utils.cpu_worker_pool import quick_check_text_layer_async
+    text_check = await quick_check_text_layer_async(file_bytes, filename)
+"""
+import asyncio
+import logging
+import mmap
+import multiprocessing
+import os
+import signal
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Default per-job timeouts (seconds)
+PDF_PARSE_TIMEOUT = float(os.getenv('PDF_PARSE_TIMEOUT_SECONDS', '120'))
+PDF_SPLIT_TIMEOUT = float(os.getenv('PDF_SPLIT_TIMEOUT_SECONDS', '120'))
+OCR_TIMEOUT = float(os.getenv('OCR_TIMEOUT_SECONDS', '90'))
+
+# How often a pool retired after a timeout checks whether its other jobs have finished
+POOL_RETIRE_POLL_SECONDS = 1.0
+
+# Bump when TargetedOCRProcessor output changes: cached OCR results (page_text_cache) are keyed by it
+TARGETED_OCR_VERSION = "2"
+
+
+class _WorkerPool:
+    """
+    A process pool plus what is needed to retire it after a timeout: its jobs
+    that are still pending, and per-worker slots (pid, running job id) in shared
+    memory so the process running a timed-out job can be found and killed.
+    """
+
+    def __init__(self, workers: int):
+        context = multiprocessing.get_context("spawn")
+        self.slots = context.Array('q', 2 * workers)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.slots,)
+        )
+        self.pending: Set[Future] = set()
+        self.timed_out: Set[int] = set()
+        self._next_job_id = 0
+
+    def submit(self, func: Callable, *args) -> Tuple[int, Future]:
+        self._next_job_id += 1
+        job = self.executor.submit(_run_job, self._next_job_id, func, *args)
+        self.pending.add(job)
+        job.add_done_callback(self.pending.discard)
+        return self._next_job_id, job
+
+    def mark_timed_out(self, job_id: int, job: Future):
+        """The caller gave up on ``job``: retirement neither waits for it nor lets it run on"""
+        self.pending.discard(job)
+        self.timed_out.add(job_id)
+
+    def hung_pids(self) -> List[int]:
+        """Worker processes currently running a timed-out job"""
+        with self.slots.get_lock():
+            values = list(self.slots)
+        return [
+            values[index] for index in range(0, len(values), 2)
+            if values[index] and values[index + 1] in self.timed_out
+        ]
+
+
+_pool: Optional[_WorkerPool] = None
+# Running retirements (referenced so they are not garbage-collected mid-run)
+_retire_tasks: Set[asyncio.Task] = set()
+
+# Worker-side: index of this process's slot in _WorkerPool.slots
+_worker_slots = None
+_worker_slot_index = -1
+
+
+def _init_worker(slots):
+    """Claim a free (pid, job id) slot for this worker process"""
+    global _worker_slots, _worker_slot_index
+    _worker_slots = slots
+    with slots.get_lock():
+        for index in range(0, len(slots), 2):
+            if slots[index] == 0:
+                slots[index] = os.getpid()
+                _worker_slot_index = index
+                return
+
+
+def _run_job(job_id: int, func: Callable, *args) -> Any:
+    """Run ``func`` with this worker's slot pointing at ``job_id``"""
+    if _worker_slot_index >= 0:
+        _worker_slots[_worker_slot_index + 1] = job_id
+    try:
+        return func(*args)
+    finally:
+        if _worker_slot_index >= 0:
+            _worker_slots[_worker_slot_index + 1] = 0
+
+
+def _default_worker_count() -> int:
+    """Size the pool from the cores actually available to this container"""
+    configured = os.getenv('CPU_WORKER_PROCESSES')
+    if configured is not None:
+        return max(0, int(configured))
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return max(1, cores)
+
+
+def _get_pool() -> Optional[_WorkerPool]:
+    global _pool
+    if _pool is None:
+        workers = _default_worker_count()
+        if workers == 0:
+            return None
+        # spawn: forking a process that already runs an event loop + Motor threads is unsafe
+        _pool = _WorkerPool(workers)
+        logger.info(f"✅ CPU worker pool started with {workers} processes")
+    return _pool
+
+
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Get (or lazily create) the shared process pool.
+
+    Returns None when the pool is disabled (CPU_WORKER_PROCESSES=0); jobs then run
+    in the default thread executor, which still keeps them off the event loop.
+    """
+    pool = _get_pool()
+    return pool.executor if pool is not None else None
+
+
+def shutdown_executor():
+    """Shut down the shared pool (called on application shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.executor.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        logger.info("✅ CPU worker pool shut down")
+
+
+async def _retire_pool(pool: _WorkerPool):
+    """
+    Let the other jobs of a retired pool (running and queued) finish, then kill
+    the processes still stuck in timed-out jobs. Every job has a timeout, so the
+    wait is bounded. Killing a worker breaks the old pool, which then stops its
+    idle workers.
+    """
+    pool.executor.shutdown(wait=False, cancel_futures=False)
+    while pool.pending:
+        await asyncio.sleep(POOL_RETIRE_POLL_SECONDS)
+    for pid in pool.hung_pids():
+        logger.warning(f"⚠️ Killing hung CPU worker process {pid}")
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+async def run_cpu_bound(func: Callable, *args, timeout: Optional[float] = None) -> Any:
+    """
+    Run a picklable top-level function in the worker pool and await its result.
+
+    Raises asyncio.TimeoutError if the job exceeds ``timeout`` seconds. The worker
+    process cannot be interrupted, so the pool is retired: later jobs go to a fresh
+    pool, jobs already submitted to the old pool still run to completion, and then
+    the process of the timed-out job is killed. In the thread fallback
+    (CPU_WORKER_PROCESSES=0) a timed-out job keeps its thread until it returns. A
+    worker that crashed (e.g. OOM on a huge scan) breaks the pool; it is recreated
+    for the next job and the error is propagated to the caller.
+
+    Buffer arguments (memoryview / mmap / bytearray, e.g. IngestedUpload.view())
+    are sent to worker processes as bytes; in the thread fallback they are passed
+    through as-is.
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.wait_for(loop.run_in_executor(None, func, *args), timeout=timeout)
+
+    args = tuple(
+        bytes(arg) if isinstance(arg, (memoryview, bytearray, mmap.mmap)) else arg
+        for arg in args
+    )
+    job_id, job = pool.submit(func, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(job), timeout=timeout)
+    except asyncio.TimeoutError:
+        pool.mark_timed_out(job_id, job)
+        if _pool is pool:
+            logger.error(f"❌ {func.__name__} timed out after {timeout}s, retiring the CPU worker pool")
+            _pool = None
+            task = asyncio.create_task(_retire_pool(pool))
+            _retire_tasks.add(task)
+            task.add_done_callback(_retire_tasks.discard)
+        raise
+    except BrokenProcessPool:
+        logger.error(f"❌ CPU worker pool broken while running {func.__name__}, recreating")
+        if _pool is pool:
+            _pool = None
+        raise
+
+
+# ============================================================================
+# WORKER-SIDE JOBS (must be top-level so they can be pickled)
+# ============================================================================
+
+def _strip_original_content(chunks: List[Dict], pdf_content: bytes) -> List[Dict]:
+    """Don't ship the input bytes back over the pipe when a chunk is the whole file"""
+    for chunk in chunks:
+        if chunk.get('content') is pdf_content:
+            chunk['content'] = None
+            chunk['is_original'] = True
+    return chunks
+
+
+def _restore_original_content(chunks: List[Dict], pdf_content: bytes) -> List[Dict]:
+    for chunk in chunks:
+        if chunk.pop('is_original', False):
+            chunk['content'] = pdf_content
+    return chunks
+
+
+def _parse_pdf_once_job(file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    from app.utils.pdf_text_extractor import parse_pdf_once
+    return parse_pdf_once(file_bytes, filename)
+
+
+def _quick_check_text_layer_job(file_bytes: bytes, filename: str) -> Dict[str, Any]:
+    from app.utils.pdf_text_extractor import quick_check_text_layer
+    return quick_check_text_layer(file_bytes, filename)
+
+
+def _page_info_job(pdf_content: bytes, max_pages_per_chunk: int) -> Dict[str, Any]:
+    from app.utils.pdf_splitter import PDFSplitter
+    splitter = PDFSplitter(max_pages_per_chunk=max_pages_per_chunk)
+    total_pages = splitter.get_page_count(pdf_content)
+    return {'total_pages': total_pages, 'needs_split': total_pages > 15}
+
+
+def _split_pdf_job(pdf_content: bytes, filename: str, max_pages_per_chunk: int) -> List[Dict]:
+    from app.utils.pdf_splitter import PDFSplitter
+    splitter = PDFSplitter(max_pages_per_chunk=max_pages_per_chunk)
+    return _strip_original_content(splitter.split_pdf(pdf_content, filename), pdf_content)
+
+
+def _split_first_and_last_job(pdf_content: bytes, filename: str, first_pages: int, last_pages: int) -> List[Dict]:
+    from app.utils.pdf_splitter import split_first_and_last
+    chunks = split_first_and_last(pdf_content, filename, first_pages=first_pages, last_pages=last_pages)
+    return _strip_original_content(chunks, pdf_content)
+
+
+def _page_fingerprints_job(file_content: bytes, pages: Optional[List[int]]) -> Optional[List[str]]:
+    from app.utils.pdf_splitter import page_fingerprints
+    return page_fingerprints(file_content, pages)
+
+
+def _ocr_extract_from_pdf_job(pdf_content: bytes, page_num: int, report_no_field: str) -> Dict[str, Optional[str]]:
+    from app.utils.targeted_ocr import get_ocr_processor
+    return get_ocr_processor().extract_from_pdf(pdf_content, page_num=page_num, report_no_field=report_no_field)
+
+
+def _ocr_extract_from_image_job(image_content: bytes, report_no_field: str) -> Dict[str, Optional[str]]:
+    from app.utils.targeted_ocr import get_ocr_processor
+    return get_ocr_processor().extract_from_image(image_content, report_no_field=report_no_field)
+
+
+# ============================================================================
+# ASYNC API
+# ============================================================================
+
+async def parse_pdf_once_async(file_bytes: bytes, filename: str = "unknown.pdf", timeout: float = PDF_PARSE_TIMEOUT) -> Dict[str, Any]:
+    """Awaitable parse_pdf_once (see app.utils.pdf_text_extractor)"""
+    return await run_cpu_bound(_parse_pdf_once_job, file_bytes, filename, timeout=timeout)
+
+
+async def quick_check_text_layer_async(file_bytes: bytes, filename: str, timeout: float = PDF_PARSE_TIMEOUT) -> Dict[str, Any]:
+    """Awaitable quick_check_text_layer (see app.utils.pdf_text_extractor)"""
+    return await run_cpu_bound(_quick_check_text_layer_job, file_bytes, filename, timeout=timeout)
+
+
+async def get_pdf_page_info_async(pdf_content: bytes, max_pages_per_chunk: int = 12, timeout: float = PDF_PARSE_TIMEOUT) -> Dict[str, Any]:
+    """
+    Page count and split decision in one pass (replaces PDFSplitter.get_page_count
+    followed by needs_splitting, which parsed the PDF twice).
+
+    Returns:
+        {'total_pages': int, 'needs_split': bool}
+    """
+    return await run_cpu_bound(_page_info_job, pdf_content, max_pages_per_chunk, timeout=timeout)
+
+
+async def split_pdf_async(
+    pdf_content: bytes,
+    filename: str = "document.pdf",
+    max_pages_per_chunk: int = 12,
+    timeout: float = PDF_SPLIT_TIMEOUT
+) -> List[Dict]:
+    """Awaitable PDFSplitter.split_pdf (see app.utils.pdf_splitter)"""
+    chunks = await run_cpu_bound(_split_pdf_job, pdf_content, filename, max_pages_per_chunk, timeout=timeout)
+    return _restore_original_content(chunks, pdf_content)
+
+
+async def split_first_and_last_async(
+    pdf_content: bytes,
+    filename: str,
+    first_pages: int = 10,
+    last_pages: int = 10,
+    timeout: float = PDF_SPLIT_TIMEOUT
+) -> List[Dict]:
+    """Awaitable split_first_and_last (see app.utils.pdf_splitter)"""
+    chunks = await run_cpu_bound(_split_first_and_last_job, pdf_content, filename, first_pages, last_pages, timeout=timeout)
+    return _restore_original_content(chunks, pdf_content)
+
+
+async def page_fingerprints_async(
+    file_content: bytes,
+    pages: Optional[List[int]] = None,
+    timeout: float = PDF_PARSE_TIMEOUT
+) -> Optional[List[str]]:
+    """Awaitable page_fingerprints (see app.utils.pdf_splitter)"""
+    return await run_cpu_bound(_page_fingerprints_job, file_content, pages, timeout=timeout)
+
+
+async def ocr_extract_from_pdf_async(
+    pdf_content: bytes,
+    page_num: int = 0,
+    report_no_field: str = 'survey_report_no',
+    timeout: float = OCR_TIMEOUT
+) -> Dict[str, Optional[str]]:
+    """
+    Awaitable TargetedOCRProcessor.extract_from_pdf (see app.utils.targeted_ocr).
+    Successful results are reused for pages with the same content (see app.utils.page_text_cache).
+    """
+    from app.utils.page_text_cache import PageTextCache
+    
+    cache_key = None
+    try:
+        fingerprints = await page_fingerprints_async(pdf_content, [page_num])
+        if fingerprints:
+            cache_key = PageTextCache.make_key("targeted_ocr", fingerprints, report_no_field, TARGETED_OCR_VERSION)
+            cached = await PageTextCache.get(cache_key)
+            if cached is not None:
+                logger.info(f"♻️ Targeted OCR of page {page_num} served from page cache")
+                return cached
+    except Exception as e:
+        # Fingerprinting / cache lookup is an optimization only → plain OCR
+        logger.warning(f"⚠️ Page text cache unavailable for targeted OCR of page {page_num}: {e}")
+        cache_key = None
+    
+    result = await run_cpu_bound(_ocr_extract_from_pdf_job, pdf_content, page_num, report_no_field, timeout=timeout)
+    if cache_key and result.get('ocr_success'):
+        await PageTextCache.set(cache_key, result, kind="targeted_ocr", page_count=1)
+    return result
+
+
+async def ocr_extract_from_image_async(
+    image_content: bytes,
+    report_no_field: str = 'cert_no',
+    timeout: float = OCR_TIMEOUT
+) -> Dict[str, Optional[str]]:
+    """Awaitable TargetedOCRProcessor.extract_from_image (see app.utils.targeted_ocr)"""
+    return await run_cpu_bound(_ocr_extract_from_image_job, image_content, report_no_field, timeout=timeout)
@@ -7,6 +7,7 @@ import aiohttp
 import asyncio
 import base64
 from typing import Dict, Any
+from app.utils.http_client import http_session
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +72,23 @@ async def analyze_document_with_document_ai(
         logger.info(f"🤖 Calling Google Document AI for {document_type}: {filename}")
         logger.info(f"   Project: {project_id}, Processor: {processor_id}, Location: {location}")
         
+        # ♻️ Pages already read by Document AI (same page content, any file) → reuse the text
+        page_cache_key = None
+        try:
+            from app.utils.cpu_worker_pool import page_fingerprints_async
+            from app.utils.page_text_cache import PageTextCache
+            fingerprints = await page_fingerprints_async(file_content)
+            if fingerprints:
+                page_cache_key = PageTextCache.make_key(
+                    "document_ai", fingerprints, document_type, processor_id, location
+                )
+                cached = await PageTextCache.get(page_cache_key)
+                if cached is not None:
+                    logger.info(f"♻️ Document AI text for {filename} ({len(fingerprints)} pages) served from page cache")
+                    return {"success": True, "data": cached, "from_page_cache": True}
+        except Exception as e:
+            logger.warning(f"⚠️ Page text cache unavailable for {filename}: {e}")
+        
         # Get Apps Script URL
         apps_script_url = document_ai_config.get("apps_script_url")
         
@@ -116,7 +134,7 @@ async def analyze_document_with_document_ai(
                 logger.info(f"⏱️ [TIMING] Starting Document AI request (attempt {retry_count + 1})...")
                 logger.info(f"⏱️ [TIMING] Payload size: {len(str(payload))} chars (~{len(str(payload))/1024/1024:.2f} MB)")
                 
-                async with aiohttp.ClientSession() as session:
+                async with http_session() as session:
                     # Time the actual HTTP POST
                     post_start = time.time()
                     async with session.post(
@@ -149,6 +167,14 @@ async def analyze_document_with_document_ai(
                                 logger.info(f"   Confidence: {confidence}")
                                 logger.info(f"   Full response: {result}")
                                 
+                                if page_cache_key and summary:
+                                    await PageTextCache.set(
+                                        page_cache_key,
+                                        {"summary": summary, "confidence": confidence},
+                                        kind="document_ai",
+                                        page_count=len(fingerprints)
+                                    )
+                                
                                 return {
                                     "success": True,
                                     "data": {
@@ -7,6 +7,8 @@ from typing import Optional
 import re
 import logging
 
+from app.utils.keyword_matcher import MappingMatcher
+
 logger = logging.getLogger(__name__)
 
 # Document name to standardized format mapping
@@ -166,6 +168,9 @@ DOCUMENT_NAME_MAPPINGS = {
     "training manual": "Training Manual",
 }
 
+# Compiled substring matcher over DOCUMENT_NAME_MAPPINGS (rebuilt by add_custom_document_mapping)
+_document_name_matcher = MappingMatcher(DOCUMENT_NAME_MAPPINGS)
+
 
 def normalize_document_name(document_name: str) -> str:
     """
@@ -200,18 +205,19 @@ def normalize_document_name(document_name: str) -> str:
             logger.debug(f"✅ Normalized '{document_name}' → '{normalized}' (cleaned match)")
             return normalized
         
-        # Partial match - check if any known document name is contained
-        for doc_pattern, normalized_name in DOCUMENT_NAME_MAPPINGS.items():
-            # Check if pattern is in the document name
-            if doc_pattern in doc_name_lower or doc_pattern in doc_name_clean:
-                logger.debug(f"✅ Normalized '{document_name}' → '{normalized_name}' (partial match: {doc_pattern})")
-                return normalized_name
+        # Partial match - first known document name (in table order) contained in the document name
+        doc_pattern = _document_name_matcher.first_key_in(doc_name_lower, doc_name_clean)
+        if doc_pattern is not None:
+            normalized_name = DOCUMENT_NAME_MAPPINGS[doc_pattern]
+            logger.debug(f"✅ Normalized '{document_name}' → '{normalized_name}' (partial match: {doc_pattern})")
+            return normalized_name
         
         # Check if document name contains the pattern (reverse match)
-        for doc_pattern, normalized_name in DOCUMENT_NAME_MAPPINGS.items():
-            if doc_name_lower in doc_pattern or doc_name_clean in doc_pattern:
-                logger.debug(f"✅ Normalized '{document_name}' → '{normalized_name}' (reverse match: {doc_pattern})")
-                return normalized_name
+        doc_pattern = _document_name_matcher.first_key_containing(doc_name_lower, doc_name_clean)
+        if doc_pattern is not None:
+            normalized_name = DOCUMENT_NAME_MAPPINGS[doc_pattern]
+            logger.debug(f"✅ Normalized '{document_name}' → '{normalized_name}' (reverse match: {doc_pattern})")
+            return normalized_name
         
         # No match found - return original but cleaned up
         # Capitalize first letter of each word
@@ -233,6 +239,7 @@ def add_custom_document_mapping(pattern: str, normalized_name: str):
         normalized_name: Standardized format
     """
     DOCUMENT_NAME_MAPPINGS[pattern.lower().strip()] = normalized_name
+    _document_name_matcher.invalidate()
     logger.info(f"✅ Added custom document mapping: '{pattern}' → '{normalized_name}'")
 
 
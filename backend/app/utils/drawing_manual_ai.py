@@ -10,6 +10,10 @@ from typing import Dict
 
 logger = logging.getLogger(__name__)
 
+# Bump when the drawing/manual extraction prompt or its post-parsing changes:
+# cached AI extractions (app/utils/ai_extraction_cache.py) are keyed by it
+DRAWING_MANUAL_PROMPT_VERSION = "1"
+
 
 def create_drawings_manuals_extraction_prompt(summary_text: str) -> str:
     """
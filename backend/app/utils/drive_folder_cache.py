@@ -0,0 +1,190 @@
+"""
+Drive folder-ID cache
+Maps (company, root folder, folder path) -> Google Drive folder ID so resolving
+"SHIP/Crew Records/Crew Cert" does not cost one Apps Script round trip per path
+segment on every crew file move (sign-on / sign-off / ship change).
+
+- Process-local LRU in front of the ``gdrive_folder_cache`` collection (shared by
+  all instances; entries expire after GDRIVE_FOLDER_CACHE_TTL_SECONDS).
+- Single-flight: concurrent resolutions of the same missing path share one lookup,
+  so e.g. parallel moves into a new crew folder create it exactly once.
+- Paths are compared case-insensitively, like the folder walks they replace.
+
+Usage:
+    folder_id = await DriveFolderCache.resolve(company_id, root_id, ["SHIP", "Crew Records"], walk)
+    await DriveFolderCache.invalidate_path(company_id, root_id, ["SHIP"])  # after deleting SHIP
+    await DriveFolderCache.invalidate_folder(folder_id)  # after deleting a folder / a failed move into it
+
+Folders are never renamed by the backend; a folder renamed or deleted directly in
+Drive is dropped when a move into it fails, or expires with the TTL.
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+FOLDER_CACHE_COLLECTION = "gdrive_folder_cache"
+FOLDER_CACHE_MAX_ENTRIES = int(os.getenv('GDRIVE_FOLDER_CACHE_MAX_ENTRIES', '5000'))
+FOLDER_CACHE_TTL_SECONDS = int(os.getenv('GDRIVE_FOLDER_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+
+CacheKey = Tuple[str, str, str]
+
+
+def _normalize_path(path_parts: List[str]) -> str:
+    return "/".join(part.strip().lower() for part in path_parts if part and part.strip())
+
+
+class DriveFolderCache:
+    """Path -> folder ID cache (see module docstring)"""
+
+    _lru: "OrderedDict[CacheKey, Tuple[str, float]]" = OrderedDict()
+    _in_flight: Dict[CacheKey, asyncio.Future] = {}
+    _indexes_ready = False
+
+    @staticmethod
+    def _key(company_id: str, root_folder_id: str, path_parts: List[str]) -> CacheKey:
+        return (str(company_id or ""), str(root_folder_id or ""), _normalize_path(path_parts))
+
+    @staticmethod
+    async def _ensure_indexes():
+        if DriveFolderCache._indexes_ready:
+            return
+        from app.db.index_registry import ensure_collection_indexes
+
+        await ensure_collection_indexes(mongo_db.database, FOLDER_CACHE_COLLECTION)
+        DriveFolderCache._indexes_ready = True
+
+    @staticmethod
+    def _remember(key: CacheKey, folder_id: str):
+        lru = DriveFolderCache._lru
+        lru[key] = (folder_id, time.monotonic() + FOLDER_CACHE_TTL_SECONDS)
+        lru.move_to_end(key)
+        while len(lru) > FOLDER_CACHE_MAX_ENTRIES:
+            lru.popitem(last=False)
+
+    @staticmethod
+    async def get(company_id: str, root_folder_id: str, path_parts: List[str]) -> Optional[str]:
+        """Cached folder ID for a path, or None"""
+        key = DriveFolderCache._key(company_id, root_folder_id, path_parts)
+        cached = DriveFolderCache._lru.get(key)
+        if cached:
+            folder_id, expires_at = cached
+            if expires_at > time.monotonic():
+                DriveFolderCache._lru.move_to_end(key)
+                return folder_id
+            DriveFolderCache._lru.pop(key, None)
+
+        try:
+            doc = await mongo_db.database[FOLDER_CACHE_COLLECTION].find_one(
+                {"company_id": key[0], "root_folder_id": key[1], "path": key[2]},
+                {"_id": 0, "folder_id": 1}
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Folder cache lookup failed: {e}")
+            return None
+        if doc and doc.get("folder_id"):
+            DriveFolderCache._remember(key, doc["folder_id"])
+            return doc["folder_id"]
+        return None
+
+    @staticmethod
+    async def set(company_id: str, root_folder_id: str, path_parts: List[str], folder_id: str):
+        """Remember the folder ID of a path (locally and in Mongo)"""
+        if not folder_id:
+            return
+        key = DriveFolderCache._key(company_id, root_folder_id, path_parts)
+        DriveFolderCache._remember(key, folder_id)
+        try:
+            await DriveFolderCache._ensure_indexes()
+            await mongo_db.database[FOLDER_CACHE_COLLECTION].update_one(
+                {"company_id": key[0], "root_folder_id": key[1], "path": key[2]},
+                {"$set": {"folder_id": folder_id, "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Folder cache write failed: {e}")
+
+    @staticmethod
+    async def resolve(
+        company_id: str,
+        root_folder_id: str,
+        path_parts: List[str],
+        resolver: Callable[[], Awaitable[Optional[str]]]
+    ) -> Optional[str]:
+        """
+        Cached folder ID for a path; on a miss run ``resolver`` (find/create walk)
+        once for all concurrent callers and cache a non-empty result.
+        """
+        folder_id = await DriveFolderCache.get(company_id, root_folder_id, path_parts)
+        if folder_id:
+            return folder_id
+
+        key = DriveFolderCache._key(company_id, root_folder_id, path_parts)
+        in_flight = DriveFolderCache._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        DriveFolderCache._in_flight[key] = future
+        try:
+            folder_id = await resolver()
+            if folder_id:
+                await DriveFolderCache.set(company_id, root_folder_id, path_parts, folder_id)
+            future.set_result(folder_id)
+            return folder_id
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not logged as lost
+            future.exception()
+            raise
+        finally:
+            DriveFolderCache._in_flight.pop(key, None)
+
+    @staticmethod
+    async def invalidate_path(company_id: str, root_folder_id: str, path_parts: List[str]):
+        """Forget a path and everything below it (after the folder was deleted or renamed)"""
+        company, root, path = DriveFolderCache._key(company_id, root_folder_id, path_parts)
+        def below(cached_path: str) -> bool:
+            return not path or cached_path == path or cached_path.startswith(path + "/")
+
+        for key in [k for k in DriveFolderCache._lru if k[0] == company and k[1] == root and below(k[2])]:
+            DriveFolderCache._lru.pop(key, None)
+        query = {"company_id": company, "root_folder_id": root}
+        if path:
+            query["path"] = {"$regex": f"^{re.escape(path)}(/|$)"}
+        try:
+            await mongo_db.database[FOLDER_CACHE_COLLECTION].delete_many(query)
+        except Exception as e:
+            logger.warning(f"⚠️ Folder cache invalidation failed: {e}")
+
+    @staticmethod
+    async def invalidate_folder(folder_id: str):
+        """Forget every path resolved to ``folder_id`` (and the paths below them)"""
+        if not folder_id:
+            return
+        matches = {k for k, (cached_id, _) in DriveFolderCache._lru.items() if cached_id == folder_id}
+        try:
+            async for doc in mongo_db.database[FOLDER_CACHE_COLLECTION].find(
+                {"folder_id": folder_id}, {"_id": 0, "company_id": 1, "root_folder_id": 1, "path": 1}
+            ):
+                matches.add((doc["company_id"], doc["root_folder_id"], doc["path"]))
+        except Exception as e:
+            logger.warning(f"⚠️ Folder cache lookup failed: {e}")
+        for company, root, path in matches:
+            await DriveFolderCache.invalidate_path(company, root, path.split("/"))
+
+    @staticmethod
+    def clear_local():
+        """Drop the process-local LRU (Mongo entries are kept)"""
+        DriveFolderCache._lru.clear()
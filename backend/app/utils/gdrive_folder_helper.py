@@ -6,6 +6,7 @@ import asyncio
 import aiohttp
 from datetime import datetime, timezone
 from typing import Dict, Any
+from app.utils.http_client import http_session
 
 logger = logging.getLogger(__name__)
 
@@ -162,7 +163,7 @@ async def create_google_drive_folder_for_new_ship(
         logger.info(f"Payload for Apps Script: {payload}")
         
         # Call Apps Script
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(
                 web_app_url,
                 json=payload,
@@ -3,10 +3,10 @@ Google Drive Helper Functions
 """
 import logging
 import base64
-import requests
 import aiohttp
 import asyncio
 from typing import Dict, Any, List, Tuple
+from app.utils.http_client import http_session, post_json
 
 logger = logging.getLogger(__name__)
 
@@ -72,10 +72,7 @@ async def upload_file_to_ship_folder(
         logger.info(f"📤 Uploading {filename} to {ship_name}/{category} via Apps Script")
         
         # Call Apps Script
-        response = requests.post(script_url, json=payload, timeout=120)
-        response.raise_for_status()
-        
-        result = response.json()
+        result = await post_json(script_url, payload, timeout=120)
         
         if result.get("success"):
             logger.info(f"✅ Uploaded {filename} to {ship_name}/{category}")
@@ -162,7 +159,7 @@ async def upload_file_with_parent_category(
         logger.info(f"📤 Uploading {filename} to {ship_name}/{parent_category}/{category} via Apps Script")
         
         # Call Apps Script asynchronously
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(
                 script_url,
                 json=payload,
@@ -248,7 +245,7 @@ async def upload_file_to_subfolder(
         
         logger.info(f"📤 Uploading {filename} to {ship_name}/{parent_category}/{extended_category}")
         
-        async with aiohttp.ClientSession() as session:
+        async with http_session() as session:
             async with session.post(
                 script_url,
                 json=payload,
@@ -346,7 +343,7 @@ async def upload_files_to_folder(
                 logger.info(f"   📤 Uploading: {filename}")
                 
                 # Call Apps Script asynchronously
-                async with aiohttp.ClientSession() as session:
+                async with http_session() as session:
                     async with session.post(
                         script_url,
                         json=payload,
@@ -477,7 +474,7 @@ async def upload_file_to_folder_streaming(
                 }
                 
                 # Upload to Apps Script
-                async with aiohttp.ClientSession() as session:
+                async with http_session() as session:
                     async with session.post(
                         script_url,
                         json=payload,
@@ -0,0 +1,154 @@
+"""
+Shared HTTP client
+One aiohttp session (and connection pool) per event loop for all outbound calls
+to Apps Script, Document AI and other Google endpoints, so TCP + TLS setup to
+script.google.com is paid once per connection instead of once per request.
+
+Usage:
+    from app.utils.http_client import http_session
+
+    async with http_session() as session:
+        async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=120)) as response:
+            result = await response.json()
+
+``http_session()`` yields the shared session and does NOT close it; sessions are
+closed by ``close_http_sessions()`` on application shutdown.
+"""
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '20'))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL_SECONDS', '300'))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT_SECONDS', '60'))
+
+_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+_metrics: Dict[str, int] = {
+    "requests": 0,
+    "errors": 0,
+    "in_flight": 0,
+    "max_in_flight": 0,
+    "connections_created": 0,
+    "connections_reused": 0,
+    "connection_queued": 0,
+    "dns_cache_hits": 0,
+    "dns_cache_misses": 0,
+}
+
+
+def _count(key: str):
+    async def handler(session, trace_config_ctx, params):
+        _metrics[key] += 1
+    return handler
+
+
+async def _on_request_start(session, trace_config_ctx, params):
+    _metrics["requests"] += 1
+    _metrics["in_flight"] += 1
+    _metrics["max_in_flight"] = max(_metrics["max_in_flight"], _metrics["in_flight"])
+
+
+async def _on_request_end(session, trace_config_ctx, params):
+    _metrics["in_flight"] -= 1
+
+
+async def _on_request_exception(session, trace_config_ctx, params):
+    _metrics["in_flight"] -= 1
+    _metrics["errors"] += 1
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    trace_config.on_connection_create_end.append(_count("connections_created"))
+    trace_config.on_connection_reuseconn.append(_count("connections_reused"))
+    trace_config.on_connection_queued_start.append(_count("connection_queued"))
+    trace_config.on_dns_cache_hit.append(_count("dns_cache_hits"))
+    trace_config.on_dns_cache_miss.append(_count("dns_cache_misses"))
+    return trace_config
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Get (or lazily create) the shared session of the running event loop"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        # Forget sessions of loops that no longer exist (e.g. a finished asyncio.run)
+        for stale_loop in [l for l in _sessions if l.is_closed()]:
+            _sessions.pop(stale_loop, None)
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        session = aiohttp.ClientSession(connector=connector, trace_configs=[_trace_config()])
+        _sessions[loop] = session
+        logger.info(f"✅ Shared HTTP session created (limit={HTTP_POOL_LIMIT}, per host={HTTP_POOL_LIMIT_PER_HOST})")
+    return session
+
+
+@asynccontextmanager
+async def http_session():
+    """Drop-in for ``async with aiohttp.ClientSession() as session`` that reuses the shared pool"""
+    yield get_http_session()
+
+
+async def post_json(url: str, payload: Dict[str, Any], timeout: float) -> Any:
+    """
+    POST ``payload`` as JSON on the shared session and return the decoded JSON body.
+
+    Non-2xx responses raise aiohttp.ClientResponseError (the equivalent of
+    requests' raise_for_status); timeouts raise asyncio.TimeoutError.
+    """
+    async with http_session() as session:
+        async with session.post(
+            url,
+            json=payload,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            raise_for_status=True
+        ) as response:
+            # Apps Script does not always label JSON as application/json
+            return await response.json(content_type=None)
+
+
+async def close_http_sessions():
+    """Close all shared sessions (called on application shutdown)"""
+    current_loop = asyncio.get_running_loop()
+    for loop, session in list(_sessions.items()):
+        # A session can only be closed from its own loop; others die with their loop
+        if loop is current_loop and not session.closed:
+            try:
+                await session.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing HTTP session: {e}")
+    _sessions.clear()
+    logger.info("✅ Shared HTTP sessions closed")
+
+
+def get_http_metrics() -> Dict[str, Any]:
+    """Request/connection counters plus a snapshot of the pool of the current loop"""
+    metrics: Dict[str, Any] = dict(_metrics)
+    reused, created = metrics["connections_reused"], metrics["connections_created"]
+    metrics["connection_reuse_ratio"] = round(reused / (reused + created), 3) if reused + created else None
+    try:
+        session = _sessions.get(asyncio.get_running_loop())
+    except RuntimeError:
+        session = None
+    if session is not None and not session.closed:
+        connector = session.connector
+        metrics["pool"] = {
+            "limit": connector.limit,
+            "limit_per_host": connector.limit_per_host,
+        }
+    return metrics
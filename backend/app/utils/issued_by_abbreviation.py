@@ -7,6 +7,8 @@ from typing import Optional
 import re
 import logging
 
+from app.utils.keyword_matcher import MappingMatcher
+
 logger = logging.getLogger(__name__)
 
 # Company name to abbreviation mapping
@@ -111,6 +113,52 @@ COMPANY_ABBREVIATIONS = {
     "türk loydu": "TURKLOYDU",
 }
 
+# Exact mappings for well-known maritime organizations (matched as substrings of the upper-cased name)
+ORGANIZATION_EXACT_MAPPINGS = {
+    # Panama Maritime Organizations
+    'PANAMA MARITIME DOCUMENTATION SERVICES': 'PMDS',
+    'PANAMA MARITIME DOCUMENTATION SERVICES INC': 'PMDS',
+    'PANAMA MARITIME AUTHORITY': 'PMA',
+    'MARITIME AUTHORITY OF PANAMA': 'PMA',
+    
+    # Major Classification Societies (IACS Members)
+    'DET NORSKE VERITAS': 'DNV',
+    'DNV GL': 'DNV',
+    'AMERICAN BUREAU OF SHIPPING': 'ABS',
+    "LLOYD'S REGISTER": 'LR',
+    'LLOYDS REGISTER': 'LR',
+    "LLOYD'S REGISTER OF SHIPPING": 'LR',
+    'BUREAU VERITAS': 'BV',
+    'CHINA CLASSIFICATION SOCIETY': 'CCS',
+    'NIPPON KAIJI KYOKAI': 'ClassNK',
+    'CLASS NK': 'ClassNK',
+    'KOREAN REGISTER OF SHIPPING': 'KR',
+    'REGISTRO ITALIANO NAVALE': 'RINA',
+    'RUSSIAN MARITIME REGISTER OF SHIPPING': 'RS',
+    'CROATIAN REGISTER OF SHIPPING': 'CRS',
+    'POLISH REGISTER OF SHIPPING': 'PRS',
+    'TURKISH LLOYD': 'TL',
+    'INDIAN REGISTER OF SHIPPING': 'IRClass',
+    
+    # Other Flag State Authorities
+    'LIBERIA MARITIME AUTHORITY': 'LISCR',
+    'MARSHALL ISLANDS MARITIME AUTHORITY': 'MIMA',
+    'SINGAPORE MARITIME AND PORT AUTHORITY': 'MPA',
+    'MALAYSIA MARINE DEPARTMENT': 'MMD',
+    'HONG KONG MARINE DEPARTMENT': 'MARDEP',
+    
+    # Government Maritime Administrations
+    'VIETNAM MARITIME ADMINISTRATION': 'VINAMARINE',
+    'MARITIME SAFETY ADMINISTRATION': 'MSA',
+    'COAST GUARD': 'CG',
+    'PORT STATE CONTROL': 'PSC',
+    'INTERNATIONAL MARITIME ORGANIZATION': 'IMO',
+}
+
+# Compiled substring matchers (COMPANY_ABBREVIATIONS is rebuilt by add_custom_abbreviation)
+_company_matcher = MappingMatcher(COMPANY_ABBREVIATIONS)
+_organization_exact_matcher = MappingMatcher(ORGANIZATION_EXACT_MAPPINGS)
+
 
 def generate_organization_abbreviation(org_name: str) -> str:
     """
@@ -149,52 +197,10 @@ def generate_organization_abbreviation(org_name: str) -> str:
         logger.debug(f"✅ Detected manual abbreviation: '{org_name_stripped}'")
         return org_name_stripped
     
-    # Exact mappings for well-known maritime organizations
-    exact_mappings = {
-        # Panama Maritime Organizations
-        'PANAMA MARITIME DOCUMENTATION SERVICES': 'PMDS',
-        'PANAMA MARITIME DOCUMENTATION SERVICES INC': 'PMDS',
-        'PANAMA MARITIME AUTHORITY': 'PMA',
-        'MARITIME AUTHORITY OF PANAMA': 'PMA',
-        
-        # Major Classification Societies (IACS Members)
-        'DET NORSKE VERITAS': 'DNV',
-        'DNV GL': 'DNV',
-        'AMERICAN BUREAU OF SHIPPING': 'ABS',
-        "LLOYD'S REGISTER": 'LR',
-        'LLOYDS REGISTER': 'LR',
-        "LLOYD'S REGISTER OF SHIPPING": 'LR',
-        'BUREAU VERITAS': 'BV',
-        'CHINA CLASSIFICATION SOCIETY': 'CCS',
-        'NIPPON KAIJI KYOKAI': 'ClassNK',
-        'CLASS NK': 'ClassNK',
-        'KOREAN REGISTER OF SHIPPING': 'KR',
-        'REGISTRO ITALIANO NAVALE': 'RINA',
-        'RUSSIAN MARITIME REGISTER OF SHIPPING': 'RS',
-        'CROATIAN REGISTER OF SHIPPING': 'CRS',
-        'POLISH REGISTER OF SHIPPING': 'PRS',
-        'TURKISH LLOYD': 'TL',
-        'INDIAN REGISTER OF SHIPPING': 'IRClass',
-        
-        # Other Flag State Authorities
-        'LIBERIA MARITIME AUTHORITY': 'LISCR',
-        'MARSHALL ISLANDS MARITIME AUTHORITY': 'MIMA',
-        'SINGAPORE MARITIME AND PORT AUTHORITY': 'MPA',
-        'MALAYSIA MARINE DEPARTMENT': 'MMD',
-        'HONG KONG MARINE DEPARTMENT': 'MARDEP',
-        
-        # Government Maritime Administrations
-        'VIETNAM MARITIME ADMINISTRATION': 'VINAMARINE',
-        'MARITIME SAFETY ADMINISTRATION': 'MSA',
-        'COAST GUARD': 'CG',
-        'PORT STATE CONTROL': 'PSC',
-        'INTERNATIONAL MARITIME ORGANIZATION': 'IMO',
-    }
-    
     # Check for exact matches first
-    for full_name, abbreviation in exact_mappings.items():
-        if full_name in org_name_upper:
-            return abbreviation
+    full_name = _organization_exact_matcher.first_key_in(org_name_upper)
+    if full_name is not None:
+        return ORGANIZATION_EXACT_MAPPINGS[full_name]
     
     # Pattern-based matching for common variations
     if 'PANAMA MARITIME' in org_name_upper and 'DOCUMENTATION' in org_name_upper:
@@ -286,11 +292,12 @@ def normalize_issued_by(issued_by: str) -> str:
             logger.debug(f"✅ Normalized '{issued_by}' → '{abbreviation}' (cleaned match)")
             return abbreviation
         
-        # Partial match - check if any known company name is contained
-        for company_name, abbreviation in COMPANY_ABBREVIATIONS.items():
-            if company_name in issued_by_lower or issued_by_lower in company_name:
-                logger.debug(f"✅ Normalized '{issued_by}' → '{abbreviation}' (partial match: {company_name})")
-                return abbreviation
+        # Partial match - first known company name (in table order) contained in, or containing, the name
+        company_name = _company_matcher.first_key_in_or_containing(issued_by_lower)
+        if company_name is not None:
+            abbreviation = COMPANY_ABBREVIATIONS[company_name]
+            logger.debug(f"✅ Normalized '{issued_by}' → '{abbreviation}' (partial match: {company_name})")
+            return abbreviation
         
         # No match found - return original but cleaned up
         # Capitalize first letter of each word
@@ -312,6 +319,7 @@ def add_custom_abbreviation(company_name: str, abbreviation: str):
         abbreviation: Abbreviated form
     """
     COMPANY_ABBREVIATIONS[company_name.lower().strip()] = abbreviation.upper()
+    _company_matcher.invalidate()
     logger.info(f"✅ Added custom abbreviation: '{company_name}' → '{abbreviation}'")
 
 
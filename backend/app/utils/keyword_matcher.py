@@ -0,0 +1,175 @@
+"""
+Keyword Matcher
+Compiled multi-pattern substring matching for the name normalization tables
+(document names, issued-by organizations, standard certificate abbreviations).
+
+The normalizers answer "which mapping, in table order, is the first one whose
+pattern occurs in this text?". Instead of testing every pattern with ``in``
+(one scan of the text per pattern), the patterns are compiled once into an
+Aho–Corasick automaton: one pass over the text finds every pattern occurrence,
+and each state remembers the lowest table index it completes, so the result is
+the same first-in-table-order match as the linear loop.
+
+Usage:
+    matcher = MappingMatcher(DOCUMENT_NAME_MAPPINGS)
+    key = matcher.first_key_in(doc_name_lower, doc_name_clean)   # pattern found in a text
+    key = matcher.first_key_containing(doc_name_lower)             # pattern containing the text
+    matcher.invalidate()                                           # after the table changed
+"""
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+_NO_MATCH = 1 << 62
+# Joins patterns for the reverse lookup; never part of a normalized name
+_SEPARATOR = "\x00"
+
+
+class KeywordMatcher:
+    """Aho–Corasick automaton over an ordered list of patterns"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        # An empty pattern occurs in every text
+        self._empty_index = next((i for i, p in enumerate(self.patterns) if not p), _NO_MATCH)
+        self._joined = _SEPARATOR.join(self.patterns)
+        self._pattern_starts = []
+        offset = 0
+        for pattern in self.patterns:
+            self._pattern_starts.append(offset)
+            offset += len(pattern) + 1
+        self._build()
+
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        best = [_NO_MATCH]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    goto.append({})
+                    best.append(_NO_MATCH)
+                    nxt = len(goto) - 1
+                    goto[node][ch] = nxt
+                node = nxt
+            best[node] = min(best[node], index)
+
+        # Failure links in BFS order, folded into a complete transition table
+        # (deterministic automaton: one dict lookup per input character)
+        fail = [0] * len(goto)
+        delta: List[Optional[Dict[str, int]]] = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            transitions = dict(delta[fail[node]])
+            transitions.update(goto[node])
+            delta[node] = transitions
+            for ch, child in goto[node].items():
+                fail[child] = delta[fail[node]].get(ch, 0) if node else 0
+                best[child] = min(best[child], best[fail[child]])
+                queue.append(child)
+
+        self._delta = delta
+        self._best = best
+
+    def first_index_in(self, *texts: str) -> Optional[int]:
+        """Lowest index of a pattern occurring in any of ``texts``"""
+        delta, best = self._delta, self._best
+        result = self._empty_index
+        for text in texts:
+            node = 0
+            for ch in text:
+                node = delta[node].get(ch, 0)
+                if best[node] < result:
+                    result = best[node]
+                    if result == 0:
+                        return 0
+        return None if result == _NO_MATCH else result
+
+    def first_index_containing(self, *texts: str, before: Optional[int] = None) -> Optional[int]:
+        """
+        Lowest index of a pattern that contains any of ``texts`` (only patterns
+        below index ``before`` are considered when given)
+        """
+        if not self.patterns:
+            return None
+        end = len(self._joined) if before is None else self._pattern_starts[before]
+        result = _NO_MATCH
+        for text in texts:
+            if _SEPARATOR in text:
+                continue
+            # The first occurrence in the joined patterns lies in the lowest-index pattern
+            position = self._joined.find(text, 0, end)
+            if position >= 0:
+                result = min(result, bisect_right(self._pattern_starts, position) - 1)
+        return None if result == _NO_MATCH else result
+
+
+class MappingMatcher:
+    """
+    First-match lookups over the keys of a mapping table, compiled lazily and
+    rebuilt after ``invalidate()`` (call it whenever the table is changed).
+
+    Small tables are scanned linearly: below MIN_COMPILED_PATTERNS keys the
+    C-level ``in`` loop with early exit beats a per-character automaton walk in
+    CPython (see scripts/benchmark_name_matching.py). Results are identical.
+    """
+
+    MIN_COMPILED_PATTERNS = 100
+
+    def __init__(self, mappings: Dict[str, str]):
+        self._mappings = mappings
+        self._matcher: Optional[KeywordMatcher] = None
+
+    def invalidate(self):
+        self._matcher = None
+
+    def _compiled(self) -> Optional[KeywordMatcher]:
+        if len(self._mappings) < self.MIN_COMPILED_PATTERNS:
+            return None
+        matcher = self._matcher
+        if matcher is None:
+            matcher = self._matcher = KeywordMatcher(self._mappings.keys())
+        return matcher
+
+    def first_key_in(self, *texts: str) -> Optional[str]:
+        """First key (in table order) occurring in any of ``texts``"""
+        matcher = self._compiled()
+        if matcher is None:
+            for key in self._mappings:
+                for text in texts:
+                    if key in text:
+                        return key
+            return None
+        index = matcher.first_index_in(*texts)
+        return None if index is None else matcher.patterns[index]
+
+    def first_key_containing(self, *texts: str) -> Optional[str]:
+        """First key (in table order) that contains any of ``texts``"""
+        matcher = self._compiled()
+        if matcher is None:
+            for key in self._mappings:
+                for text in texts:
+                    if text in key:
+                        return key
+            return None
+        index = matcher.first_index_containing(*texts)
+        return None if index is None else matcher.patterns[index]
+
+    def first_key_in_or_containing(self, text: str) -> Optional[str]:
+        """First key (in table order) that occurs in ``text`` or contains it"""
+        matcher = self._compiled()
+        if matcher is None:
+            for key in self._mappings:
+                if key in text or text in key:
+                    return key
+            return None
+        index = matcher.first_index_in(text)
+        containing = matcher.first_index_containing(text, before=index)
+        if containing is not None:
+            index = containing
+        return None if index is None else matcher.patterns[index]
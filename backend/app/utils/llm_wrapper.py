@@ -1,6 +1,8 @@
 # Wrapper module to replace emergentintegrations for cloud deployment
-# This provides a compatible interface using google-generativeai directly
+# This provides a compatible interface using the native async clients of
+# google-genai / openai, so LLM calls never block the event loop
 
+import asyncio
 import os
 import logging
 import time
@@ -91,6 +93,8 @@ def clear_api_key_cache():
     """Clear the API key cache. Call this when AI configuration is updated."""
     global _api_key_cache
     _api_key_cache.clear()
+    # Shared clients are keyed by API key - drop them so rotated keys aren't kept alive
+    _client_cache.clear()
     logger.info("🗑️ API key cache cleared")
 
 
@@ -168,121 +172,137 @@ class LlmChat:
         return self
         
     def _get_client(self):
-        """Initialize the appropriate client based on provider"""
-        if self._client is not None:
-            return self._client
-            
+        """Return the shared client for this chat's provider and API key"""
+        if self._client is None:
+            self._client = _get_shared_client(self.provider, self.api_key)
+        return self._client
+
+    def _get_gemini_config(self):
+        """Build the per-call Gemini generation config"""
+        from google.genai import types
+
+        # Get temperature from ai_config if available
+        temperature = 0.2
+        if self.ai_config and 'temperature' in self.ai_config:
+            temperature = self.ai_config.get('temperature', 0.2)
+
+        return types.GenerateContentConfig(
+            temperature=temperature,
+            top_p=0.95,
+            top_k=40,
+            max_output_tokens=8192,
+            system_instruction=self.system_message or None,
+        )
+
+    async def _send_message_async(self, msg_content: str) -> str:
+        """Issue the provider call using the provider's native async client"""
+        client = self._get_client()
+
         if self.provider in ["gemini", "google"]:
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=self.api_key)
-                model_name = self.model or "gemini-1.5-flash"
-                
-                # Get temperature from ai_config if available
-                temperature = 0.2
-                if self.ai_config and 'temperature' in self.ai_config:
-                    temperature = self.ai_config.get('temperature', 0.2)
-                
-                # Configure generation settings
-                generation_config = {
-                    "temperature": temperature,
-                    "top_p": 0.95,
-                    "top_k": 40,
-                    "max_output_tokens": 8192,
-                }
-                
-                # Add system instruction if provided
-                if self.system_message:
-                    self._client = genai.GenerativeModel(
-                        model_name,
-                        generation_config=generation_config,
-                        system_instruction=self.system_message
-                    )
-                else:
-                    self._client = genai.GenerativeModel(
-                        model_name,
-                        generation_config=generation_config
-                    )
-                logger.info(f"✅ Initialized Gemini model: {model_name}")
-                return self._client
-            except ImportError:
-                logger.error("google-generativeai not installed")
-                raise ImportError("Please install google-generativeai: pip install google-generativeai")
+            model_name = self.model or "gemini-1.5-flash"
+            response = await client.aio.models.generate_content(
+                model=model_name,
+                contents=msg_content,
+                config=self._get_gemini_config()
+            )
+            return response.text
         elif self.provider in ["openai", "gpt"]:
-            try:
-                from openai import OpenAI
-                self._client = OpenAI(api_key=self.api_key)
-                return self._client
-            except ImportError:
-                logger.error("openai not installed")
-                raise ImportError("Please install openai: pip install openai")
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
-    
-    def _send_message_sync(self, message: UserMessage) -> str:
-        """Send a message and get response (sync version)"""
-        client = self._get_client()
-        
+            model_name = self.model or "gpt-4o-mini"
+            messages = []
+            if self.system_message:
+                messages.append({"role": "system", "content": self.system_message})
+            messages.append({"role": "user", "content": msg_content})
+
+            response = await client.chat.completions.create(
+                model=model_name,
+                messages=messages
+            )
+            return response.choices[0].message.content
+        raise ValueError(f"Unsupported provider: {self.provider}")
+
+    async def send_message(self, message: UserMessage, timeout: Optional[float] = None) -> str:
+        """Send a message and get the response text.
+
+        The call never blocks the event loop: it goes through the provider's async
+        client, waits for a slot in the per-provider concurrency limit and is
+        cancelled if it exceeds ``timeout`` seconds (default LLM_REQUEST_TIMEOUT_SECONDS).
+        """
         # Get message content - support both .content and .text
         msg_content = getattr(message, 'content', None) or getattr(message, 'text', str(message))
-        
+        timeout = timeout if timeout is not None else LLM_REQUEST_TIMEOUT_SECONDS
+
         try:
-            if self.provider in ["gemini", "google"]:
-                response = client.generate_content(msg_content)
-                return response.text
-            elif self.provider in ["openai", "gpt"]:
-                model_name = self.model or "gpt-4o-mini"
-                messages = []
-                if self.system_message:
-                    messages.append({"role": "system", "content": self.system_message})
-                messages.append({"role": "user", "content": msg_content})
-                
-                response = client.chat.completions.create(
-                    model=model_name,
-                    messages=messages
-                )
-                return response.choices[0].message.content
+            async with _get_provider_semaphore(self.provider):
+                return await asyncio.wait_for(self._send_message_async(msg_content), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"LLM API timeout after {timeout}s (provider: {self.provider}, model: {self.model})")
+            raise
         except Exception as e:
             logger.error(f"LLM API error: {e}")
             raise
-    
-    def send_message(self, message: UserMessage):
-        """Send a message - returns an awaitable result for async compatibility"""
-        return AwaitableResult(self._send_message_sync, message)
 
 
-class AwaitableResult:
-    """Wrapper that makes sync results awaitable for async code compatibility"""
-    
-    def __init__(self, func, *args, **kwargs):
-        self._func = func
-        self._args = args
-        self._kwargs = kwargs
-        self._result = None
-        self._executed = False
-        
-    def _execute(self):
-        if not self._executed:
-            self._result = self._func(*self._args, **self._kwargs)
-            self._executed = True
-        return self._result
-        
-    def __await__(self):
-        # Execute the function and yield the result
-        result = self._execute()
-        yield
-        return result
-        
-    def __str__(self):
-        return str(self._execute())
-        
-    def strip(self):
-        result = self._execute()
-        return result.strip() if result else ""
-    
-    def __bool__(self):
-        result = self._execute()
-        return bool(result)
+# ============================================================================
+# SHARED CLIENTS & CONCURRENCY LIMITS
+# ============================================================================
+LLM_REQUEST_TIMEOUT_SECONDS = float(os.getenv('LLM_REQUEST_TIMEOUT_SECONDS', '120'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+
+_client_cache: Dict[Tuple[str, str], Any] = {}  # {(provider, api_key): client}
+_provider_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _normalize_provider(provider: str) -> str:
+    """Map provider aliases onto one key so they share clients and limits"""
+    if provider in ["gemini", "google"]:
+        return "gemini"
+    if provider in ["openai", "gpt"]:
+        return "openai"
+    return provider
+
+
+def _get_shared_client(provider: str, api_key: str):
+    """Get (or create once) the async-capable client for a provider + API key.
+
+    Clients hold their own connection pools, so reusing them keeps connections
+    warm across requests instead of re-configuring the SDK for every LlmChat.
+    """
+    provider = _normalize_provider(provider)
+    cache_key = (provider, api_key)
+    client = _client_cache.get(cache_key)
+    if client is not None:
+        return client
+
+    if provider == "gemini":
+        try:
+            from google import genai
+        except ImportError:
+            logger.error("google-genai not installed")
+            raise ImportError("Please install google-genai: pip install google-genai")
+        client = genai.Client(api_key=api_key)
+    elif provider == "openai":
+        try:
+            from openai import AsyncOpenAI
+        except ImportError:
+            logger.error("openai not installed")
+            raise ImportError("Please install openai: pip install openai")
+        client = AsyncOpenAI(api_key=api_key)
+    else:
+        raise ValueError(f"Unsupported provider: {provider}")
+
+    _client_cache[cache_key] = client
+    logger.info(f"✅ Initialized shared {provider} client")
+    return client
+
+
+def _get_provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """Concurrency limit shared by all calls to the same provider"""
+    provider = _normalize_provider(provider)
+    semaphore = _provider_semaphores.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _provider_semaphores[provider] = semaphore
+    return semaphore
 
 
 # For compatibility with existing imports
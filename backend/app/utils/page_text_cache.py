@@ -0,0 +1,137 @@
+"""
+Page text cache
+Reuses Document AI / targeted OCR text for pages that were already processed,
+keyed by page content rather than by file:
+
+- A page fingerprint hashes the page's raw content streams, the XObjects it draws
+  (scanned pages are one image each), the fonts it uses (encoding, ToUnicode map,
+  embedded font program), its media box and rotation. Re-saving a PDF,
+  changing its metadata or cutting it into chunks keeps the fingerprints, so a
+  chunk of a re-uploaded report maps to the same pages as before.
+- Document AI answers one summary per request, so its text is stored per page run:
+  the ordered fingerprints of the pages sent (+ document type and processor).
+  Re-analysis and retries only send the chunks whose pages are not cached yet.
+- Header/footer OCR results are stored per single page.
+
+Process-local LRU in front of the ``page_text_cache`` collection (shared by all
+instances; entries expire after PAGE_TEXT_CACHE_TTL_SECONDS).
+
+Fingerprints are computed by app.utils.pdf_splitter.page_fingerprints (run it via
+cpu_worker_pool.page_fingerprints_async).
+
+Usage:
+    fingerprints = await page_fingerprints_async(chunk_bytes)
+    key = PageTextCache.make_key("document_ai", fingerprints, document_type, processor_id)
+    cached = await PageTextCache.get(key)
+"""
+import copy
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+PAGE_TEXT_CACHE_COLLECTION = "page_text_cache"
+PAGE_TEXT_CACHE_ENABLED = os.getenv('PAGE_TEXT_CACHE_ENABLED', 'true').lower() == 'true'
+PAGE_TEXT_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_TEXT_CACHE_MAX_ENTRIES', '300'))
+PAGE_TEXT_CACHE_TTL_SECONDS = int(os.getenv('PAGE_TEXT_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+
+
+class PageTextCache:
+    """Page fingerprint(s) -> extracted text cache (see module docstring)"""
+
+    _lru: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+    _indexes_ready = False
+    _stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def make_key(kind: str, fingerprints: Sequence[str], *variant: Any) -> str:
+        """Key for text of ``kind`` ("document_ai", "targeted_ocr") extracted from these pages"""
+        parts = [kind, *(str(value or "") for value in variant), *fingerprints]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    async def _ensure_indexes():
+        if PageTextCache._indexes_ready:
+            return
+        from app.db.index_registry import ensure_collection_indexes
+
+        await ensure_collection_indexes(mongo_db.database, PAGE_TEXT_CACHE_COLLECTION)
+        PageTextCache._indexes_ready = True
+
+    @staticmethod
+    def _remember(key: str, value: Dict[str, Any]):
+        lru = PageTextCache._lru
+        lru[key] = (value, time.monotonic() + PAGE_TEXT_CACHE_TTL_SECONDS)
+        lru.move_to_end(key)
+        while len(lru) > PAGE_TEXT_CACHE_MAX_ENTRIES:
+            lru.popitem(last=False)
+
+    @staticmethod
+    async def get(key: str) -> Optional[Dict[str, Any]]:
+        """Cached value (a private copy), or None"""
+        if not PAGE_TEXT_CACHE_ENABLED:
+            return None
+        cached = PageTextCache._lru.get(key)
+        if cached:
+            value, expires_at = cached
+            if expires_at > time.monotonic():
+                PageTextCache._lru.move_to_end(key)
+                PageTextCache._stats["memory_hits"] += 1
+                return copy.deepcopy(value)
+            PageTextCache._lru.pop(key, None)
+
+        try:
+            doc = await mongo_db.database[PAGE_TEXT_CACHE_COLLECTION].find_one({"key": key}, {"_id": 0, "value": 1})
+        except Exception as e:
+            logger.warning(f"⚠️ Page text cache lookup failed: {e}")
+            return None
+        if not doc or doc.get("value") is None:
+            PageTextCache._stats["misses"] += 1
+            return None
+        PageTextCache._remember(key, doc["value"])
+        PageTextCache._stats["db_hits"] += 1
+        return copy.deepcopy(doc["value"])
+
+    @staticmethod
+    async def set(key: str, value: Dict[str, Any], kind: str = "", page_count: int = 0):
+        """Remember text extracted from a page run (locally and in Mongo)"""
+        if not PAGE_TEXT_CACHE_ENABLED:
+            return
+        value = copy.deepcopy(value)
+        PageTextCache._remember(key, value)
+        PageTextCache._stats["stores"] += 1
+        try:
+            await PageTextCache._ensure_indexes()
+            await mongo_db.database[PAGE_TEXT_CACHE_COLLECTION].update_one(
+                {"key": key},
+                {"$set": {
+                    "value": value,
+                    "kind": kind,
+                    "page_count": page_count,
+                    "created_at": datetime.now(timezone.utc)
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Page text cache write failed: {e}")
+
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        stats = dict(PageTextCache._stats)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        stats["entries"] = len(PageTextCache._lru)
+        stats["enabled"] = PAGE_TEXT_CACHE_ENABLED
+        return stats
+
+    @staticmethod
+    def clear_local():
+        """Drop the process-local LRU (Mongo entries are kept)"""
+        PageTextCache._lru.clear()
@@ -3,8 +3,9 @@ PDF Splitter Utility
 Split large PDFs into processable chunks for Document AI
 """
 import PyPDF2
+import hashlib
 import io
-from typing import List, Dict
+from typing import List, Dict, Optional, Sequence
 import logging
 
 logger = logging.getLogger(__name__)
@@ -605,3 +606,132 @@ def split_first_and_last(
         logger.error(f"❌ Error splitting PDF first/last: {e}")
         raise ValueError(f"Failed to split PDF: {str(e)}")
 
+
+# ============================================================================
+# PAGE FINGERPRINTS (see app.utils.page_text_cache)
+# ============================================================================
+
+# Form XObjects can nest; deeper levels are not worth hashing
+_MAX_XOBJECT_DEPTH = 3
+
+# Bump when _page_fingerprint changes: cached page text (page_text_cache) is keyed by it
+FINGERPRINT_VERSION = "2"
+
+# Font descriptor entries holding the embedded font program
+_FONT_FILE_KEYS = ("/FontFile", "/FontFile2", "/FontFile3")
+
+
+def _stream_bytes(obj) -> bytes:
+    """Raw (still encoded) bytes of a stream object; decoding is not needed to hash it"""
+    data = getattr(obj, "_data", None)
+    return data if isinstance(data, bytes) else b""
+
+
+def _hash_font(font, digest):
+    """
+    What decides the text a font's glyph codes map to: type, base font and
+    encoding, the ToUnicode CMap, the embedded font program and (Type0) the
+    descendant CID fonts.
+    """
+    font = font.get_object()
+    for key in ("/Subtype", "/BaseFont"):
+        digest.update(str(font.get(key)).encode("utf-8"))
+
+    encoding = font.get("/Encoding")
+    if encoding is not None:
+        encoding = encoding.get_object()
+        if hasattr(encoding, "get") and not hasattr(encoding, "_data"):
+            digest.update(str(encoding.get("/BaseEncoding")).encode("utf-8"))
+            differences = encoding.get("/Differences")
+            digest.update(str(differences.get_object() if differences is not None else None).encode("utf-8"))
+        else:
+            # Predefined encoding name, or an embedded CMap stream (Type0)
+            digest.update(str(encoding).encode("utf-8"))
+            digest.update(_stream_bytes(encoding))
+
+    to_unicode = font.get("/ToUnicode")
+    if to_unicode is not None:
+        digest.update(_stream_bytes(to_unicode.get_object()))
+
+    descriptor = font.get("/FontDescriptor")
+    if descriptor is not None:
+        descriptor = descriptor.get_object()
+        for key in _FONT_FILE_KEYS:
+            font_file = descriptor.get(key)
+            if font_file is not None:
+                digest.update(key.encode("utf-8"))
+                digest.update(_stream_bytes(font_file.get_object()))
+
+    char_procs = font.get("/CharProcs")
+    if char_procs is not None:
+        # Type3: every glyph is a content stream
+        char_procs = char_procs.get_object()
+        for name in sorted(char_procs.keys()):
+            digest.update(str(name).encode("utf-8"))
+            digest.update(_stream_bytes(char_procs[name].get_object()))
+
+    descendants = font.get("/DescendantFonts")
+    if descendants is not None:
+        for descendant in descendants.get_object():
+            _hash_font(descendant, digest)
+
+
+def _hash_resources(resources, digest, depth: int):
+    """Fonts and XObjects of a resource dictionary (Form XObjects recursively)"""
+    if depth > _MAX_XOBJECT_DEPTH or not resources:
+        return
+    resources = resources.get_object()
+
+    fonts = resources.get("/Font")
+    if fonts:
+        fonts = fonts.get_object()
+        for name in sorted(fonts.keys()):
+            digest.update(str(name).encode("utf-8"))
+            _hash_font(fonts[name], digest)
+
+    xobjects = resources.get("/XObject")
+    if not xobjects:
+        return
+    xobjects = xobjects.get_object()
+    for name in sorted(xobjects.keys()):
+        xobject = xobjects[name].get_object()
+        digest.update(str(name).encode("utf-8"))
+        digest.update(_stream_bytes(xobject))
+        if xobject.get("/Subtype") == "/Form":
+            _hash_resources(xobject.get("/Resources"), digest, depth + 1)
+
+
+def _page_fingerprint(page) -> str:
+    digest = hashlib.sha256()
+    digest.update(FINGERPRINT_VERSION.encode("utf-8"))
+    digest.update(repr([float(value) for value in page.mediabox]).encode("utf-8"))
+    digest.update(str(page.get("/Rotate", 0)).encode("utf-8"))
+
+    contents = page.get("/Contents")
+    if contents is not None:
+        contents = contents.get_object()
+        streams = contents if isinstance(contents, list) else [contents]
+        for stream in streams:
+            digest.update(_stream_bytes(stream.get_object()))
+
+    _hash_resources(page.get("/Resources"), digest, 1)
+    return digest.hexdigest()
+
+
+def page_fingerprints(file_content: bytes, pages: Optional[Sequence[int]] = None) -> Optional[List[str]]:
+    """
+    Content fingerprints of the pages of a PDF (0-based ``pages``, default all).
+    Non-PDF input (images) is one page fingerprinted by its bytes.
+
+    Returns:
+        List of hex digests, or None if the PDF cannot be parsed
+    """
+    if bytes(file_content[:4]) != b"%PDF":
+        return [hashlib.sha256(file_content).hexdigest()]
+    try:
+        reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+        indexes = range(len(reader.pages)) if pages is None else pages
+        return [_page_fingerprint(reader.pages[index]) for index in indexes]
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fingerprint PDF pages: {e}")
+        return None
@@ -13,6 +13,10 @@ from dateutil import parser as date_parser
 
 logger = logging.getLogger(__name__)
 
+# Bump when the ship certificate extraction prompt or its post-parsing changes:
+# cached AI extractions (app/utils/ai_extraction_cache.py) are keyed by it
+SHIP_CERTIFICATE_PROMPT_VERSION = "1"
+
 # Ship Certificate Categories (Class & Flag Certificates)
 SHIP_CERTIFICATE_CATEGORIES = {
     "class": [
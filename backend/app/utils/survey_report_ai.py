@@ -9,6 +9,10 @@ from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Bump when the survey report extraction prompt or its post-parsing changes:
+# cached AI extractions (app/utils/ai_extraction_cache.py) are keyed by it
+SURVEY_REPORT_PROMPT_VERSION = "1"
+
 
 async def extract_survey_report_fields_from_summary(
     summary_text: str,
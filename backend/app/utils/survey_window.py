@@ -0,0 +1,141 @@
+"""
+Survey window materialization
+Parses a certificate's Next Survey display value ("30/10/2025 (±3M)") once, at
+write time, into queryable fields so upcoming-survey dashboards can use an
+indexed range query instead of parsing every certificate of the company:
+
+    survey_due_date         datetime (midnight) of the next survey
+    survey_window_open      first day of the survey window
+    survey_window_close     last day of the survey window
+    survey_window_annotation  "±6M" | "±3M" | "-3M" | None (no annotation -> -3M window)
+
+All four are None when the certificate has no parseable next survey.
+"""
+import logging
+import re
+from datetime import date, datetime, time
+from typing import Any, Dict, Optional
+
+from dateutil.relativedelta import relativedelta
+from pymongo import UpdateOne
+
+from app.db.mongodb import mongo_db
+
+logger = logging.getLogger(__name__)
+
+# Certificate families differ in the formats / annotations their upcoming-survey logic accepts
+SHIP_CERTIFICATE = "ship"    # dd/mm/yyyy or ISO date; ±3M and -3M windows
+AUDIT_CERTIFICATE = "audit"  # dd/mm/yyyy only; ±6M, ±3M and -3M windows
+
+SURVEY_WINDOW_FIELDS = ("survey_due_date", "survey_window_open", "survey_window_close", "survey_window_annotation")
+
+
+def _to_datetime(value: date) -> datetime:
+    return datetime.combine(value, time())
+
+
+def parse_survey_window(next_survey: Any, kind: str = SHIP_CERTIFICATE) -> Optional[Dict[str, Any]]:
+    """
+    Parse a Next Survey display value into (due date, window open, window close, annotation).
+
+    Returns:
+        Dict with date objects, or None if no date can be found
+    """
+    if not next_survey:
+        return None
+    next_survey_str = str(next_survey)
+
+    date_match = re.search(r'(\d{2}/\d{2}/\d{4})', next_survey_str)
+    try:
+        if date_match:
+            due_date = datetime.strptime(date_match.group(1), '%d/%m/%Y').date()
+        elif kind == SHIP_CERTIFICATE:
+            iso_match = re.search(r'(\d{4}-\d{2}-\d{2})', next_survey_str)
+            if not iso_match:
+                return None
+            due_date = datetime.strptime(iso_match.group(1), '%Y-%m-%d').date()
+        else:
+            return None
+    except ValueError:
+        return None
+
+    if kind == AUDIT_CERTIFICATE and '(±6M)' in next_survey_str:
+        annotation = '±6M'
+        window_open = due_date - relativedelta(months=6)
+        window_close = due_date + relativedelta(months=6)
+    elif '(±3M)' in next_survey_str or '(+3M)' in next_survey_str or '(+-3M)' in next_survey_str:
+        annotation = '±3M'
+        window_open = due_date - relativedelta(months=3)
+        window_close = due_date + relativedelta(months=3)
+    else:
+        # '(-3M)' or no annotation (defaults to -3M for safety)
+        annotation = '-3M' if '(-3M)' in next_survey_str else None
+        window_open = due_date - relativedelta(months=3)
+        window_close = due_date
+
+    return {
+        "due_date": due_date,
+        "window_open": window_open,
+        "window_close": window_close,
+        "annotation": annotation,
+    }
+
+
+def survey_window_fields(
+    next_survey_display: Any,
+    next_survey: Any = None,
+    kind: str = SHIP_CERTIFICATE
+) -> Dict[str, Any]:
+    """Materialized window fields for a certificate (display value first, like the dashboards)"""
+    window = parse_survey_window(next_survey_display or next_survey, kind)
+    if not window:
+        return {field: None for field in SURVEY_WINDOW_FIELDS}
+    return {
+        "survey_due_date": _to_datetime(window["due_date"]),
+        "survey_window_open": _to_datetime(window["window_open"]),
+        "survey_window_close": _to_datetime(window["window_close"]),
+        "survey_window_annotation": window["annotation"],
+    }
+
+
+def touches_survey_window(update_data: Dict[str, Any]) -> bool:
+    """True if an update changes a field the survey window is derived from"""
+    return "next_survey_display" in update_data or "next_survey" in update_data
+
+
+async def refresh_survey_window(collection: str, cert_id: str, kind: str = SHIP_CERTIFICATE):
+    """Recompute the window fields of one certificate from its stored next survey"""
+    try:
+        cert = await mongo_db.database[collection].find_one(
+            {"id": cert_id}, {"_id": 0, "next_survey_display": 1, "next_survey": 1}
+        )
+        if cert is None:
+            return
+        await mongo_db.database[collection].update_one(
+            {"id": cert_id},
+            {"$set": survey_window_fields(cert.get("next_survey_display"), cert.get("next_survey"), kind)}
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Could not refresh survey window of {collection}/{cert_id}: {e}")
+
+
+async def backfill_survey_windows(collection: str, query: Dict[str, Any], kind: str = SHIP_CERTIFICATE) -> int:
+    """
+    Materialize the window fields of certificates matching ``query`` that were
+    written before the fields existed. After the first run this is a single
+    indexed lookup that finds nothing.
+    """
+    operations = []
+    cursor = mongo_db.database[collection].find(
+        {**query, "survey_window_close": {"$exists": False}},
+        {"_id": 1, "next_survey_display": 1, "next_survey": 1}
+    )
+    async for cert in cursor:
+        operations.append(UpdateOne(
+            {"_id": cert["_id"]},
+            {"$set": survey_window_fields(cert.get("next_survey_display"), cert.get("next_survey"), kind)}
+        ))
+    if operations:
+        await mongo_db.database[collection].bulk_write(operations, ordered=False)
+        logger.info(f"📅 Materialized survey windows for {len(operations)} {collection}")
+    return len(operations)
@@ -0,0 +1,83 @@
+"""
+Sync I/O guard (development / test only)
+Flags blocking network calls (requests, urllib, googleapiclient, ...) made on the
+event loop thread, where they stall every other request for the duration of the call.
+
+Implemented with an audit hook on ``socket.connect`` / ``socket.getaddrinfo``:
+- asyncio uses non-blocking sockets and resolves names in an executor thread, so
+  it never trips the guard;
+- a blocking socket connected (or a name resolved) while an event loop is running
+  in the current thread is a synchronous call on the loop.
+
+Enable with SYNC_IO_GUARD=warn (log a warning with the caller) or SYNC_IO_GUARD=raise
+(raise RuntimeError, useful in tests). Disabled by default and on Cloud Run.
+"""
+import asyncio
+import logging
+import os
+import sys
+import traceback
+
+logger = logging.getLogger(__name__)
+
+SYNC_IO_GUARD_MODE = os.getenv('SYNC_IO_GUARD', 'off').lower()
+
+_installed = False
+
+
+def _on_event_loop_thread() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _caller() -> str:
+    """First stack frame inside the application (skips stdlib / site-packages)"""
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if "/app/" in frame.filename and "sync_io_guard" not in frame.filename:
+            return f"{frame.filename}:{frame.lineno} in {frame.name}"
+    return "unknown caller"
+
+
+def _audit_hook(event: str, args):
+    if SYNC_IO_GUARD_MODE not in ("warn", "raise"):
+        return
+    if event == "socket.connect":
+        sock = args[0]
+        try:
+            if sock.gettimeout() == 0.0:
+                return  # Non-blocking socket (asyncio)
+        except OSError:
+            return
+    elif event != "socket.getaddrinfo":
+        return
+
+    if not _on_event_loop_thread():
+        return
+
+    message = f"Synchronous network call on the event loop ({event}) from {_caller()}"
+    if SYNC_IO_GUARD_MODE == "raise":
+        raise RuntimeError(message)
+    logger.warning(f"🐢 {message}")
+
+
+def install_sync_io_guard(mode: str = None) -> bool:
+    """
+    Install the guard (idempotent). Audit hooks cannot be removed; setting the
+    mode to anything but warn/raise makes the installed hook a no-op.
+
+    Returns:
+        True if the guard is active
+    """
+    global _installed, SYNC_IO_GUARD_MODE
+    if mode:
+        SYNC_IO_GUARD_MODE = mode.lower()
+    if SYNC_IO_GUARD_MODE not in ("warn", "raise"):
+        return False
+    if not _installed:
+        sys.addaudithook(_audit_hook)
+        _installed = True
+        logger.info(f"🐢 Sync I/O guard enabled (mode={SYNC_IO_GUARD_MODE})")
+    return True
@@ -1,11 +1,18 @@
 """
 Targeted OCR for Header/Footer Extraction
 Improves accuracy of Report No. and Report Form extraction from Survey Reports
+
+PDF pages are not rasterized whole: only the header and footer bands are rendered
+(pypdfium2 cropped rendering, DPI adapted to the page size) and both bands are
+read by a single Tesseract call. Repeated passes over the same page are served
+by the page text cache wrapping ocr_extract_from_pdf_async (app.utils.cpu_worker_pool).
 """
 import logging
+import os
 import re
 import io
-from typing import Dict, Optional, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from PIL import Image
 import cv2
 import numpy as np
@@ -30,6 +37,26 @@ except ImportError:
     PDF2IMAGE_AVAILABLE = False
     logger.warning("⚠️ pdf2image not available")
 
+# pypdfium2 renders page regions without rasterizing the whole page
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+    logger.warning("⚠️ pypdfium2 not available, falling back to full-page rendering")
+
+# Adaptive DPI: render so the page width is ~OCR_TARGET_PAGE_WIDTH_PX (A4 at 300 DPI),
+# within [OCR_MIN_DPI, OCR_MAX_DPI] - large drawings no longer produce huge bitmaps
+OCR_TARGET_PAGE_WIDTH_PX = int(os.getenv('OCR_TARGET_PAGE_WIDTH_PX', '2480'))
+OCR_MIN_DPI = int(os.getenv('OCR_MIN_DPI', '150'))
+OCR_MAX_DPI = int(os.getenv('OCR_MAX_DPI', '300'))
+
+# White gap between the header and footer bands in the batched OCR image
+_BAND_GAP_PX = 60
+_TESSERACT_CONFIG = '--psm 6 --oem 3'  # Assume uniform block of text
+# A band with at least this share of pure white pixels is a noise-free render, not a scan
+_CLEAN_RENDER_WHITE_SHARE = 0.5
+
 
 class TargetedOCRProcessor:
     """
@@ -60,7 +87,6 @@ class TargetedOCRProcessor:
                 # Try common paths
                 common_paths = ['/usr/bin/tesseract', '/usr/local/bin/tesseract']
                 for path in common_paths:
-                    import os
                     if os.path.exists(path):
                         pytesseract.pytesseract.tesseract_cmd = path
                         logger.info(f"✅ Tesseract path configured: {path}")
@@ -78,7 +104,7 @@ class TargetedOCRProcessor:
     
     def is_available(self) -> bool:
         """Check if OCR is available"""
-        return TESSERACT_AVAILABLE and PDF2IMAGE_AVAILABLE
+        return TESSERACT_AVAILABLE and (PDFIUM_AVAILABLE or PDF2IMAGE_AVAILABLE)
     
     def extract_from_pdf(
         self, 
@@ -129,32 +155,21 @@ class TargetedOCRProcessor:
         }
         
         if not self.is_available():
-            result['ocr_error'] = "OCR not available (Tesseract or pdf2image not installed)"
+            result['ocr_error'] = "OCR not available (Tesseract or PDF renderer not installed)"
             logger.warning(f"⚠️ {result['ocr_error']}")
             return result
         
         try:
             logger.info(f"🔍 Starting targeted OCR extraction for page {page_num}")
             
-            # Convert PDF to images
-            images = convert_from_bytes(
-                pdf_content,
-                first_page=page_num + 1,
-                last_page=page_num + 1,
-                dpi=300  # High DPI for better OCR accuracy
-            )
-            
-            if not images:
+            bands = self._render_pdf_bands(pdf_content, page_num)
+            if bands is None:
                 result['ocr_error'] = "Failed to convert PDF to image"
                 logger.error(f"❌ {result['ocr_error']}")
                 return result
             
-            page_image = images[0]
-            logger.info(f"📄 Page image size: {page_image.size}")
-            
-            # Extract header and footer text
-            header_text = self._extract_header(page_image)
-            footer_text = self._extract_footer(page_image)
+            # Extract header and footer text (one Tesseract call)
+            header_text, footer_text = self._ocr_bands(*bands)
             
             result['header_text'] = header_text
             result['footer_text'] = footer_text
@@ -225,9 +240,8 @@ class TargetedOCRProcessor:
             if image.mode in ('RGBA', 'LA', 'P'):
                 image = image.convert('RGB')
             
-            # Extract header and footer
-            header_text = self._extract_header(image)
-            footer_text = self._extract_footer(image)
+            # Extract header and footer (one Tesseract call)
+            header_text, footer_text = self._ocr_bands(*self._crop_bands(image))
             
             result['header_text'] = header_text
             result['footer_text'] = footer_text
@@ -286,52 +300,116 @@ class TargetedOCRProcessor:
         
         return None
     
-    def _extract_header(self, image: Image.Image) -> str:
-        """Extract text from header region (top 15%)"""
+    def _render_dpi(self, page_width_pt: float) -> int:
+        """DPI that renders the page about OCR_TARGET_PAGE_WIDTH_PX wide"""
+        dpi = OCR_TARGET_PAGE_WIDTH_PX / max(page_width_pt / 72.0, 1.0)
+        return int(min(OCR_MAX_DPI, max(OCR_MIN_DPI, dpi)))
+    
+    def _crop_bands(self, image: Image.Image) -> Tuple[Image.Image, Image.Image]:
+        """Header and footer strips of an already rendered page"""
         width, height = image.size
         header_height = int(height * self.header_percent)
+        footer_y = height - int(height * self.footer_percent)
+        return image.crop((0, 0, width, header_height)), image.crop((0, footer_y, width, height))
+    
+    def _render_pdf_bands(self, pdf_content: bytes, page_num: int) -> Optional[Tuple[Image.Image, Image.Image]]:
+        """
+        Render only the header and footer bands of a PDF page.
         
-        # Crop header region
-        header_region = image.crop((0, 0, width, header_height))
-        
-        # Preprocess for better OCR
-        header_region = self._preprocess_image(header_region)
-        
-        # OCR
-        text = pytesseract.image_to_string(
-            header_region,
-            lang='eng',
-            config='--psm 6 --oem 3'  # Assume uniform block of text
-        )
+        pypdfium2 crops while rendering, so the middle ~70% of the page is never
+        rasterized. Rotated pages (and installs without pypdfium2) render the page
+        once and crop both bands from it.
+        """
+        if PDFIUM_AVAILABLE:
+            pdf = pdfium.PdfDocument(pdf_content)
+            try:
+                page = pdf[page_num]
+                try:
+                    if not page.get_rotation():
+                        width_pt, height_pt = page.get_size()
+                        scale = self._render_dpi(width_pt) / 72.0
+                        header_cut = height_pt * (1 - self.header_percent)
+                        footer_cut = height_pt * (1 - self.footer_percent)
+                        # crop = (left, bottom, right, top) points cut away before rendering
+                        header = page.render(scale=scale, crop=(0, header_cut, 0, 0), grayscale=True).to_pil()
+                        footer = page.render(scale=scale, crop=(0, 0, 0, footer_cut), grayscale=True).to_pil()
+                        logger.info(f"📄 Rendered header {header.size} + footer {footer.size} at {round(scale * 72)} DPI")
+                        return header, footer
+                    
+                    width_pt = page.get_size()[1]  # rendered width of a 90°/270° page
+                    scale = self._render_dpi(width_pt) / 72.0
+                    page_image = page.render(scale=scale, grayscale=True).to_pil()
+                finally:
+                    page.close()
+            finally:
+                pdf.close()
+        elif PDF2IMAGE_AVAILABLE:
+            images = convert_from_bytes(
+                pdf_content,
+                first_page=page_num + 1,
+                last_page=page_num + 1,
+                dpi=OCR_MAX_DPI,
+                grayscale=True
+            )
+            if not images:
+                return None
+            page_image = images[0]
+        else:
+            return None
         
-        return text.strip()
+        logger.info(f"📄 Page image size: {page_image.size}")
+        return self._crop_bands(page_image)
     
-    def _extract_footer(self, image: Image.Image) -> str:
-        """Extract text from footer region (bottom 15%)"""
-        width, height = image.size
-        footer_height = int(height * self.footer_percent)
-        footer_y = height - footer_height
-        
-        # Crop footer region
-        footer_region = image.crop((0, footer_y, width, height))
+    def _ocr_bands(self, header: Image.Image, footer: Image.Image) -> Tuple[str, str]:
+        """
+        OCR header and footer in one Tesseract call: the preprocessed bands are
+        stacked (separated by a white gap) and words are assigned back to a band
+        by their vertical position.
+        """
+        header = self._preprocess_image(header)
+        footer = self._preprocess_image(footer)
         
-        # Preprocess for better OCR
-        footer_region = self._preprocess_image(footer_region)
+        width = max(header.width, footer.width)
+        split_y = header.height + _BAND_GAP_PX // 2
+        combined = Image.new('L', (width, header.height + _BAND_GAP_PX + footer.height), 255)
+        combined.paste(header, (0, 0))
+        combined.paste(footer, (0, header.height + _BAND_GAP_PX))
         
-        # OCR
-        text = pytesseract.image_to_string(
-            footer_region,
+        data = pytesseract.image_to_data(
+            combined,
             lang='eng',
-            config='--psm 6 --oem 3'  # Assume uniform block of text
+            config=_TESSERACT_CONFIG,
+            output_type=pytesseract.Output.DICT
         )
         
-        return text.strip()
+        # Rebuild lines (block, paragraph, line) in reading order
+        lines: "OrderedDict[tuple, List]" = OrderedDict()
+        for i, word in enumerate(data['text']):
+            if not word or not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            entry = lines.setdefault(key, [data['top'][i], []])
+            entry[0] = min(entry[0], data['top'][i])
+            entry[1].append(word.strip())
+        
+        header_lines, footer_lines = [], []
+        for (block, paragraph, _), (top, words) in lines.items():
+            target = header_lines if top < split_y else footer_lines
+            # Blank line between paragraphs, like image_to_string
+            if target and target[-1][0] != (block, paragraph):
+                target.append(((block, paragraph), ""))
+            target.append(((block, paragraph), " ".join(words)))
+        
+        def to_text(band_lines):
+            return "\n".join(text for _, text in band_lines).strip()
+        
+        return to_text(header_lines), to_text(footer_lines)
     
     def _preprocess_image(self, image: Image.Image) -> Image.Image:
         """
         Preprocess image for better OCR accuracy
         - Convert to grayscale
-        - Denoise
+        - Denoise (scans only - see below)
         - Threshold (binarization)
         """
         # Convert PIL Image to numpy array
@@ -343,8 +421,12 @@ class TargetedOCRProcessor:
         else:
             gray = img_array
         
-        # Denoise
-        denoised = cv2.fastNlMeansDenoising(gray, h=10)
+        # Denoise - the most expensive step. Bands rendered from born-digital PDFs
+        # have a pure white background and no scan noise, so they skip it.
+        if np.count_nonzero(gray == 255) >= gray.size * _CLEAN_RENDER_WHITE_SHARE:
+            denoised = gray
+        else:
+            denoised = cv2.fastNlMeansDenoising(gray, h=10)
         
         # Threshold (Otsu's method)
         _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
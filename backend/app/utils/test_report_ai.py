@@ -10,6 +10,10 @@ from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Bump when the test report extraction prompt or its post-parsing changes:
+# cached AI extractions (app/utils/ai_extraction_cache.py) are keyed by it
+TEST_REPORT_PROMPT_VERSION = "1"
+
 
 def create_test_report_extraction_prompt(summary_text: str) -> str:
     """
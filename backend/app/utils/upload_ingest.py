@@ -0,0 +1,213 @@
+"""
+Upload ingestion
+Streams an UploadFile once - in fixed-size chunks - to compute its SHA-256, size and
+sniffed MIME type, enforcing the size / type limits as it goes, and then hands the
+content downstream without copying it into a ``bytes`` object:
+
+- ``view()``: memoryview of the spooled content (mmap of the spool file once
+  Starlette rolled it to disk, the in-memory buffer for small files). Accepted by
+  base64, hashlib, file writes and the Drive/Document AI helpers.
+- ``save_to(path)`` / ``copy_to(fileobj)``: chunked copy in a worker thread.
+- ``read_bytes()``: one explicit copy for consumers that really need ``bytes``
+  (e.g. arguments shipped to the CPU worker pool).
+
+The bytes live in the request's own spool (Starlette writes multipart files to a
+SpooledTemporaryFile while parsing), so ten concurrent 20 MB uploads cost ten spool
+files instead of ten spool files plus ten or more in-memory copies each.
+
+Usage:
+    upload = await ingest_upload(file, max_bytes=10 * 1024 * 1024, allowed_types=IMAGE_OR_PDF_TYPES)
+    try:
+        result = await analyze(upload.view(), upload.filename, upload.content_type)
+    finally:
+        upload.close()
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import mmap
+import os
+import shutil
+from typing import Any, BinaryIO, Iterable, Optional
+
+from fastapi import HTTPException, UploadFile
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_READ_CHUNK_BYTES = int(os.getenv('UPLOAD_READ_CHUNK_BYTES', str(1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(50 * 1024 * 1024)))
+
+PDF_TYPES = ("application/pdf",)
+IMAGE_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp", "image/tiff", "image/bmp")
+IMAGE_OR_PDF_TYPES = PDF_TYPES + IMAGE_TYPES
+
+# Leading magic bytes -> MIME type
+_SIGNATURES = (
+    (b"%PDF", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+    (b"BM", "image/bmp"),
+    (b"PK\x03\x04", "application/zip"),  # also docx / xlsx / pptx
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),  # doc / xls
+)
+_SNIFF_BYTES = 16
+
+
+def sniff_mime_type(head: bytes) -> Optional[str]:
+    """MIME type from the first bytes of a file, or None if unknown"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    return None
+
+
+class IngestedUpload:
+    """A streamed, hashed and validated upload (see module docstring)"""
+
+    def __init__(self, file: UploadFile, size: int, sha256: str, sniffed_type: Optional[str]):
+        self.filename = file.filename or "upload"
+        self.declared_type = file.content_type
+        self.sniffed_type = sniffed_type
+        self.size = size
+        self.sha256 = sha256
+        self._spool: BinaryIO = file.file
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+
+    @property
+    def content_type(self) -> str:
+        """Sniffed MIME type when recognised, else the declared one"""
+        return self.sniffed_type or self.declared_type or "application/octet-stream"
+
+    def _fileno(self) -> Optional[int]:
+        # SpooledTemporaryFile: only a real file once rolled over to disk
+        if getattr(self._spool, "_rolled", True) is False:
+            return None
+        try:
+            return self._spool.fileno()
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return None
+
+    def view(self) -> memoryview:
+        """Read-only view of the whole content (no copy)"""
+        if self._view is None:
+            fileno = self._fileno() if self.size else None
+            if fileno is not None:
+                self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)
+            else:
+                buffer = getattr(self._spool, "_file", self._spool)
+                if hasattr(buffer, "getbuffer"):
+                    self._view = buffer.getbuffer().toreadonly()
+                else:
+                    self._spool.seek(0)
+                    self._view = memoryview(self._spool.read())
+        return self._view
+
+    def head(self, length: int = _SNIFF_BYTES) -> bytes:
+        return bytes(self.view()[:length])
+
+    def read_bytes(self) -> bytes:
+        """The content as ``bytes`` (one copy - prefer view() where it is accepted)"""
+        return bytes(self.view())
+
+    def copy_to(self, destination: BinaryIO):
+        """Chunked copy of the content into an open binary file (blocking)"""
+        self._spool.seek(0)
+        shutil.copyfileobj(self._spool, destination, UPLOAD_READ_CHUNK_BYTES)
+        self._spool.seek(0)
+
+    async def save_to(self, path: Any):
+        """Write the content to ``path`` without holding it in memory"""
+        def write():
+            with open(path, "wb") as destination:
+                self.copy_to(destination)
+        await asyncio.to_thread(write)
+
+    def close(self):
+        """Release the view / mapping (the spool itself is closed with the request)"""
+        if self._view is not None:
+            try:
+                self._view.release()
+            except BufferError:
+                pass
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A downstream slice is still alive; the mapping is freed with it
+                pass
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _too_large(filename: str, max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large: {filename}. Maximum size is {max_bytes // (1024 * 1024)}MB"
+    )
+
+
+async def ingest_upload(
+    file: UploadFile,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    allowed_types: Optional[Iterable[str]] = None,
+    allow_empty: bool = False
+) -> IngestedUpload:
+    """
+    Stream ``file`` once: hash, measure and sniff it, enforcing the limits.
+
+    Raises:
+        HTTPException 413 if larger than ``max_bytes`` (checked against the size
+        known from multipart parsing before anything is read), 400 if empty,
+        415 if neither the sniffed nor the declared type is in ``allowed_types``.
+    """
+    filename = file.filename or "upload"
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(filename, max_bytes)
+
+    await file.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            await file.seek(0)
+            raise _too_large(filename, max_bytes)
+        digest.update(chunk)
+        if len(head) < _SNIFF_BYTES:
+            head += chunk[:_SNIFF_BYTES - len(head)]
+    await file.seek(0)
+
+    if size == 0 and not allow_empty:
+        raise HTTPException(status_code=400, detail=f"Empty file received: {filename}")
+
+    sniffed_type = sniff_mime_type(head)
+    if allowed_types is not None:
+        allowed = set(allowed_types)
+        declared = (file.content_type or "").lower()
+        if sniffed_type not in allowed and (sniffed_type is not None or declared not in allowed):
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported file type for {filename}: {sniffed_type or declared or 'unknown'}"
+            )
+
+    logger.debug(f"📥 Ingested {filename}: {size} bytes, {sniffed_type or file.content_type}, sha256 {digest.hexdigest()[:12]}")
+    return IngestedUpload(file, size, digest.hexdigest(), sniffed_type)
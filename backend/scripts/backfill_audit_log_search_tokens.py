@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Backfill search_tokens on crew_audit_logs written before name search was indexed
+Logs without the field are still found by the slower regex fallback in
+CrewAuditLogRepository.get_logs; run this once so every search uses the index.
+
+Usage:
+    python scripts/backfill_audit_log_search_tokens.py [batch_size]
+"""
+
+import asyncio
+import sys
+import os
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from dotenv import load_dotenv
+
+from app.repositories.crew_audit_log_repository import build_search_tokens
+
+load_dotenv()
+
+
+async def backfill_search_tokens(batch_size: int = 1000):
+    mongo_url = os.getenv('MONGO_URL')
+    if not mongo_url:
+        print("❌ MONGO_URL not found in environment variables")
+        return False
+
+    print("🔗 Connecting to MongoDB...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client.get_default_database()
+    collection = db.crew_audit_logs
+
+    pending = await collection.count_documents({'search_tokens': {'$exists': False}})
+    print(f"📋 {pending} logs without search_tokens\n")
+
+    updated = 0
+    batch = []
+    cursor = collection.find({'search_tokens': {'$exists': False}}, {'_id': 1, 'entity_name': 1})
+    async for log in cursor:
+        batch.append(UpdateOne(
+            {'_id': log['_id']},
+            {'$set': {'search_tokens': build_search_tokens(log.get('entity_name'))}}
+        ))
+        if len(batch) >= batch_size:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+            print(f"   ✅ {updated}/{pending}")
+    if batch:
+        result = await collection.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+
+    print(f"\n🎉 Backfilled {updated} logs")
+    client.close()
+    return True
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    success = asyncio.run(backfill_search_tokens(size))
+    sys.exit(0 if success else 1)
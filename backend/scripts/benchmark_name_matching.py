@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled keyword matcher vs. the previous linear scans
+Compares normalize_document_name / normalize_issued_by / generate_organization_abbreviation
+against the original per-pattern loops, checks that both give identical results,
+and repeats the document-name run with a table grown by custom mappings.
+
+Usage:
+    python scripts/benchmark_name_matching.py [iterations]
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.utils import document_name_normalization as docs
+from app.utils import issued_by_abbreviation as orgs
+
+
+DOCUMENT_NAMES = [
+    "G.A. Plan", "Operating Manual", "MSDS", "Main Engine Operation Manual for B&W 6S50MC",
+    "Fire Control Plan - Deck 3", "Wiring diagram of main switchboard", "Spare parts list rev.2",
+    "Stability Booklet (Approved)", "Cargo securing arrangement", "Ballast water treatment system",
+    "Emergency towing booklet", "Hull survey record 2024", "drawing", "manual",
+]
+
+ISSUERS = [
+    "Lloyd's Register", "Panama Maritime Documentation Services Inc.", "DNV GL AS", "Bureau Veritas Marine",
+    "Nippon Kaiji Kyokai", "Chau Giang Maritime Co., Ltd", "Socotra Shipping Agency", "Vietnam Register",
+    "Liberia Maritime Authority", "Hong Kong Marine Department", "ABC Surveyors", "rina",
+]
+
+
+# ---------------------------------------------------------------------------
+# Reference implementations (the linear scans replaced by the matcher)
+# ---------------------------------------------------------------------------
+
+def legacy_normalize_document_name(document_name, mappings):
+    doc_name_lower = document_name.lower().strip()
+    doc_name_clean = ' '.join(re.sub(r'[^\w\s]', ' ', doc_name_lower).split())
+    if doc_name_lower in mappings:
+        return mappings[doc_name_lower]
+    if doc_name_clean in mappings:
+        return mappings[doc_name_clean]
+    for doc_pattern, normalized_name in mappings.items():
+        if doc_pattern in doc_name_lower or doc_pattern in doc_name_clean:
+            return normalized_name
+    for doc_pattern, normalized_name in mappings.items():
+        if doc_name_lower in doc_pattern or doc_name_clean in doc_pattern:
+            return normalized_name
+    return ' '.join(word.capitalize() for word in document_name.split())
+
+
+def legacy_normalize_issued_by(issued_by):
+    issued_by_lower = issued_by.lower().strip()
+    issued_by_clean = re.sub(r'[^\w\s]', '', issued_by_lower)
+    if issued_by_lower in orgs.COMPANY_ABBREVIATIONS:
+        return orgs.COMPANY_ABBREVIATIONS[issued_by_lower]
+    if issued_by_clean in orgs.COMPANY_ABBREVIATIONS:
+        return orgs.COMPANY_ABBREVIATIONS[issued_by_clean]
+    for company_name, abbreviation in orgs.COMPANY_ABBREVIATIONS.items():
+        if company_name in issued_by_lower or issued_by_lower in company_name:
+            return abbreviation
+    return ' '.join(word.capitalize() for word in issued_by.split())
+
+
+def legacy_exact_organization(org_name):
+    org_name_upper = org_name.strip().upper()
+    for full_name, abbreviation in orgs.ORGANIZATION_EXACT_MAPPINGS.items():
+        if full_name in org_name_upper:
+            return abbreviation
+    return None
+
+
+def compiled_exact_organization(org_name):
+    full_name = orgs._organization_exact_matcher.first_key_in(org_name.strip().upper())
+    return orgs.ORGANIZATION_EXACT_MAPPINGS[full_name] if full_name else None
+
+
+# ---------------------------------------------------------------------------
+
+def bench(label, legacy, compiled, inputs, iterations):
+    for value in inputs:
+        expected, actual = legacy(value), compiled(value)
+        assert expected == actual, f"{label}: {value!r} -> legacy {expected!r} != compiled {actual!r}"
+
+    legacy_time = timeit.timeit(lambda: [legacy(v) for v in inputs], number=iterations)
+    compiled_time = timeit.timeit(lambda: [compiled(v) for v in inputs], number=iterations)
+    per_call = 1e6 / (iterations * len(inputs))
+    print(
+        f"{label:<34} linear {legacy_time * per_call:8.2f} µs/call   "
+        f"compiled {compiled_time * per_call:8.2f} µs/call   speedup x{legacy_time / compiled_time:.1f}"
+    )
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"🏁 {iterations} iterations, identical results verified for every input\n")
+
+    bench(
+        f"normalize_document_name ({len(docs.DOCUMENT_NAME_MAPPINGS)})",
+        lambda name: legacy_normalize_document_name(name, docs.DOCUMENT_NAME_MAPPINGS),
+        docs.normalize_document_name,
+        DOCUMENT_NAMES,
+        iterations,
+    )
+    bench(
+        f"normalize_issued_by ({len(orgs.COMPANY_ABBREVIATIONS)})",
+        legacy_normalize_issued_by,
+        orgs.normalize_issued_by,
+        ISSUERS,
+        iterations,
+    )
+    bench(
+        f"organization exact mappings ({len(orgs.ORGANIZATION_EXACT_MAPPINGS)})",
+        legacy_exact_organization,
+        compiled_exact_organization,
+        ISSUERS,
+        iterations,
+    )
+
+    # Grow the table the way add_custom_document_mapping does at runtime
+    for i in range(1000):
+        docs.add_custom_document_mapping(f"custom equipment type {i:04d} handbook", f"Custom Handbook {i}")
+    bench(
+        f"normalize_document_name ({len(docs.DOCUMENT_NAME_MAPPINGS)})",
+        lambda name: legacy_normalize_document_name(name, docs.DOCUMENT_NAME_MAPPINGS),
+        docs.normalize_document_name,
+        DOCUMENT_NAMES,
+        max(1, iterations // 10),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: header/footer band rendering vs. full-page rasterization
+Compares the previous TargetedOCRProcessor input (whole page at 300 DPI, cropped,
+always denoised) with the region-only rendering used now, on a sample PDF. Reports the
+rasterize + preprocess time and the bitmap size handed to Tesseract.
+
+Tesseract itself is not timed (its cost scales with the pixels it is given, and
+the bands are now read in one call instead of two).
+
+Usage:
+    python scripts/benchmark_targeted_ocr.py path/to/report.pdf [page] [iterations]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+import pypdfium2 as pdfium
+from PIL import Image
+
+from app.utils.targeted_ocr import TargetedOCRProcessor
+
+
+def legacy_preprocess(image):
+    gray = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
+    denoised = cv2.fastNlMeansDenoising(gray, h=10)
+    _, thresh = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return Image.fromarray(thresh)
+
+
+def legacy_bands(processor, pdf_content, page_num):
+    pdf = pdfium.PdfDocument(pdf_content)
+    page_image = pdf[page_num].render(scale=300 / 72).to_pil()  # full page, RGB
+    header, footer = processor._crop_bands(page_image)
+    bands = legacy_preprocess(header), legacy_preprocess(footer)
+    return page_image.width * page_image.height * 3, bands
+
+
+def region_bands(processor, pdf_content, page_num):
+    header, footer = processor._render_pdf_bands(pdf_content, page_num)
+    bands = processor._preprocess_image(header), processor._preprocess_image(footer)
+    return header.width * header.height + footer.width * footer.height, bands
+
+
+def measure(label, func, processor, pdf_content, page_num, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        bitmap_bytes, _ = func(processor, pdf_content, page_num)
+    per_call = (time.perf_counter() - start) / iterations
+    print(f"{label:<22} {per_call * 1000:8.1f} ms/page   bitmap {bitmap_bytes / 1024 / 1024:6.1f} MB")
+    return per_call, bitmap_bytes
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    pdf_content = Path(sys.argv[1]).read_bytes()
+    page_num = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    processor = TargetedOCRProcessor()
+    print(f"🏁 {sys.argv[1]} page {page_num}, {iterations} iterations\n")
+    legacy_time, legacy_bytes = measure("full page @300 DPI", legacy_bands, processor, pdf_content, page_num, iterations)
+    region_time, region_bytes = measure("header/footer bands", region_bands, processor, pdf_content, page_num, iterations)
+    print(f"\nspeedup x{legacy_time / region_time:.1f}, bitmap memory x{legacy_bytes / region_bytes:.1f} smaller")
+
+
+if __name__ == "__main__":
+    main()
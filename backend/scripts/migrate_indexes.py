@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Index migrations against the registry in app/db/index_registry.py
+(replaces add_missing_indexes.py and add_audit_log_indexes.py)
+
+Usage:
+    python scripts/migrate_indexes.py            # show the diff (missing / TTL / conflicts / unregistered)
+    python scripts/migrate_indexes.py --check    # same, exit 1 if anything is missing (deploy gate)
+    python scripts/migrate_indexes.py --apply    # build missing indexes, update TTLs
+    python scripts/migrate_indexes.py --report   # index usage ($indexStats), least used first
+
+The API builds missing indexes itself in the background at startup; run --check
+in the deploy pipeline to fail a release whose database is not indexed yet.
+"""
+
+import asyncio
+import sys
+import os
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+
+from app.db.index_registry import apply_index_migrations, index_usage_report, plan_index_migrations
+
+load_dotenv()
+
+
+def print_plan(plan):
+    print("=" * 80)
+    print("INDEX DIFF")
+    print("=" * 80)
+    for spec in plan["missing"]:
+        keys = ', '.join(f'{field}: {direction}' for field, direction in spec["keys"])
+        options = f"  {spec['options']}" if spec["options"] else ""
+        print(f"➕ {spec['collection']}: ({keys}){options}")
+        if spec["description"]:
+            print(f"   📝 {spec['description']}")
+    for change in plan["ttl_changes"]:
+        print(f"⏱️  {change['collection']}.{change['name']}: TTL {change['from']} → {change['to']}s")
+    for conflict in plan["conflicts"]:
+        print(f"⚠️  {conflict['collection']}.{conflict['name']}: live {conflict['live']}, registry {conflict['registry']}")
+    for index in plan["unregistered"]:
+        print(f"❔ {index['collection']}.{index['name']} (not in registry)")
+    print()
+    print(f"Missing: {len(plan['missing'])}  TTL changes: {len(plan['ttl_changes'])}  "
+          f"Conflicts: {len(plan['conflicts'])}  Unregistered: {len(plan['unregistered'])}")
+
+
+async def main(mode: str) -> int:
+    mongo_url = os.getenv('MONGO_URL')
+    if not mongo_url:
+        print("❌ MONGO_URL not found in environment variables")
+        return 1
+
+    client = AsyncIOMotorClient(mongo_url)
+    db_name = os.getenv('DB_NAME')
+    db = client[db_name] if db_name else client.get_default_database()
+    print(f"🔗 Connected to MongoDB: {db.name}\n")
+
+    try:
+        if mode == "--apply":
+            result = await apply_index_migrations(db)
+            for name in result["created"]:
+                print(f"✅ Built {name}")
+            for name in result["ttl_updated"]:
+                print(f"⏱️  TTL updated {name}")
+            for failure in result["failed"]:
+                print(f"❌ {failure['index']}: {failure['error']}")
+            print(f"\n📊 Built: {len(result['created'])}  TTL updated: {len(result['ttl_updated'])}  "
+                  f"Failed: {len(result['failed'])}")
+            return 1 if result["failed"] else 0
+
+        if mode == "--report":
+            print(f"{'OPS':>12}  INDEX")
+            for entry in await index_usage_report(db):
+                print(f"{entry['ops']:>12}  {entry['collection']}.{entry['name']}")
+            print("\n💡 Counters reset on server restart; check 'since' before dropping an index")
+            return 0
+
+        plan = await plan_index_migrations(db)
+        print_plan(plan)
+        if mode == "--check" and (plan["missing"] or plan["ttl_changes"]):
+            print("\n❌ Database is missing registered indexes - run with --apply")
+            return 1
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1] if len(sys.argv) > 1 else ""
+    if selected not in ("", "--check", "--apply", "--report"):
+        print(__doc__)
+        sys.exit(2)
+    sys.exit(asyncio.run(main(selected)))
@@ -0,0 +1,137 @@
+"""
+Adaptive pacer - AIMD transitions and throttle detection
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.utils.adaptive_pacer import AdaptivePacer, is_throttle_response
+
+
+class TestAIMDTransitions:
+
+    def test_limit_grows_by_one_after_limit_fast_successes(self):
+        pacer = AdaptivePacer(max_concurrency=4, initial_concurrency=2, latency_target=10)
+        pacer.record_success(0.1)
+        assert pacer.limit == 2
+        pacer.record_success(0.1)
+        assert pacer.limit == 3
+        for _ in range(3):
+            pacer.record_success(0.1)
+        assert pacer.limit == 4
+
+    def test_limit_never_exceeds_max(self):
+        pacer = AdaptivePacer(max_concurrency=2, initial_concurrency=1)
+        for _ in range(20):
+            pacer.record_success(0.1)
+        assert pacer.limit == 2
+
+    def test_slow_latency_sheds_one_slot(self):
+        pacer = AdaptivePacer(max_concurrency=4, latency_target=1.0)
+        pacer.record_success(5.0)
+        assert pacer.limit == 3
+        pacer.record_success(5.0)
+        assert pacer.limit == 2
+
+    def test_slow_latency_keeps_at_least_one_slot(self):
+        pacer = AdaptivePacer(max_concurrency=1, latency_target=1.0)
+        pacer.record_success(5.0)
+        assert pacer.limit == 1
+
+    def test_latency_is_a_moving_average(self):
+        pacer = AdaptivePacer(max_concurrency=4, latency_target=1.0)
+        pacer.record_success(0.5)
+        # One slow call does not push the average over the target
+        pacer.record_success(2.0)
+        assert pacer.avg_latency == pytest.approx(0.8 * 0.5 + 0.2 * 2.0)
+        assert pacer.limit == 4
+
+    def test_throttle_halves_limit_and_pauses(self):
+        pacer = AdaptivePacer(max_concurrency=8)
+        before = time.monotonic()
+        pacer.record_throttle()
+        assert pacer.limit == 4
+        assert pacer.throttle_count == 1
+        assert pacer._paused_until >= before + 1.0
+        pacer.record_throttle()
+        pacer.record_throttle()
+        pacer.record_throttle()
+        assert pacer.limit == 1
+
+    def test_throttle_backoff_doubles_up_to_max(self):
+        pacer = AdaptivePacer(max_concurrency=8, max_backoff=4.0)
+        backoffs = []
+        for _ in range(5):
+            pacer.record_throttle()
+            backoffs.append(pacer._backoff)
+        assert backoffs == [1.0, 2.0, 4.0, 4.0, 4.0]
+
+    def test_retry_after_extends_the_pause(self):
+        pacer = AdaptivePacer(max_concurrency=2)
+        before = time.monotonic()
+        pacer.record_throttle(retry_after=30)
+        assert pacer._paused_until >= before + 30
+
+    def test_success_resets_backoff_and_growth_restarts(self):
+        pacer = AdaptivePacer(max_concurrency=4)
+        pacer.record_throttle()
+        pacer.record_throttle()
+        assert pacer.limit == 1
+        pacer.record_success(0.1)
+        assert pacer._backoff == 0.0
+        assert pacer.limit == 2
+        pacer.record_throttle()
+        assert pacer._backoff == 1.0
+
+
+class TestSlot:
+
+    def test_slot_limits_concurrency(self):
+        pacer = AdaptivePacer(max_concurrency=2)
+        active = 0
+        peak = 0
+
+        async def call():
+            nonlocal active, peak
+            async with pacer.slot():
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        async def main():
+            await asyncio.gather(*(call() for _ in range(8)))
+
+        asyncio.run(main())
+        assert peak == 2
+        assert pacer.active == 0
+
+    def test_slot_waits_out_the_cool_down(self):
+        async def main():
+            pacer = AdaptivePacer(max_concurrency=2)
+            pacer._paused_until = time.monotonic() + 0.1
+            started = time.monotonic()
+            async with pacer.slot():
+                return time.monotonic() - started
+
+        assert asyncio.run(main()) >= 0.09
+
+
+class TestThrottleDetection:
+
+    @pytest.mark.parametrize("status", [429, 503])
+    def test_throttle_status(self, status):
+        assert is_throttle_response(status=status)
+
+    @pytest.mark.parametrize("message", [
+        "Service invoked too many times for one day: urlfetch",
+        "User Rate Limit Exceeded",
+        "Quota exceeded for quota metric",
+    ])
+    def test_throttle_message(self, message):
+        assert is_throttle_response(status=200, message=message)
+
+    def test_other_errors_are_not_throttling(self):
+        assert not is_throttle_response(status=500, message="Internal error")
+        assert not is_throttle_response()
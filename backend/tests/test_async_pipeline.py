@@ -0,0 +1,131 @@
+"""
+Bounded async pipeline - ordering, error isolation, concurrency and backpressure
+"""
+import asyncio
+
+from app.utils.async_pipeline import PipelineStage, run_pipeline
+
+
+class TestRunPipeline:
+
+    def test_items_flow_through_all_stages(self):
+        results = []
+
+        async def double(item):
+            return item * 2
+
+        async def collect(item):
+            results.append(item)
+
+        asyncio.run(run_pipeline(range(10), [
+            PipelineStage("double", double, concurrency=3),
+            PipelineStage("collect", collect),
+        ]))
+        assert sorted(results) == [i * 2 for i in range(10)]
+
+    def test_none_drops_the_item(self):
+        results = []
+
+        async def keep_even(item):
+            return item if item % 2 == 0 else None
+
+        async def collect(item):
+            results.append(item)
+
+        asyncio.run(run_pipeline(range(6), [
+            PipelineStage("filter", keep_even),
+            PipelineStage("collect", collect),
+        ]))
+        assert sorted(results) == [0, 2, 4]
+
+    def test_failed_item_is_reported_and_others_continue(self):
+        results = []
+        errors = []
+
+        async def fail_on_three(item):
+            if item == 3:
+                raise ValueError("bad item")
+            return item
+
+        async def collect(item):
+            results.append(item)
+
+        async def on_error(item, stage_name, error):
+            errors.append((item, stage_name, str(error)))
+
+        asyncio.run(run_pipeline(range(5), [
+            PipelineStage("check", fail_on_three, concurrency=2),
+            PipelineStage("collect", collect),
+        ], on_error=on_error))
+        assert sorted(results) == [0, 1, 2, 4]
+        assert errors == [(3, "check", "bad item")]
+
+    def test_failing_error_handler_does_not_stop_the_pipeline(self):
+        results = []
+
+        async def fail(item):
+            if item == 0:
+                raise RuntimeError("boom")
+            return item
+
+        async def collect(item):
+            results.append(item)
+
+        async def broken_handler(item, stage_name, error):
+            raise RuntimeError("handler boom")
+
+        asyncio.run(run_pipeline(range(3), [
+            PipelineStage("fail", fail),
+            PipelineStage("collect", collect),
+        ], on_error=broken_handler))
+        assert sorted(results) == [1, 2]
+
+    def test_stage_concurrency_is_respected(self):
+        active = 0
+        peak = 0
+
+        async def slow(item):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return item
+
+        asyncio.run(run_pipeline(range(12), [PipelineStage("slow", slow, concurrency=3)]))
+        assert peak == 3
+
+    def test_slow_stage_applies_backpressure(self):
+        produced = 0
+        max_in_flight = 0
+        consumed = 0
+
+        def items():
+            nonlocal produced
+            for i in range(30):
+                produced += 1
+                yield i
+
+        async def fast(item):
+            nonlocal max_in_flight
+            max_in_flight = max(max_in_flight, produced - consumed)
+            return item
+
+        async def slow(item):
+            nonlocal consumed
+            await asyncio.sleep(0.005)
+            consumed += 1
+
+        asyncio.run(run_pipeline(items(), [
+            PipelineStage("fast", fast, concurrency=2),
+            PipelineStage("slow", slow, concurrency=1),
+        ]))
+        assert consumed == 30
+        # Bounded by the queues and workers (~2x the sum of concurrencies), not by the input size
+        assert max_in_flight <= 2 * (2 + 1) + 1
+
+    def test_empty_input(self):
+        async def never(item):
+            raise AssertionError("no items expected")
+
+        asyncio.run(run_pipeline([], [PipelineStage("never", never)]))
@@ -0,0 +1,81 @@
+"""
+Crew audit log paging helpers - search tokens and keyset cursors
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from app.repositories.crew_audit_log_repository import (
+    SEARCH_TOKEN_MAX_LENGTH,
+    build_search_tokens,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+class TestBuildSearchTokens:
+
+    def test_word_prefixes_accent_free_lowercase(self):
+        assert build_search_tokens("Nguyễn Văn An") == sorted({
+            "n", "ng", "ngu", "nguy", "nguye", "nguyen",
+            "v", "va", "van",
+            "a", "an",
+        })
+
+    def test_vietnamese_d(self):
+        assert "duc" in build_search_tokens("Đức")
+
+    def test_punctuation_splits_words(self):
+        tokens = build_search_tokens("O'Brien-Smith")
+        assert "brien" in tokens and "smith" in tokens and "o" in tokens
+
+    def test_long_words_are_indexed_up_to_max_length(self):
+        word = "a" * (SEARCH_TOKEN_MAX_LENGTH + 10)
+        tokens = build_search_tokens(word)
+        assert max(len(token) for token in tokens) == SEARCH_TOKEN_MAX_LENGTH
+
+    def test_duplicates_removed(self):
+        assert build_search_tokens("an an") == ["a", "an"]
+
+    @pytest.mark.parametrize("text", [None, "", "  ", "--"])
+    def test_empty(self, text):
+        assert build_search_tokens(text) == []
+
+
+class TestCursor:
+
+    def test_round_trip(self):
+        performed_at = datetime(2025, 3, 1, 8, 30, 15, 123000, tzinfo=timezone.utc)
+        oid = ObjectId()
+        cursor = encode_cursor({"performed_at": performed_at, "_id": oid, "id": "log-1"})
+        assert decode_cursor(cursor) == (performed_at, oid)
+
+    def test_cursor_is_url_safe_without_padding(self):
+        cursor = encode_cursor({"performed_at": datetime.now(timezone.utc), "_id": ObjectId()})
+        assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+    def test_legacy_row_without_id(self):
+        performed_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        oid = ObjectId()
+        assert decode_cursor(encode_cursor({"performed_at": performed_at, "_id": oid})) == (performed_at, oid)
+
+    def test_naive_datetime_is_read_back_as_utc(self):
+        naive = datetime(2025, 3, 1, 8, 30)
+        performed_at, _ = decode_cursor(encode_cursor({"performed_at": naive, "_id": ObjectId()}))
+        assert performed_at == naive.replace(tzinfo=timezone.utc)
+
+    def test_offset_datetime_keeps_its_instant(self):
+        local = datetime(2025, 3, 1, 15, 30, tzinfo=timezone(timedelta(hours=7)))
+        performed_at, _ = decode_cursor(encode_cursor({"performed_at": local, "_id": ObjectId()}))
+        assert performed_at == local
+
+    def test_string_timestamp(self):
+        oid = ObjectId()
+        performed_at, _ = decode_cursor(encode_cursor({"performed_at": "2025-03-01T08:30:00+00:00", "_id": oid}))
+        assert performed_at == datetime(2025, 3, 1, 8, 30, tzinfo=timezone.utc)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", "eyJ0IjoieCJ9"])
+    def test_malformed_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
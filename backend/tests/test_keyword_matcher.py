@@ -0,0 +1,103 @@
+"""
+Keyword Matcher - equivalence with the linear scans it replaces
+
+The compiled Aho–Corasick lookups must return exactly what the original
+"first key in table order" loops returned, for random tables and texts and for
+the real normalization tables.
+"""
+import random
+
+import pytest
+
+from app.utils.keyword_matcher import KeywordMatcher, MappingMatcher
+from app.utils.document_name_normalization import DOCUMENT_NAME_MAPPINGS
+from app.utils.issued_by_abbreviation import COMPANY_ABBREVIATIONS
+
+
+def linear_first_in(keys, *texts):
+    for key in keys:
+        for text in texts:
+            if key in text:
+                return key
+    return None
+
+
+def linear_first_containing(keys, *texts):
+    for key in keys:
+        for text in texts:
+            if text in key:
+                return key
+    return None
+
+
+def linear_first_in_or_containing(keys, text):
+    for key in keys:
+        if key in text or text in key:
+            return key
+    return None
+
+
+def compiled(mappings):
+    """MappingMatcher that always uses the automaton, whatever the table size"""
+    matcher = MappingMatcher(mappings)
+    matcher.MIN_COMPILED_PATTERNS = 0
+    return matcher
+
+
+def random_word(rng, alphabet="abc ", max_length=6):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+
+
+class TestKeywordMatcherEquivalence:
+    """Random tables over a small alphabet produce many overlapping patterns"""
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_random_tables(self, seed):
+        rng = random.Random(seed)
+        keys = list(dict.fromkeys(random_word(rng) for _ in range(rng.randint(1, 40))))
+        mappings = {key: key.upper() for key in keys}
+        matcher = compiled(mappings)
+
+        for _ in range(200):
+            text = random_word(rng, max_length=20)
+            other = random_word(rng, max_length=10)
+            assert matcher.first_key_in(text) == linear_first_in(keys, text)
+            assert matcher.first_key_in(text, other) == linear_first_in(keys, text, other)
+            assert matcher.first_key_containing(text) == linear_first_containing(keys, text)
+            assert matcher.first_key_containing(text, other) == linear_first_containing(keys, text, other)
+            assert matcher.first_key_in_or_containing(text) == linear_first_in_or_containing(keys, text)
+
+    def test_empty_table(self):
+        matcher = compiled({})
+        assert matcher.first_key_in("anything") is None
+        assert matcher.first_key_containing("anything") is None
+        assert matcher.first_key_in_or_containing("anything") is None
+
+    def test_table_order_wins_over_text_position(self):
+        matcher = KeywordMatcher(["cargo ship", "ship", "cargo"])
+        # "cargo" occurs first in the text, but "cargo ship" is first in the table
+        assert matcher.first_index_in("cargo ship safety") == 0
+        assert matcher.first_index_in("ship safety") == 1
+
+    def test_invalidate_picks_up_table_changes(self):
+        mappings = {"load line": "LL"}
+        matcher = compiled(mappings)
+        assert matcher.first_key_in("international load line") == "load line"
+        mappings["international"] = "INTL"
+        mappings.pop("load line")
+        matcher.invalidate()
+        assert matcher.first_key_in("international load line") == "international"
+
+
+class TestNormalizationTables:
+    """The real tables: compiled and linear lookups agree on every key and on samples"""
+
+    @pytest.mark.parametrize("mappings", [DOCUMENT_NAME_MAPPINGS, COMPANY_ABBREVIATIONS])
+    def test_real_tables(self, mappings):
+        keys = list(mappings)
+        matcher = compiled(mappings)
+        samples = keys + [f"certificate of {key} issued" for key in keys[:50]] + [key[1:-1] for key in keys]
+        for text in samples:
+            assert matcher.first_key_in(text) == linear_first_in(keys, text)
+            assert matcher.first_key_containing(text) == linear_first_containing(keys, text)
+            assert matcher.first_key_in_or_containing(text) == linear_first_in_or_containing(keys, text)
@@ -0,0 +1,110 @@
+"""
+Survey window materialization - parsing of Next Survey display values
+"""
+from datetime import date, datetime
+
+import pytest
+
+from app.utils.survey_window import (
+    AUDIT_CERTIFICATE,
+    SHIP_CERTIFICATE,
+    SURVEY_WINDOW_FIELDS,
+    parse_survey_window,
+    survey_window_fields,
+    touches_survey_window,
+)
+
+
+class TestParseSurveyWindow:
+
+    def test_plus_minus_3m_window(self):
+        window = parse_survey_window("30/10/2025 (±3M)")
+        assert window == {
+            "due_date": date(2025, 10, 30),
+            "window_open": date(2025, 7, 30),
+            "window_close": date(2026, 1, 30),
+            "annotation": "±3M",
+        }
+
+    @pytest.mark.parametrize("annotation", ["(+3M)", "(+-3M)"])
+    def test_legacy_plus_minus_spellings(self, annotation):
+        assert parse_survey_window(f"15/06/2025 {annotation}")["annotation"] == "±3M"
+
+    def test_minus_3m_window_closes_on_due_date(self):
+        window = parse_survey_window("15/06/2025 (-3M)")
+        assert window["annotation"] == "-3M"
+        assert window["window_open"] == date(2025, 3, 15)
+        assert window["window_close"] == date(2025, 6, 15)
+
+    def test_no_annotation_defaults_to_minus_3m_window(self):
+        window = parse_survey_window("15/06/2025")
+        assert window["annotation"] is None
+        assert window["window_open"] == date(2025, 3, 15)
+        assert window["window_close"] == date(2025, 6, 15)
+
+    def test_month_end_is_clamped(self):
+        window = parse_survey_window("31/05/2025 (±3M)")
+        assert window["window_open"] == date(2025, 2, 28)
+        assert window["window_close"] == date(2025, 8, 31)
+
+    def test_leap_day(self):
+        window = parse_survey_window("29/02/2024 (±3M)")
+        assert window["window_open"] == date(2023, 11, 29)
+        assert window["window_close"] == date(2024, 5, 29)
+
+    def test_window_crosses_year_boundary(self):
+        window = parse_survey_window("15/01/2026 (-3M)")
+        assert window["window_open"] == date(2025, 10, 15)
+
+    def test_iso_date_for_ship_certificates(self):
+        window = parse_survey_window("2025-10-30T00:00:00", SHIP_CERTIFICATE)
+        assert window["due_date"] == date(2025, 10, 30)
+
+    def test_iso_date_not_accepted_for_audit_certificates(self):
+        assert parse_survey_window("2025-10-30", AUDIT_CERTIFICATE) is None
+
+    def test_plus_minus_6m_only_for_audit_certificates(self):
+        audit = parse_survey_window("30/10/2025 (±6M)", AUDIT_CERTIFICATE)
+        assert audit["annotation"] == "±6M"
+        assert audit["window_open"] == date(2025, 4, 30)
+        assert audit["window_close"] == date(2026, 4, 30)
+
+        ship = parse_survey_window("30/10/2025 (±6M)", SHIP_CERTIFICATE)
+        assert ship["annotation"] is None
+        assert ship["window_close"] == date(2025, 10, 30)
+
+    @pytest.mark.parametrize("value", [None, "", "N/A", "31/02/2025", "2025-13-01", "Annual survey"])
+    def test_unparseable_values(self, value):
+        assert parse_survey_window(value) is None
+
+
+class TestSurveyWindowFields:
+
+    def test_fields_are_midnight_datetimes(self):
+        fields = survey_window_fields("30/10/2025 (±3M)")
+        assert fields == {
+            "survey_due_date": datetime(2025, 10, 30),
+            "survey_window_open": datetime(2025, 7, 30),
+            "survey_window_close": datetime(2026, 1, 30),
+            "survey_window_annotation": "±3M",
+        }
+
+    def test_display_value_takes_precedence(self):
+        fields = survey_window_fields("30/10/2025 (±3M)", "2024-01-01")
+        assert fields["survey_due_date"] == datetime(2025, 10, 30)
+
+    def test_falls_back_to_next_survey(self):
+        fields = survey_window_fields(None, "2025-10-30T00:00:00")
+        assert fields["survey_due_date"] == datetime(2025, 10, 30)
+        assert fields["survey_window_annotation"] is None
+
+    def test_all_none_without_a_date(self):
+        assert survey_window_fields(None, None) == {field: None for field in SURVEY_WINDOW_FIELDS}
+
+
+class TestTouchesSurveyWindow:
+
+    def test_only_next_survey_fields_count(self):
+        assert touches_survey_window({"next_survey": "2025-10-30"})
+        assert touches_survey_window({"next_survey_display": None})
+        assert not touches_survey_window({"cert_name": "IOPP"})
@@ -0,0 +1,45 @@
+"""
+Standalone background job worker
+Runs the durable job queue (deferred Drive uploads/deletions, folder uploads,
+bulk rename) outside the API process so it can be scaled independently.
+
+Usage:
+    python worker.py
+
+Set JOB_WORKER_ENABLED=false on the API service when running dedicated workers.
+"""
+import asyncio
+import logging
+import signal
+
+from app.db.mongodb import mongo_db
+from app.services.audit_log_sink import AuditLogSink
+from app.services.job_queue_service import JobWorker
+from app.utils.certificate_abbreviation import AbbreviationMappingCache
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    await mongo_db.connect()
+    worker = JobWorker()
+    await worker.start()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    logger.info("🛠️ Job worker running - press Ctrl+C to stop")
+    await stop_event.wait()
+
+    await worker.stop()
+    # Jobs write audit logs (e.g. documents created by folder uploads): flush the buffer
+    await AuditLogSink.shutdown()
+    await AbbreviationMappingCache.shutdown()
+    await mongo_db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())